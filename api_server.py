@@ -0,0 +1,3 @@
+from finance.api import main
+
+main()
@@ -0,0 +1,112 @@
+# bench_aggregate_service.py
+"""
+Compara a carga no banco com e sem o serviço de agregados.
+
+Cada "espectador" pede o que a tela principal mostra: KPIs, totais por mês,
+totais das categorias e a série de uma categoria. Sem o serviço, são quatro
+consultas ao resumo por espectador; com ele, o banco só é lido na carga do
+serviço, qualquer que seja o número de espectadores.
+
+Uso:
+    python -m benchmarks.bench_aggregate_service --viewers 1 10 100
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao import category_dao, summary_dao, transaction_dao
+from dao.summary_dao import SummaryDAO
+from db.aggregate_service import AggregateClient, AggregateServer
+
+
+def read_from_database(category_id):
+    with SummaryDAO() as dao:
+        dao.get_totals_by_type()
+        dao.get_totals_by_month()
+        dao.get_totals_by_category(rollup=True)
+        dao.get_subtree_month_totals(category_id)
+
+
+def read_from_service(path, category_id):
+    client = AggregateClient(path)
+    client.totals()
+    client.totals_by_month()
+    client.category_totals()
+    client.subtree_month_totals(category_id)
+    client.close()
+
+
+def run_viewers(viewers, func, *args):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(viewers, 16)) as pool:
+        list(pool.map(lambda _: func(*args), range(viewers)))
+    return time.perf_counter() - started
+
+
+def start_service(path):
+    """Serviço em um loop asyncio em outra thread"""
+    server = AggregateServer(path, poll_interval=3600)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+    return server, loop, thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(
+            url, args.rows, categories=args.categories, years=args.years
+        )
+        session_factory = sessionmaker(bind=engine)
+        for module in (category_dao, summary_dao, transaction_dao):
+            module.SessionLocal = session_factory
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *a: statements.append(1))
+
+        path = os.path.join(directory, "aggregates.sock")
+        server, loop, thread = start_service(path)
+        print(f"service load: {len(statements)} statements")
+        for viewers in args.viewers:
+            statements.clear()
+            elapsed = run_viewers(viewers, read_from_database, 1)
+            direct = len(statements)
+            direct_time = elapsed
+            statements.clear()
+            elapsed = run_viewers(viewers, read_from_service, path, 1)
+            print(
+                f"{viewers:4d} viewers: database {direct} statements "
+                f"({direct_time * 1000:.1f}ms), service {len(statements)} "
+                f"statements ({elapsed * 1000:.1f}ms)"
+            )
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# bench_anomalies.py
+"""
+Mede a detecção de anomalias de gastos sobre o cache colunar.
+
+A detecção completa roda sobre todas as colunas (na partida, em uma thread
+de worker); a cada delta, só as categorias alteradas são refeitas.
+
+Uso:
+    python -m benchmarks.bench_anomalies --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_column_cache import best_of
+from benchmarks.data import seed_database
+from dao.transaction_dao import TransactionDAO
+from db.column_cache import ColumnCache
+from models.anomalies import AnomalyDetector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows, categories=args.categories)
+        session_factory = sessionmaker(bind=engine)
+        cache = ColumnCache(os.path.join(directory, "columns"), stamp="bench")
+        with TransactionDAO(session=session_factory(), read_replica=False) as dao:
+            cache.rebuild(dao)
+
+        detector = AnomalyDetector()
+        found = len(detector.detect(cache.read()))
+        full = best_of(lambda: detector.detect(cache.read()))
+
+        def one_category():
+            detector.detect(cache.read(category_ids=[1]), category_ids=[1])
+
+        print(
+            f"full detection ({args.rows:,} rows): {full * 1000:.1f}ms, {found} found"
+        )
+        print(f"one changed category: {best_of(one_category) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
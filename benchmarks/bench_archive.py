@@ -0,0 +1,99 @@
+# bench_archive.py
+"""
+Mede as leituras do TransactionDAO antes e depois de arquivar o histórico.
+
+Com o arquivo, as consultas sobre o período recente tocam só a tabela quente;
+as que cobrem todo o histórico juntam as duas tabelas.
+
+Uso:
+    python -m benchmarks.bench_archive --rows 1000000 --keep-months 12
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.archive_dao import ArchiveDAO, months_ago
+from dao.transaction_dao import TransactionDAO, TransactionFilters
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def reads(session_factory, recent: datetime.datetime):
+    """Leituras típicas da tela e dos relatórios"""
+
+    def run(method, *args, **kwargs):
+        def call():
+            with TransactionDAO(session=session_factory(), read_replica=False) as dao:
+                return getattr(dao, method)(*args, **kwargs)
+
+        return call
+
+    def first_page_with_balances():
+        with TransactionDAO(session=session_factory(), read_replica=False) as dao:
+            dao.get_running_balances(dao.get_transaction_rows_sorted(limit=200))
+
+    last_month = TransactionFilters(start=months_ago(1))
+    return {
+        "first page (date)": run("get_transaction_rows_sorted", limit=200),
+        "first page + balances": first_page_with_balances,
+        "recent by value": run(
+            "get_transaction_rows_sorted",
+            "value",
+            filters=TransactionFilters(start=recent),
+            limit=200,
+        ),
+        "last month, text filter": run(
+            "get_transaction_rows_sorted",
+            filters=TransactionFilters(description="mercado", start=last_month.start),
+            limit=200,
+        ),
+        "recent category totals": run(
+            "get_category_month_totals", recent, datetime.datetime.now()
+        ),
+        "all-time totals by month": run("get_totals_by_month"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--keep-months", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows, years=args.years)
+        session_factory = sessionmaker(bind=engine)
+        cutoff = months_ago(args.keep_months)
+
+        before = {
+            name: best_of(f) for name, f in reads(session_factory, cutoff).items()
+        }
+        with ArchiveDAO(session=session_factory()) as dao:
+            started = time.perf_counter()
+            archived = dao.archive(cutoff)
+            elapsed = time.perf_counter() - started
+        print(f"archived={archived:,} of {args.rows:,} in {elapsed:.1f}s")
+        after = {name: best_of(f) for name, f in reads(session_factory, cutoff).items()}
+        for name in before:
+            print(
+                f"{name:28s} before={before[name] * 1000:9.1f}ms  "
+                f"after={after[name] * 1000:9.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
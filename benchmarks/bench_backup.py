@@ -0,0 +1,103 @@
+# bench_backup.py
+"""
+Mede backup, verificação e restauração do banco, completo e incremental.
+
+O backup lê as tabelas em lotes e grava um quadro comprimido por lote; a
+restauração insere em lotes (executemany) em uma única transação. O
+incremental é medido depois de alterar ``--changed`` transações.
+
+Uso:
+    python -m benchmarks.bench_backup --rows 1000000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.backup_dao import BackupDAO
+from dao.versioning import current_version, next_version
+from models.models import Transaction
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def run_backup(session_factory, since=None):
+    out = io.BytesIO()
+    with BackupDAO(session=session_factory()) as dao:
+        header = dao.backup(out, since=since)
+    return header, out.getvalue()
+
+
+def run_restore(session_factory, *files, **kwargs):
+    with BackupDAO(session=session_factory()) as dao:
+        return dao.restore([io.BytesIO(data) for data in files], **kwargs)
+
+
+def touch_transactions(session_factory, count: int):
+    """Altera ``count`` transações como uma edição faria (nova versão)"""
+    with session_factory() as session:
+        ids = session.execute(select(Transaction.id).limit(count)).scalars().all()
+        version = next_version(session)
+        session.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(ids))
+            .values(description="Editada", version=version)
+        )
+        session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--changed", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(
+            url, args.rows, categories=args.categories, years=args.years
+        )
+        session_factory = sessionmaker(bind=engine)
+
+        (header, full), elapsed = timed(lambda: run_backup(session_factory))
+        rows = sum(header["rows"].values())
+        print(
+            f"full backup:   {elapsed:6.2f}s  {rows} rows, "
+            f"{len(full) / 2**20:.1f} MiB"
+        )
+        _, elapsed = timed(lambda: run_restore(session_factory, full, dry_run=True))
+        print(f"verify:        {elapsed:6.2f}s")
+        result, elapsed = timed(lambda: run_restore(session_factory, full, force=True))
+        assert result is not None
+        print(f"full restore:  {elapsed:6.2f}s")
+
+        with session_factory() as session:
+            since = current_version(session)
+        touch_transactions(session_factory, args.changed)
+        (header, incremental), elapsed = timed(
+            lambda: run_backup(session_factory, since=since)
+        )
+        print(
+            f"incremental:   {elapsed:6.2f}s  "
+            f"{header['rows']['TRANSACTIONS']} transactions, "
+            f"{len(incremental) / 2**10:.1f} KiB"
+        )
+        assert run_restore(session_factory, full, force=True) is not None
+        result, elapsed = timed(lambda: run_restore(session_factory, incremental))
+        assert result is not None
+        print(f"incr. restore: {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
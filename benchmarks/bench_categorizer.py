@@ -0,0 +1,101 @@
+# bench_categorizer.py
+"""
+Mede a categorização automática com muitas regras de palavra-chave.
+
+Compara o autômato (uma passada por descrição) com o laço ingênuo que testa
+regra por regra; o laço ingênuo roda só sobre uma amostra e o tempo total é
+estimado a partir dela.
+
+Uso:
+    python -m benchmarks.bench_categorizer --rules 10000 --descriptions 1000000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from models.categorizer import KEYWORD, Categorizer
+from models.fingerprint import normalize_description
+
+SYLLABLES = ["ba", "ca", "da", "fe", "gi", "lo", "ma", "no", "pe", "ri", "su", "to"]
+
+
+def make_words(rng, count: int):
+    """Vocabulário de palavras sintéticas distintas"""
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_rules(rng, vocabulary, count: int):
+    return [
+        SimpleNamespace(
+            category_id=rng.randint(1, 50),
+            kind=KEYWORD,
+            pattern=" ".join(rng.sample(vocabulary, rng.randint(1, 3))),
+            min_value=None,
+            max_value=None,
+            priority=0,
+        )
+        for _ in range(count)
+    ]
+
+
+def make_descriptions(rng, vocabulary, count: int):
+    return [
+        f"PAG*{' '.join(rng.choices(vocabulary, k=rng.randint(2, 6))).upper()} "
+        f"{rng.randrange(10_000)}"
+        for _ in range(count)
+    ]
+
+
+def naive_categorize(rules, description):
+    """Testa cada regra sobre a descrição normalizada"""
+    text = f" {normalize_description(description)} "
+    for rule in rules:
+        if f" {rule.pattern} " in text:
+            return rule.category_id
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--descriptions", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=5_000)
+    parser.add_argument(
+        "--naive-sample", type=int, default=1_000, help="Descrições do laço ingênuo"
+    )
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    vocabulary = make_words(rng, args.vocabulary)
+    rules = make_rules(rng, vocabulary, args.rules)
+    descriptions = make_descriptions(rng, vocabulary, args.descriptions)
+
+    started = time.perf_counter()
+    categorizer = Categorizer(rules)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    categorized = sum(
+        categorizer.categorize(description) is not None for description in descriptions
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"rules={args.rules:,}  descriptions={args.descriptions:,}  "
+        f"build={build:.3f}s  automaton={elapsed:.3f}s "
+        f"({args.descriptions / elapsed:,.0f}/s)  categorized={categorized:,}"
+    )
+
+    sample = descriptions[: args.naive_sample]
+    started = time.perf_counter()
+    for description in sample:
+        naive_categorize(rules, description)
+    naive = (time.perf_counter() - started) / len(sample) * args.descriptions
+    print(f"naive (estimated from {len(sample):,})={naive:,.1f}s")
+
+
+if __name__ == "__main__":
+    main()
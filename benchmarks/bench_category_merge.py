@@ -0,0 +1,49 @@
+# bench_category_merge.py
+"""
+Mede a fusão de duas categorias grandes.
+
+As transações mudam de categoria por UPDATEs em faixas de IDs e o resumo
+mensal por poucos comandos em conjunto, em uma única transação de banco.
+
+Uso:
+    python -m benchmarks.bench_category_merge --rows 1000000 --categories 10
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.category_dao import REASSIGN_CHUNK_SIZE, CategoryDAO
+from models.models import Transaction
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=REASSIGN_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows, categories=args.categories)
+        session_factory = sessionmaker(bind=engine)
+        with CategoryDAO(session=session_factory(), read_replica=False) as dao:
+            size = dao.session.execute(
+                select(func.count(Transaction.id)).where(Transaction.category_id == 1)
+            ).scalar()
+            started = time.perf_counter()
+            moved = dao.merge_categories(1, 2, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - started
+        print(
+            f"merged category with {size:,} transactions: "
+            f"moved={moved:,} in {elapsed * 1000:.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
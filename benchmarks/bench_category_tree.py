@@ -0,0 +1,80 @@
+# bench_category_tree.py
+"""
+Mede os totais por subárvore de categorias (rollup) em árvores profundas.
+
+Compara o join com a tabela de fechamento (uma consulta, qualquer
+profundidade) com o percurso nível a nível que seria feito só com
+``parent_id`` (uma consulta por categoria visitada).
+
+Uso:
+    python -m benchmarks.bench_category_tree --rows 200000 --categories 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.summary_dao import SummaryDAO
+from models.models import Category, MonthlySummary
+
+
+def walk_rollup(session, category_id: int) -> float:
+    """Soma da subárvore descendo por ``parent_id`` (uma consulta por nó)"""
+    total = session.execute(
+        select(func.coalesce(func.sum(MonthlySummary.total), 0.0)).where(
+            MonthlySummary.category_id == category_id
+        )
+    ).scalar()
+    children = session.execute(
+        select(Category.id).where(Category.parent_id == category_id)
+    ).scalars()
+    return total + sum(walk_rollup(session, child) for child in children)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--categories", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    for fanout, shape in ((1, "chain"), (3, "fanout 3")):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            engine = seed_database(
+                url, args.rows, categories=args.categories, tree_fanout=fanout
+            )
+            session_factory = sessionmaker(bind=engine)
+            statements = []
+            event.listen(
+                engine, "before_cursor_execute", lambda *a: statements.append(1)
+            )
+
+            with SummaryDAO(session=session_factory()) as dao:
+                statements.clear()
+                started = time.perf_counter()
+                rows = dao.get_totals_by_category(rollup=True)
+                closure = time.perf_counter() - started
+                closure_queries = len(statements)
+                root = next(row for row in rows if row["category_id"] == 1)
+
+                statements.clear()
+                started = time.perf_counter()
+                walked = walk_rollup(dao.session, 1)
+                walk = time.perf_counter() - started
+                walk_queries = len(statements)
+
+            assert round(walked, 2) == round(root["income"] + root["expense"], 2)
+            print(
+                f"{shape:>8}: closure rollup (all categories) "
+                f"{closure * 1000:7.1f}ms / {closure_queries} query   "
+                f"parent walk (root only) {walk * 1000:7.1f}ms / "
+                f"{walk_queries} queries"
+            )
+
+
+if __name__ == "__main__":
+    main()
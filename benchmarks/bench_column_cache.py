@@ -0,0 +1,89 @@
+# bench_column_cache.py
+"""
+Compara a partida com e sem o cache colunar.
+
+Sem o cache, KPIs e gráfico dependem das consultas ao resumo mensal; com ele,
+os arquivos são mapeados e somados sem nenhuma ida ao banco.
+
+Uso:
+    python -m benchmarks.bench_column_cache --rows 1000000
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db.column_cache import ColumnCache
+
+
+def best_of(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows, years=args.years)
+        session_factory = sessionmaker(bind=engine)
+        cache_dir = os.path.join(directory, "columns")
+
+        def dao():
+            return TransactionDAO(session=session_factory(), read_replica=False)
+
+        with dao() as transactions:
+            started = time.perf_counter()
+            ColumnCache(cache_dir, stamp="bench").rebuild(transactions)
+            print(f"rebuild ({args.rows:,} rows): {time.perf_counter() - started:.1f}s")
+
+        def cold():
+            with SummaryDAO(session=session_factory()) as summary:
+                summary.get_totals_by_type()
+                summary.get_totals_by_month()
+
+        def warm():
+            cache = ColumnCache(cache_dir, stamp="bench")
+            cache.totals()
+            cache.totals_by_month()
+
+        print(f"cold start (summary queries): {best_of(cold) * 1000:8.1f}ms")
+        print(f"warm start (mapped columns):  {best_of(warm) * 1000:8.1f}ms")
+
+        with dao() as transactions:
+            records = [
+                {
+                    "description": f"Nova {i}",
+                    "transaction_date": datetime.datetime.now(),
+                    "transaction_value": 10.0,
+                    "type": "Despesa",
+                    "category_id": 1,
+                }
+                for i in range(args.changes)
+            ]
+            transactions.create_transactions(records)
+        with dao() as transactions:
+            cache = ColumnCache(cache_dir, stamp="bench")
+            started = time.perf_counter()
+            applied = cache.sync(transactions)
+            elapsed = time.perf_counter() - started
+        print(f"delta sync ({applied} rows):      {elapsed * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# bench_dashboard.py
+"""
+Mede o tempo até a tela inicial da TUI ficar interativa (montagem completa,
+sem esperar carregamentos em segundo plano), com um banco SQLite sintético.
+
+Uso:
+    python -m benchmarks.bench_dashboard --rows 100000 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+async def time_to_interactive() -> float:
+    from finance.tui import FinanceApp
+
+    started = time.perf_counter()
+    app = FinanceApp()
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        elapsed = time.perf_counter() - started
+        await app.workers.wait_for_complete()
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Precisa estar definido antes de importar db.config
+        os.environ[
+            "FINANCE_DATABASE_URL"
+        ] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ.pop("FINANCE_REPLICA_PATH", None)
+        from benchmarks.data import seed_database
+
+        seed_database(os.environ["FINANCE_DATABASE_URL"], args.rows)
+        timings = [asyncio.run(time_to_interactive()) for _ in range(args.runs)]
+        print(
+            f"{args.rows:,d} rows  time-to-interactive: "
+            f"median={statistics.median(timings):.3f}s  "
+            f"min={min(timings):.3f}s  max={max(timings):.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# bench_pivot.py
+"""
+Mede a tabela dinâmica categorias x meses.
+
+A consulta agrupa o resumo mensal (uma linha por categoria, mês e tipo),
+então o custo depende de categorias x meses, não do número de transações.
+Com ``--render``, mede também a tela completa (PivotScreen) em um app
+Textual sem terminal, da abertura até a linha de totais.
+
+Uso:
+    python -m benchmarks.bench_pivot --categories 200 --years 10 --render
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_column_cache import best_of
+from benchmarks.data import seed_database
+from dao import summary_dao
+from dao.summary_dao import SummaryDAO
+from finance.pivot import CategoryPivot, month_range
+
+
+def load_pivot(session_factory):
+    with SummaryDAO(session=session_factory()) as dao:
+        pivot = CategoryPivot(month_range(*dao.get_month_range()))
+        for category_id, name, totals in dao.iter_category_month_totals():
+            pivot.add(category_id, name, totals)
+    return pivot
+
+
+async def render(timeout=30.0):
+    """Tempo até a tela mostrar a tabela completa"""
+    from textual.app import App
+
+    from finance.pivot_screen import TOTAL_ROW, PivotScreen
+
+    class PivotApp(App):
+        def on_mount(self):
+            self.push_screen(PivotScreen())
+
+    app = PivotApp()
+    async with app.run_test(size=(200, 60)) as pilot:
+        started = time.perf_counter()
+        while True:
+            screen = app.screen
+            if screen.pivot is not None:
+                table = screen.query_one("#pivot")
+                if TOTAL_ROW in table.rows:
+                    break
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("pivot not rendered")
+            await pilot.pause(0.005)
+        await pilot.pause()
+        return time.perf_counter() - started, table.row_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--categories", type=int, default=200)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--render", action="store_true")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(
+            url, args.rows, categories=args.categories, years=args.years
+        )
+        session_factory = sessionmaker(bind=engine)
+        pivot = load_pivot(session_factory)
+        elapsed = best_of(lambda: load_pivot(session_factory))
+        print(
+            f"query + pivot ({len(pivot.cells)} categories x "
+            f"{len(pivot.months)} months): {elapsed * 1000:.1f}ms"
+        )
+        if args.render:
+            # A tela abre o SummaryDAO com a sessão padrão
+            summary_dao.SessionLocal = session_factory
+            elapsed, rows = asyncio.run(render())
+            print(f"screen render ({rows} rows): {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_reconcile.py
+"""
+Mede a reconciliação de uma importação contra uma base grande.
+
+O lote importado mistura duplicatas exatas de transações existentes (com a
+descrição em outra caixa), quase duplicatas (um dia depois, com sufixo na
+descrição) e transações novas.
+
+Uso:
+    python -m benchmarks.bench_reconcile --rows 1000000 --incoming 100000 [--days 90]
+"""
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import DESCRIPTIONS, seed_database
+from dao.reconciliation import ReconciliationDAO
+from models.models import Transaction
+
+
+def incoming_records(session, count: int, days: int = 0, seed: int = 7):
+    """
+    Metade duplicatas, um décimo quase duplicatas, o resto novas.
+
+    Com ``days``, o lote cobre só os últimos ``days`` dias da base (como um
+    extrato); sem, as datas se espalham por toda a base.
+    """
+    rng = random.Random(seed)
+    query = select(
+        Transaction.description,
+        Transaction.transaction_date,
+        Transaction.transaction_value,
+        Transaction.type,
+        Transaction.category_id,
+    )
+    if days:
+        latest = session.execute(select(func.max(Transaction.transaction_date)))
+        start = latest.scalar() - datetime.timedelta(days=days)
+        query = query.where(Transaction.transaction_date >= start)
+    sample = session.execute(query.limit(count * 6 // 10)).all()
+    records = []
+    for index, (description, date, value, type, category_id) in enumerate(sample):
+        if index < count // 2:
+            description = description.upper()
+        else:
+            description = f"{description} {rng.randrange(1000)}"
+            date += datetime.timedelta(days=1)
+        records.append(
+            {
+                "description": description,
+                "transaction_date": date,
+                "transaction_value": value,
+                "type": type,
+                "category_id": category_id,
+            }
+        )
+    start = min(row[1] for row in sample)
+    span = max(row[1] for row in sample) - start
+    while len(records) < count:
+        records.append(
+            {
+                "description": rng.choice(DESCRIPTIONS),
+                "transaction_date": start + span * rng.random(),
+                "transaction_value": round(rng.uniform(1, 500), 2),
+                "type": "Despesa",
+                "category_id": 1,
+            }
+        )
+    rng.shuffle(records)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--incoming", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument(
+        "--days", type=int, default=0, help="Período do lote (0 = toda a base)"
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows, years=args.years)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as session:
+            records = incoming_records(session, args.incoming, args.days)
+
+        with ReconciliationDAO(session=session_factory()) as dao:
+            started = time.perf_counter()
+            result = dao.reconcile(records)
+            elapsed = time.perf_counter() - started
+        print(
+            f"existing={args.rows:,}  incoming={len(records):,}  "
+            f"days={args.days or 'all'}  {elapsed:7.3f}s  "
+            f"new={len(result.new):,}  duplicates={len(result.duplicates):,}  "
+            f"conflicts={len(result.conflicts):,}"
+        )
+
+
+if __name__ == "__main__":
+    main()
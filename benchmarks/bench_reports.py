@@ -0,0 +1,47 @@
+# bench_reports.py
+"""
+Mede a escalabilidade do gerador de relatórios com o número de processos.
+
+Uso:
+    python -m benchmarks.bench_reports --rows 1000000 --years 5
+"""
+import argparse
+import datetime
+import os
+import tempfile
+import time
+
+from benchmarks.data import seed_database
+from finance import reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed_database(url, args.rows, args.categories, args.years)
+        this_year = datetime.date.today().year
+        years = list(range(this_year - args.years + 1, this_year + 1))
+
+        baseline = None
+        workers = 1
+        while workers <= max(os.cpu_count() or 1, 2):
+            started = time.perf_counter()
+            reports.generate_report(years, workers=workers, url=url)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(
+                f"workers={workers:2d}  {elapsed:7.3f}s  "
+                f"{args.rows / elapsed:12,.0f} rows/s  "
+                f"speedup={baseline / elapsed:.2f}x"
+            )
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
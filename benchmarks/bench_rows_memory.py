@@ -0,0 +1,66 @@
+# bench_rows_memory.py
+"""
+Compara a memória retida pelas transações carregadas como instâncias ORM e
+como TransactionRow (projeção de colunas), por 100 mil linhas.
+
+Uso:
+    python -m benchmarks.bench_rows_memory --rows 100000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from dao.transaction_dao import TransactionDAO
+from db.config import make_engine
+
+
+def measure(session_factory, load):
+    """Retorna (bytes retidos, segundos) para carregar as transações"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    dao = TransactionDAO(session=session_factory())
+    data = load(dao)
+    # Acessa a categoria, como a tabela faz ao exibir cada linha
+    for item in data:
+        getattr(item, "category_name", None) or item.category.name
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    dao.close()
+    return retained, elapsed, len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed_database(url, args.rows, args.categories)
+        session_factory = sessionmaker(bind=make_engine(url))
+
+        for name, load in (
+            ("orm", lambda dao: dao.get_all_transactions(order=True)),
+            ("rows", lambda dao: dao.get_transaction_rows(order=True)),
+        ):
+            retained, elapsed, count = measure(session_factory, load)
+            per_100k = retained * 100_000 / max(count, 1)
+            print(
+                f"{name:5s} {count:9,d} rows  {elapsed:7.3f}s  "
+                f"{per_100k / 2**20:8.1f} MiB/100k rows  "
+                f"{retained / max(count, 1):6.0f} B/row"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# bench_tag_filter.py
+"""
+Mede o filtro por etiquetas ("A e não B na categoria C") em KPIs e gráfico.
+
+Compara as somas do cache colunar com a máscara do índice de bitmaps
+(db/tag_index.py) com as mesmas somas em SQL, com EXISTS / NOT EXISTS sobre
+TRANSACTION_TAGS.
+
+Uso:
+    python -m benchmarks.bench_tag_filter --rows 1000000 --tags 20
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bench_column_cache import best_of
+from benchmarks.data import seed_database
+from dao.tag_dao import TagDAO
+from dao.transaction_dao import TransactionDAO, TransactionFilters
+from db.column_cache import ColumnCache
+from db.tag_index import TagIndex
+from models.models import Tag, TransactionTag
+
+
+def seed_tags(engine, rows: int, tags: int, seed: int = 42):
+    """Etiqueta ``i`` em ~1/(i + 2) das transações (a 1 em metade delas)"""
+    rng = random.Random(seed)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Tag), [{"id": i, "name": f"tag {i}"} for i in range(1, tags + 1)]
+        )
+        pairs = 0
+        for tag_id in range(1, tags + 1):
+            ids = rng.sample(range(1, rows + 1), rows // (tag_id + 1))
+            connection.execute(
+                insert(TransactionTag),
+                [{"transaction_id": id, "tag_id": tag_id} for id in ids],
+            )
+            pairs += len(ids)
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tags", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = seed_database(url, args.rows)
+        pairs = seed_tags(engine, args.rows, args.tags)
+        session_factory = sessionmaker(bind=engine)
+        filters = TransactionFilters(category_id=1, tags=(1,), exclude_tags=(2,))
+
+        with TransactionDAO(session=session_factory(), read_replica=False) as dao:
+            cache = ColumnCache(os.path.join(directory, "columns"), stamp="bench")
+            cache.rebuild(dao)
+
+            index = TagIndex(cache)
+            with TagDAO(session=session_factory()) as tags:
+                started = time.perf_counter()
+                index.rebuild(tags.iter_tag_members())
+                build = time.perf_counter() - started
+            print(f"index build ({pairs:,} pairs): {build:.2f}s")
+
+            def bitmap():
+                mask = index.mask(
+                    filters.tags, filters.exclude_tags, filters.category_id
+                )
+                return cache.totals(mask), cache.totals_by_month(mask)
+
+            def sql():
+                return dao.get_totals_by_type(filters), dao.get_totals_by_month(filters)
+
+            by_bitmap, by_sql = bitmap(), sql()
+            assert round(by_bitmap[0]["expense"], 2) == round(by_sql[0]["expense"], 2)
+            assert by_bitmap[1].keys() == by_sql[1].keys()
+            print(f"tag filter, bitmap mask: {best_of(bitmap) * 1000:8.1f}ms")
+            print(f"tag filter, SQL EXISTS:  {best_of(sql, repeat=3) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# data.py
+"""Geração de bancos SQLite sintéticos para os benchmarks"""
+import datetime
+import random
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+import models.models  # noqa: F401 - registra os modelos no metadata
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.versioning import VERSION_ROW_ID
+from db.config import Base, make_engine
+from models.fingerprint import transaction_fingerprint
+from models.models import Category, DataVersion, Transaction
+
+DESCRIPTIONS = [
+    "Supermercado",
+    "Padaria",
+    "Posto de gasolina",
+    "Farmácia",
+    "Restaurante",
+    "Aluguel",
+    "Energia elétrica",
+    "Internet",
+    "Salário",
+    "Freelance",
+]
+
+
+def seed_database(
+    url: str,
+    rows: int,
+    categories: int = 50,
+    years: int = 5,
+    chunk_size: int = 50_000,
+    seed: int = 42,
+    tree_fanout: int = 0,
+):
+    """
+    Cria o schema e insere ``rows`` transações aleatórias
+
+    Args:
+        tree_fanout: Se > 0, as categorias formam uma árvore com a categoria
+            1 na raiz e até ``tree_fanout`` filhas por categoria (1: uma
+            cadeia com a profundidade do número de categorias).
+    """
+    rng = random.Random(seed)
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    start = datetime.datetime(datetime.date.today().year - years + 1, 1, 1)
+    span = years * 365 * 24 * 3600
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Category),
+            [
+                {
+                    "id": i,
+                    "name": f"Categoria {i:03d}",
+                    "parent_id": (i - 2) // tree_fanout + 1
+                    if tree_fanout and i > 1
+                    else None,
+                    "version": i,
+                }
+                for i in range(1, categories + 1)
+            ],
+        )
+        for offset in range(0, rows, chunk_size):
+            batch = []
+            for i in range(offset + 1, min(offset + chunk_size, rows) + 1):
+                income = rng.random() < 0.1
+                batch.append(
+                    {
+                        "id": i,
+                        "description": rng.choice(DESCRIPTIONS),
+                        "transaction_date": start
+                        + datetime.timedelta(seconds=rng.randrange(span)),
+                        "transaction_value": round(
+                            rng.uniform(1000, 8000) if income else rng.uniform(1, 500),
+                            2,
+                        ),
+                        "type": "Receita" if income else "Despesa",
+                        "category_id": rng.randint(1, categories),
+                        "version": categories + i,
+                    }
+                )
+                row = batch[-1]
+                row["fingerprint"] = transaction_fingerprint(
+                    row["transaction_date"],
+                    row["transaction_value"],
+                    row["type"],
+                    row["description"],
+                )
+            connection.execute(insert(Transaction), batch)
+        # O contador continua depois das versões geradas aqui
+        connection.execute(
+            insert(DataVersion), [{"id": VERSION_ROW_ID, "value": categories + rows}]
+        )
+    # Os dados entram por fora do DAO: recalcula os totais mensais e a
+    # tabela de fechamento das categorias
+    session_factory = sessionmaker(bind=engine)
+    with SummaryDAO(session=session_factory()) as dao:
+        dao.rebuild()
+    with CategoryDAO(session=session_factory(), read_replica=False) as dao:
+        dao.rebuild_closure()
+    return engine
@@ -0,0 +1,99 @@
+# load_api.py
+"""
+Teste de carga da API HTTP contra um banco SQLite local.
+
+Sobe a API em uma porta livre e dispara requisições concorrentes por um
+tempo fixo, por endpoint, com e sem If-None-Match (dashboards que fazem
+polling reenviam o último ETag e recebem 304).
+
+Uso:
+    python -m benchmarks.load_api --rows 100000 --concurrency 20 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.data import seed_database
+from db.config import make_engine
+from finance.api import create_app
+
+ENDPOINTS = [
+    "/api/transactions?limit=100",
+    "/api/totals",
+    "/api/totals/by-month",
+    "/api/totals/by-category",
+    "/api/categories",
+]
+
+
+async def hammer(base_url, path, concurrency, seconds, conditional):
+    """Retorna (latências em segundos, contagem por status)"""
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + seconds
+    async with aiohttp.ClientSession(base_url) as session:
+        etag = None
+        if conditional:
+            async with session.get(path) as response:
+                etag = response.headers.get("ETag")
+        headers = {"If-None-Match": etag} if etag else {}
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                async with session.get(path, headers=headers) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - started)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+async def run(url, args):
+    app = create_app(sessionmaker(bind=make_engine(url)), workers=args.workers)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for path in ENDPOINTS:
+            for conditional in (False, True):
+                latencies, statuses = await hammer(
+                    base_url, path, args.concurrency, args.seconds, conditional
+                )
+                quantiles = statistics.quantiles(latencies, n=100)
+                print(
+                    f"{path:30s} {'etag' if conditional else 'full':4s}  "
+                    f"{len(latencies) / args.seconds:8.0f} req/s  "
+                    f"p50={quantiles[49] * 1000:6.1f}ms  "
+                    f"p95={quantiles[94] * 1000:6.1f}ms  {statuses}"
+                )
+    finally:
+        await runner.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed_database(url, args.rows)
+        asyncio.run(run(url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# archive_dao.py
+"""
+Arquivamento de transações antigas.
+
+As transações anteriores a uma data de corte saem de TRANSACTIONS e vão para
+TRANSACTIONS_ARCHIVE, com o mesmo ID e as mesmas colunas. O resumo mensal
+(MONTHLY_SUMMARY) não muda: gráficos e totais continuam cobrindo todo o
+histórico, enquanto a tabela quente fica com os dados recentes.
+
+As leituras do TransactionDAO juntam o arquivo só quando o período pedido o
+alcança (ver ``archive_end``). Transações arquivadas são somente leitura.
+"""
+import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from dao.transaction_dao import archive_end, parse_date
+from dao.versioning import next_version
+from db import replica
+from db.config import SessionLocal
+from models.models import ArchivedTransaction, Transaction
+
+
+def months_ago(months: int, today: Optional[datetime.date] = None):
+    """Primeiro dia do mês de ``months`` meses atrás"""
+    today = today or datetime.date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return datetime.datetime(index // 12, index % 12 + 1, 1)
+
+
+class ArchiveDAO:
+    """Data Access Object do arquivo de transações"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    def archive(self, cutoff, batch_size: int = 5000) -> int:
+        """
+        Move para o arquivo as transações anteriores a ``cutoff``.
+
+        Cada lote (por ordem de ID) é copiado com INSERT ... SELECT e apagado
+        da tabela quente na mesma transação de banco. Lápides ficam na tabela
+        quente: a réplica ainda precisa delas.
+
+        Returns:
+            Quantidade de transações arquivadas.
+        """
+        cutoff = parse_date(cutoff)
+        columns = [column.name for column in Transaction.__table__.columns]
+        archived = 0
+        try:
+            while True:
+                ids = (
+                    self.session.execute(
+                        select(Transaction.id)
+                        .where(
+                            Transaction.deleted.is_(False),
+                            Transaction.transaction_date < cutoff,
+                        )
+                        .order_by(Transaction.id)
+                        .limit(batch_size)
+                    )
+                    .scalars()
+                    .all()
+                )
+                if not ids:
+                    return archived
+                # Faixa de IDs em vez de IN: o Firebird limita o tamanho da lista
+                batch = (
+                    Transaction.deleted.is_(False),
+                    Transaction.transaction_date < cutoff,
+                    Transaction.id.between(ids[0], ids[-1]),
+                )
+                version = next_version(self.session)
+                rows = select(*Transaction.__table__.columns, literal(version))
+                self.session.execute(
+                    insert(ArchivedTransaction).from_select(
+                        columns + ["archived_version"], rows.where(*batch)
+                    )
+                )
+                self.session.execute(
+                    delete(Transaction)
+                    .where(*batch)
+                    .execution_options(synchronize_session=False)
+                )
+                self.session.commit()
+                replica.fold_delete(Transaction, ids)
+                archived += len(ids)
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao arquivar transações: {e}")
+            return archived
+
+    def archive_end(self) -> Optional[datetime.datetime]:
+        """Data da transação arquivada mais recente (None se não há arquivo)"""
+        try:
+            return archive_end(self.session)
+        except SQLAlchemyError as e:
+            print(f"Erro ao consultar o arquivo: {e}")
+            return None
+
+    def count(self) -> int:
+        """Quantidade de transações arquivadas"""
+        try:
+            return self.session.execute(
+                select(func.count(ArchivedTransaction.id))
+            ).scalar()
+        except SQLAlchemyError as e:
+            print(f"Erro ao consultar o arquivo: {e}")
+            return 0
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
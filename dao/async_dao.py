@@ -0,0 +1,201 @@
+# async_dao.py
+"""
+Variantes assíncronas dos DAOs.
+
+Têm os mesmos métodos dos DAOs síncronos, mas como corrotinas, para uso no
+loop do Textual ou do aiohttp. Com um driver assíncrono configurado
+(``config.ASYNC_DATABASE_URL``) cada DAO usa uma ``AsyncSession`` e executa
+a lógica do DAO síncrono sobre ela via ``run_sync``, sem duplicar regras de
+versão e de resumo. Sem driver assíncrono (caso do Firebird), cada chamada
+roda o DAO síncrono em uma thread.
+
+Uma sessão não aceita operações simultâneas: para consultas em paralelo, use
+um DAO (uma sessão) por tarefa:
+
+    async def totals():
+        async with AsyncSummaryDAO() as dao:
+            return await dao.get_totals_by_type()
+
+    totals, categories = await asyncio.gather(totals(), categories())
+"""
+import asyncio
+from typing import AsyncIterator, List
+
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO, archive_end
+from db import config
+from models.models import ArchivedTransaction
+from models.rows import TransactionRow
+
+# Fábrica de sessões assíncronas (criada no primeiro uso)
+_session_factory = None
+
+
+def async_enabled() -> bool:
+    """Indica se há um driver assíncrono configurado"""
+    return bool(config.ASYNC_DATABASE_URL)
+
+
+def get_async_session_factory():
+    """Retorna a fábrica de AsyncSession, criando a engine no primeiro uso"""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from sqlalchemy.pool import NullPool
+
+        kwargs = {}
+        if config.ASYNC_DATABASE_URL.startswith("sqlite"):
+            # Cada conexão do aiosqlite tem a sua thread: sem pool, ela termina
+            # junto com a sessão e não prende o processo (nem um loop antigo)
+            kwargs["poolclass"] = NullPool
+        engine = create_async_engine(config.ASYNC_DATABASE_URL, echo=False, **kwargs)
+        _session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    return _session_factory
+
+
+def _delegate(name: str):
+    """Cria a corrotina que repassa a chamada ao método do DAO síncrono"""
+
+    async def method(self, *args, **kwargs):
+        return await self._run(name, *args, **kwargs)
+
+    method.__name__ = name
+    return method
+
+
+class AsyncDAO:
+    """Base dos DAOs assíncronos"""
+
+    # DAO síncrono cujos métodos são repassados
+    sync_dao_class = None
+    # Argumentos extras do DAO síncrono sobre a sessão assíncrona
+    sync_dao_kwargs = {}
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: AsyncSession a usar. Se None, abre uma nova (ou usa
+                threads, quando não há driver assíncrono).
+        """
+        if session is None and async_enabled():
+            session = get_async_session_factory()()
+        self.session = session
+
+    async def __aenter__(self):
+        """Método chamado quando entra no bloco 'async with'"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'async with'"""
+        if exc_type is not None and self.session is not None:
+            # Se houve exceção, faz rollback
+            await self.session.rollback()
+        # Sempre fecha a sessão
+        await self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    async def _run(self, name: str, *args, **kwargs):
+        if self.session is None:
+
+            def call_in_thread():
+                with self.sync_dao_class() as dao:
+                    return getattr(dao, name)(*args, **kwargs)
+
+            return await asyncio.to_thread(call_in_thread)
+
+        def call(sync_session):
+            dao = self.sync_dao_class(session=sync_session, **self.sync_dao_kwargs)
+            return getattr(dao, name)(*args, **kwargs)
+
+        return await self.session.run_sync(call)
+
+    async def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session is not None:
+            await self.session.close()
+
+
+class AsyncCategoryDAO(AsyncDAO):
+    """Versão assíncrona do CategoryDAO"""
+
+    sync_dao_class = CategoryDAO
+    # A réplica local é síncrona; as leituras usam a sessão assíncrona
+    sync_dao_kwargs = {"read_replica": False}
+
+    get_all_categories = _delegate("get_all_categories")
+    get_category_by_id = _delegate("get_category_by_id")
+    create_category = _delegate("create_category")
+    update_category = _delegate("update_category")
+    delete_category = _delegate("delete_category")
+    set_parent = _delegate("set_parent")
+    rebuild_closure = _delegate("rebuild_closure")
+    reassign_transactions = _delegate("reassign_transactions")
+    merge_categories = _delegate("merge_categories")
+    get_category_by_name = _delegate("get_category_by_name")
+    changes_since = _delegate("changes_since")
+    current_version = _delegate("current_version")
+
+
+class AsyncTransactionDAO(AsyncDAO):
+    """Versão assíncrona do TransactionDAO"""
+
+    sync_dao_class = TransactionDAO
+    sync_dao_kwargs = {"read_replica": False}
+
+    get_all_transactions = _delegate("get_all_transactions")
+    get_transaction_rows = _delegate("get_transaction_rows")
+    get_transaction_rows_page = _delegate("get_transaction_rows_page")
+    get_transaction_rows_sorted = _delegate("get_transaction_rows_sorted")
+    get_transaction_rows_by_category = _delegate("get_transaction_rows_by_category")
+    get_transaction_by_id = _delegate("get_transaction_by_id")
+    create_transaction = _delegate("create_transaction")
+    create_transactions = _delegate("create_transactions")
+    update_transaction = _delegate("update_transaction")
+    delete_transaction = _delegate("delete_transaction")
+    get_totals_by_type = _delegate("get_totals_by_type")
+    get_totals_by_month = _delegate("get_totals_by_month")
+    get_running_balances = _delegate("get_running_balances")
+    get_transactions_by_category = _delegate("get_transactions_by_category")
+    get_category_month_totals = _delegate("get_category_month_totals")
+    get_largest_expenses = _delegate("get_largest_expenses")
+    changes_since = _delegate("changes_since")
+    row_changes_since = _delegate("row_changes_since")
+    current_version = _delegate("current_version")
+
+    async def iter_transaction_row_batches(
+        self, batch_size: int = 5000
+    ) -> AsyncIterator[List[TransactionRow]]:
+        """Percorre as transações em lotes (as arquivadas por último)"""
+        if self.session is None:
+            with TransactionDAO() as dao:
+                batches = dao.iter_transaction_row_batches(batch_size)
+                while batch := await asyncio.to_thread(next, batches, None):
+                    yield batch
+            return
+        result = await self.session.stream(
+            TransactionDAO._row_batches_query(batch_size)
+        )
+        async for partition in result.partitions():
+            yield list(map(TransactionRow._make, partition))
+        if await self.session.run_sync(archive_end) is None:
+            return
+        result = await self.session.stream(
+            TransactionDAO._row_batches_query(batch_size, model=ArchivedTransaction)
+        )
+        async for partition in result.partitions():
+            yield list(map(TransactionRow._make, partition))
+
+
+class AsyncSummaryDAO(AsyncDAO):
+    """Versão assíncrona do SummaryDAO"""
+
+    sync_dao_class = SummaryDAO
+
+    get_totals_by_type = _delegate("get_totals_by_type")
+    get_totals_by_month = _delegate("get_totals_by_month")
+    get_totals_by_category = _delegate("get_totals_by_category")
+    get_subtree_month_totals = _delegate("get_subtree_month_totals")
+    get_opening_balances = _delegate("get_opening_balances")
+    rebuild = _delegate("rebuild")
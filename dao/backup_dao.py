@@ -0,0 +1,642 @@
+# backup_dao.py
+"""
+Backup e restauração do banco em um arquivo único.
+
+O arquivo é uma sequência de quadros (ver ``BackupWriter``):
+
+    MAGIC | versão do formato | tamanho + cabeçalho JSON
+    quadro*  -> tabela, linhas, tamanho, CRC32 + lote de linhas (JSON, zlib)
+    quadro final -> contagem de linhas por tabela
+    SHA-256 de todos os bytes anteriores
+
+As tabelas são lidas em lotes (``yield_per``) e cada lote vira um quadro, de
+modo que nem o backup nem a restauração carregam o banco inteiro na memória.
+A restauração confere o CRC de cada quadro ao lê-lo e o SHA-256 e as
+contagens antes do commit: um arquivo truncado ou corrompido é recusado sem
+alterar nada.
+
+Um backup incremental (``since``) leva só as categorias e transações com
+versão posterior (lápides incluídas), as transações arquivadas depois dela e
+as etiquetas dessas transações; as tabelas pequenas e sem versão (fechamento,
+regras, etiquetas, resumo mensal e o contador) vão inteiras.
+"""
+import datetime
+import hashlib
+import json
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, bindparam, delete, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from dao.tag_dao import chunks
+from dao.versioning import advance_version, current_version
+from db import change_bus, replica
+from db.config import SessionLocal
+from models.models import (
+    ArchivedTransaction,
+    Category,
+    CategoryClosure,
+    CategoryRule,
+    DataVersion,
+    MonthlySummary,
+    Tag,
+    Transaction,
+    TransactionTag,
+)
+
+MAGIC = b"FINBAK\r\n"
+FORMAT_VERSION = 1
+PREFIX = struct.Struct("!8sHI")
+# Tabela (índice no cabeçalho), linhas, bytes comprimidos, CRC32 do lote
+FRAME = struct.Struct("!BIII")
+END_FRAME = 255
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+# Ordem de gravação: pais antes dos filhos (as chaves estrangeiras são
+# verificadas a cada INSERT)
+TABLES = [
+    model.__table__
+    for model in (
+        DataVersion,
+        Category,
+        CategoryClosure,
+        Transaction,
+        ArchivedTransaction,
+        Tag,
+        TransactionTag,
+        CategoryRule,
+        MonthlySummary,
+    )
+]
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+# Como cada tabela entra em um backup incremental
+REPLACE = "replace"  # cópia inteira: substitui o conteúdo
+UPSERT = "upsert"  # linhas alteradas: atualiza as existentes, insere as novas
+BY_TRANSACTION = "by_transaction"  # todas as etiquetas das transações alteradas
+INCREMENTAL_MODES = {
+    DataVersion.__tablename__: UPSERT,
+    Category.__tablename__: UPSERT,
+    Transaction.__tablename__: UPSERT,
+    ArchivedTransaction.__tablename__: UPSERT,
+    Tag.__tablename__: UPSERT,
+    TransactionTag.__tablename__: BY_TRANSACTION,
+}
+
+# Colunas gravadas só depois de todas as linhas da tabela (auto-referência)
+DEFERRED_COLUMNS = {Category.__tablename__: ["parent_id"]}
+
+CHUNK_SIZE = 50_000
+
+
+class BackupError(ValueError):
+    """Arquivo de backup inválido, corrompido ou fora de ordem"""
+
+
+def _default(value):
+    """Datas vão para o JSON em ISO 8601"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não suportado no backup: {type(value).__name__}")
+
+
+class BackupWriter:
+    """
+    Grava o cabeçalho, os quadros e o trailer de um arquivo de backup.
+
+    A compressão e a gravação de um quadro rodam em uma thread enquanto o
+    chamador lê e codifica o lote seguinte (o zlib libera o GIL); no máximo
+    um quadro fica pendente, o que limita a memória a dois lotes.
+    """
+
+    def __init__(self, out: BinaryIO, header: dict, level: int = 1):
+        self.out = out
+        self.level = level
+        self.digest = hashlib.sha256()
+        self.counts = {table["name"]: 0 for table in header["tables"]}
+        self.names = list(self.counts)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending = None
+        encoded = json.dumps(header).encode()
+        self._write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(encoded)) + encoded)
+
+    def _write(self, data: bytes):
+        self.digest.update(data)
+        self.out.write(data)
+
+    def _compress(self, index: int, count: int, payload: bytes):
+        compressed = zlib.compress(payload, self.level)
+        self._write(
+            FRAME.pack(index, count, len(compressed), zlib.crc32(payload)) + compressed
+        )
+
+    def _frame(self, index: int, count: int, payload: bytes):
+        self._wait()
+        self._pending = self._executor.submit(self._compress, index, count, payload)
+
+    def _wait(self):
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+    def write_rows(self, name: str, rows: List[Sequence]):
+        """Grava um lote de linhas (na ordem das colunas do cabeçalho)"""
+        payload = json.dumps(rows, separators=(",", ":"), default=_default)
+        self._frame(self.names.index(name), len(rows), payload.encode())
+        self.counts[name] += len(rows)
+
+    def finish(self) -> Dict[str, int]:
+        """Grava o quadro final e o SHA-256 do arquivo"""
+        payload = json.dumps({"rows": self.counts}).encode()
+        self._frame(END_FRAME, sum(self.counts.values()), payload)
+        self._wait()
+        self.out.write(self.digest.digest())
+        return dict(self.counts)
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class BackupReader:
+    """
+    Lê um arquivo de backup quadro a quadro.
+
+    ``header`` fica disponível logo após a construção; ``frames()`` entrega
+    (tabela, linhas) com as datas já convertidas e só termina sem erro se o
+    SHA-256 e as contagens do trailer conferirem.
+
+    Raises:
+        BackupError: Arquivo que não é um backup, de formato mais novo,
+            truncado ou corrompido.
+    """
+
+    def __init__(self, source: BinaryIO):
+        self.source = source
+        self.digest = hashlib.sha256()
+        magic, version, size = PREFIX.unpack(self._read(PREFIX.size))
+        if magic != MAGIC:
+            raise BackupError("o arquivo não é um backup")
+        if version > FORMAT_VERSION:
+            raise BackupError(f"formato de backup {version} não suportado")
+        self.header = json.loads(self._read(size))
+        self.tables = [table["name"] for table in self.header["tables"]]
+
+    def _read(self, size: int) -> bytes:
+        data = self.source.read(size)
+        if len(data) != size:
+            raise BackupError("arquivo de backup truncado")
+        self.digest.update(data)
+        return data
+
+    def _payload(self) -> Tuple[int, int, bytes]:
+        index, count, size, crc = FRAME.unpack(self._read(FRAME.size))
+        try:
+            payload = zlib.decompress(self._read(size))
+        except zlib.error as e:
+            raise BackupError(f"quadro corrompido: {e}")
+        if zlib.crc32(payload) != crc:
+            raise BackupError("quadro corrompido (CRC32 não confere)")
+        return index, count, payload
+
+    def frames(self) -> Iterator[Tuple[str, List[list]]]:
+        counts = dict.fromkeys(self.tables, 0)
+        while True:
+            index, count, payload = self._payload()
+            if index == END_FRAME:
+                break
+            if index >= len(self.tables):
+                raise BackupError(f"quadro de tabela desconhecida ({index})")
+            name = self.tables[index]
+            rows = json.loads(payload)
+            if len(rows) != count:
+                raise BackupError(f"quadro de {name} com linhas faltando")
+            counts[name] += count
+            yield name, self._decode(name, rows)
+        expected = self.digest.digest()
+        if self.source.read(DIGEST_SIZE) != expected:
+            raise BackupError("SHA-256 do arquivo não confere")
+        if json.loads(payload)["rows"] != counts:
+            raise BackupError("contagem de linhas não confere")
+
+    def _decode(self, name: str, rows: List[list]) -> List[list]:
+        table = TABLES_BY_NAME.get(name)
+        if table is None:
+            raise BackupError(f"tabela desconhecida no backup: {name}")
+        columns = self.header["tables"][self.tables.index(name)]["columns"]
+        unknown = [column for column in columns if column not in table.c]
+        if unknown:
+            raise BackupError(f"colunas desconhecidas em {name}: {unknown}")
+        dates = [
+            i
+            for i, column in enumerate(columns)
+            if isinstance(table.c[column].type, DateTime)
+        ]
+        parse = datetime.datetime.fromisoformat
+        for row in rows:
+            for i in dates:
+                if row[i] is not None:
+                    row[i] = parse(row[i])
+        return rows
+
+
+def read_header(path: str) -> dict:
+    """Cabeçalho de um arquivo de backup (sem ler os quadros)"""
+    with open(path, "rb") as f:
+        return BackupReader(f).header
+
+
+class BackupDAO:
+    """Data Access Object de backup e restauração"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    @property
+    def _driver_error(self):
+        """Classe base dos erros do driver (o cursor cru não os converte)"""
+        return self.session.get_bind().dialect.loaded_dbapi.Error
+
+    # ==================== BACKUP ====================
+
+    def _changed_rows(self, table, since: Optional[int]):
+        """SELECT das linhas de ``table`` que entram no backup"""
+        query = select(*table.columns).order_by(*table.primary_key.columns)
+        if since is None or table.name not in INCREMENTAL_MODES:
+            return query
+        if table.name == ArchivedTransaction.__tablename__:
+            return query.where(table.c.archived_version > since)
+        if table.name == TransactionTag.__tablename__:
+            return query.where(
+                or_(
+                    table.c.transaction_id.in_(
+                        select(Transaction.id).where(Transaction.version > since)
+                    ),
+                    table.c.transaction_id.in_(
+                        select(ArchivedTransaction.id).where(
+                            ArchivedTransaction.archived_version > since
+                        )
+                    ),
+                )
+            )
+        if "version" in table.c:
+            return query.where(table.c.version > since)
+        return query
+
+    def _fetch(self, query, chunk_size: int) -> Iterator[list]:
+        """
+        Lotes de linhas direto do cursor do driver, na transação da sessão.
+
+        Sem os objetos Row e sem a conversão de tipos do SQLAlchemy: datas
+        chegam como o driver as entrega (texto no SQLite, datetime no
+        Firebird) e ambas voltam com ``fromisoformat`` na restauração.
+        """
+        connection = self.session.connection()
+        sql = query.compile(
+            dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+        ).string
+        cursor = connection.connection.cursor()
+        try:
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+    def backup(
+        self, out: BinaryIO, since: Optional[int] = None, chunk_size: int = CHUNK_SIZE
+    ) -> Optional[dict]:
+        """
+        Grava o backup do banco em ``out`` (arquivo binário).
+
+        Todas as tabelas são lidas na mesma transação de banco: no Firebird,
+        um snapshot consistente mesmo com escritas concorrentes.
+
+        Args:
+            since: Versão de dados do backup anterior; None para backup
+                completo.
+            chunk_size: Linhas por quadro.
+
+        Returns:
+            Cabeçalho gravado mais a contagem de linhas por tabela
+            (``rows``), ou None em caso de erro.
+        """
+        try:
+            version = max(current_version(self.session), since or 0)
+            header = {
+                "format": FORMAT_VERSION,
+                "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                "version": version,
+                "since": since,
+                "tables": [
+                    {
+                        "name": table.name,
+                        "columns": [column.name for column in table.columns],
+                        "mode": (
+                            INCREMENTAL_MODES.get(table.name, REPLACE)
+                            if since is not None
+                            else REPLACE
+                        ),
+                    }
+                    for table in TABLES
+                ],
+            }
+            writer = BackupWriter(out, header)
+            try:
+                for table in TABLES:
+                    query = self._changed_rows(table, since)
+                    for rows in self._fetch(query, chunk_size):
+                        writer.write_rows(table.name, rows)
+                header["rows"] = writer.finish()
+            finally:
+                writer.close()
+            self.session.rollback()
+            return header
+        except (SQLAlchemyError, self._driver_error) as e:
+            self.session.rollback()
+            print(f"Erro ao gravar backup: {e}")
+            return None
+
+    # ==================== RESTAURAÇÃO ====================
+
+    def _check_order(self, header: dict, first: bool, force: bool):
+        """Recusa um arquivo que não se aplica ao estado atual do banco"""
+        version = current_version(self.session)
+        since = header["since"]
+        if since is None:
+            if not first:
+                raise BackupError("backup completo depois de outro arquivo")
+            if version and not force:
+                raise BackupError(
+                    "o banco não está vazio (use force para substituí-lo)"
+                )
+        elif version < since:
+            raise BackupError(
+                f"backup incremental a partir da versão {since}, mas o banco "
+                f"está na versão {version}"
+            )
+        elif version > header["version"]:
+            raise BackupError(
+                f"o banco (versão {version}) tem alterações posteriores ao "
+                f"backup (versão {header['version']})"
+            )
+
+    def _clear(self):
+        """Apaga todas as tabelas, dos filhos para os pais"""
+        self.session.execute(
+            update(Category)
+            .values(parent_id=None)
+            .where(Category.parent_id.isnot(None))
+        )
+        for table in reversed(TABLES):
+            self.session.execute(delete(table))
+
+    def _drop_indexes(self) -> list:
+        """
+        Tira os índices secundários durante uma carga completa: recriá-los no
+        fim (uma ordenação por índice) custa bem menos que atualizá-los a cada
+        INSERT. Só no SQLite, onde o DDL entra na transação e um rollback os
+        traz de volta; no Firebird o DDL só vale no commit.
+
+        Returns:
+            Os índices a recriar com ``_create_indexes``.
+        """
+        connection = self.session.connection()
+        if connection.dialect.name != "sqlite":
+            return []
+        indexes = [index for table in TABLES for index in table.indexes]
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+        return indexes
+
+    def _create_indexes(self, indexes: list):
+        connection = self.session.connection()
+        for index in indexes:
+            index.create(connection, checkfirst=True)
+
+    def _insert(self, table, columns: List[str], rows: List[list]):
+        """
+        INSERT em lote (executemany) direto no driver.
+
+        Só as colunas cujo tipo precisa de conversão para o banco (datas, no
+        SQLite) passam pelo processador do SQLAlchemy; o resto vai como veio
+        do arquivo, sem montar um dicionário por linha.
+        """
+        connection = self.session.connection()
+        dialect = connection.dialect
+        compiled = (
+            insert(table)
+            .values({name: bindparam(name) for name in columns})
+            .compile(dialect=dialect)
+        )
+        if compiled.positiontup is None:
+            # Driver com parâmetros nomeados: caminho comum do SQLAlchemy
+            self.session.execute(insert(table), [dict(zip(columns, r)) for r in rows])
+            return
+        positions = {name: i for i, name in enumerate(columns)}
+        order = [positions[name] for name in compiled.positiontup]
+        processors = [
+            (i, processor)
+            for i, name in enumerate(compiled.positiontup)
+            if (
+                processor := table.c[name]
+                .type.dialect_impl(dialect)
+                .bind_processor(dialect)
+            )
+        ]
+        if order != list(range(len(columns))):
+            rows = [[row[i] for i in order] for row in rows]
+        for row in rows:
+            for i, processor in processors:
+                row[i] = processor(row[i])
+        connection.exec_driver_sql(compiled.string, list(map(tuple, rows)))
+
+    def _upsert(self, table, rows: List[dict]):
+        """Atualiza as linhas que já existem e insere as demais"""
+        key = table.c.id
+        existing = set()
+        for ids in chunks([row["id"] for row in rows]):
+            existing.update(
+                self.session.execute(select(key).where(key.in_(ids))).scalars()
+            )
+        updates = [{**row, "_id": row["id"]} for row in rows if row["id"] in existing]
+        inserts = [row for row in rows if row["id"] not in existing]
+        if updates:
+            values = {name: bindparam(name) for name in rows[0] if name != "id"}
+            self.session.execute(
+                update(table).where(key == bindparam("_id")).values(values),
+                updates,
+                execution_options={"synchronize_session": False},
+            )
+        if inserts:
+            self.session.execute(insert(table), inserts)
+
+    def _apply(self, reader: BackupReader) -> Dict[str, int]:
+        """Aplica os quadros de um arquivo na transação corrente"""
+        incremental = reader.header["since"] is not None
+        modes = {table["name"]: table["mode"] for table in reader.header["tables"]}
+        columns = {table["name"]: table["columns"] for table in reader.header["tables"]}
+        if incremental:
+            # Cópias inteiras: o conteúdo anterior sai mesmo que a tabela venha
+            # vazia (e, portanto, sem nenhum quadro)
+            for table in reversed(TABLES):
+                if modes.get(table.name) == REPLACE:
+                    self.session.execute(delete(table))
+        deferred = {name: [] for name in DEFERRED_COLUMNS}
+        tags = [] if incremental else None
+        counts = {}
+        for name, rows in reader.frames():
+            table = TABLES_BY_NAME[name]
+            counts[name] = counts.get(name, 0) + len(rows)
+            for column in DEFERRED_COLUMNS.get(name, ()):
+                key, i = columns[name].index("id"), columns[name].index(column)
+                for row in rows:
+                    if row[i] is not None:
+                        deferred[name].append({"_id": row[key], column: row[i]})
+                        row[i] = None
+            if name == Tag.__tablename__ and tags is not None:
+                # Aplicadas de uma vez, antes dos vínculos (ver _replace_tags)
+                tags.extend(dict(zip(columns[name], row)) for row in rows)
+                continue
+            if name == TransactionTag.__tablename__ and tags:
+                self._replace_tags(tags)
+                tags = None
+            if modes[name] == UPSERT:
+                self._upsert(table, [dict(zip(columns[name], row)) for row in rows])
+            else:
+                self._insert(table, columns[name], rows)
+            if incremental and name in (
+                Transaction.__tablename__,
+                ArchivedTransaction.__tablename__,
+            ):
+                key = columns[name].index("id")
+                ids = [row[key] for row in rows]
+                for chunk in chunks(ids):
+                    # Etiquetas das transações alteradas vêm inteiras no backup
+                    self.session.execute(
+                        delete(TransactionTag).where(
+                            TransactionTag.transaction_id.in_(chunk)
+                        )
+                    )
+                    if name == ArchivedTransaction.__tablename__:
+                        # Arquivadas depois do backup anterior: saem da quente
+                        self.session.execute(
+                            delete(Transaction).where(Transaction.id.in_(chunk))
+                        )
+        if tags is not None:
+            self._replace_tags(tags)
+        for name, values in deferred.items():
+            table = TABLES_BY_NAME[name]
+            for column in DEFERRED_COLUMNS[name]:
+                if values:
+                    self.session.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("_id"))
+                        .values({column: bindparam(column)}),
+                        values,
+                        execution_options={"synchronize_session": False},
+                    )
+        return counts
+
+    def _replace_tags(self, rows: List[dict]):
+        """
+        Substitui as etiquetas pelas do backup incremental (cópia inteira).
+
+        As que não estão no backup foram apagadas depois do anterior e saem
+        com os seus vínculos; as demais são atualizadas sem apagar, já que os
+        vínculos das transações não alteradas continuam apontando para elas.
+        """
+        keep = {row["id"] for row in rows}
+        removed = set(self.session.execute(select(Tag.id)).scalars()) - keep
+        for chunk in chunks(sorted(removed)):
+            self.session.execute(
+                delete(TransactionTag).where(TransactionTag.tag_id.in_(chunk))
+            )
+            self.session.execute(delete(Tag).where(Tag.id.in_(chunk)))
+        if rows:
+            self._upsert(Tag.__table__, rows)
+
+    def restore(
+        self, sources: Sequence[BinaryIO], force: bool = False, dry_run: bool = False
+    ) -> Optional[dict]:
+        """
+        Restaura um backup completo e/ou incrementais, nesta ordem.
+
+        Tudo roda em uma única transação de banco: se algum arquivo estiver
+        corrompido ou fora de ordem, nada é alterado.
+
+        Args:
+            sources: Arquivos binários abertos (o completo primeiro).
+            force: Permite substituir um banco que não está vazio.
+            dry_run: Só confere os arquivos (checksums e contagens), sem
+                tocar no banco.
+
+        Returns:
+            Versão final e linhas restauradas por tabela, ou None em caso de
+            erro (o motivo é impresso).
+        """
+        restored = {}
+        try:
+            for position, source in enumerate(sources):
+                reader = BackupReader(source)
+                if dry_run:
+                    counts = {}
+                    for name, rows in reader.frames():
+                        counts[name] = counts.get(name, 0) + len(rows)
+                else:
+                    self._check_order(reader.header, position == 0, force)
+                    indexes = []
+                    if reader.header["since"] is None:
+                        # Os DELETEs abrem a transação antes do DDL (o pysqlite
+                        # não emite BEGIN para DROP INDEX)
+                        self._clear()
+                        indexes = self._drop_indexes()
+                    counts = self._apply(reader)
+                    self._create_indexes(indexes)
+                for name, count in counts.items():
+                    restored[name] = restored.get(name, 0) + count
+            if dry_run:
+                return {"version": reader.header["version"], "rows": restored}
+            # Escritas depois da restauração recebem versões maiores que as
+            # restauradas (o generator do Firebird não está no backup)
+            version = max(current_version(self.session), reader.header["version"])
+            advance_version(self.session, version)
+            self.session.commit()
+        except (SQLAlchemyError, self._driver_error, BackupError) as e:
+            self.session.rollback()
+            print(f"Erro ao restaurar backup: {e}")
+            return None
+        if replica.replica_enabled():
+            # Versões restauradas podem ser anteriores aos marcadores da réplica
+            replica.ReplicaSync().resync()
+        change_bus.publish("categories", version, restored.get("CATEGORIES", 0))
+        change_bus.publish("transactions", version, restored.get("TRANSACTIONS", 0))
+        return {"version": version, "rows": restored}
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
@@ -1,16 +1,112 @@
 # dao.py
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, literal, select, true, update
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from models.models import Category
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.exc import StaleDataError
+from models.models import ArchivedTransaction, Category, CategoryClosure, Transaction
+from dao.summary_dao import move_summary
+from dao.versioning import current_version, next_version
+from db import change_bus, replica
 from db.config import SessionLocal
 from typing import List, Optional
 
 
+# Transações movidas por comando na reassociação de categorias
+REASSIGN_CHUNK_SIZE = 50_000
+
+CLOSURE_COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+
+
+def add_to_closure(session, category_id: int, parent_id: Optional[int]):
+    """Insere os caminhos de uma categoria nova (ainda sem filhas)"""
+    session.execute(
+        insert(CategoryClosure).values(
+            ancestor_id=category_id, descendant_id=category_id, depth=0
+        )
+    )
+    if parent_id is not None:
+        # Os ancestrais da mãe (e ela própria) passam a alcançar a nova
+        session.execute(
+            insert(CategoryClosure).from_select(
+                CLOSURE_COLUMNS,
+                select(
+                    CategoryClosure.ancestor_id,
+                    literal(category_id),
+                    CategoryClosure.depth + 1,
+                ).where(CategoryClosure.descendant_id == parent_id),
+            )
+        )
+
+
+def move_in_closure(session, category_id: int, parent_id: Optional[int]):
+    """Pendura a subárvore de ``category_id`` em ``parent_id`` (None: raiz)"""
+    subtree = select(CategoryClosure.descendant_id).where(
+        CategoryClosure.ancestor_id == category_id
+    )
+    # Remove os caminhos que chegavam à subárvore por fora dela
+    session.execute(
+        delete(CategoryClosure)
+        .where(
+            CategoryClosure.descendant_id.in_(subtree),
+            CategoryClosure.ancestor_id.not_in(subtree),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if parent_id is None:
+        return
+    # Cada ancestral da nova mãe alcança cada nó da subárvore
+    above = aliased(CategoryClosure)
+    below = aliased(CategoryClosure)
+    session.execute(
+        insert(CategoryClosure).from_select(
+            CLOSURE_COLUMNS,
+            select(
+                above.ancestor_id,
+                below.descendant_id,
+                above.depth + below.depth + 1,
+            )
+            .join(below, true())
+            .where(above.descendant_id == parent_id, below.ancestor_id == category_id),
+        )
+    )
+
+
+def in_subtree(session, root_id: int, category_id: int) -> bool:
+    """Indica se ``category_id`` é ``root_id`` ou uma descendente dela"""
+    return (
+        session.execute(
+            select(CategoryClosure.depth).where(
+                CategoryClosure.ancestor_id == root_id,
+                CategoryClosure.descendant_id == category_id,
+            )
+        ).first()
+        is not None
+    )
+
+
 class CategoryDAO:
     """Data Access Object para a tabela Categories"""
 
-    def __init__(self):
-        self.session = SessionLocal()
+    def __init__(self, session=None, read_replica=True):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+            read_replica: Se False, as leituras também usam ``session``.
+        """
+        self.session = session if session is not None else SessionLocal()
+        # Leituras vão para a réplica local quando ela está habilitada
+        self._replica_session = (
+            replica.ReplicaSession()
+            if read_replica and replica.replica_enabled()
+            else None
+        )
+
+    @property
+    def read_session(self):
+        """Sessão usada nas leituras (réplica local ou banco primário)"""
+        if self._replica_session is not None:
+            return self._replica_session
+        return self.session
 
     def __enter__(self):
         """Método chamado quando entra no bloco 'with'"""
@@ -29,7 +125,13 @@ class CategoryDAO:
     def get_all_categories(self) -> List[Category]:
         """Retorna todas as categorias"""
         try:
-            categories = self.session.execute(select(Category)).scalars().all()
+            categories = (
+                self.read_session.execute(
+                    select(Category).where(Category.deleted.is_(False))
+                )
+                .scalars()
+                .all()
+            )
             return categories
         except SQLAlchemyError as e:
             print(f"Erro ao buscar categorias: {e}")
@@ -38,19 +140,31 @@ class CategoryDAO:
     def get_category_by_id(self, category_id: int) -> Optional[Category]:
         """Retorna uma categoria pelo ID"""
         try:
-            category = self.session.get(Category, category_id)
+            category = self.read_session.get(Category, category_id)
+            if category is not None and category.deleted:
+                return None
             return category
         except SQLAlchemyError as e:
             print(f"Erro ao buscar categoria por ID: {e}")
             return None
 
-    def create_category(self, name: str) -> Optional[Category]:
-        """Cria uma nova categoria"""
-        new_category = Category(name=name)
+    def create_category(
+        self, name: str, parent_id: Optional[int] = None
+    ) -> Optional[Category]:
+        """Cria uma nova categoria (subcategoria de ``parent_id``, se informada)"""
+        new_category = Category(name=name, parent_id=parent_id)
         try:
+            if parent_id is not None and self._live_category(parent_id) is None:
+                print("Categoria mãe não encontrada")
+                return None
+            new_category.version = next_version(self.session)
             self.session.add(new_category)
+            self.session.flush()
+            add_to_closure(self.session, new_category.id, parent_id)
             self.session.commit()
             self.session.refresh(new_category)
+            replica.fold(new_category)
+            change_bus.publish("categories", new_category.version)
             return new_category
         except IntegrityError as e:
             self.session.rollback()
@@ -61,30 +175,68 @@ class CategoryDAO:
             print(f"Erro ao criar categoria: {e}")
             return None
 
-    def update_category(self, category_id: int, new_name: str) -> Optional[Category]:
-        """Atualiza o nome de uma categoria existente"""
+    def update_category(
+        self, category_id: int, new_name: str, expected_version: Optional[int] = None
+    ) -> Optional[Category]:
+        """
+        Atualiza o nome de uma categoria existente
+
+        Args:
+            expected_version: Versão lida pelo chamador. Se informada e a
+                categoria tiver mudado desde então, a atualização é recusada.
+        """
         try:
             category = self.session.get(Category, category_id)
-            if category:
+            if category and not category.deleted:
+                if expected_version not in (None, category.version):
+                    print("Conflito de concorrência ao atualizar categoria")
+                    return None
                 category.name = new_name
+                category.version = next_version(self.session)
                 self.session.commit()
                 self.session.refresh(category)
+                replica.fold(category)
+                change_bus.publish("categories", category.version)
                 return category
             else:
                 print("Categoria não encontrada")
                 return None
+        except StaleDataError:
+            self.session.rollback()
+            print("Conflito de concorrência ao atualizar categoria")
+            return None
         except SQLAlchemyError as e:
             self.session.rollback()
             print(f"Erro ao atualizar categoria: {e}")
             return None
 
-    def delete_category(self, category_id: int) -> bool:
-        """Remove uma categoria pelo ID"""
+    def delete_category(
+        self, category_id: int, reassign_to: Optional[int] = None
+    ) -> bool:
+        """
+        Remove uma categoria pelo ID (mantém uma lápide versionada)
+
+        Args:
+            reassign_to: Categoria que recebe as transações da removida. Sem
+                ela, uma categoria ainda usada por transações não é removida.
+        """
+        if reassign_to is not None:
+            return self.merge_categories(category_id, reassign_to) is not None
         try:
             category = self.session.get(Category, category_id)
-            if category:
-                self.session.delete(category)
+            if category and not category.deleted:
+                if self._reference_count(category_id):
+                    print("Categoria possui transações: informe outra para recebê-las")
+                    return False
+                if self._child_ids(category_id):
+                    print("Categoria possui subcategorias")
+                    return False
+                category.deleted = True
+                category.version = next_version(self.session)
+                self._remove_from_closure(category_id)
                 self.session.commit()
+                replica.fold(category)
+                change_bus.publish("categories", category.version)
                 return True
             else:
                 print("Categoria não encontrada")
@@ -94,11 +246,260 @@ class CategoryDAO:
             print(f"Erro ao remover categoria: {e}")
             return False
 
+    def set_parent(
+        self,
+        category_id: int,
+        parent_id: Optional[int],
+        expected_version: Optional[int] = None,
+    ) -> Optional[Category]:
+        """
+        Move uma categoria (com as subcategorias) para baixo de outra
+
+        Args:
+            parent_id: Nova categoria mãe (None: torna a categoria raiz).
+            expected_version: Versão lida pelo chamador (concorrência otimista).
+        """
+        try:
+            category = self._live_category(category_id)
+            if category is None or (
+                parent_id is not None and self._live_category(parent_id) is None
+            ):
+                print("Categoria não encontrada")
+                return None
+            if expected_version not in (None, category.version):
+                print("Conflito de concorrência ao atualizar categoria")
+                return None
+            if parent_id is not None and in_subtree(
+                self.session, category_id, parent_id
+            ):
+                print("Uma categoria não pode ficar abaixo de si mesma")
+                return None
+            move_in_closure(self.session, category_id, parent_id)
+            category.parent_id = parent_id
+            category.version = next_version(self.session)
+            self.session.commit()
+            self.session.refresh(category)
+            replica.fold(category)
+            change_bus.publish("categories", category.version)
+            return category
+        except StaleDataError:
+            self.session.rollback()
+            print("Conflito de concorrência ao atualizar categoria")
+            return None
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao mover categoria: {e}")
+            return None
+
+    def rebuild_closure(self) -> bool:
+        """
+        Recalcula a tabela de fechamento a partir de ``parent_id`` (ex: em
+        bancos anteriores à hierarquia). Cada comando desce um nível.
+        """
+        try:
+            live = Category.deleted.is_(False)
+            self.session.execute(delete(CategoryClosure))
+            self.session.execute(
+                insert(CategoryClosure).from_select(
+                    CLOSURE_COLUMNS,
+                    select(Category.id, Category.id, literal(0)).where(live),
+                )
+            )
+            levels = self.session.execute(select(func.count(Category.id))).scalar()
+            for depth in range(levels):
+                result = self.session.execute(
+                    insert(CategoryClosure).from_select(
+                        CLOSURE_COLUMNS,
+                        select(
+                            CategoryClosure.ancestor_id,
+                            Category.id,
+                            CategoryClosure.depth + 1,
+                        )
+                        .join(
+                            Category,
+                            Category.parent_id == CategoryClosure.descendant_id,
+                        )
+                        .where(CategoryClosure.depth == depth, live),
+                    )
+                )
+                if not result.rowcount:
+                    break
+            self.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao recalcular a árvore de categorias: {e}")
+            return False
+
+    def _live_category(self, category_id: int) -> Optional[Category]:
+        category = self.session.get(Category, category_id)
+        return category if category is not None and not category.deleted else None
+
+    def _child_ids(self, category_id: int) -> List[int]:
+        """Subcategorias diretas (não removidas)"""
+        return list(
+            self.session.execute(
+                select(Category.id).where(
+                    Category.parent_id == category_id, Category.deleted.is_(False)
+                )
+            ).scalars()
+        )
+
+    def _remove_from_closure(self, category_id: int):
+        """Remove os caminhos de uma categoria sem filhas"""
+        self.session.execute(
+            delete(CategoryClosure)
+            .where(CategoryClosure.descendant_id == category_id)
+            .execution_options(synchronize_session=False)
+        )
+
+    def _reference_count(self, category_id: int) -> int:
+        """Transações (inclusive arquivadas) que usam a categoria"""
+        return sum(
+            self.session.execute(
+                select(func.count(model.id)).where(
+                    model.category_id == category_id, model.deleted.is_(False)
+                )
+            ).scalar()
+            or 0
+            for model in (Transaction, ArchivedTransaction)
+        )
+
+    def _load_pair(self, source_id: int, target_id: int):
+        """Carrega origem e destino de uma reassociação (None se inválidas)"""
+        if source_id == target_id:
+            print("Origem e destino da reassociação são a mesma categoria")
+            return None
+        categories = [self.session.get(Category, id) for id in (source_id, target_id)]
+        if any(c is None or c.deleted for c in categories):
+            print("Categoria não encontrada")
+            return None
+        return categories
+
+    def _move_transactions(
+        self, source_id: int, target_id: int, version: int, chunk_size: int
+    ) -> int:
+        """
+        Move as transações (e o resumo mensal) de uma categoria para outra,
+        sem commit. As da tabela quente recebem ``version``.
+        """
+        moved = 0
+        for model, values in (
+            (Transaction, {"category_id": target_id, "version": version}),
+            (ArchivedTransaction, {"category_id": target_id}),
+        ):
+            live = (model.category_id == source_id, model.deleted.is_(False))
+            while True:
+                ids = (
+                    self.session.execute(
+                        select(model.id)
+                        .where(*live)
+                        .order_by(model.id)
+                        .limit(chunk_size)
+                    )
+                    .scalars()
+                    .all()
+                )
+                if not ids:
+                    break
+                # Faixa de IDs em vez de IN: o Firebird limita o tamanho da lista
+                self.session.execute(
+                    update(model)
+                    .where(*live, model.id.between(ids[0], ids[-1]))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                moved += len(ids)
+        move_summary(self.session, source_id, target_id)
+        return moved
+
+    def _fold_moved(self, source_id: int, target_id: int, version: int, moved: int):
+        """Propaga (réplica e barramento) as transações movidas"""
+        replica.fold_update(
+            Transaction,
+            {"category_id": target_id, "version": version},
+            Transaction.category_id == source_id,
+            Transaction.deleted.is_(False),
+        )
+        if moved:
+            change_bus.publish("transactions", version, moved)
+
+    def reassign_transactions(
+        self, source_id: int, target_id: int, chunk_size: int = REASSIGN_CHUNK_SIZE
+    ) -> Optional[int]:
+        """
+        Passa todas as transações de uma categoria para outra.
+
+        As transações são movidas por UPDATEs em faixas de IDs (``chunk_size``
+        linhas por comando) e o resumo mensal por poucos comandos em
+        conjunto, tudo em uma única transação de banco.
+
+        Returns:
+            Quantidade de transações movidas (None em caso de erro).
+        """
+        try:
+            if self._load_pair(source_id, target_id) is None:
+                return None
+            version = next_version(self.session)
+            moved = self._move_transactions(source_id, target_id, version, chunk_size)
+            self.session.commit()
+            self._fold_moved(source_id, target_id, version, moved)
+            return moved
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao reassociar transações: {e}")
+            return None
+
+    def merge_categories(
+        self, source_id: int, target_id: int, chunk_size: int = REASSIGN_CHUNK_SIZE
+    ) -> Optional[int]:
+        """
+        Funde uma categoria em outra: move as transações (como
+        ``reassign_transactions``) e remove a origem, na mesma transação.
+
+        Returns:
+            Quantidade de transações movidas (None em caso de erro).
+        """
+        try:
+            categories = self._load_pair(source_id, target_id)
+            if categories is None:
+                return None
+            source = categories[0]
+            if in_subtree(self.session, source_id, target_id):
+                print("Uma categoria não pode ser fundida em uma subcategoria dela")
+                return None
+            version = next_version(self.session)
+            moved = self._move_transactions(source_id, target_id, version, chunk_size)
+            # As subcategorias da origem passam para o destino
+            children = [
+                self.session.get(Category, id) for id in self._child_ids(source_id)
+            ]
+            for child in children:
+                move_in_closure(self.session, child.id, target_id)
+                child.parent_id = target_id
+                child.version = version
+            source.deleted = True
+            source.version = version
+            self._remove_from_closure(source_id)
+            self.session.commit()
+            self._fold_moved(source_id, target_id, version, moved)
+            replica.fold(source, *children)
+            change_bus.publish("categories", version, 1 + len(children))
+            return moved
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao fundir categorias: {e}")
+            return None
+
     def get_category_by_name(self, name: str) -> Optional[Category]:
         """Retorna uma categoria pelo nome"""
         try:
             category = (
-                self.session.execute(select(Category).where(Category.name == name))
+                self.read_session.execute(
+                    select(Category).where(
+                        Category.name == name, Category.deleted.is_(False)
+                    )
+                )
                 .scalars()
                 .first()
             )
@@ -107,7 +508,35 @@ class CategoryDAO:
             print(f"Erro ao buscar categoria por nome: {e}")
             return None
 
+    def changes_since(self, version: int) -> List[Category]:
+        """Retorna as categorias (inclusive lápides) alteradas após a versão"""
+        try:
+            query = (
+                select(Category)
+                .where(Category.version > version)
+                .order_by(Category.version)
+            )
+            return self.read_session.execute(query).scalars().all()
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar alterações de categorias: {e}")
+            return []
+
+    def current_version(self) -> int:
+        """
+        Retorna a versão de dados mais recente.
+
+        Lida sempre no banco primário: a réplica não tem a tabela de arquivo
+        (nem as versões de arquivamento) e pode estar atrasada.
+        """
+        try:
+            return current_version(self.session)
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar versão dos dados: {e}")
+            return 0
+
     def close(self):
         """Fecha a sessão do banco de dados"""
         if self.session:
             self.session.close()
+        if self._replica_session is not None:
+            self._replica_session.close()
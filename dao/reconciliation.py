@@ -0,0 +1,321 @@
+# reconciliation.py
+"""
+Reconciliação de importações com as transações já gravadas.
+
+Cada registro importado recebe a impressão digital de (dia, tipo, valor,
+descrição normalizada), a mesma gravada na coluna indexada
+``TRANSACTIONS.fingerprint``. O casamento é feito em lote:
+
+1. Duplicatas exatas: as impressões do lote são buscadas no índice em
+   blocos (``IN``) e casadas com uma tabela hash em memória. Cada transação
+   existente absorve no máximo um registro, então duas compras iguais no
+   mesmo dia continuam sendo duas.
+2. Quase duplicatas: os registros que sobraram são comparados com as
+   transações do mesmo tipo e valor a até ``date_tolerance`` dias, agrupadas
+   em uma tabela hash por (tipo, centavos, dia). As descrições parecidas
+   viram conflitos, que o usuário revisa antes de importar.
+
+Quando o lote alcança o período arquivado, os dois passos também consultam
+TRANSACTIONS_ARCHIVE.
+"""
+import datetime
+import difflib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from db.config import SessionLocal
+from dao.transaction_dao import archive_end, parse_date
+from models.fingerprint import normalize_description, to_cents, transaction_fingerprint
+from models.models import ArchivedTransaction, Transaction
+from models.serialization import batched
+
+# Impressões digitais por consulta IN
+LOOKUP_CHUNK_SIZE = 500
+
+
+class Candidate(NamedTuple):
+    """Transação existente parecida com um registro importado"""
+
+    id: int
+    description: str
+    transaction_date: datetime.datetime
+    transaction_value: float
+    similarity: float
+
+
+@dataclass
+class Conflict:
+    """Registro importado que pode já existir (a decidir pelo usuário)"""
+
+    record: Dict[str, Any]
+    # Candidatos do mais parecido para o menos parecido
+    candidates: List[Candidate]
+
+
+@dataclass
+class Reconciliation:
+    """Resultado da reconciliação de um lote de registros"""
+
+    # Registros sem correspondência: podem ser importados
+    new: List[Dict[str, Any]] = field(default_factory=list)
+    # Duplicatas exatas: (registro, id da transação existente)
+    duplicates: List[tuple] = field(default_factory=list)
+    conflicts: List[Conflict] = field(default_factory=list)
+
+
+class ReconciliationDAO:
+    """Data Access Object da reconciliação de importações"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    def backfill_fingerprints(self, batch_size: int = 5000) -> int:
+        """
+        Calcula a impressão digital das transações gravadas (ou arquivadas)
+        sem ela (ex: anteriores à coluna). Não altera a versão: é um dado
+        derivado.
+
+        Returns:
+            Quantidade de transações atualizadas.
+        """
+        updated = 0
+        try:
+            for model in (Transaction, ArchivedTransaction):
+                while True:
+                    rows = self.session.execute(
+                        select(
+                            model.id,
+                            model.transaction_date,
+                            model.transaction_value,
+                            model.type,
+                            model.description,
+                        )
+                        .where(model.fingerprint.is_(None))
+                        .limit(batch_size)
+                    ).all()
+                    if not rows:
+                        break
+                    self.session.connection().execute(
+                        update(model.__table__)
+                        .where(model.__table__.c.id == bindparam("row_id"))
+                        .values(fingerprint=bindparam("row_fingerprint")),
+                        [
+                            {
+                                "row_id": id,
+                                "row_fingerprint": transaction_fingerprint(
+                                    date, value, type, description
+                                ),
+                            }
+                            for id, date, value, type, description in rows
+                        ],
+                    )
+                    self.session.commit()
+                    updated += len(rows)
+            return updated
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao calcular impressões digitais: {e}")
+            return updated
+
+    def _existing_by_fingerprint(
+        self, fingerprints, models=(Transaction,)
+    ) -> Dict[str, List[int]]:
+        """IDs das transações existentes para cada impressão digital do lote"""
+        existing = defaultdict(list)
+        for model in models:
+            for chunk in batched(sorted(fingerprints), LOOKUP_CHUNK_SIZE):
+                query = (
+                    select(model.fingerprint, model.id)
+                    .where(model.fingerprint.in_(chunk))
+                    .where(model.deleted.is_(False))
+                    .order_by(model.id)
+                )
+                for fingerprint, id in self.session.execute(query):
+                    existing[fingerprint].append(id)
+        return existing
+
+    def _near_candidates(
+        self, records, matched_ids, date_tolerance, models=(Transaction,)
+    ):
+        """
+        Transações do mesmo tipo e valor a até ``date_tolerance`` dias de
+        algum registro, em uma tabela hash por (tipo, centavos, dia).
+
+        A janela de datas é percorrida uma vez, sem a descrição; ela só é
+        buscada (por ID) para as transações que sobram.
+        """
+        # (tipo, centavos) -> dias a até date_tolerance de algum registro
+        wanted = defaultdict(set)
+        offsets = range(-date_tolerance, date_tolerance + 1)
+        for r in records:
+            key = (r["type"], to_cents(r["transaction_value"]))
+            day = r["transaction_date"].toordinal()
+            wanted[key].update(day + offset for offset in offsets)
+        days = [r["transaction_date"].toordinal() for r in records]
+        tolerance = datetime.timedelta(days=date_tolerance + 1)
+        near = {}
+        for model in models:
+            query = (
+                select(
+                    model.id,
+                    model.transaction_date,
+                    model.transaction_value,
+                    model.type,
+                )
+                .where(model.deleted.is_(False))
+                .where(
+                    model.transaction_date
+                    >= datetime.datetime.fromordinal(min(days)) - tolerance
+                )
+                .where(
+                    model.transaction_date
+                    < datetime.datetime.fromordinal(max(days)) + tolerance
+                )
+            )
+            result = self.session.connection().execution_options(yield_per=10_000)
+            for partition in result.execute(query).partitions():
+                for id, date, value, type in partition:
+                    key = (type, round(value * 100))
+                    record_days = wanted.get(key)
+                    if record_days is None or id in matched_ids:
+                        continue
+                    day = date.toordinal()
+                    if day in record_days:
+                        near[id] = (model, *key, day, date, value)
+        table = defaultdict(list)
+        for model in models:
+            ids = [id for id, values in near.items() if values[0] is model]
+            for chunk in batched(ids, LOOKUP_CHUNK_SIZE):
+                query = select(model.id, model.description).where(model.id.in_(chunk))
+                for id, description in self.session.execute(query):
+                    _, type, cents, day, date, value = near[id]
+                    table[(type, cents, day)].append(
+                        (
+                            id,
+                            description,
+                            date,
+                            value,
+                            normalize_description(description),
+                        )
+                    )
+        return table
+
+    def reconcile(
+        self,
+        records: Sequence[Dict[str, Any]],
+        date_tolerance: int = 3,
+        min_similarity: float = 0.6,
+    ) -> Optional[Reconciliation]:
+        """
+        Separa os registros em novos, duplicatas exatas e conflitos.
+
+        Args:
+            records: Transações a importar (dicionários como os de
+                ``create_transactions``).
+            date_tolerance: Distância máxima, em dias, de uma quase duplicata.
+            min_similarity: Semelhança mínima das descrições normalizadas
+                (0 a 1) para um candidato virar conflito.
+
+        Returns:
+            Reconciliation, ou None em caso de erro (nada deve ser importado).
+        """
+        result = Reconciliation()
+        if not records:
+            return result
+        self.backfill_fingerprints()
+        records = [
+            {**r, "transaction_date": parse_date(r["transaction_date"])}
+            for r in records
+        ]
+        fingerprints = [
+            transaction_fingerprint(
+                r["transaction_date"],
+                r["transaction_value"],
+                r["type"],
+                r.get("description"),
+            )
+            for r in records
+        ]
+        try:
+            models = [Transaction]
+            end = archive_end(self.session)
+            first = min(r["transaction_date"] for r in records)
+            if end is not None and first - datetime.timedelta(date_tolerance) <= end:
+                models.append(ArchivedTransaction)
+            existing = self._existing_by_fingerprint(set(fingerprints), models)
+            unmatched, matched_ids = [], set()
+            for record, fingerprint in zip(records, fingerprints):
+                ids = existing.get(fingerprint)
+                if ids:
+                    matched_ids.add(ids[0])
+                    result.duplicates.append((record, ids.pop(0)))
+                else:
+                    unmatched.append(record)
+            if not unmatched:
+                return result
+            table = self._near_candidates(
+                unmatched, matched_ids, date_tolerance, models
+            )
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao reconciliar transações: {e}")
+            return None
+        for record in unmatched:
+            candidates = self._match(record, table, date_tolerance, min_similarity)
+            if candidates:
+                result.conflicts.append(Conflict(record, candidates))
+            else:
+                result.new.append(record)
+        return result
+
+    @staticmethod
+    def _match(record, table, date_tolerance, min_similarity) -> List[Candidate]:
+        key = (record["type"], to_cents(record["transaction_value"]))
+        day = record["transaction_date"].toordinal()
+        matcher = difflib.SequenceMatcher(
+            b=normalize_description(record.get("description")), autojunk=False
+        )
+        candidates = []
+        for probe in range(day - date_tolerance, day + date_tolerance + 1):
+            for id, description, date, value, normalized in table.get(
+                (*key, probe), ()
+            ):
+                matcher.set_seq1(normalized)
+                if matcher.real_quick_ratio() < min_similarity:
+                    continue
+                if matcher.quick_ratio() < min_similarity:
+                    continue
+                similarity = matcher.ratio()
+                if similarity >= min_similarity:
+                    candidates.append(
+                        Candidate(id, description, date, value, round(similarity, 3))
+                    )
+        candidates.sort(key=lambda c: (-c.similarity, c.id))
+        return candidates
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
@@ -0,0 +1,116 @@
+# rule_dao.py
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from models.models import Category, CategoryRule
+from db.config import SessionLocal
+from models.categorizer import Categorizer, compile_rule_pattern
+from typing import List, Optional
+
+
+class RuleDAO:
+    """Data Access Object para a tabela CategoryRules"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    def get_all_rules(self) -> List[CategoryRule]:
+        """Retorna as regras das categorias não removidas"""
+        try:
+            query = (
+                select(CategoryRule)
+                .join(Category, Category.id == CategoryRule.category_id)
+                .where(Category.deleted.is_(False))
+                .order_by(CategoryRule.id)
+            )
+            return self.session.execute(query).scalars().all()
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar regras: {e}")
+            return []
+
+    def get_rules_by_category(self, category_id: int) -> List[CategoryRule]:
+        """Retorna as regras de uma categoria"""
+        try:
+            query = (
+                select(CategoryRule)
+                .where(CategoryRule.category_id == category_id)
+                .order_by(CategoryRule.id)
+            )
+            return self.session.execute(query).scalars().all()
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar regras da categoria: {e}")
+            return []
+
+    def get_categorizer(self) -> Categorizer:
+        """Compila todas as regras em um Categorizer"""
+        return Categorizer(self.get_all_rules())
+
+    def create_rule(
+        self,
+        category_id: int,
+        kind: str,
+        pattern: Optional[str] = None,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        priority: int = 0,
+    ) -> Optional[CategoryRule]:
+        """Cria uma regra de categorização (valida o padrão antes)"""
+        try:
+            compile_rule_pattern(kind, pattern)
+        except ValueError as e:
+            print(f"Regra inválida: {e}")
+            return None
+        rule = CategoryRule(
+            category_id=category_id,
+            kind=kind,
+            pattern=pattern,
+            min_value=min_value,
+            max_value=max_value,
+            priority=priority,
+        )
+        try:
+            self.session.add(rule)
+            self.session.commit()
+            self.session.refresh(rule)
+            return rule
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao criar regra: {e}")
+            return None
+
+    def delete_rule(self, rule_id: int) -> bool:
+        """Remove uma regra pelo ID"""
+        try:
+            rule = self.session.get(CategoryRule, rule_id)
+            if rule is None:
+                print("Regra não encontrada")
+                return False
+            self.session.delete(rule)
+            self.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao remover regra: {e}")
+            return False
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
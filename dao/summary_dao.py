@@ -0,0 +1,498 @@
+# summary_dao.py
+"""
+Totais mensais pré-agregados (tabela MONTHLY_SUMMARY).
+
+O TransactionDAO aplica um delta na tabela a cada escrita, dentro da mesma
+transação, de forma que totais por tipo, mês e categoria saiam de poucas
+linhas em vez de uma varredura de TRANSACTIONS. ``rebuild`` recalcula tudo
+a partir das transações (ex: depois de importar dados por fora do DAO).
+O arquivamento (dao/archive_dao.py) não altera o resumo.
+"""
+import datetime
+from itertools import groupby
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    exists,
+    extract,
+    func,
+    insert,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import aliased
+from models.models import (
+    ArchivedTransaction,
+    Category,
+    CategoryClosure,
+    MonthlySummary,
+    Transaction,
+)
+from db.config import SessionLocal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+def apply_summary_delta(
+    session,
+    transaction_date: datetime.datetime,
+    category_id: int,
+    type: str,
+    value: float,
+    count: int,
+):
+    """Soma ``value``/``count`` à linha de resumo (cria a linha se preciso)"""
+    key = (
+        MonthlySummary.year == transaction_date.year,
+        MonthlySummary.month == transaction_date.month,
+        MonthlySummary.category_id == category_id,
+        MonthlySummary.type == type,
+    )
+    add = (
+        update(MonthlySummary)
+        .where(*key)
+        .values(
+            total=MonthlySummary.total + value,
+            count=MonthlySummary.count + count,
+        )
+    )
+    result = session.execute(add)
+    if count < 0:
+        # Linhas que ficaram sem transações são removidas
+        session.execute(delete(MonthlySummary).where(*key, MonthlySummary.count <= 0))
+    elif result.rowcount == 0:
+        try:
+            # Savepoint: se outro escritor criou a linha primeiro, só a
+            # inserção é desfeita, não a escrita do usuário
+            with session.begin_nested():
+                session.execute(
+                    insert(MonthlySummary).values(
+                        year=transaction_date.year,
+                        month=transaction_date.month,
+                        category_id=category_id,
+                        type=type,
+                        total=value,
+                        count=count,
+                    )
+                )
+        except IntegrityError:
+            session.execute(add)
+
+
+def move_summary(session, source_category_id: int, target_category_id: int):
+    """Soma o resumo de uma categoria ao de outra (sem uma linha por mês)"""
+    source = aliased(MonthlySummary)
+    target = aliased(MonthlySummary)
+
+    def same_key(other, category_id):
+        return and_(
+            other.year == MonthlySummary.year,
+            other.month == MonthlySummary.month,
+            other.type == MonthlySummary.type,
+            other.category_id == category_id,
+        )
+
+    from_source = same_key(source, source_category_id)
+    # Meses que as duas categorias já têm: soma na linha do destino
+    session.execute(
+        update(MonthlySummary)
+        .where(
+            MonthlySummary.category_id == target_category_id,
+            exists().where(from_source),
+        )
+        .values(
+            total=MonthlySummary.total
+            + select(source.total).where(from_source).scalar_subquery(),
+            count=MonthlySummary.count
+            + select(source.count).where(from_source).scalar_subquery(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # Meses só da origem: a linha passa para o destino
+    session.execute(
+        update(MonthlySummary)
+        .where(
+            MonthlySummary.category_id == source_category_id,
+            ~exists().where(same_key(target, target_category_id)),
+        )
+        .values(category_id=target_category_id)
+        .execution_options(synchronize_session=False)
+    )
+    session.execute(
+        delete(MonthlySummary)
+        .where(MonthlySummary.category_id == source_category_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_to_summary(session, transaction: Transaction, sign: int = 1):
+    """Soma (sign=1) ou subtrai (sign=-1) uma transação do resumo"""
+    apply_summary_delta(
+        session,
+        transaction.transaction_date,
+        transaction.category_id,
+        transaction.type,
+        sign * transaction.transaction_value,
+        sign,
+    )
+
+
+class SummaryDAO:
+    """Data Access Object para a tabela MonthlySummary"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    def _filters(self, year: Optional[int]):
+        return [MonthlySummary.year == year] if year is not None else []
+
+    def get_totals_by_type(self, year: Optional[int] = None) -> Dict[str, float]:
+        """Retorna o total de receitas e despesas"""
+        totals = {"income": 0.0, "expense": 0.0}
+        try:
+            query = (
+                select(MonthlySummary.type, func.sum(MonthlySummary.total))
+                .where(*self._filters(year))
+                .group_by(MonthlySummary.type)
+            )
+            for type, total in self.session.execute(query):
+                if type == "Receita":
+                    totals["income"] = float(total or 0.0)
+                elif type == "Despesa":
+                    totals["expense"] = float(total or 0.0)
+            return totals
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais: {e}")
+            return totals
+
+    def get_totals_by_month(
+        self, year: Optional[int] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Retorna o total de receitas e despesas por mês ("YYYY-MM")"""
+        try:
+            query = (
+                select(
+                    MonthlySummary.year,
+                    MonthlySummary.month,
+                    MonthlySummary.type,
+                    func.sum(MonthlySummary.total),
+                )
+                .where(*self._filters(year))
+                .group_by(
+                    MonthlySummary.year, MonthlySummary.month, MonthlySummary.type
+                )
+            )
+            totals = {}
+            for row_year, month, type, total in self.session.execute(query):
+                key = f"{row_year:04d}-{month:02d}"
+                values = totals.setdefault(key, {"income": 0.0, "expense": 0.0})
+                if type == "Receita":
+                    values["income"] += float(total or 0.0)
+                elif type == "Despesa":
+                    values["expense"] += float(total or 0.0)
+            return dict(sorted(totals.items()))
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais por mês: {e}")
+            return {}
+
+    def get_totals_by_category(
+        self, year: Optional[int] = None, rollup: bool = False
+    ) -> List[Dict]:
+        """
+        Retorna receitas e despesas por categoria
+
+        Args:
+            rollup: Soma em cada categoria também as subcategorias (em
+                qualquer profundidade), com um único join na tabela de
+                fechamento.
+        """
+        try:
+            query = (
+                select(
+                    MonthlySummary.category_id,
+                    Category.name,
+                    MonthlySummary.type,
+                    func.sum(MonthlySummary.total),
+                )
+                .join(Category, Category.id == MonthlySummary.category_id)
+                .where(*self._filters(year))
+                .group_by(
+                    MonthlySummary.category_id, Category.name, MonthlySummary.type
+                )
+            )
+            if rollup:
+                # Agrega por categoria antes do join: o fechamento de uma
+                # árvore profunda tem muito mais linhas que as categorias
+                per_category = (
+                    select(
+                        MonthlySummary.category_id,
+                        MonthlySummary.type,
+                        func.sum(MonthlySummary.total).label("total"),
+                    )
+                    .where(*self._filters(year))
+                    .group_by(MonthlySummary.category_id, MonthlySummary.type)
+                    .subquery()
+                )
+                query = (
+                    select(
+                        CategoryClosure.ancestor_id,
+                        Category.name,
+                        per_category.c.type,
+                        func.sum(per_category.c.total),
+                    )
+                    .join(
+                        per_category,
+                        per_category.c.category_id == CategoryClosure.descendant_id,
+                    )
+                    .join(Category, Category.id == CategoryClosure.ancestor_id)
+                    .group_by(
+                        CategoryClosure.ancestor_id, Category.name, per_category.c.type
+                    )
+                )
+            totals = {}
+            for category_id, name, type, total in self.session.execute(query):
+                values = totals.setdefault(
+                    category_id,
+                    {
+                        "category_id": category_id,
+                        "category": name,
+                        "income": 0.0,
+                        "expense": 0.0,
+                    },
+                )
+                if type == "Receita":
+                    values["income"] += float(total or 0.0)
+                elif type == "Despesa":
+                    values["expense"] += float(total or 0.0)
+            return sorted(totals.values(), key=lambda v: v["category"])
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais por categoria: {e}")
+            return []
+
+    def get_subtree_month_totals(self, category_id: int) -> Dict[str, float]:
+        """
+        Retorna a soma dos valores por mês ("YYYY-MM") de uma categoria e de
+        todas as subcategorias, em uma consulta
+        """
+        try:
+            query = (
+                select(
+                    MonthlySummary.year,
+                    MonthlySummary.month,
+                    func.sum(MonthlySummary.total),
+                )
+                .join(
+                    CategoryClosure,
+                    CategoryClosure.descendant_id == MonthlySummary.category_id,
+                )
+                .where(CategoryClosure.ancestor_id == category_id)
+                .group_by(MonthlySummary.year, MonthlySummary.month)
+                .order_by(MonthlySummary.year, MonthlySummary.month)
+            )
+            return {
+                f"{year:04d}-{month:02d}": float(total or 0.0)
+                for year, month, total in self.session.execute(query)
+            }
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais da categoria: {e}")
+            return {}
+
+    def get_summary_rows(
+        self,
+    ) -> Optional[List[Tuple[int, int, int, str, float]]]:
+        """
+        Retorna todas as linhas do resumo como (categoria, ano, mês, tipo,
+        total), ou None se a leitura falhar
+        """
+        try:
+            query = select(
+                MonthlySummary.category_id,
+                MonthlySummary.year,
+                MonthlySummary.month,
+                MonthlySummary.type,
+                MonthlySummary.total,
+            )
+            return [
+                (category_id, year, month, type, float(total or 0.0))
+                for category_id, year, month, type, total in self.session.execute(query)
+            ]
+        except SQLAlchemyError as e:
+            print(f"Erro ao ler o resumo mensal: {e}")
+            return None
+
+    @staticmethod
+    def _amount(type: Optional[str]):
+        """Total de um tipo ou, com None, o saldo (receitas - despesas)"""
+        if type is not None:
+            return MonthlySummary.total, [MonthlySummary.type == type]
+        signed = case(
+            (MonthlySummary.type == "Receita", MonthlySummary.total),
+            (MonthlySummary.type == "Despesa", -MonthlySummary.total),
+            else_=0.0,
+        )
+        return signed, []
+
+    def get_month_range(
+        self, type: Optional[str] = "Despesa"
+    ) -> Optional[Tuple[str, str]]:
+        """Primeiro e último mês ("YYYY-MM") do resumo (None se vazio)"""
+        _, filters = self._amount(type)
+        key = MonthlySummary.year * 100 + MonthlySummary.month
+        try:
+            first, last = self.session.execute(
+                select(func.min(key), func.max(key)).where(*filters)
+            ).one()
+            if first is None:
+                return None
+            return (
+                f"{first // 100:04d}-{first % 100:02d}",
+                f"{last // 100:04d}-{last % 100:02d}",
+            )
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar o período do resumo: {e}")
+            return None
+
+    def iter_category_month_totals(
+        self, type: Optional[str] = "Despesa", batch_size: int = 10_000
+    ) -> Iterator[Tuple[int, str, Dict[str, float]]]:
+        """
+        Totais de cada categoria por mês, em uma única consulta agrupada
+        por categoria e mês, lida aos poucos
+
+        Args:
+            type: "Despesa", "Receita" ou None para o saldo do mês.
+
+        Yields:
+            (ID, nome, {"YYYY-MM": total}) de uma categoria por vez, em
+            ordem de nome.
+        """
+        amount, filters = self._amount(type)
+        query = (
+            select(
+                MonthlySummary.category_id,
+                Category.name,
+                MonthlySummary.year,
+                MonthlySummary.month,
+                func.sum(amount),
+            )
+            .join(Category, Category.id == MonthlySummary.category_id)
+            .where(*filters)
+            .group_by(
+                MonthlySummary.category_id,
+                Category.name,
+                MonthlySummary.year,
+                MonthlySummary.month,
+            )
+            .order_by(
+                Category.name,
+                MonthlySummary.category_id,
+                MonthlySummary.year,
+                MonthlySummary.month,
+            )
+            .execution_options(yield_per=batch_size)
+        )
+        try:
+            rows = self.session.execute(query)
+            for (category_id, name), group in groupby(rows, key=lambda r: r[:2]):
+                yield category_id, name, {
+                    f"{year:04d}-{month:02d}": float(total or 0.0)
+                    for _, _, year, month, total in group
+                }
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais por categoria e mês: {e}")
+
+    def get_opening_balances(self) -> Dict[Tuple[int, int], float]:
+        """
+        Saldo (receitas - despesas) acumulado antes de cada mês do resumo.
+
+        Serve de ponto de controle para o saldo corrente: o saldo de uma
+        transação é o de abertura do seu mês mais o acumulado dentro do mês.
+        """
+        try:
+            query = (
+                select(
+                    MonthlySummary.year,
+                    MonthlySummary.month,
+                    MonthlySummary.type,
+                    func.sum(MonthlySummary.total),
+                )
+                .group_by(
+                    MonthlySummary.year, MonthlySummary.month, MonthlySummary.type
+                )
+                .order_by(MonthlySummary.year, MonthlySummary.month)
+            )
+            net = {}
+            for year, month, type, total in self.session.execute(query):
+                sign = {"Receita": 1, "Despesa": -1}.get(type, 0)
+                net[(year, month)] = net.get((year, month), 0.0) + sign * float(
+                    total or 0.0
+                )
+            balances, balance = {}, 0.0
+            for key in sorted(net):
+                balances[key] = balance
+                balance += net[key]
+            return balances
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular saldos de abertura: {e}")
+            return {}
+
+    def rebuild(self) -> bool:
+        """Recalcula todo o resumo a partir das transações (e do arquivo)"""
+        try:
+            parts = [
+                select(
+                    model.transaction_date.label("transaction_date"),
+                    model.category_id.label("category_id"),
+                    model.type.label("type"),
+                    model.transaction_value.label("transaction_value"),
+                ).where(model.deleted.is_(False))
+                for model in (Transaction, ArchivedTransaction)
+            ]
+            source = union_all(*parts).subquery()
+            year = extract("year", source.c.transaction_date)
+            month = extract("month", source.c.transaction_date)
+            self.session.execute(delete(MonthlySummary))
+            self.session.execute(
+                insert(MonthlySummary).from_select(
+                    ["year", "month", "category_id", "type", "total", "count"],
+                    select(
+                        year,
+                        month,
+                        source.c.category_id,
+                        source.c.type,
+                        func.sum(source.c.transaction_value),
+                        func.count(),
+                    ).group_by(year, month, source.c.category_id, source.c.type),
+                )
+            )
+            self.session.commit()
+            return True
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao reconstruir resumo mensal: {e}")
+            return False
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
@@ -0,0 +1,293 @@
+# tag_dao.py
+"""
+Etiquetas de transações (muitos-para-muitos, tabelas TAGS e TRANSACTION_TAGS).
+
+Ao contrário da categoria, uma transação pode ter várias etiquetas. Mudar as
+etiquetas de uma transação gera uma nova versão dela, de forma que a tela,
+a réplica e o índice de bitmaps (db/tag_index.py) recebam a alteração pelo
+mesmo delta (``row_changes_since``) das demais escritas.
+"""
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from models.models import Tag, Transaction, TransactionTag
+from dao.versioning import next_version
+from db import change_bus, replica
+from db.config import SessionLocal
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# IDs por comando (o Firebird limita uma lista IN a 1500 valores)
+TAG_CHUNK_SIZE = 1000
+
+
+def normalize_tag(name: str) -> str:
+    """Nome canônico: minúsculas, sem espaços nas pontas nem repetidos"""
+    return " ".join(name.split()).lower()
+
+
+def chunks(ids: Sequence[int], size: int = TAG_CHUNK_SIZE):
+    """Fatias de ``size`` IDs"""
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+class TagDAO:
+    """Data Access Object para as tabelas Tags e TransactionTags"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+        """
+        self.session = session if session is not None else SessionLocal()
+
+    def __enter__(self):
+        """Método chamado quando entra no bloco 'with'"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Método chamado quando sai do bloco 'with'"""
+        if exc_type is not None:
+            # Se houve exceção, faz rollback
+            self.session.rollback()
+        # Sempre fecha a sessão
+        self.close()
+        # Retorna False para propagar exceções (se houver)
+        return False
+
+    def get_all_tags(self) -> List[Tag]:
+        """Retorna todas as etiquetas, por nome"""
+        try:
+            return self.session.execute(select(Tag).order_by(Tag.name)).scalars().all()
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar etiquetas: {e}")
+            return []
+
+    def get_tags_by_name(self, names: Iterable[str]) -> Dict[str, Tag]:
+        """Etiquetas existentes com os nomes dados (normalizados)"""
+        names = sorted({normalize_tag(name) for name in names} - {""})
+        if not names:
+            return {}
+        try:
+            tags = self.session.execute(select(Tag).where(Tag.name.in_(names)))
+            return {tag.name: tag for tag in tags.scalars()}
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar etiquetas: {e}")
+            return {}
+
+    def get_transaction_tags(
+        self, transaction_ids: Sequence[int]
+    ) -> Dict[int, List[int]]:
+        """IDs das etiquetas de cada transação (as sem etiqueta ficam de fora)"""
+        tags = {}
+        try:
+            for chunk in chunks(list(transaction_ids)):
+                query = (
+                    select(TransactionTag.transaction_id, TransactionTag.tag_id)
+                    .where(TransactionTag.transaction_id.in_(chunk))
+                    .order_by(TransactionTag.transaction_id, TransactionTag.tag_id)
+                )
+                for transaction_id, tag_id in self.session.execute(query):
+                    tags.setdefault(transaction_id, []).append(tag_id)
+            return tags
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar etiquetas das transações: {e}")
+            return {}
+
+    def get_tag_names(self, transaction_id: int) -> List[str]:
+        """Nomes das etiquetas de uma transação"""
+        try:
+            query = (
+                select(Tag.name)
+                .join(TransactionTag, TransactionTag.tag_id == Tag.id)
+                .where(TransactionTag.transaction_id == transaction_id)
+                .order_by(Tag.name)
+            )
+            return list(self.session.execute(query).scalars())
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar etiquetas da transação: {e}")
+            return []
+
+    def iter_tag_members(self) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Cada etiqueta com os IDs das suas transações, uma etiqueta por vez
+        (monta os bitmaps)
+        """
+        # Pela conexão, sem o processamento de linhas do ORM: só inteiros
+        connection = self.session.connection()
+        for tag_id in self.session.execute(select(Tag.id).order_by(Tag.id)).scalars():
+            query = select(TransactionTag.transaction_id).where(
+                TransactionTag.tag_id == tag_id
+            )
+            yield tag_id, list(connection.execute(query).scalars())
+
+    def set_transaction_tags(
+        self, transaction_id: int, names: Iterable[str]
+    ) -> Optional[List[Tag]]:
+        """
+        Substitui as etiquetas de uma transação (criando as que não existem)
+
+        Returns:
+            As etiquetas da transação, ou None se ela não existe (ou está
+            arquivada) ou em caso de erro.
+        """
+        try:
+            if not self._hot_ids([transaction_id]):
+                print("Transação não encontrada")
+                return None
+            tags = self._get_or_create(names)
+            self.session.execute(
+                delete(TransactionTag).where(
+                    TransactionTag.transaction_id == transaction_id
+                )
+            )
+            if tags:
+                self.session.execute(
+                    insert(TransactionTag),
+                    [{"transaction_id": transaction_id, "tag_id": t.id} for t in tags],
+                )
+            version = self._touch([transaction_id])
+            self.session.commit()
+            for tag in tags:
+                self.session.refresh(tag)
+            self._publish([transaction_id], version)
+            return tags
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao gravar etiquetas: {e}")
+            return None
+
+    def tag_transactions(
+        self, name: str, transaction_ids: Sequence[int], remove: bool = False
+    ) -> Optional[int]:
+        """
+        Acrescenta (ou remove) uma etiqueta em várias transações de uma vez
+
+        Returns:
+            Quantidade de transações alteradas, ou None em caso de erro.
+        """
+        try:
+            if remove:
+                tag = list(self.get_tags_by_name([name]).values())
+                if not tag:
+                    return 0
+            else:
+                tag = self._get_or_create([name])
+            if not tag:
+                print("Nome de etiqueta vazio")
+                return None
+            tag_id = tag[0].id
+            changed = []
+            for chunk in chunks(sorted(set(transaction_ids))):
+                hot = self._hot_ids(chunk)
+                tagged = set(
+                    self.session.execute(
+                        select(TransactionTag.transaction_id).where(
+                            TransactionTag.tag_id == tag_id,
+                            TransactionTag.transaction_id.in_(hot),
+                        )
+                    ).scalars()
+                )
+                if remove:
+                    ids = sorted(tagged)
+                    if ids:
+                        self.session.execute(
+                            delete(TransactionTag).where(
+                                TransactionTag.tag_id == tag_id,
+                                TransactionTag.transaction_id.in_(ids),
+                            )
+                        )
+                else:
+                    ids = [id for id in hot if id not in tagged]
+                    if ids:
+                        self.session.execute(
+                            insert(TransactionTag),
+                            [{"transaction_id": id, "tag_id": tag_id} for id in ids],
+                        )
+                changed.extend(ids)
+            version = self._touch(changed) if changed else None
+            self.session.commit()
+            if changed:
+                self._publish(changed, version)
+            return len(changed)
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao gravar etiquetas: {e}")
+            return None
+
+    def delete_tag(self, tag_id: int) -> bool:
+        """Remove uma etiqueta de todas as transações e a própria etiqueta"""
+        try:
+            tag = self.session.get(Tag, tag_id)
+            if tag is None:
+                print("Etiqueta não encontrada")
+                return False
+            tagged = list(
+                self.session.execute(
+                    select(TransactionTag.transaction_id).where(
+                        TransactionTag.tag_id == tag_id
+                    )
+                ).scalars()
+            )
+            self.session.execute(
+                delete(TransactionTag).where(TransactionTag.tag_id == tag_id)
+            )
+            self.session.delete(tag)
+            touched = [id for chunk in chunks(tagged) for id in self._hot_ids(chunk)]
+            version = self._touch(touched) if touched else None
+            self.session.commit()
+            if touched:
+                self._publish(touched, version)
+            return True
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao remover etiqueta: {e}")
+            return False
+
+    def _get_or_create(self, names: Iterable[str]) -> List[Tag]:
+        """Etiquetas com os nomes dados, criando as que faltam (sem commit)"""
+        names = sorted({normalize_tag(name) for name in names} - {""})
+        existing = self.get_tags_by_name(names)
+        for name in names:
+            if name not in existing:
+                existing[name] = Tag(name=name)
+                self.session.add(existing[name])
+        self.session.flush()
+        return [existing[name] for name in names]
+
+    def _hot_ids(self, transaction_ids: Sequence[int]) -> List[int]:
+        """Transações vivas na tabela quente (as arquivadas são somente leitura)"""
+        return list(
+            self.session.execute(
+                select(Transaction.id)
+                .where(
+                    Transaction.id.in_(transaction_ids),
+                    Transaction.deleted.is_(False),
+                )
+                .order_by(Transaction.id)
+            ).scalars()
+        )
+
+    def _touch(self, transaction_ids: Sequence[int]) -> int:
+        """Dá uma nova versão às transações cujas etiquetas mudaram"""
+        version = next_version(self.session)
+        for chunk in chunks(transaction_ids):
+            self.session.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(chunk))
+                .values(version=version)
+                .execution_options(synchronize_session=False)
+            )
+        return version
+
+    def _publish(self, transaction_ids: Sequence[int], version: int):
+        """Leva a nova versão para a réplica e avisa os outros apps"""
+        for chunk in chunks(transaction_ids):
+            replica.fold_update(
+                Transaction, {"version": version}, Transaction.id.in_(chunk)
+            )
+        change_bus.publish("transactions", version, len(transaction_ids))
+
+    def close(self):
+        """Fecha a sessão do banco de dados"""
+        if self.session:
+            self.session.close()
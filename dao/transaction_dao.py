@@ -1,16 +1,213 @@
 # dao.py
-from sqlalchemy import select
+from sqlalchemy import and_, case, exists, extract, func, or_, select, union_all
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from models.models import Transaction
+from sqlalchemy.orm.exc import StaleDataError
+from models.fingerprint import fingerprint_of
+from models.models import ArchivedTransaction, Category, Transaction, TransactionTag
+from models.rows import TransactionRow
+from dao.summary_dao import SummaryDAO, add_to_summary, apply_summary_delta
+from dao.versioning import current_version, next_version
+from db import change_bus, replica
 from db.config import SessionLocal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from dataclasses import dataclass
+import datetime
+import heapq
+import sqlite3
+
+# Ordenações da tabela: chave -> (coluna, atributo de TransactionRow). Cada
+# uma tem um índice (coluna, id) para a paginação por chave
+SORT_KEYS = {
+    "date": (Transaction.transaction_date, "transaction_date"),
+    "value": (Transaction.transaction_value, "transaction_value"),
+    "type": (Transaction.type, "type"),
+    "category": (Category.name, "category_name"),
+}
+
+
+def parse_date(value):
+    """Aceita datetime, date ou texto ISO ("YYYY-MM-DD") e retorna datetime"""
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+def month_range(year: int, month: int):
+    """Início do mês e início do mês seguinte"""
+    start = datetime.datetime(year, month, 1)
+    if month == 12:
+        return start, datetime.datetime(year + 1, 1, 1)
+    return start, datetime.datetime(year, month + 1, 1)
+
+
+def window_functions_supported(session) -> bool:
+    """Indica se o banco da sessão aceita SUM() OVER (...)"""
+    dialect = session.get_bind().dialect
+    if dialect.name == "sqlite":
+        return sqlite3.sqlite_version_info >= (3, 25)
+    if dialect.name == "firebird":
+        # Funções de janela existem a partir do Firebird 3
+        session.connection()
+        return (dialect.server_version_info or (0,)) >= (3,)
+    return True
+
+
+def sort_column(sort: str, model=Transaction):
+    """Coluna de SORT_KEYS na tabela ``model`` (Transaction ou o arquivo)"""
+    column = SORT_KEYS[sort][0]
+    if column.class_ is Transaction:
+        return getattr(model, column.key)
+    return column
+
+
+def row_sort_key(row: TransactionRow, sort: str = "date"):
+    """Chave de ordenação de uma linha, igual à usada no banco"""
+    return (getattr(row, SORT_KEYS[sort][1]), row.id)
+
+
+def merge_rows(*sorted_rows, key, reverse=False, limit=None) -> List[TransactionRow]:
+    """
+    Intercala listas de linhas já ordenadas por ``key``. Um ID repetido (a
+    réplica ainda não sabe que a linha foi arquivada) entra uma vez só.
+    """
+    seen = set()
+    merged = []
+    for row in heapq.merge(*sorted_rows, key=key, reverse=reverse):
+        if row.id not in seen:
+            seen.add(row.id)
+            merged.append(row)
+    return merged[:limit] if limit is not None else merged
+
+
+def archive_end(session) -> Optional[datetime.datetime]:
+    """Data da transação arquivada mais recente (None se não há arquivo)"""
+    return session.execute(
+        select(func.max(ArchivedTransaction.transaction_date))
+    ).scalar()
+
+
+@dataclass(frozen=True)
+class TransactionFilters:
+    """Filtros por coluna da tabela de transações (None = sem filtro)"""
+
+    # Trecho da descrição (sem diferenciar maiúsculas)
+    description: Optional[str] = None
+    type: Optional[str] = None
+    category_id: Optional[int] = None
+    # Período [start, end)
+    start: Optional[datetime.datetime] = None
+    end: Optional[datetime.datetime] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    # Etiquetas: todas as de ``tags`` e nenhuma das de ``exclude_tags``
+    tags: Tuple[int, ...] = ()
+    exclude_tags: Tuple[int, ...] = ()
+
+    @property
+    def has_tags(self) -> bool:
+        """Indica se há condição sobre etiquetas"""
+        return bool(self.tags or self.exclude_tags)
+
+    def tag_view(self, with_category: bool = True) -> "TransactionFilters":
+        """Só as etiquetas (e a categoria): o recorte de KPIs e gráficos"""
+        return TransactionFilters(
+            category_id=self.category_id if with_category else None,
+            tags=self.tags,
+            exclude_tags=self.exclude_tags,
+        )
+
+    def clauses(self, model=Transaction) -> list:
+        """Condições WHERE equivalentes (sobre Transaction ou o arquivo)"""
+        clauses = []
+        if self.description:
+            clauses.append(
+                func.lower(model.description).contains(
+                    self.description.lower(), autoescape=True
+                )
+            )
+        if self.type is not None:
+            clauses.append(model.type == self.type)
+        if self.category_id is not None:
+            clauses.append(model.category_id == self.category_id)
+        if self.start is not None:
+            clauses.append(model.transaction_date >= self.start)
+        if self.end is not None:
+            clauses.append(model.transaction_date < self.end)
+        if self.min_value is not None:
+            clauses.append(model.transaction_value >= self.min_value)
+        if self.max_value is not None:
+            clauses.append(model.transaction_value <= self.max_value)
+        for tag_id in self.tags:
+            clauses.append(
+                exists().where(
+                    TransactionTag.transaction_id == model.id,
+                    TransactionTag.tag_id == tag_id,
+                )
+            )
+        if self.exclude_tags:
+            clauses.append(
+                ~exists().where(
+                    TransactionTag.transaction_id == model.id,
+                    TransactionTag.tag_id.in_(self.exclude_tags),
+                )
+            )
+        return clauses
+
+    def matches(self, row: TransactionRow, tag_ids: Iterable[int] = ()) -> bool:
+        """
+        Aplica os mesmos filtros a uma linha já carregada
+
+        Args:
+            tag_ids: Etiquetas da linha (só usadas se houver filtro por elas).
+        """
+        if self.has_tags:
+            tag_ids = set(tag_ids)
+            if not tag_ids.issuperset(self.tags) or tag_ids.intersection(
+                self.exclude_tags
+            ):
+                return False
+        return (
+            (
+                not self.description
+                or self.description.lower() in (row.description or "").lower()
+            )
+            and self.type in (None, row.type)
+            and self.category_id in (None, row.category_id)
+            and (self.start is None or row.transaction_date >= self.start)
+            and (self.end is None or row.transaction_date < self.end)
+            and (self.min_value is None or row.transaction_value >= self.min_value)
+            and (self.max_value is None or row.transaction_value <= self.max_value)
+        )
 
 
 class TransactionDAO:
     """Data Access Object para a tabela Transactions"""
 
-    def __init__(self):
-        self.session = SessionLocal()
+    # Campos controlados pelo DAO, nunca copiados de transaction_data
+    PROTECTED_FIELDS = ("id", "version", "deleted", "fingerprint")
+
+    def __init__(self, session=None, read_replica=True):
+        """
+        Args:
+            session: Sessão a usar. Se None, abre uma nova com SessionLocal.
+            read_replica: Se False, as leituras também usam ``session``.
+        """
+        self.session = session if session is not None else SessionLocal()
+        # Leituras vão para a réplica local quando ela está habilitada
+        self._replica_session = (
+            replica.ReplicaSession()
+            if read_replica and replica.replica_enabled()
+            else None
+        )
+
+    @property
+    def read_session(self):
+        """Sessão usada nas leituras (réplica local ou banco primário)"""
+        if self._replica_session is not None:
+            return self._replica_session
+        return self.session
 
     def __enter__(self):
         """Método chamado quando entra no bloco 'with'"""
@@ -26,22 +223,265 @@ class TransactionDAO:
         # Retorna False para propagar exceções (se houver)
         return False
 
+    def _reaches_archive(self, start=None) -> bool:
+        """Indica se um período que começa em ``start`` alcança o arquivo"""
+        end = archive_end(self.session)
+        return end is not None and (start is None or start <= end)
+
+    def _hot_session(self, filters: Optional[TransactionFilters] = None):
+        """
+        Sessão das leituras da tabela quente. As etiquetas não são copiadas
+        para a réplica: filtros por etiqueta vão ao primário.
+        """
+        if filters is not None and filters.has_tags:
+            return self.session
+        return self.read_session
+
+    def _sources(self, start=None, filters: Optional[TransactionFilters] = None):
+        """
+        Pares (sessão, modelo) a consultar: o banco quente e, se o período
+        alcançar o arquivo, a tabela de arquivo (só existe no primário).
+        """
+        sources = [(self._hot_session(filters), Transaction)]
+        if self._reaches_archive(start):
+            sources.append((self.session, ArchivedTransaction))
+        return sources
+
     def get_all_transactions(self, order=False) -> List[Transaction]:
-        """Retorna todas as transações"""
+        """Retorna todas as transações (as arquivadas como ArchivedTransaction)"""
+        try:
+            results = []
+            for session, model in self._sources():
+                query = select(model).where(model.deleted.is_(False))
+                if order:
+                    query = query.order_by(model.transaction_date.desc())
+                results.append(session.execute(query).scalars().all())
+            if len(results) == 1:
+                return results[0]
+            if order:
+                return merge_rows(
+                    *results, key=lambda t: t.transaction_date, reverse=True
+                )
+            return [t for result in results for t in result]
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações: {e}")
+            return []
+
+    @staticmethod
+    def _row_query(model=Transaction):
+        """Projeção das colunas de TransactionRow (sem instâncias ORM)"""
+        return select(
+            model.id,
+            model.description,
+            model.transaction_date,
+            model.transaction_value,
+            model.type,
+            model.category_id,
+            Category.name,
+            model.version,
+            model.deleted,
+        ).outerjoin(Category, Category.id == model.category_id)
+
+    def _fetch_rows(self, query, session=None) -> List[TransactionRow]:
+        session = session if session is not None else self.read_session
+        return list(map(TransactionRow._make, session.execute(query)))
+
+    def get_transaction_rows(self, order=False) -> List[TransactionRow]:
+        """Retorna todas as transações como linhas compactas"""
         try:
-            query = select(Transaction)
+            results = []
+            for session, model in self._sources():
+                query = self._row_query(model).where(model.deleted.is_(False))
+                if order:
+                    query = query.order_by(model.transaction_date.desc())
+                results.append(self._fetch_rows(query, session))
             if order:
-                query = query.order_by(Transaction.transaction_date.desc())
-            transactions = self.session.execute(query).scalars().all()
-            return transactions
+                return merge_rows(
+                    *results, key=lambda row: row.transaction_date, reverse=True
+                )
+            # Sem ordem: só concatena (sem repetir IDs)
+            return merge_rows(*results, key=lambda row: 0)
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações: {e}")
+            return []
+
+    @classmethod
+    def _sorted_query(cls, model, sort, descending, filters, after, limit):
+        """Página ordenada por (coluna, id) da tabela ``model``"""
+        column = sort_column(sort, model)
+        query = cls._row_query(model).where(model.deleted.is_(False))
+        if filters is not None:
+            query = query.where(*filters.clauses(model))
+        if after is not None:
+            value = getattr(after, SORT_KEYS[sort][1])
+            if descending:
+                query = query.where(
+                    or_(column < value, and_(column == value, model.id < after.id))
+                )
+            else:
+                query = query.where(
+                    or_(column > value, and_(column == value, model.id > after.id))
+                )
+        if descending:
+            query = query.order_by(column.desc(), model.id.desc())
+        else:
+            query = query.order_by(column.asc(), model.id.asc())
+        return query.limit(limit)
+
+    def get_transaction_rows_sorted(
+        self,
+        sort: str = "date",
+        descending: bool = True,
+        filters: Optional[TransactionFilters] = None,
+        after: Optional[TransactionRow] = None,
+        limit: int = 200,
+    ) -> List[TransactionRow]:
+        """
+        Página de transações ordenada e filtrada no banco.
+
+        A paginação é por chave: a página seguinte começa depois da última
+        linha da anterior (``after``), sem OFFSET, e usa o índice (coluna, id)
+        da ordenação. O arquivo só é consultado quando o filtro de período o
+        alcança e a página pode conter linhas dele.
+
+        Args:
+            sort: Chave de SORT_KEYS.
+            after: Última linha da página anterior (None para a primeira).
+        """
+        args = (sort, descending, filters, after, limit)
+        try:
+            rows = self._fetch_rows(
+                self._sorted_query(Transaction, *args), self._hot_session(filters)
+            )
+            end = archive_end(self.session)
+            start = filters.start if filters is not None else None
+            if end is None or (start is not None and start > end):
+                return rows
+            if sort == "date":
+                # Todas as linhas arquivadas têm data <= end
+                if (
+                    descending
+                    and len(rows) == limit
+                    and rows[-1].transaction_date > end
+                ):
+                    return rows
+                if not descending and after and after.transaction_date > end:
+                    return rows
+            archived = self._fetch_rows(
+                self._sorted_query(ArchivedTransaction, *args), self.session
+            )
+            return merge_rows(
+                rows,
+                archived,
+                key=lambda row: row_sort_key(row, sort),
+                reverse=descending,
+                limit=limit,
+            )
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações: {e}")
+            return []
+
+    def get_transaction_rows_page(
+        self, limit: int, offset: int = 0
+    ) -> List[TransactionRow]:
+        """Retorna uma página de transações (por data, mais recentes primeiro)"""
+
+        def page_query(model, limit, offset=0):
+            return (
+                self._row_query(model)
+                .where(model.deleted.is_(False))
+                .order_by(model.transaction_date.desc(), model.id.desc())
+                .limit(limit)
+                .offset(offset)
+            )
+
+        try:
+            rows = self._fetch_rows(page_query(Transaction, limit, offset))
+            end = archive_end(self.session)
+            # Se a página toda é posterior ao arquivo, as linhas antes dela
+            # também são: a posição no banco quente é a posição final
+            if end is None or (len(rows) == limit and rows[-1].transaction_date > end):
+                return rows
+            hot = self._fetch_rows(page_query(Transaction, offset + limit))
+            archived = self._fetch_rows(
+                page_query(ArchivedTransaction, offset + limit), self.session
+            )
+            return merge_rows(
+                hot,
+                archived,
+                key=lambda row: (row.transaction_date, row.id),
+                reverse=True,
+                limit=offset + limit,
+            )[offset:]
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações: {e}")
+            return []
+
+    @classmethod
+    def _row_batches_query(cls, batch_size: int, offset: int = 0, model=Transaction):
+        return (
+            cls._row_query(model)
+            .where(model.deleted.is_(False))
+            .order_by(model.transaction_date.desc(), model.id.desc())
+            .offset(offset)
+            .execution_options(yield_per=batch_size)
+        )
+
+    def iter_transaction_row_batches(
+        self, batch_size: int = 5000, offset: int = 0
+    ) -> Iterator[List[TransactionRow]]:
+        """
+        Percorre as transações em lotes de linhas compactas: as do banco
+        quente e depois as arquivadas, cada parte por data (desc.)
+
+        Args:
+            offset: Quantidade de transações iniciais a pular.
+        """
+        try:
+            query = self._row_batches_query(batch_size, offset)
+            for partition in self.read_session.execute(query).partitions():
+                yield list(map(TransactionRow._make, partition))
+            if archive_end(self.session) is None:
+                return
+            if offset:
+                hot = self.read_session.execute(
+                    select(func.count(Transaction.id)).where(
+                        Transaction.deleted.is_(False)
+                    )
+                ).scalar()
+                offset = max(0, offset - hot)
+            query = self._row_batches_query(batch_size, offset, ArchivedTransaction)
+            for partition in self.session.execute(query).partitions():
+                yield list(map(TransactionRow._make, partition))
         except SQLAlchemyError as e:
             print(f"Erro ao buscar transações: {e}")
+
+    def get_transaction_rows_by_category(
+        self, category_id: int
+    ) -> List[TransactionRow]:
+        """Retorna as transações de uma categoria como linhas compactas"""
+        try:
+            results = []
+            for session, model in self._sources():
+                query = (
+                    self._row_query(model)
+                    .where(model.category_id == category_id, model.deleted.is_(False))
+                    .order_by(model.transaction_date.desc())
+                )
+                results.append(self._fetch_rows(query, session))
+            return merge_rows(
+                *results, key=lambda row: row.transaction_date, reverse=True
+            )
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações por categoria: {e}")
             return []
 
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """Retorna uma transação pelo ID"""
         try:
-            transaction = self.session.get(Transaction, transaction_id)
+            transaction = self.read_session.get(Transaction, transaction_id)
+            if transaction is not None and transaction.deleted:
+                return None
             return transaction
         except SQLAlchemyError as e:
             print(f"Erro ao buscar transação por ID: {e}")
@@ -52,10 +492,16 @@ class TransactionDAO:
     ) -> Optional[Transaction]:
         """Cria uma nova transação"""
         new_transaction = Transaction.from_dict(transaction_data)
+        new_transaction.transaction_date = parse_date(new_transaction.transaction_date)
+        new_transaction.fingerprint = fingerprint_of(new_transaction)
         try:
+            add_to_summary(self.session, new_transaction)
+            new_transaction.version = next_version(self.session)
             self.session.add(new_transaction)
             self.session.commit()
             self.session.refresh(new_transaction)
+            replica.fold(new_transaction)
+            change_bus.publish("transactions", new_transaction.version)
             return new_transaction
         except IntegrityError as e:
             self.session.rollback()
@@ -69,17 +515,44 @@ class TransactionDAO:
     def update_transaction(
         self, transaction_data: Dict[str, Any]
     ) -> Optional[Transaction]:
-        """Atualiza uma transação existente"""
+        """
+        Atualiza uma transação existente
+
+        Se ``transaction_data`` trouxer a chave "version" (a versão lida pelo
+        chamador), a atualização só é aplicada se ninguém tiver alterado a
+        transação desde então. A verificação é otimista: o UPDATE é emitido
+        com ``WHERE version = <versão carregada>``, sem bloquear a linha
+        enquanto o usuário edita.
+        """
         try:
             transaction_id = transaction_data.get("id")
+            expected_version = transaction_data.get("version")
             transaction = self.session.get(Transaction, transaction_id)
-            if transaction:
-                for key, value in transaction_data.items():
-                    if hasattr(transaction, key) and value is not None:
-                        setattr(transaction, key, value)
+            if not transaction or transaction.deleted:
+                print("Transação não encontrada")
+                return None
+            if expected_version not in (None, transaction.version):
+                print("Conflito de concorrência ao atualizar transação")
+                return None
+            add_to_summary(self.session, transaction, sign=-1)
+            for key, value in transaction_data.items():
+                if key in self.PROTECTED_FIELDS:
+                    continue
+                if hasattr(transaction, key) and value is not None:
+                    setattr(transaction, key, value)
+            transaction.transaction_date = parse_date(transaction.transaction_date)
+            transaction.fingerprint = fingerprint_of(transaction)
+            add_to_summary(self.session, transaction)
+            transaction.version = next_version(self.session)
             self.session.commit()
             self.session.refresh(transaction)
+            replica.fold(transaction)
+            change_bus.publish("transactions", transaction.version)
             return transaction
+        except StaleDataError:
+            self.session.rollback()
+            print("Conflito de concorrência ao atualizar transação")
+            return None
         except SQLAlchemyError as e:
             self.session.rollback()
             print(f"Erro ao atualizar transação: {e}")
@@ -89,13 +562,67 @@ class TransactionDAO:
             print(f"Erro de integridade ao atualizar transação: {e}")
             return None
 
+    def create_transactions(self, transactions_data: Sequence[Dict[str, Any]]) -> int:
+        """
+        Cria várias transações em uma única transação de banco.
+
+        Todas recebem a mesma versão e o resumo mensal recebe um único delta
+        por (mês, categoria, tipo).
+
+        Returns:
+            Quantidade de transações criadas (0 em caso de erro).
+        """
+        try:
+            version = next_version(self.session)
+            new_transactions = []
+            deltas = {}
+            for data in transactions_data:
+                transaction = Transaction.from_dict(data)
+                transaction.transaction_date = parse_date(transaction.transaction_date)
+                transaction.fingerprint = fingerprint_of(transaction)
+                transaction.version = version
+                new_transactions.append(transaction)
+                key = (
+                    transaction.transaction_date.year,
+                    transaction.transaction_date.month,
+                    transaction.category_id,
+                    transaction.type,
+                )
+                delta = deltas.setdefault(key, [0.0, 0])
+                delta[0] += transaction.transaction_value
+                delta[1] += 1
+            for (year, month, category_id, type), (value, count) in deltas.items():
+                apply_summary_delta(
+                    self.session,
+                    datetime.datetime(year, month, 1),
+                    category_id,
+                    type,
+                    value,
+                    count,
+                )
+            self.session.add_all(new_transactions)
+            self.session.flush()
+            rows = [replica.row_values(t) for t in new_transactions]
+            self.session.commit()
+            replica.fold_rows(Transaction.__table__, rows)
+            change_bus.publish("transactions", version, len(rows))
+            return len(rows)
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            print(f"Erro ao criar transações em lote: {e}")
+            return 0
+
     def delete_transaction(self, transaction_id: int) -> bool:
-        """Remove uma transação pelo ID"""
+        """Remove uma transação pelo ID (mantém uma lápide versionada)"""
         try:
             transaction = self.session.get(Transaction, transaction_id)
-            if transaction:
-                self.session.delete(transaction)
+            if transaction and not transaction.deleted:
+                add_to_summary(self.session, transaction, sign=-1)
+                transaction.deleted = True
+                transaction.version = next_version(self.session)
                 self.session.commit()
+                replica.fold(transaction)
+                change_bus.publish("transactions", transaction.version)
                 return True
             else:
                 print("Transação não encontrada")
@@ -105,54 +632,308 @@ class TransactionDAO:
             print(f"Erro ao remover transação: {e}")
             return False
 
-    def get_totals_by_type(self) -> Dict[str, float]:
-        """Retorna o total de receitas e despesas"""
+    def get_totals_by_type(
+        self, filters: Optional[TransactionFilters] = None
+    ) -> Dict[str, float]:
+        """Retorna o total de receitas e despesas (das transações filtradas)"""
+        totals = {"income": 0.0, "expense": 0.0}
+        clauses = filters.clauses if filters is not None else lambda model: []
+        start = filters.start if filters is not None else None
         try:
-            totals = {"income": 0.0, "expense": 0.0}
-            transactions = self.get_all_transactions()
-            for transaction in transactions:
-                if transaction.type == "Receita":
-                    totals["income"] += transaction.transaction_value
-                elif transaction.type == "Despesa":
-                    totals["expense"] += transaction.transaction_value
+            for session, model in self._sources(start, filters):
+                query = (
+                    select(model.type, func.sum(model.transaction_value))
+                    .where(model.deleted.is_(False), *clauses(model))
+                    .group_by(model.type)
+                )
+                for type, total in session.execute(query):
+                    if type == "Receita":
+                        totals["income"] += float(total or 0.0)
+                    elif type == "Despesa":
+                        totals["expense"] += float(total or 0.0)
             return totals
         except SQLAlchemyError as e:
             print(f"Erro ao calcular totais: {e}")
-            return {"income": 0.0, "expense": 0.0}
+            return totals
 
-    def get_totals_by_month(self) -> Dict[str, Dict[str, float]]:
-        """Retorna o total de receitas e despesas por mês"""
+    def get_totals_by_month(
+        self,
+        filters: Optional[TransactionFilters] = None,
+        category_ids: Optional[Sequence[int]] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Retorna o total de receitas e despesas por mês ("YYYY-MM")
+
+        Args:
+            filters: Filtros das transações somadas (ex: por etiqueta).
+            category_ids: Restringe a soma a estas categorias.
+        """
+        clauses = filters.clauses if filters is not None else lambda model: []
+        start = filters.start if filters is not None else None
         try:
             totals = {}
-            transactions = self.get_all_transactions()
-            for transaction in transactions:
-                month = transaction.transaction_date.strftime("%Y-%m")
-                if month not in totals:
-                    totals[month] = {"income": 0.0, "expense": 0.0}
-                if transaction.type == "Receita":
-                    totals[month]["income"] += transaction.transaction_value
-                elif transaction.type == "Despesa":
-                    totals[month]["expense"] += transaction.transaction_value
-            return totals
+            for session, model in self._sources(start, filters):
+                year = extract("year", model.transaction_date)
+                month = extract("month", model.transaction_date)
+                if category_ids is not None:
+                    in_categories = [model.category_id.in_(category_ids)]
+                else:
+                    in_categories = []
+                query = (
+                    select(year, month, model.type, func.sum(model.transaction_value))
+                    .where(model.deleted.is_(False), *clauses(model), *in_categories)
+                    .group_by(year, month, model.type)
+                )
+                for row_year, row_month, type, total in session.execute(query):
+                    key = f"{int(row_year):04d}-{int(row_month):02d}"
+                    values = totals.setdefault(key, {"income": 0.0, "expense": 0.0})
+                    if type == "Receita":
+                        values["income"] += float(total or 0.0)
+                    elif type == "Despesa":
+                        values["expense"] += float(total or 0.0)
+            return dict(sorted(totals.items()))
         except SQLAlchemyError as e:
             print(f"Erro ao calcular totais por mês: {e}")
             return {}
 
+    def get_running_balances(self, rows: Sequence[TransactionRow]) -> Dict[int, float]:
+        """
+        Saldo corrente (receitas - despesas, por data e id) até cada linha.
+
+        O saldo de abertura de cada mês vem do resumo mensal; dentro do mês,
+        a soma acumulada sai de SUM() OVER (ORDER BY data, id), ou é feita em
+        Python quando o banco não tem funções de janela. O custo depende dos
+        meses das linhas pedidas, não do tamanho da tabela. Meses que
+        alcançam o arquivo somam as duas tabelas (UNION ALL).
+
+        Usa sempre o banco primário: o resumo mensal não vai para a réplica.
+
+        Returns:
+            Dicionário {id da transação: saldo}.
+        """
+        if not rows:
+            return {}
+        ids = [row.id for row in rows]
+        ranges = [
+            month_range(*key)
+            for key in sorted(
+                {
+                    (row.transaction_date.year, row.transaction_date.month)
+                    for row in rows
+                }
+            )
+        ]
+        try:
+            opening = SummaryDAO(session=self.session).get_opening_balances()
+            models = [Transaction]
+            if self._reaches_archive(ranges[0][0]):
+                models.append(ArchivedTransaction)
+            parts = [
+                select(
+                    model.id.label("id"),
+                    model.transaction_date.label("transaction_date"),
+                    case(
+                        (model.type == "Receita", model.transaction_value),
+                        (model.type == "Despesa", -model.transaction_value),
+                        else_=0.0,
+                    ).label("value"),
+                ).where(
+                    model.deleted.is_(False),
+                    or_(
+                        *(
+                            and_(
+                                model.transaction_date >= start,
+                                model.transaction_date < end,
+                            )
+                            for start, end in ranges
+                        )
+                    ),
+                )
+                for model in models
+            ]
+            source = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+            date = source.c.transaction_date
+            if window_functions_supported(self.session):
+                year, month = extract("year", date), extract("month", date)
+                running = select(
+                    source.c.id,
+                    year.label("year"),
+                    month.label("month"),
+                    func.sum(source.c.value)
+                    .over(partition_by=(year, month), order_by=(date, source.c.id))
+                    .label("balance"),
+                ).subquery()
+                result = self.session.execute(
+                    select(running).where(running.c.id.in_(ids))
+                )
+                return {
+                    id: opening.get((int(y), int(m)), 0.0) + float(balance)
+                    for id, y, m, balance in result
+                }
+            # Sem funções de janela: acumula em Python, mês a mês
+            query = select(source).order_by(date, source.c.id)
+            wanted, balances = set(ids), {}
+            current_month, balance = None, 0.0
+            for id, transaction_date, value in self.session.execute(query):
+                key = (transaction_date.year, transaction_date.month)
+                if key != current_month:
+                    current_month, balance = key, opening.get(key, 0.0)
+                balance += float(value)
+                if id in wanted:
+                    balances[id] = balance
+            return balances
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular saldos: {e}")
+            return {}
+
     def get_transactions_by_category(self, category_id: int) -> List[Transaction]:
         """Retorna as transações de uma categoria específica"""
+        try:
+            results = []
+            for session, model in self._sources():
+                query = (
+                    select(model)
+                    .where(model.category_id == category_id, model.deleted.is_(False))
+                    .order_by(model.transaction_date.desc())
+                )
+                results.append(session.execute(query).scalars().all())
+            return merge_rows(*results, key=lambda t: t.transaction_date, reverse=True)
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar transações por categoria: {e}")
+            return []
+
+    def _period_filters(self, start, end, category_ids, model=Transaction):
+        """Filtros comuns das consultas agregadas por período"""
+        filters = [
+            model.deleted.is_(False),
+            model.transaction_date >= start,
+            model.transaction_date < end,
+        ]
+        if category_ids is not None:
+            filters.append(model.category_id.in_(category_ids))
+        return filters
+
+    def get_category_month_totals(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        category_ids: Optional[Sequence[int]] = None,
+    ) -> List[Any]:
+        """
+        Retorna totais e contagens por categoria, ano, mês e tipo no período
+        [start, end), agregados no banco com um único GROUP BY (por tabela,
+        se o período alcançar o arquivo).
+
+        Cada linha tem: category_id, year, month, type, total, count.
+        """
+        try:
+            results = []
+            for session, model in self._sources(start):
+                year = extract("year", model.transaction_date).label("year")
+                month = extract("month", model.transaction_date).label("month")
+                query = (
+                    select(
+                        model.category_id,
+                        year,
+                        month,
+                        model.type,
+                        func.sum(model.transaction_value).label("total"),
+                        func.count(model.id).label("count"),
+                    )
+                    .where(*self._period_filters(start, end, category_ids, model))
+                    .group_by(model.category_id, year, month, model.type)
+                )
+                results.append(session.execute(query).all())
+            if len(results) == 1:
+                return results[0]
+            totals = {}
+            for result in results:
+                for category_id, year, month, type, total, count in result:
+                    key = (category_id, int(year), int(month), type)
+                    values = totals.setdefault(key, [0.0, 0])
+                    values[0] += float(total or 0.0)
+                    values[1] += count
+            return [(*key, total, count) for key, (total, count) in totals.items()]
+        except SQLAlchemyError as e:
+            print(f"Erro ao calcular totais por categoria e mês: {e}")
+            return []
+
+    def get_largest_expenses(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        category_ids: Optional[Sequence[int]] = None,
+        limit: int = 10,
+    ) -> List[Any]:
+        """Retorna as maiores despesas do período [start, end)"""
+        try:
+            results = []
+            for session, model in self._sources(start):
+                query = (
+                    select(
+                        model.id,
+                        model.transaction_date,
+                        model.description,
+                        model.transaction_value,
+                        model.category_id,
+                    )
+                    .where(
+                        model.type == "Despesa",
+                        *self._period_filters(start, end, category_ids, model),
+                    )
+                    .order_by(model.transaction_value.desc(), model.id)
+                    .limit(limit)
+                )
+                results.append(session.execute(query).all())
+            return merge_rows(
+                *results, key=lambda row: (-row.transaction_value, row.id), limit=limit
+            )
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar maiores despesas: {e}")
+            return []
+
+    def changes_since(self, version: int) -> List[Transaction]:
+        """Retorna as transações (inclusive lápides) alteradas após a versão"""
         try:
             query = (
                 select(Transaction)
-                .where(Transaction.category_id == category_id)
-                .order_by(Transaction.transaction_date.desc())
+                .where(Transaction.version > version)
+                .order_by(Transaction.version)
             )
-            transactions = self.session.execute(query).scalars().all()
-            return transactions
+            return self.read_session.execute(query).scalars().all()
         except SQLAlchemyError as e:
-            print(f"Erro ao buscar transações por categoria: {e}")
+            print(f"Erro ao buscar alterações de transações: {e}")
             return []
 
+    def row_changes_since(self, version: int) -> List[TransactionRow]:
+        """Como changes_since, mas retornando linhas compactas"""
+        try:
+            query = (
+                self._row_query()
+                .where(Transaction.version > version)
+                .order_by(Transaction.version)
+            )
+            return self._fetch_rows(query)
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar alterações de transações: {e}")
+            return []
+
+    def current_version(self) -> int:
+        """
+        Retorna a versão de dados mais recente.
+
+        Lida sempre no banco primário: a réplica não tem a tabela de arquivo
+        (nem as versões de arquivamento) e pode estar atrasada.
+        """
+        try:
+            return current_version(self.session)
+        except SQLAlchemyError as e:
+            print(f"Erro ao buscar versão dos dados: {e}")
+            return 0
+
     def close(self):
         """Fecha a sessão do banco de dados"""
         if self.session:
             self.session.close()
+        if self._replica_session is not None:
+            self._replica_session.close()
@@ -0,0 +1,151 @@
+# versioning.py
+"""
+Controle de versões de dados compartilhado pelos DAOs.
+
+Cada escrita reserva um número global e o grava na linha alterada; um
+leitor pede apenas o que mudou desde a última versão vista.
+
+No Firebird o número vem de um generator (DATA_VERSION_SEQ): o incremento
+não participa da transação e não trava nada, então escritores de vários
+processos não fazem fila numa linha de contador (nem perdem a escrita num
+conflito de atualização). O preço é que versões podem ser confirmadas fora
+de ordem: uma importação longa reserva a versão no início e confirma depois
+de escritas com versões maiores. Por isso ``current_version`` não passa do
+horizonte confirmado (``settled_version``): antes de reservar, o escritor
+grava na variável de contexto da transação o valor do generator, visível
+aos outros em MON$CONTEXT_VARIABLES até o commit ou rollback; nenhuma versão
+até o menor desses valores pode mais aparecer. Quem usa ``current_version``
+como marcador (lido antes do delta) nunca perde uma escrita atrasada.
+
+Nos demais bancos (SQLite) o contador é a linha DATA_VERSION, incrementada
+na transação da escrita: o SQLite já serializa os escritores, e a ordem das
+versões acompanha a dos commits.
+"""
+from sqlalchemy import func, literal_column, select, text, update
+from models.models import (
+    VERSION_SEQUENCE,
+    ArchivedTransaction,
+    Category,
+    DataVersion,
+    Transaction,
+)
+
+VERSION_ROW_ID = 1
+
+# Variável de contexto (USER_TRANSACTION) dos escritores com versão pendente
+PENDING_VARIABLE = "DATA_VERSION_PENDING"
+
+
+def uses_sequence(session) -> bool:
+    """Indica se as versões vêm do generator (Firebird)"""
+    return session.get_bind().dialect.name == "firebird"
+
+
+def _generator(bind):
+    """Nome do generator pronto para uso em GEN_ID"""
+    preparer = bind.dialect.identifier_preparer
+    return preparer.format_sequence(VERSION_SEQUENCE)
+
+
+def next_version(session) -> int:
+    """Reserva o próximo número de versão (ver o docstring do módulo)"""
+    if uses_sequence(session):
+        # Marca a transação como pendente antes de reservar: o limite
+        # inferior gravado vale até o commit (ver settled_version)
+        session.execute(
+            text(
+                "SELECT RDB$SET_CONTEXT('USER_TRANSACTION', :name, COALESCE("
+                "RDB$GET_CONTEXT('USER_TRANSACTION', :name), "
+                f"CAST(GEN_ID({_generator(session.get_bind())}, 0) AS VARCHAR(20))))"
+                " FROM RDB$DATABASE"
+            ),
+            {"name": PENDING_VARIABLE},
+        )
+        return session.execute(select(VERSION_SEQUENCE.next_value())).scalar_one()
+    result = session.execute(
+        update(DataVersion)
+        .where(DataVersion.id == VERSION_ROW_ID)
+        .values(value=DataVersion.value + 1)
+    )
+    if result.rowcount == 0:
+        # Primeiro uso: cria a linha do contador
+        session.add(DataVersion(id=VERSION_ROW_ID, value=1))
+        session.flush()
+        return 1
+    return session.execute(
+        select(DataVersion.value).where(DataVersion.id == VERSION_ROW_ID)
+    ).scalar_one()
+
+
+def settled_version(session):
+    """
+    Maior versão até a qual nenhuma escrita pode mais ser confirmada, ou None
+    quando os escritores são serializados (SQLite).
+
+    Lida numa conexão própria: o retrato das tabelas MON$ vale a transação
+    inteira, e o da sessão pode ser anterior a escritas já confirmadas. O
+    generator é lido antes dos pendentes: quem reservar depois fica acima.
+    """
+    if not uses_sequence(session):
+        return None
+    bind = session.get_bind()
+    with bind.connect() as connection:
+        reserved = connection.execute(
+            select(func.gen_id(literal_column(_generator(bind)), 0))
+        ).scalar_one()
+        pending = connection.execute(
+            text(
+                "SELECT MIN(CAST(MON$VARIABLE_VALUE AS BIGINT)) "
+                "FROM MON$CONTEXT_VARIABLES "
+                "WHERE MON$VARIABLE_NAME = :name AND MON$TRANSACTION_ID IS NOT NULL"
+            ),
+            {"name": PENDING_VARIABLE},
+        ).scalar()
+    return reserved if pending is None else min(reserved, pending)
+
+
+def current_version(session) -> int:
+    """
+    Maior versão já gravada em categorias ou transações.
+
+    Inclui as versões de arquivamento: arquivar tira linhas da tabela quente
+    (talvez a de maior versão), e a versão de dados nunca pode voltar atrás.
+    No Firebird não passa de ``settled_version``: tudo até a versão retornada
+    já está confirmado, e um delta lido depois a partir dela é completo.
+    """
+    versions = session.execute(
+        select(
+            *(
+                select(func.max(column)).scalar_subquery()
+                for column in (
+                    Category.version,
+                    Transaction.version,
+                    ArchivedTransaction.archived_version,
+                )
+            )
+        )
+    ).one()
+    version = max((v for v in versions if v is not None), default=0)
+    settled = settled_version(session)
+    return version if settled is None else min(version, settled)
+
+
+def advance_version(session, version: int):
+    """
+    Garante que as próximas versões reservadas sejam maiores que ``version``
+    (generator recém-criado em um banco com dados, banco restaurado).
+    """
+    if uses_sequence(session):
+        generator = literal_column(_generator(session.get_bind()))
+        current = session.execute(select(func.gen_id(generator, 0))).scalar_one()
+        if current < version:
+            session.execute(select(func.gen_id(generator, version - current)))
+        return
+    result = session.execute(
+        update(DataVersion)
+        .where(DataVersion.id == VERSION_ROW_ID, DataVersion.value < version)
+        .values(value=version)
+    )
+    if result.rowcount == 0 and session.get(DataVersion, VERSION_ROW_ID) is None:
+        session.add(DataVersion(id=VERSION_ROW_ID, value=version))
+        session.flush()
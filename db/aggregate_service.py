@@ -0,0 +1,499 @@
+# aggregate_service.py
+"""
+Serviço local de agregados compartilhado entre apps.
+
+Com o ``server.py`` cada navegador roda o seu próprio FinanceApp, e cada um
+recalculava os mesmos KPIs, totais por mês e totais das categorias. O
+serviço (``python -m finance aggregate-daemon``) é o único processo que lê
+esses totais do banco: mantém em memória os agregados montados a partir do
+resumo mensal e os entrega aos apps por um socket Unix
+(``config.AGGREGATE_SOCKET``), em um protocolo binário curto. As respostas
+já ficam codificadas; atender mais um app não custa nenhuma consulta.
+
+Os agregados são recarregados quando a versão de dados muda: na hora, pelos
+eventos do barramento de alterações (db/change_bus.py), e a cada
+``poll_interval`` por uma consulta da versão, caso um evento se perca. Um app
+que acabou de escrever pede a versão que já conhece (``min_version``): se o
+serviço ainda não a tem, recarrega antes de responder. Qualquer falha do
+serviço faz o cliente devolver None, e o app lê do SummaryDAO como antes.
+
+Protocolo (inteiros em ordem de rede):
+
+- pedido: operação (B), categoria (I), versão mínima (Q);
+- resposta: status (B), versão dos agregados (Q), tamanho do conteúdo (I),
+  seguido do conteúdo: registros de tamanho fixo (``TOTALS``, ``MONTH``,
+  ``MONTH_TOTAL``) ou, nos totais por categoria, ``CATEGORY`` mais o nome
+  em UTF-8.
+"""
+import asyncio
+import os
+import socket
+import struct
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from db import change_bus, config
+
+OP_VERSION = 0
+OP_TOTALS = 1
+OP_TOTALS_BY_MONTH = 2
+OP_CATEGORY_TOTALS = 3
+OP_SUBTREE_MONTH_TOTALS = 4
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+REQUEST = struct.Struct("!BIQ")
+RESPONSE = struct.Struct("!BQI")
+# Receitas e despesas
+TOTALS = struct.Struct("!dd")
+# Ano, mês, receitas e despesas
+MONTH = struct.Struct("!HBdd")
+# Categoria, receitas, despesas e tamanho do nome
+CATEGORY = struct.Struct("!IddH")
+# Ano, mês e total
+MONTH_TOTAL = struct.Struct("!HBd")
+
+
+def service_enabled() -> bool:
+    """Indica se o serviço está configurado (e disponível na plataforma)"""
+    return bool(config.AGGREGATE_SOCKET) and hasattr(socket, "AF_UNIX")
+
+
+def month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+
+# ==================== AGREGADOS ====================
+
+
+class Aggregates:
+    """
+    Agregados de uma versão de dados, com as respostas já codificadas
+
+    Os valores são os mesmos do SummaryDAO: ``get_totals_by_type``,
+    ``get_totals_by_month``, ``get_totals_by_category(rollup=True)`` e
+    ``get_subtree_month_totals`` (somas das categorias ativas e das suas
+    subcategorias, como na tabela de fechamento).
+    """
+
+    def __init__(
+        self,
+        version: Optional[int] = None,
+        rows: Iterable[Tuple[int, int, int, str, float]] = (),
+        categories: Iterable = (),
+    ):
+        """
+        Args:
+            version: Versão de dados lida antes das linhas.
+            rows: Linhas do resumo (categoria, ano, mês, tipo, total).
+            categories: Categorias ativas (id, name e parent_id).
+        """
+        self.version = version
+        income = expense = 0.0
+        by_month: Dict[Tuple[int, int], List[float]] = {}
+        by_category: Dict[int, List[float]] = {}
+        # Soma de todos os tipos por mês, por categoria (gráfico da categoria)
+        self._category_months: Dict[int, Dict[Tuple[int, int], float]] = {}
+        for category_id, year, month, type, total in rows:
+            if type == "Receita":
+                column = 0
+                income += total
+            elif type == "Despesa":
+                column = 1
+                expense += total
+            else:
+                column = None
+            if column is not None:
+                by_month.setdefault((year, month), [0.0, 0.0])[column] += total
+                by_category.setdefault(category_id, [0.0, 0.0])[column] += total
+            months = self._category_months.setdefault(category_id, {})
+            months[(year, month)] = months.get((year, month), 0.0) + total
+
+        self._names = {category.id: category.name for category in categories}
+        parents = {category.id: category.parent_id for category in categories}
+        self._children: Dict[int, List[int]] = {}
+        for category_id, parent_id in parents.items():
+            if parent_id in parents:
+                self._children.setdefault(parent_id, []).append(category_id)
+        rollup: Dict[int, List[float]] = {}
+        for category_id, (category_income, category_expense) in by_category.items():
+            # Sobe a cadeia de categorias mães ativas
+            ancestor = category_id if category_id in parents else None
+            while ancestor is not None:
+                sums = rollup.setdefault(ancestor, [0.0, 0.0])
+                sums[0] += category_income
+                sums[1] += category_expense
+                ancestor = parents.get(ancestor)
+
+        self._payloads = {
+            OP_VERSION: b"",
+            OP_TOTALS: TOTALS.pack(income, expense),
+            OP_TOTALS_BY_MONTH: b"".join(
+                MONTH.pack(year, month, *sums)
+                for (year, month), sums in sorted(by_month.items())
+            ),
+            OP_CATEGORY_TOTALS: b"".join(
+                self._category_record(category_id, *sums)
+                for category_id, sums in sorted(
+                    rollup.items(), key=lambda item: self._names[item[0]]
+                )
+            ),
+        }
+        self._subtrees: Dict[int, bytes] = {}
+
+    def _category_record(self, category_id, income, expense) -> bytes:
+        name = self._names[category_id].encode()
+        return CATEGORY.pack(category_id, income, expense, len(name)) + name
+
+    def subtree_ids(self, category_id: int) -> List[int]:
+        """A categoria e todas as suas subcategorias"""
+        ids = [category_id]
+        for parent_id in ids:
+            ids.extend(self._children.get(parent_id, ()))
+        return ids
+
+    def payload(self, op: int, category_id: int = 0) -> Optional[bytes]:
+        """Resposta codificada de uma operação (None se desconhecida)"""
+        if op != OP_SUBTREE_MONTH_TOTALS:
+            return self._payloads.get(op)
+        payload = self._subtrees.get(category_id)
+        if payload is None:
+            totals: Dict[Tuple[int, int], float] = {}
+            if category_id in self._names:
+                for subtree_id in self.subtree_ids(category_id):
+                    months = self._category_months.get(subtree_id, {})
+                    for key, total in months.items():
+                        totals[key] = totals.get(key, 0.0) + total
+            payload = self._subtrees[category_id] = b"".join(
+                MONTH_TOTAL.pack(year, month, total)
+                for (year, month), total in sorted(totals.items())
+            )
+        return payload
+
+
+def decode_totals(payload: bytes) -> Dict[str, float]:
+    income, expense = TOTALS.unpack(payload)
+    return {"income": income, "expense": expense}
+
+
+def decode_totals_by_month(payload: bytes) -> Dict[str, Dict[str, float]]:
+    return {
+        month_key(year, month): {"income": income, "expense": expense}
+        for year, month, income, expense in MONTH.iter_unpack(payload)
+    }
+
+
+def decode_category_totals(payload: bytes) -> Dict[int, Dict]:
+    """Totais por categoria no formato de ``get_totals_by_category``, por ID"""
+    totals = {}
+    offset = 0
+    while offset < len(payload):
+        category_id, income, expense, size = CATEGORY.unpack_from(payload, offset)
+        offset += CATEGORY.size
+        totals[category_id] = {
+            "category_id": category_id,
+            "category": payload[offset : offset + size].decode(),
+            "income": income,
+            "expense": expense,
+        }
+        offset += size
+    return totals
+
+
+def decode_subtree_month_totals(payload: bytes) -> Dict[str, float]:
+    return {
+        month_key(year, month): total
+        for year, month, total in MONTH_TOTAL.iter_unpack(payload)
+    }
+
+
+def load_aggregates() -> Optional[Aggregates]:
+    """Lê o resumo e as categorias do banco (None se a leitura falhar)"""
+    from dao.category_dao import CategoryDAO
+    from dao.summary_dao import SummaryDAO
+    from dao.transaction_dao import TransactionDAO
+
+    # A versão vem primeiro: o que mudar durante a leitura dispara outra
+    with TransactionDAO(read_replica=False) as dao:
+        version = dao.current_version()
+    with SummaryDAO() as dao:
+        rows = dao.get_summary_rows()
+    if rows is None:
+        return None
+    with CategoryDAO(read_replica=False) as dao:
+        categories = dao.get_all_categories()
+    return Aggregates(version, rows, categories)
+
+
+# ==================== SERVIÇO ====================
+
+
+class AggregateServer:
+    """Serviço de agregados no loop asyncio"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        poll_interval: float = 2.0,
+        reload_delay: float = 0.1,
+    ):
+        """
+        Args:
+            path: Caminho do socket (padrão: config.AGGREGATE_SOCKET).
+            poll_interval: Intervalo da consulta da versão de dados.
+            reload_delay: Espera depois de um evento do barramento, para
+                juntar uma rajada de escritas em uma recarga.
+        """
+        self.path = path or config.AGGREGATE_SOCKET
+        self.poll_interval = poll_interval
+        self.reload_delay = reload_delay
+        self.aggregates = Aggregates()
+        # Pedidos atendidos, recargas feitas e apps conectados
+        self.requests = 0
+        self.reloads = 0
+        self.clients = 0
+        self._server = None
+        self._listener = None
+        self._poller = None
+        self._reload = None
+        self._scheduled = None
+
+    async def start(self) -> bool:
+        """
+        Carrega os agregados e passa a atender no socket
+
+        Returns:
+            False se outro serviço já atende no mesmo caminho.
+        """
+        if os.path.exists(self.path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                    probe.connect(self.path)
+                return False
+            except OSError:
+                # Socket de um serviço que terminou sem removê-lo
+                os.unlink(self.path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        await self.refresh()
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o600)
+        if change_bus.bus_enabled():
+            listener = change_bus.ChangeListener(
+                self._handle_published_changes, ignore_own=False
+            )
+            if listener.start():
+                self._listener = listener
+        self._poller = asyncio.ensure_future(self._poll())
+        return True
+
+    async def stop(self):
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+        if self._poller is not None:
+            self._poller.cancel()
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    async def serve_forever(self) -> bool:
+        if not await self.start():
+            return False
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+        return True
+
+    async def refresh(self):
+        """
+        Recarrega os agregados. Só há uma recarga por vez: quem pede durante
+        uma recarga espera por ela.
+        """
+        if self._reload is None:
+            self._reload = asyncio.ensure_future(self._run_reload())
+        await asyncio.shield(self._reload)
+
+    async def _run_reload(self):
+        try:
+            aggregates = await asyncio.to_thread(load_aggregates)
+            if aggregates is not None:
+                self.aggregates = aggregates
+                self.reloads += 1
+        finally:
+            self._reload = None
+
+    def _handle_published_changes(self, events):
+        """Agenda uma recarga para as escritas avisadas pelo barramento"""
+        version = max(event.get("version", 0) for event in events)
+        if version <= (self.aggregates.version or 0) or self._scheduled is not None:
+            return
+        self._scheduled = asyncio.get_running_loop().call_later(
+            self.reload_delay, self._scheduled_reload
+        )
+
+    def _scheduled_reload(self):
+        self._scheduled = None
+        asyncio.ensure_future(self.refresh())
+
+    async def _poll(self):
+        """Recarrega quando a versão de dados muda (eventos perdidos)"""
+        from dao.transaction_dao import TransactionDAO
+
+        def current_version():
+            with TransactionDAO(read_replica=False) as dao:
+                return dao.current_version()
+
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if await asyncio.to_thread(current_version) != self.aggregates.version:
+                await self.refresh()
+
+    async def _handle(self, reader, writer):
+        """Atende os pedidos de um app até ele desconectar"""
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    request = await reader.readexactly(REQUEST.size)
+                except asyncio.IncompleteReadError:
+                    break
+                op, category_id, min_version = REQUEST.unpack(request)
+                if min_version > (self.aggregates.version or 0):
+                    # O app já viu uma escrita que os agregados não têm
+                    await self.refresh()
+                aggregates = self.aggregates
+                payload = aggregates.payload(op, category_id)
+                status = STATUS_OK if payload is not None else STATUS_ERROR
+                payload = payload or b""
+                writer.write(
+                    RESPONSE.pack(status, aggregates.version or 0, len(payload))
+                    + payload
+                )
+                await writer.drain()
+                self.requests += 1
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    def summary(self) -> str:
+        return (
+            f"version {self.aggregates.version}, {self.requests} requests, "
+            f"{self.reloads} reloads, {self.clients} clients"
+        )
+
+
+# ==================== CLIENTE ====================
+
+
+class AggregateClient:
+    """
+    Cliente síncrono (usado nas threads de worker da TUI)
+
+    A conexão fica aberta entre os pedidos. Se o serviço não responde, os
+    pedidos devolvem None sem tentar de novo por ``retry_after`` segundos.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        timeout: float = 2.0,
+        retry_after: float = 5.0,
+    ):
+        self.path = path or config.AGGREGATE_SOCKET
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._socket = None
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    def request(
+        self, op: int, category_id: int = 0, min_version: int = 0
+    ) -> Optional[Tuple[int, bytes]]:
+        """
+        Faz um pedido ao serviço
+
+        Returns:
+            Versão dos agregados e o conteúdo da resposta, ou None se o
+            serviço não respondeu ou ainda não tem ``min_version``.
+        """
+        with self._lock:
+            if time.monotonic() < self._down_until:
+                return None
+            try:
+                if self._socket is None:
+                    self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    self._socket.settimeout(self.timeout)
+                    self._socket.connect(self.path)
+                self._socket.sendall(REQUEST.pack(op, category_id, min_version))
+                status, version, size = RESPONSE.unpack(self._receive(RESPONSE.size))
+                payload = self._receive(size)
+            except OSError:
+                self.close()
+                self._down_until = time.monotonic() + self.retry_after
+                return None
+        if status != STATUS_OK or version < min_version:
+            return None
+        return version, payload
+
+    def _receive(self, size: int) -> bytes:
+        data = bytearray()
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("aggregate service closed the connection")
+            data += chunk
+        return bytes(data)
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def totals(self, min_version: int = 0) -> Optional[Dict[str, float]]:
+        response = self.request(OP_TOTALS, min_version=min_version)
+        return decode_totals(response[1]) if response else None
+
+    def totals_by_month(
+        self, min_version: int = 0
+    ) -> Optional[Dict[str, Dict[str, float]]]:
+        response = self.request(OP_TOTALS_BY_MONTH, min_version=min_version)
+        return decode_totals_by_month(response[1]) if response else None
+
+    def category_totals(self, min_version: int = 0) -> Optional[Dict[int, Dict]]:
+        response = self.request(OP_CATEGORY_TOTALS, min_version=min_version)
+        return decode_category_totals(response[1]) if response else None
+
+    def subtree_month_totals(
+        self, category_id: int, min_version: int = 0
+    ) -> Optional[Dict[str, float]]:
+        response = self.request(
+            OP_SUBTREE_MONTH_TOTALS, category_id, min_version=min_version
+        )
+        return decode_subtree_month_totals(response[1]) if response else None
+
+
+_client = None
+
+
+def get_client() -> Optional[AggregateClient]:
+    """Cliente do processo (None se o serviço não está configurado)"""
+    global _client
+    if not service_enabled():
+        return None
+    if _client is None or _client.path != config.AGGREGATE_SOCKET:
+        _client = AggregateClient()
+    return _client
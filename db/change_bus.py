@@ -0,0 +1,152 @@
+# change_bus.py
+"""
+Barramento local de notificações de alteração.
+
+Com o ``server.py`` cada navegador roda o seu próprio FinanceApp. Para que a
+edição de um usuário apareça nas telas dos outros sem consultar o banco em
+intervalos, cada app abre um socket Unix de datagramas em um diretório
+comum (``config.NOTIFY_DIR``) e os DAOs, depois de cada commit, enviam um
+evento curto a todos os sockets do diretório.
+
+O evento só diz o que mudou (tabela, versão e quantidade de linhas): quem
+recebe busca o delta com ``row_changes_since``, como já faz após as próprias
+escritas. Por isso perder um evento não perde dados, apenas adia a
+atualização até o próximo, e o envio nunca bloqueia quem escreve.
+"""
+import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Callable, List, Optional
+
+from db import config
+
+# Sufixo dos arquivos de socket no diretório do barramento
+SOCKET_SUFFIX = ".sock"
+# Tamanho máximo de um evento (os eventos têm poucas dezenas de bytes)
+MAX_EVENT_SIZE = 4096
+
+
+def bus_enabled() -> bool:
+    """Indica se o barramento está configurado (e disponível na plataforma)"""
+    return bool(config.NOTIFY_DIR) and hasattr(socket, "AF_UNIX")
+
+
+def publish(table: str, version: int, count: int = 1):
+    """
+    Avisa os apps em execução de uma escrita já confirmada.
+
+    Args:
+        table: "transactions" ou "categories".
+        version: Versão de dados gravada pela escrita.
+        count: Quantidade de linhas alteradas.
+    """
+    if not bus_enabled():
+        return
+    event = json.dumps(
+        {"table": table, "version": version, "count": count, "pid": os.getpid()}
+    ).encode()
+    try:
+        names = os.listdir(config.NOTIFY_DIR)
+    except OSError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+        sender.setblocking(False)
+        for name in names:
+            if not name.endswith(SOCKET_SUFFIX):
+                continue
+            path = os.path.join(config.NOTIFY_DIR, name)
+            try:
+                sender.sendto(event, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket de um app que terminou sem removê-lo
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                # Fila do destinatário cheia: os eventos pendentes dele já
+                # vão disparar a busca do delta
+                pass
+
+
+class ChangeListener:
+    """Recebe os eventos do barramento no loop asyncio"""
+
+    def __init__(
+        self,
+        callback: Callable[[List[dict]], None],
+        directory: Optional[str] = None,
+        ignore_own: bool = True,
+    ):
+        """
+        Args:
+            callback: Chamado com os eventos recebidos de uma vez (uma
+                rajada de escritas chega em uma única chamada).
+            directory: Diretório do barramento (padrão: config.NOTIFY_DIR).
+            ignore_own: Descarta os eventos publicados por este processo.
+        """
+        self.callback = callback
+        self.directory = directory or config.NOTIFY_DIR
+        self.ignore_own = ignore_own
+        self.path = None
+        self._socket = None
+        self._loop = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        """
+        Cria o socket e passa a ouvir no loop.
+
+        Returns:
+            True se o listener foi iniciado.
+        """
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            self.path = os.path.join(
+                self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}{SOCKET_SUFFIX}"
+            )
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.bind(self.path)
+            self._socket.setblocking(False)
+        except OSError as e:
+            print(f"Erro ao abrir o barramento de alterações: {e}")
+            self.stop()
+            return False
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop.add_reader(self._socket.fileno(), self._receive)
+        return True
+
+    def _receive(self):
+        """Esvazia a fila do socket e entrega os eventos de uma vez"""
+        events = []
+        while True:
+            try:
+                data = self._socket.recv(MAX_EVENT_SIZE)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            if self.ignore_own and event.get("pid") == os.getpid():
+                continue
+            events.append(event)
+        if events:
+            self.callback(events)
+
+    def stop(self):
+        """Para de ouvir e remove o socket"""
+        if self._socket is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
@@ -0,0 +1,422 @@
+# column_cache.py
+"""
+Cache colunar local das transações (arquivos mapeados em memória).
+
+Guarda, em um arquivo binário por coluna, o ID, a data, o valor, o tipo e a
+categoria de todas as transações (inclusive as arquivadas), ordenadas por
+ID. Um ``meta.json`` traz a quantidade de linhas e a versão de dados (ver
+dao/versioning.py) que o cache reflete.
+
+Na partida, os arquivos são mapeados com ``numpy.memmap`` sem cópia e sem
+consultar o banco: KPIs e gráficos saem de somas vetorizadas sobre as
+colunas. Depois, só as alterações posteriores à versão do cache são buscadas
+(``row_changes_since``) e aplicadas: atualizações e lápides no lugar, linhas
+novas acrescentadas ao fim dos arquivos.
+
+O ``meta.json`` é gravado por último (e trocado atomicamente): se o processo
+cair no meio de uma atualização, o cache continua válido na versão anterior
+e as mesmas alterações são aplicadas de novo.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+from sqlalchemy import select
+
+from db import config
+from models.models import Category
+from models.rows import TransactionRow
+
+# Formato dos arquivos; um cache de outro formato é reconstruído
+CACHE_FORMAT = 1
+
+# Coluna -> tipo numpy (um arquivo <coluna>.bin por coluna)
+COLUMNS = {
+    "id": np.int64,
+    "date": "datetime64[s]",
+    # Mês da data (meses desde 1970-01): evita converter datas a cada soma
+    "month": np.int32,
+    "value": np.float64,
+    "type": np.int8,
+    "category": np.int32,
+}
+
+# Códigos da coluna "type"; 0 marca uma transação removida
+REMOVED = 0
+TYPE_CODES = {"Receita": 1, "Despesa": 2}
+
+
+def cache_enabled() -> bool:
+    """Indica se o cache colunar está configurado"""
+    return bool(config.COLUMN_CACHE_DIR)
+
+
+def database_stamp(url: str = None) -> str:
+    """Identifica o banco de origem (um cache de outro banco é descartado)"""
+    url = url if url is not None else config.DATABASE_URL
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+
+
+def _columns_of(rows: Iterable[TransactionRow]) -> Dict[str, np.ndarray]:
+    """Colunas (arrays) de uma sequência de linhas"""
+    rows = list(rows)
+    dates = np.array([r.transaction_date for r in rows], dtype=COLUMNS["date"])
+    return {
+        "id": np.array([r.id for r in rows], dtype=COLUMNS["id"]),
+        "date": dates,
+        "month": dates.astype("datetime64[M]").astype(COLUMNS["month"]),
+        "value": np.array([r.transaction_value for r in rows], dtype=COLUMNS["value"]),
+        "type": np.array(
+            [REMOVED if r.deleted else TYPE_CODES.get(r.type, REMOVED) for r in rows],
+            dtype=COLUMNS["type"],
+        ),
+        "category": np.array(
+            [r.category_id or 0 for r in rows], dtype=COLUMNS["category"]
+        ),
+    }
+
+
+class ColumnCache:
+    """Cache colunar de um diretório"""
+
+    def __init__(self, directory: str, stamp: Optional[str] = None):
+        """
+        Args:
+            directory: Diretório dos arquivos do cache.
+            stamp: Identificação do banco (padrão: ``database_stamp()``).
+        """
+        self.directory = directory
+        self.stamp = stamp if stamp is not None else database_stamp()
+        # Versão de dados refletida (None: cache ausente ou inválido)
+        self.version: Optional[int] = None
+        self.count = 0
+        self.columns: Dict[str, np.ndarray] = {}
+        # Muda sempre que as posições das linhas mudam (regravação ou
+        # invalidação); índices sobre as posições (db/tag_index.py) a comparam
+        self.generation = 0
+        # A sincronização roda em uma thread de worker; a tela lê na principal
+        self._lock = threading.Lock()
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _map(self):
+        """Mapeia os arquivos das colunas (sem copiar os dados)"""
+        self.columns = {
+            name: (
+                np.memmap(
+                    self._path(f"{name}.bin"), dtype=dtype, mode="r+", shape=self.count
+                )
+                if self.count
+                else np.empty(0, dtype=dtype)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def _load(self):
+        """Lê o meta.json e mapeia as colunas, se o cache for válido"""
+        try:
+            with open(self._path("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != CACHE_FORMAT or meta.get("database") != self.stamp:
+                return
+            self.count = meta["count"]
+            self._map()
+            self.version = meta["version"]
+        except (OSError, ValueError, KeyError):
+            self.version, self.count, self.columns = None, 0, {}
+
+    def _write_meta(self, version: int):
+        """Grava o meta.json de forma atômica (último passo de cada escrita)"""
+        temporary = self._path("meta.json.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "format": CACHE_FORMAT,
+                    "database": self.stamp,
+                    "version": version,
+                    "count": self.count,
+                },
+                f,
+            )
+        os.replace(temporary, self._path("meta.json"))
+        self.version = version
+
+    def _write_columns(self, columns: Dict[str, np.ndarray], version: int):
+        """Substitui todos os arquivos pelas colunas dadas"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            temporary = self._path(f"{name}.bin.tmp")
+            np.ascontiguousarray(columns[name], dtype=dtype).tofile(temporary)
+            os.replace(temporary, self._path(f"{name}.bin"))
+        self.generation += 1
+        self.count = len(columns["id"])
+        self._write_meta(version)
+        self._map()
+
+    def rebuild(self, dao) -> int:
+        """
+        Reconstrói o cache a partir de todas as transações.
+
+        Args:
+            dao: TransactionDAO (fonte das linhas e da versão).
+
+        Returns:
+            Quantidade de transações no cache.
+        """
+        # A versão vem antes das linhas: o que mudar no meio chega no delta
+        version = dao.current_version()
+        parts = [_columns_of(batch) for batch in dao.iter_transaction_row_batches()]
+        columns = {
+            name: np.concatenate([p[name] for p in parts]).astype(dtype, copy=False)
+            if parts
+            else np.empty(0, dtype=dtype)
+            for name, dtype in COLUMNS.items()
+        }
+        order = np.argsort(columns["id"], kind="stable")
+        with self._lock:
+            self._write_columns({n: c[order] for n, c in columns.items()}, version)
+        return self.count
+
+    def apply(self, rows, version: int, since: Optional[int] = None) -> bool:
+        """
+        Aplica alterações (TransactionRow, inclusive lápides) ao cache.
+
+        Args:
+            version: Versão de dados depois das alterações.
+            since: Versão a partir da qual ``rows`` foram lidas. Se o cache
+                estiver atrás dela, faltam alterações e nada é aplicado.
+
+        Returns:
+            True se o cache ficou na versão ``version``.
+        """
+        with self._lock:
+            if self.version is None or (since is not None and self.version < since):
+                return False
+            # Versões até a do cache já estão nele (e podem ter mudado depois)
+            rows = [row for row in rows if row.version > self.version]
+            if not rows:
+                if version > self.version:
+                    self._write_meta(version)
+                return True
+            # A mesma transação pode aparecer mais de uma vez: vale a última
+            latest = {row.id: row for row in sorted(rows, key=lambda r: r.version)}
+            delta = _columns_of(latest.values())
+            ids = self.columns["id"]
+            positions, found = self._positions(delta["id"])
+            if found.any():
+                # Atualizações e lápides: escrita no lugar
+                for name in ("date", "month", "value", "type", "category"):
+                    self.columns[name][positions[found]] = delta[name][found]
+                    if isinstance(self.columns[name], np.memmap):
+                        self.columns[name].flush()
+            new = ~found & (delta["type"] != REMOVED)
+            if new.any():
+                added = {name: column[new] for name, column in delta.items()}
+                order = np.argsort(added["id"])
+                added = {name: column[order] for name, column in added.items()}
+                if len(ids) and added["id"][0] < ids[-1]:
+                    # ID fora de ordem (raro): regrava tudo ordenado
+                    merged = {
+                        name: np.concatenate([np.asarray(self.columns[name]), column])
+                        for name, column in added.items()
+                    }
+                    order = np.argsort(merged["id"], kind="stable")
+                    self._write_columns(
+                        {n: c[order] for n, c in merged.items()}, version
+                    )
+                    return True
+                # Linhas novas: acrescentadas ao fim de cada arquivo
+                os.makedirs(self.directory, exist_ok=True)
+                for name, dtype in COLUMNS.items():
+                    with open(self._path(f"{name}.bin"), "ab") as f:
+                        f.write(
+                            np.ascontiguousarray(added[name], dtype=dtype).tobytes()
+                        )
+                self.count += len(added["id"])
+                self._map()
+            self._write_meta(max(version, self.version))
+            return True
+
+    def _positions(self, ids: np.ndarray):
+        """Posição de cada ID nas colunas e se ele está no cache"""
+        column = self.columns.get("id", np.empty(0, COLUMNS["id"]))
+        positions = np.searchsorted(column, ids)
+        found = positions < len(column)
+        found[found] = column[positions[found]] == ids[found]
+        return positions, found
+
+    def positions(self, transaction_ids) -> np.ndarray:
+        """Posição (linha das colunas) de cada transação; -1 se fora do cache"""
+        ids = np.asarray(transaction_ids, dtype=COLUMNS["id"])
+        with self._lock:
+            positions, found = self._positions(ids)
+        return np.where(found, positions, -1)
+
+    def sync(self, dao) -> int:
+        """
+        Atualiza o cache a partir do banco: só o delta desde a versão do
+        cache, ou uma reconstrução se ele for inválido ou de outro banco.
+
+        Returns:
+            Quantidade de linhas aplicadas.
+        """
+        current = dao.current_version()
+        since = self.version
+        if since is None or current < since:
+            return self.rebuild(dao)
+        # Linhas acima da versão lida primeiro ficam para o próximo delta: no
+        # Firebird versões menores ainda podem ser confirmadas
+        rows = [row for row in dao.row_changes_since(since) if row.version <= current]
+        self.apply(rows, current, since=since)
+        removed = dao.read_session.execute(
+            select(Category.id).where(
+                Category.version > since, Category.deleted.is_(True)
+            )
+        ).scalars()
+        if not self.drop_categories(list(removed)):
+            return self.rebuild(dao)
+        return len(rows)
+
+    def drop_categories(self, category_ids) -> bool:
+        """
+        Trata categorias removidas. A fusão de categorias move também as
+        transações arquivadas, que não aparecem no delta: se o cache ainda
+        tiver linhas nas categorias removidas, ele é invalidado.
+
+        Returns:
+            True se o cache continua válido.
+        """
+        with self._lock:
+            if self.version is None:
+                return False
+            if not category_ids or not self.count:
+                return True
+            stale = np.isin(self.columns["category"], category_ids) & self._live()
+            if not stale.any():
+                return True
+            self.version, self.count, self.columns = None, 0, {}
+            self.generation += 1
+            try:
+                os.unlink(self._path("meta.json"))
+            except OSError:
+                pass
+            return False
+
+    def _live(self):
+        types = np.asarray(self.columns.get("type", np.empty(0, np.int8)))
+        return types != REMOVED
+
+    def _fit(self, mask: np.ndarray) -> np.ndarray:
+        """Ajusta uma máscara por posição à quantidade atual de linhas"""
+        mask = mask[: self.count]
+        if len(mask) < self.count:
+            # Linhas acrescentadas depois da máscara não foram marcadas
+            mask = np.pad(mask, (0, self.count - len(mask)))
+        return mask
+
+    def _select(self, names, mask: Optional[np.ndarray]):
+        """Colunas ``names``, só das linhas marcadas em ``mask`` (se houver)"""
+        if mask is None:
+            return [self.columns[name] for name in names]
+        mask = self._fit(mask)
+        return [np.asarray(self.columns[name])[mask] for name in names]
+
+    def read(
+        self, category_ids: Optional[Iterable[int]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Cópia de todas as colunas (ou só das linhas das categorias dadas),
+        lida de uma vez sob a trava: a sincronização não a altera depois
+        """
+        with self._lock:
+            if not self.count:
+                return {name: np.empty(0, dtype) for name, dtype in COLUMNS.items()}
+            if category_ids is None:
+                return {name: np.array(column) for name, column in self.columns.items()}
+            ids = np.fromiter(category_ids, dtype=COLUMNS["category"])
+            selected = np.isin(self.columns["category"], ids)
+            return {name: column[selected] for name, column in self.columns.items()}
+
+    def totals(self, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """
+        Receitas e despesas de todas as transações
+
+        Args:
+            mask: Linhas a somar (array booleano por posição, ex: de
+                ``TagIndex.mask``); None soma todas.
+        """
+        with self._lock:
+            if not self.count:
+                return {"income": 0.0, "expense": 0.0}
+            types, values = self._select(("type", "value"), mask)
+            sums = np.bincount(types, weights=values, minlength=3)
+        return {
+            "income": float(sums[TYPE_CODES["Receita"]]),
+            "expense": float(sums[TYPE_CODES["Despesa"]]),
+        }
+
+    def totals_by_month(
+        self, mask: Optional[np.ndarray] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Receitas e despesas por mês ("YYYY-MM"), como no SummaryDAO"""
+        with self._lock:
+            if not self.count:
+                return {}
+            months, types, values = self._select(("month", "type", "value"), mask)
+            if not len(months):
+                return {}
+            first = int(months.min())
+            # Um compartimento por (mês, tipo)
+            bins = (months - first) * 3 + types
+            # minlength: o último mês pode não ter o último tipo (despesa)
+            size = (int(months.max()) - first + 1) * 3
+            sums = np.bincount(bins, weights=values, minlength=size).reshape(-1, 3)
+            counts = np.bincount(bins, minlength=size).reshape(-1, 3)
+        totals = {}
+        for offset in np.flatnonzero(counts[:, 1:].sum(axis=1)):
+            key = str(np.datetime64(first + int(offset), "M"))
+            totals[key] = {
+                "income": float(sums[offset, TYPE_CODES["Receita"]]),
+                "expense": float(sums[offset, TYPE_CODES["Despesa"]]),
+            }
+        return totals
+
+    def category_month_totals(
+        self,
+        category_id: Union[int, Iterable[int]],
+        mask: Optional[np.ndarray] = None,
+    ) -> Dict[str, float]:
+        """
+        Soma dos valores por mês ("YYYY-MM") de uma categoria ou de um
+        conjunto delas (ex: uma categoria e as subcategorias)
+        """
+        ids = np.fromiter(np.atleast_1d(category_id), dtype=COLUMNS["category"])
+        with self._lock:
+            if not self.count:
+                return {}
+            selected = np.isin(self.columns["category"], ids) & self._live()
+            if mask is not None:
+                selected &= self._fit(mask)
+            months = self.columns["month"][selected]
+            values = self.columns["value"][selected]
+        if not len(months):
+            return {}
+        unique, inverse = np.unique(months, return_inverse=True)
+        sums = np.bincount(inverse, weights=values)
+        return {
+            str(np.datetime64(int(month), "M")): float(total)
+            for month, total in zip(unique, sums)
+        }
+
+
+def open_cache() -> Optional[ColumnCache]:
+    """Abre o cache configurado (None se desabilitado); não consulta o banco"""
+    if not cache_enabled():
+        return None
+    return ColumnCache(config.COLUMN_CACHE_DIR)
@@ -0,0 +1,70 @@
+# migrations.py
+"""
+Atualização do schema do banco a partir dos modelos.
+
+Cria as tabelas que faltam e acrescenta as colunas novas dos modelos às
+tabelas já existentes. Uso:
+
+    python -m db.migrations
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+import models.models  # noqa: F401 - registra os modelos no metadata
+from db.config import Base, engine as default_engine
+
+
+def missing_columns(engine, metadata=Base.metadata):
+    """Retorna as colunas dos modelos que ainda não existem no banco"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name.lower() not in {name.lower() for name in existing_tables}:
+            continue
+        existing = {
+            column["name"].lower() for column in inspector.get_columns(table.name)
+        }
+        missing.extend(
+            column for column in table.columns if column.name.lower() not in existing
+        )
+    return missing
+
+
+def ensure_schema(engine=default_engine, metadata=Base.metadata):
+    """Cria tabelas, colunas e índices ausentes (nunca remove nada)"""
+    metadata.create_all(engine)
+    columns = missing_columns(engine, metadata)
+    with engine.begin() as connection:
+        for column in columns:
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            table_name = engine.dialect.identifier_preparer.format_table(column.table)
+            connection.execute(text(f"ALTER TABLE {table_name} ADD {ddl}"))
+        # create_all não cria índices novos em tabelas que já existiam
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+    return [f"{column.table.name}.{column.name}" for column in columns]
+
+
+if __name__ == "__main__":
+    added = ensure_schema()
+    for name in added:
+        print(f"✓ Coluna criada: {name}")
+    print("✓ Schema atualizado")
+    # Bancos anteriores à hierarquia de categorias não têm a tabela de
+    # fechamento preenchida
+    from dao.category_dao import CategoryDAO
+
+    with CategoryDAO(read_replica=False) as dao:
+        if dao.rebuild_closure():
+            print("✓ Árvore de categorias recalculada")
+    # O generator de versões nasce em 1: avança para depois das versões que
+    # o banco já tem (ver dao/versioning.py)
+    from dao.versioning import advance_version, current_version
+    from db.config import SessionLocal
+
+    with SessionLocal() as session:
+        advance_version(session, current_version(session))
+        session.commit()
+    print("✓ Versão de dados sincronizada")
@@ -0,0 +1,281 @@
+# replica.py
+"""
+Réplica local (SQLite) do banco Firebird.
+
+Todas as leituras dos DAOs podem ser servidas a partir de um arquivo SQLite
+local, sincronizado de forma incremental a partir do banco primário pelos
+marcadores de versão (ver dao/versioning.py). As
+escritas continuam indo para o primário e, depois do commit, são aplicadas
+("dobradas") na réplica para que a leitura seguinte já as enxergue.
+"""
+import datetime
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (
+    Column,
+    MetaData,
+    String,
+    Table,
+    and_,
+    create_engine,
+    delete,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+
+from dao.versioning import current_version
+from db import config
+from db.config import SessionLocal
+from db.migrations import ensure_schema
+from models.models import ArchivedTransaction, Category, Transaction
+
+# Tabela de controle da réplica (não existe no banco primário)
+_replica_metadata = MetaData()
+replica_meta = Table(
+    "REPLICA_META",
+    _replica_metadata,
+    Column("key", String(64), primary_key=True),
+    Column("value", String(64)),
+)
+
+# Data/hora da última sincronização concluída
+LAST_SYNC_KEY = "last_sync"
+# Marcador (archived_version:id) das transações arquivadas já removidas
+ARCHIVE_MARKER_KEY = "archive_marker"
+
+_engine = None
+_session_factory = None
+
+
+def replica_enabled() -> bool:
+    """Indica se a réplica local está configurada"""
+    return bool(config.REPLICA_PATH)
+
+
+def get_replica_engine():
+    """Retorna (criando se necessário) a engine da réplica"""
+    global _engine, _session_factory
+    if _engine is None:
+        directory = os.path.dirname(config.REPLICA_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        _engine = create_engine(f"sqlite:///{config.REPLICA_PATH}")
+        replica_metadata = MetaData()
+        for model in (Category, Transaction):
+            model.__table__.to_metadata(replica_metadata)
+        ensure_schema(_engine, replica_metadata)
+        _replica_metadata.create_all(_engine)
+        _session_factory = sessionmaker(bind=_engine)
+    return _engine
+
+
+def ReplicaSession():
+    """Cria uma sessão ligada à réplica local"""
+    get_replica_engine()
+    return _session_factory()
+
+
+def row_values(instance) -> Dict[str, Any]:
+    """Extrai os valores das colunas de uma instância ORM"""
+    return {
+        column.key: getattr(instance, column.key)
+        for column in instance.__table__.columns
+    }
+
+
+def _upsert(connection, table, rows: List[Dict[str, Any]]):
+    """Insere ou substitui linhas na réplica"""
+    if rows:
+        connection.execute(insert(table).prefix_with("OR REPLACE"), rows)
+
+
+def fold(*instances):
+    """Aplica na réplica instâncias recém-gravadas no primário"""
+    if not replica_enabled():
+        return
+    try:
+        with get_replica_engine().begin() as connection:
+            for instance in instances:
+                _upsert(connection, instance.__table__, [row_values(instance)])
+    except SQLAlchemyError as e:
+        print(f"Erro ao aplicar escrita na réplica: {e}")
+
+
+def fold_rows(table, rows: List[Dict[str, Any]]):
+    """Aplica na réplica linhas (dicionários) recém-gravadas no primário"""
+    if not replica_enabled():
+        return
+    try:
+        with get_replica_engine().begin() as connection:
+            _upsert(connection, table, rows)
+    except SQLAlchemyError as e:
+        print(f"Erro ao aplicar escrita na réplica: {e}")
+
+
+def fold_update(model, values: Dict[str, Any], *criteria):
+    """Aplica na réplica um UPDATE em massa já feito no primário"""
+    if not replica_enabled():
+        return
+    try:
+        with get_replica_engine().begin() as connection:
+            connection.execute(
+                update(model.__table__).where(*criteria).values(**values)
+            )
+    except SQLAlchemyError as e:
+        print(f"Erro ao aplicar escrita na réplica: {e}")
+
+
+def fold_delete(model, ids: Iterable[int]):
+    """Remove da réplica linhas apagadas no primário"""
+    if not replica_enabled():
+        return
+    ids = list(ids)
+    try:
+        with get_replica_engine().begin() as connection:
+            connection.execute(delete(model.__table__).where(model.id.in_(ids)))
+    except SQLAlchemyError as e:
+        print(f"Erro ao remover linhas da réplica: {e}")
+
+
+class ReplicaSync:
+    """Sincroniza a réplica local a partir do banco primário"""
+
+    CHUNK_SIZE = 5000
+
+    def __init__(self, primary_session_factory=SessionLocal, engine=None):
+        self.primary_session_factory = primary_session_factory
+        self.engine = engine if engine is not None else get_replica_engine()
+
+    def _get_meta(self, connection, key: str) -> Optional[str]:
+        return connection.execute(
+            select(replica_meta.c.value).where(replica_meta.c.key == key)
+        ).scalar()
+
+    def _set_meta(self, connection, key: str, value: Any):
+        _upsert(connection, replica_meta, [{"key": key, "value": str(value)}])
+
+    def _pull(self, primary, model, until: int) -> int:
+        """
+        Copia para a réplica as linhas do modelo alteradas após o marcador e
+        até a versão ``until``
+        """
+        table = model.__table__
+        marker_key = f"{table.name.lower()}_marker"
+        with self.engine.connect() as connection:
+            marker = self._get_meta(connection, marker_key)
+        # Marcador composto (versão, id): várias linhas podem ter a mesma versão
+        version, last_id = map(int, marker.split(":")) if marker else (-1, 0)
+        applied = 0
+        while True:
+            rows = [
+                dict(row._mapping)
+                for row in primary.execute(
+                    select(table)
+                    .where(
+                        or_(
+                            table.c.version > version,
+                            and_(table.c.version == version, table.c.id > last_id),
+                        ),
+                        table.c.version <= until,
+                    )
+                    .order_by(table.c.version, table.c.id)
+                    .limit(self.CHUNK_SIZE)
+                )
+            ]
+            if not rows:
+                return applied
+            version, last_id = rows[-1]["version"], rows[-1]["id"]
+            with self.engine.begin() as connection:
+                _upsert(connection, table, rows)
+                self._set_meta(connection, marker_key, f"{version}:{last_id}")
+            applied += len(rows)
+
+    def _prune_archived(self, primary, until: int) -> int:
+        """Remove da réplica as transações arquivadas após o marcador"""
+        table = ArchivedTransaction.__table__
+        with self.engine.connect() as connection:
+            marker = self._get_meta(connection, ARCHIVE_MARKER_KEY)
+        version, last_id = map(int, marker.split(":")) if marker else (0, 0)
+        removed = 0
+        while True:
+            rows = primary.execute(
+                select(table.c.archived_version, table.c.id)
+                .where(
+                    or_(
+                        table.c.archived_version > version,
+                        and_(table.c.archived_version == version, table.c.id > last_id),
+                    ),
+                    table.c.archived_version <= until,
+                )
+                .order_by(table.c.archived_version, table.c.id)
+                .limit(self.CHUNK_SIZE)
+            ).all()
+            if not rows:
+                return removed
+            version, last_id = rows[-1]
+            with self.engine.begin() as connection:
+                connection.execute(
+                    delete(Transaction.__table__).where(
+                        Transaction.__table__.c.id.in_([id for _, id in rows])
+                    )
+                )
+                self._set_meta(connection, ARCHIVE_MARKER_KEY, f"{version}:{last_id}")
+            removed += len(rows)
+
+    def sync(self) -> int:
+        """
+        Sincronização incremental.
+
+        Copia, em lotes, as categorias e transações cuja versão é posterior ao
+        último marcador replicado. Lápides (registros com ``deleted``) são
+        replicadas como qualquer outra alteração; transações arquivadas no
+        primário são removidas da réplica.
+
+        Returns:
+            Quantidade de linhas aplicadas na réplica.
+        """
+        applied = 0
+        primary = self.primary_session_factory()
+        try:
+            # O marcador não passa da versão lida antes das linhas: no Firebird
+            # versões menores ainda podem ser confirmadas (dao/versioning.py)
+            until = current_version(primary)
+            for model in (Category, Transaction):
+                applied += self._pull(primary, model, until)
+            applied += self._prune_archived(primary, until)
+            with self.engine.begin() as connection:
+                self._set_meta(
+                    connection, LAST_SYNC_KEY, datetime.datetime.now().isoformat()
+                )
+            return applied
+        except SQLAlchemyError as e:
+            print(f"Erro ao sincronizar réplica: {e}")
+            return applied
+        finally:
+            primary.close()
+
+    def resync(self) -> int:
+        """Descarta o conteúdo da réplica e sincroniza tudo novamente"""
+        with self.engine.begin() as connection:
+            connection.execute(delete(Transaction.__table__))
+            connection.execute(delete(Category.__table__))
+            connection.execute(delete(replica_meta))
+        return self.sync()
+
+    def last_sync(self) -> Optional[datetime.datetime]:
+        """Data/hora da última sincronização concluída"""
+        with self.engine.connect() as connection:
+            value = self._get_meta(connection, LAST_SYNC_KEY)
+        return datetime.datetime.fromisoformat(value) if value else None
+
+    def staleness(self) -> Optional[float]:
+        """Segundos desde a última sincronização (None se nunca sincronizou)"""
+        last = self.last_sync()
+        if last is None:
+            return None
+        return (datetime.datetime.now() - last).total_seconds()
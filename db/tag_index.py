@@ -0,0 +1,156 @@
+# tag_index.py
+"""
+Índice de bitmaps das etiquetas sobre o cache colunar.
+
+Cada etiqueta tem um bitset com um bit por linha do cache colunar
+(db/column_cache.py), na mesma posição das colunas. Um filtro como "etiqueta
+A e não B na categoria C" vira AND/AND NOT entre bitsets mais uma comparação
+vetorizada na coluna de categorias; a máscara resultante vai para as somas
+do cache (KPIs e gráficos) sem nenhuma consulta ao banco.
+
+O índice fica só em memória. É montado a partir de TRANSACTION_TAGS e
+mantido com as etiquetas das transações de cada delta; se o cache mudar as
+posições das linhas (``generation``) ou avançar sem o índice (``version``),
+ele deixa de valer e é remontado.
+"""
+import threading
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from db.column_cache import ColumnCache
+
+
+def _set_bits(bitmap: np.ndarray, positions: np.ndarray, value: bool = True):
+    """Liga (ou desliga) os bits das posições dadas, no lugar"""
+    if not len(positions):
+        return
+    masks = np.left_shift(1, positions & 7).astype(np.uint8)
+    if value:
+        np.bitwise_or.at(bitmap, positions >> 3, masks)
+    else:
+        np.bitwise_and.at(bitmap, positions >> 3, ~masks)
+
+
+def _fit(bitmap: np.ndarray, size: int) -> np.ndarray:
+    """Bitmap com ``size`` bytes (bits novos desligados)"""
+    if len(bitmap) >= size:
+        return bitmap[:size]
+    return np.concatenate([bitmap, np.zeros(size - len(bitmap), np.uint8)])
+
+
+class TagIndex:
+    """Um bitset por etiqueta sobre as posições das linhas do cache colunar"""
+
+    def __init__(self, cache: ColumnCache):
+        self.cache = cache
+        # Etiqueta -> bits empacotados (bit i = linha i, ordem "little")
+        self.bitmaps: Dict[int, np.ndarray] = {}
+        # Geração e versão do cache refletidas (None: índice não montado)
+        self.generation: Optional[int] = None
+        self.version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> bool:
+        """Indica se o índice corresponde ao estado atual do cache"""
+        return (
+            self.cache.version is not None
+            and self.generation == self.cache.generation
+            and self.version == self.cache.version
+        )
+
+    def _size(self) -> int:
+        return (self.cache.count + 7) // 8
+
+    def rebuild(self, members: Iterable[Tuple[int, Sequence[int]]]) -> int:
+        """
+        Monta os bitsets a partir das transações de cada etiqueta
+
+        Args:
+            members: Pares (etiqueta, IDs das transações), ex:
+                ``TagDAO.iter_tag_members()``.
+
+        Returns:
+            Quantidade de pares (transação, etiqueta) lidos.
+        """
+        generation, version = self.cache.generation, self.cache.version
+        bitmaps = {}
+        pairs = 0
+        for tag_id, transaction_ids in members:
+            # Transações fora do cache são ignoradas
+            positions = self.cache.positions(transaction_ids)
+            bitmap = np.zeros(self._size(), np.uint8)
+            _set_bits(bitmap, positions[positions >= 0])
+            bitmaps[tag_id] = bitmap
+            pairs += len(transaction_ids)
+        with self._lock:
+            self.bitmaps = bitmaps
+            self.generation, self.version = generation, version
+        return pairs
+
+    def update(self, transaction_ids: Sequence[int], tags: Mapping[int, Iterable[int]]):
+        """
+        Aplica as etiquetas atuais de transações alteradas (depois de
+        ``ColumnCache.apply``)
+
+        Args:
+            transaction_ids: Transações do delta (inclusive as sem etiqueta).
+            tags: Etiquetas de cada transação, ex: de
+                ``TagDAO.get_transaction_tags``.
+        """
+        positions = {
+            transaction_id: position
+            for transaction_id, position in zip(
+                transaction_ids, self.cache.positions(transaction_ids).tolist()
+            )
+            if position >= 0
+        }
+        cleared = np.fromiter(positions.values(), dtype=np.int64)
+        with self._lock:
+            size = self._size()
+            for tag_id in list(self.bitmaps):
+                self.bitmaps[tag_id] = _fit(self.bitmaps[tag_id], size)
+                _set_bits(self.bitmaps[tag_id], cleared, False)
+            by_tag = {}
+            for transaction_id, tag_ids in tags.items():
+                if transaction_id in positions:
+                    for tag_id in tag_ids:
+                        by_tag.setdefault(tag_id, []).append(positions[transaction_id])
+            for tag_id, tagged in by_tag.items():
+                bitmap = _fit(self.bitmaps.get(tag_id, np.empty(0, np.uint8)), size)
+                _set_bits(bitmap, np.asarray(tagged, dtype=np.int64))
+                self.bitmaps[tag_id] = bitmap
+            self.version = self.cache.version
+
+    def mask(
+        self,
+        tags: Sequence[int] = (),
+        exclude_tags: Sequence[int] = (),
+        category_id: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Linhas com todas as ``tags``, nenhuma das ``exclude_tags`` e, se
+        informada, da categoria
+
+        Returns:
+            Array booleano com uma posição por linha do cache.
+        """
+        count = self.cache.count
+        size = (count + 7) // 8
+        with self._lock:
+            bits = np.full(size, 0xFF, np.uint8)
+            for tag_id in tags:
+                bitmap = self.bitmaps.get(tag_id)
+                if bitmap is None:
+                    bits[:] = 0
+                    break
+                bits &= _fit(bitmap, size)
+            for tag_id in exclude_tags:
+                bitmap = self.bitmaps.get(tag_id)
+                if bitmap is not None:
+                    bits &= ~_fit(bitmap, size)
+        mask = np.unpackbits(bits, count=count, bitorder="little").view(bool)
+        if category_id is not None:
+            mask &= np.asarray(self.cache.columns["category"][:count]) == category_id
+        return mask
@@ -1,14 +1,12 @@
-from finance.tui import FinanceApp
+import sys
 
-# from dao.transaction_dao import TransactionDAO
+if "--profile" in sys.argv[1:]:
+    # Mede os imports desde o início, antes dos DAOs e do SQLAlchemy
+    from finance.profiling import IMPORT_TIMER
 
-# transaction_dao = TransactionDAO()
-
-
-def main():
-    app = FinanceApp()
-    app.run()
+    IMPORT_TIMER.install()
 
+from finance.cli import main  # noqa: E402
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# api.py
+"""
+API HTTP local (JSON) sobre os DAOs.
+
+Os handlers são assíncronos e executam os DAOs, que são síncronos, em um
+pool de threads, sem bloquear o loop do aiohttp. As respostas de leitura
+levam um ETag com a versão de dados atual: um cliente que reenvia o ETag em
+If-None-Match recebe 304 sem que nenhum agregado seja recalculado.
+
+    GET    /api/transactions?limit=100&offset=0
+    GET    /api/totals[?year=2024]
+    GET    /api/totals/by-month[?year=2024]
+    GET    /api/totals/by-category[?year=2024][&rollup=1]
+    GET    /api/categories
+    POST   /api/categories                {"name": "...", "parent_id": 2}
+    GET    /api/categories/{id}
+    PUT    /api/categories/{id}           {"name": "...", "version": 3}
+    DELETE /api/categories/{id}[?reassign_to=7]
+    POST   /api/categories/{id}/merge     {"target": 7}
+    POST   /api/categories/{id}/move      {"parent_id": 7 | null}
+
+Uso:
+    python api_server.py [--host 127.0.0.1] [--port 8080]
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from aiohttp import web
+
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db.config import SessionLocal
+from models.serialization import (
+    category_decoder,
+    category_encoder,
+    transaction_encoder,
+)
+
+# Tamanho de página padrão e máximo de /api/transactions
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+SESSION_FACTORY_KEY = web.AppKey("session_factory", object)
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+
+routes = web.RouteTableDef()
+
+
+def _error(status: type, message: str) -> web.HTTPException:
+    return status(
+        text=json.dumps({"error": message}, ensure_ascii=False),
+        content_type="application/json",
+    )
+
+
+def _int_param(request: web.Request, name: str, default=None, minimum=None):
+    value = request.query.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise _error(web.HTTPBadRequest, f"'{name}' must be an integer")
+    if minimum is not None and number < minimum:
+        raise _error(web.HTTPBadRequest, f"'{name}' must be >= {minimum}")
+    return number
+
+
+def _category_id(request: web.Request) -> int:
+    try:
+        return int(request.match_info["category_id"])
+    except ValueError:
+        raise _error(web.HTTPNotFound, "Category not found")
+
+
+async def run_dao(request: web.Request, func, *args):
+    """Executa ``func(session_factory, *args)`` no pool de threads"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        request.app[EXECUTOR_KEY], func, request.app[SESSION_FACTORY_KEY], *args
+    )
+
+
+def _data_version(session_factory) -> int:
+    with TransactionDAO(session=session_factory()) as dao:
+        return dao.current_version()
+
+
+async def versioned_json(request: web.Request, func, *args) -> web.Response:
+    """
+    Resposta JSON com ETag igual à versão de dados.
+
+    A versão é lida antes dos dados: se algo mudar no meio, o ETag fica mais
+    antigo que o conteúdo e o cliente apenas busca de novo na próxima vez.
+    """
+    etag = f'"{await run_dao(request, _data_version)}"'
+    if_none_match = request.headers.get("If-None-Match", "")
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return web.Response(status=304, headers={"ETag": etag})
+    data = await run_dao(request, func, *args)
+    return web.json_response(data, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+# ==================== Transações ====================
+
+
+def _transactions_page(session_factory, limit: int, offset: int):
+    with TransactionDAO(session=session_factory()) as dao:
+        # Uma linha a mais indica se existe próxima página
+        rows = dao.get_transaction_rows_page(limit + 1, offset)
+    return {
+        "items": transaction_encoder.encode_batch(rows[:limit]),
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if len(rows) > limit else None,
+    }
+
+
+@routes.get("/api/transactions")
+async def list_transactions(request: web.Request) -> web.Response:
+    limit = _int_param(request, "limit", DEFAULT_PAGE_SIZE, minimum=1)
+    offset = _int_param(request, "offset", 0, minimum=0)
+    return await versioned_json(
+        request, _transactions_page, min(limit, MAX_PAGE_SIZE), offset
+    )
+
+
+# ==================== Agregados ====================
+
+
+def _totals(session_factory, year: Optional[int]):
+    with SummaryDAO(session=session_factory()) as dao:
+        totals = dao.get_totals_by_type(year)
+    totals["balance"] = totals["income"] - totals["expense"]
+    return totals
+
+
+def _totals_by_month(session_factory, year: Optional[int]):
+    with SummaryDAO(session=session_factory()) as dao:
+        totals = dao.get_totals_by_month(year)
+    return [{"month": month, **values} for month, values in totals.items()]
+
+
+def _totals_by_category(session_factory, year: Optional[int], rollup: bool):
+    with SummaryDAO(session=session_factory()) as dao:
+        return dao.get_totals_by_category(year, rollup=rollup)
+
+
+@routes.get("/api/totals")
+async def totals(request: web.Request) -> web.Response:
+    return await versioned_json(request, _totals, _int_param(request, "year"))
+
+
+@routes.get("/api/totals/by-month")
+async def totals_by_month(request: web.Request) -> web.Response:
+    return await versioned_json(request, _totals_by_month, _int_param(request, "year"))
+
+
+@routes.get("/api/totals/by-category")
+async def totals_by_category(request: web.Request) -> web.Response:
+    rollup = request.query.get("rollup", "") not in ("", "0", "false")
+    return await versioned_json(
+        request, _totals_by_category, _int_param(request, "year"), rollup
+    )
+
+
+# ==================== Categorias ====================
+
+
+def _list_categories(session_factory):
+    with CategoryDAO(session=session_factory()) as dao:
+        return category_encoder.encode_batch(dao.get_all_categories())
+
+
+def _get_category(session_factory, category_id: int):
+    with CategoryDAO(session=session_factory()) as dao:
+        category = dao.get_category_by_id(category_id)
+        return category_encoder.encode(category) if category else None
+
+
+def _create_category(session_factory, name: str, parent_id: Optional[int]):
+    with CategoryDAO(session=session_factory()) as dao:
+        category = dao.create_category(name, parent_id=parent_id)
+        return category_encoder.encode(category) if category else None
+
+
+def _update_category(session_factory, category_id: int, name: str, version):
+    with CategoryDAO(session=session_factory()) as dao:
+        if dao.get_category_by_id(category_id) is None:
+            return None, False
+        category = dao.update_category(category_id, name, expected_version=version)
+        return (category_encoder.encode(category) if category else None), True
+
+
+def _delete_category(session_factory, category_id: int, reassign_to):
+    with CategoryDAO(session=session_factory()) as dao:
+        if dao.get_category_by_id(category_id) is None:
+            return None, False
+        return dao.delete_category(category_id, reassign_to=reassign_to), True
+
+
+def _merge_categories(session_factory, category_id: int, target_id: int):
+    with CategoryDAO(session=session_factory()) as dao:
+        if dao.get_category_by_id(category_id) is None:
+            return None, False
+        return dao.merge_categories(category_id, target_id), True
+
+
+def _move_category(session_factory, category_id: int, parent_id: Optional[int]):
+    with CategoryDAO(session=session_factory()) as dao:
+        if dao.get_category_by_id(category_id) is None:
+            return None, False
+        category = dao.set_parent(category_id, parent_id)
+        return (category_encoder.encode(category) if category else None), True
+
+
+async def _category_body(request: web.Request):
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise _error(web.HTTPBadRequest, "Invalid JSON body")
+    if not isinstance(body, dict):
+        raise _error(web.HTTPBadRequest, "Expected a JSON object")
+    try:
+        return category_decoder.decode_batch([body])[0]
+    except ValueError as e:
+        raise _error(web.HTTPBadRequest, str(e))
+
+
+@routes.get("/api/categories")
+async def list_categories(request: web.Request) -> web.Response:
+    return await versioned_json(request, _list_categories)
+
+
+@routes.post("/api/categories")
+async def create_category(request: web.Request) -> web.Response:
+    body = await _category_body(request)
+    category = await run_dao(request, _create_category, body["name"], body["parent_id"])
+    if category is None:
+        raise _error(web.HTTPConflict, "Category not created")
+    return web.json_response(category, status=201)
+
+
+@routes.get("/api/categories/{category_id}")
+async def get_category(request: web.Request) -> web.Response:
+    category = await run_dao(request, _get_category, _category_id(request))
+    if category is None:
+        raise _error(web.HTTPNotFound, "Category not found")
+    return web.json_response(category)
+
+
+@routes.put("/api/categories/{category_id}")
+async def update_category(request: web.Request) -> web.Response:
+    category_id = _category_id(request)
+    body = await _category_body(request)
+    category, found = await run_dao(
+        request, _update_category, category_id, body["name"], body["version"]
+    )
+    if not found:
+        raise _error(web.HTTPNotFound, "Category not found")
+    if category is None:
+        raise _error(web.HTTPConflict, "Category was changed by someone else")
+    return web.json_response(category)
+
+
+@routes.delete("/api/categories/{category_id}")
+async def delete_category(request: web.Request) -> web.Response:
+    reassign_to = request.query.get("reassign_to")
+    try:
+        reassign_to = int(reassign_to) if reassign_to is not None else None
+    except ValueError:
+        raise _error(web.HTTPBadRequest, "Invalid reassign_to")
+    deleted, found = await run_dao(
+        request, _delete_category, _category_id(request), reassign_to
+    )
+    if not found:
+        raise _error(web.HTTPNotFound, "Category not found")
+    if not deleted:
+        raise _error(
+            web.HTTPConflict,
+            "Category not deleted: it has transactions (use reassign_to)",
+        )
+    return web.Response(status=204)
+
+
+@routes.post("/api/categories/{category_id}/merge")
+async def merge_categories(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+        target_id = int(body["target"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise _error(web.HTTPBadRequest, 'Expected {"target": <category id>}')
+    moved, found = await run_dao(
+        request, _merge_categories, _category_id(request), target_id
+    )
+    if not found:
+        raise _error(web.HTTPNotFound, "Category not found")
+    if moved is None:
+        raise _error(web.HTTPConflict, "Categories not merged")
+    return web.json_response({"moved": moved})
+
+
+@routes.post("/api/categories/{category_id}/move")
+async def move_category(request: web.Request) -> web.Response:
+    try:
+        body = await request.json()
+        parent_id = body["parent_id"]
+        parent_id = int(parent_id) if parent_id is not None else None
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise _error(web.HTTPBadRequest, 'Expected {"parent_id": <category id>}')
+    category, found = await run_dao(
+        request, _move_category, _category_id(request), parent_id
+    )
+    if not found:
+        raise _error(web.HTTPNotFound, "Category not found")
+    if category is None:
+        raise _error(web.HTTPConflict, "Category not moved")
+    return web.json_response(category)
+
+
+def create_app(session_factory=None, workers: Optional[int] = None) -> web.Application:
+    """
+    Monta a aplicação aiohttp.
+
+    Args:
+        session_factory: Fábrica de sessões dos DAOs (padrão: SessionLocal).
+        workers: Threads do pool que executa os DAOs.
+    """
+    app = web.Application()
+    app[SESSION_FACTORY_KEY] = session_factory or SessionLocal
+
+    async def executor_context(app):
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        app[EXECUTOR_KEY] = executor
+        yield
+        executor.shutdown(wait=True)
+
+    app.cleanup_ctx.append(executor_context)
+    app.add_routes(routes)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP de finanças")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(workers=args.workers), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from textual.screen import Screen
-from textual.widgets import Button, Label, Input
+from textual.widgets import Button, Label, Input, Select
 from textual.containers import Grid
 
 
@@ -8,6 +8,14 @@ class CategoryDialog(Screen):
 
     CSS_PATH = "category_dialog.tcss"
 
+    def __init__(self, categories=(), *args, **kwargs):
+        """
+        Args:
+            categories: Categorias que podem ser a mãe da nova (opcional).
+        """
+        super().__init__(*args, **kwargs)
+        self.categories = sorted(categories, key=lambda c: c.name)
+
     def compose(self):
         yield Grid(
             Label("Add Category", id="title"),
@@ -17,26 +25,40 @@ class CategoryDialog(Screen):
                 classes="input",
                 id="category_name",
             ),
+            Label("Parent Category:", classes="label"),
+            Select(
+                options=[(c.name, c.id) for c in self.categories],
+                prompt="None",
+                classes="input",
+                id="parent_id",
+            ),
             # Static(),
             Button("Cancel", variant="warning", id="cancel"),
             Button("Save", variant="success", id="ok"),
             id="category-dialog",
         )
 
+    def result(self, category_name):
+        """Nome e categoria mãe (None: raiz), ou None se o nome está vazio"""
+        if not category_name.strip():
+            return None
+        parent_id = self.query_one("#parent_id", Select).value
+        return {
+            "name": category_name.strip(),
+            "parent_id": None if parent_id == Select.BLANK else parent_id,
+        }
+
     def on_button_pressed(self, event):
         if event.button.id == "ok":
             category_name = self.query_one("#category_name", Input).value
-            if category_name.strip():  # Verifica se não está vazio
-                self.dismiss(category_name.strip())
-            else:
-                # Você pode adicionar uma mensagem de erro aqui
-                self.dismiss(None)
+            # Nome vazio: fecha sem criar
+            self.dismiss(self.result(category_name))
         else:
             self.dismiss(None)
 
     def on_input_submitted(self, event):
         """Permite confirmar com Enter no campo de input"""
         if event.input.id == "category_name":
-            category_name = event.input.value
-            if category_name.strip():
-                self.dismiss(category_name.strip())
+            result = self.result(event.input.value)
+            if result:
+                self.dismiss(result)
@@ -0,0 +1,570 @@
+# cli.py
+"""
+Linha de comando sem interface gráfica.
+
+Os subcomandos reutilizam os DAOs e imprimem JSON ou CSV; nada aqui importa
+Textual ou os módulos de gráficos, então a partida é rápida o bastante para
+cron e scripts. Sem subcomando, a TUI é aberta normalmente.
+
+    python -m finance totals [--year 2024] [--format json|csv]
+    python -m finance by-month [--year 2024]
+    python -m finance by-category [--year 2024] [--rollup]
+    python -m finance export [--output arquivo.csv] [--format csv|json]
+    python -m finance import arquivo.csv [--format csv|json] [--no-reconcile]
+                                         [--conflicts skip|import]
+    python -m finance rules list | add CATEGORIA --keyword "posto" | delete ID
+    python -m finance archive --before 2023-01-01 | --keep-months 24
+    python -m finance rebuild-summaries
+    python -m finance pivot [--type expenses|incomes|net] [--deltas]
+    python -m finance backup arquivo.bak [--since VERSÃO | --base anterior.bak]
+    python -m finance restore completo.bak [incremental.bak ...] [--force]
+                                           [--dry-run]
+    python -m finance aggregate-daemon [--socket /tmp/finance-aggregates.sock]
+    python -m finance --profile [--profile-dir profile]
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List
+
+from dao.archive_dao import ArchiveDAO, months_ago
+from dao.backup_dao import BackupDAO, BackupError, read_header
+from dao.category_dao import CategoryDAO
+from dao.reconciliation import ReconciliationDAO
+from dao.rule_dao import RuleDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db import config
+from finance.pivot import PIVOT_TYPES, CategoryPivot, month_range
+from models.categorizer import AMOUNT, KEYWORD, REGEX
+from models.serialization import transaction_decoder, transaction_encoder
+
+# Colunas de exportação/importação de transações
+TRANSACTION_FIELDS = list(transaction_encoder.names)
+
+
+def write_rows(rows: List[Dict[str, Any]], fmt: str, out, fields=None):
+    """Escreve uma lista de dicionários em JSON ou CSV"""
+    if fmt == "json":
+        json.dump(rows, out, ensure_ascii=False, indent=2, default=str)
+        out.write("\n")
+        return
+    fields = fields or (list(rows[0].keys()) if rows else [])
+    writer = csv.DictWriter(out, fieldnames=fields, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def write_batches(batches: Iterable[List[Dict[str, Any]]], fmt: str, out, fields):
+    """Escreve lotes de dicionários em JSON ou CSV à medida que chegam"""
+    count = 0
+    if fmt == "json":
+        out.write("[")
+        for batch in batches:
+            for row in batch:
+                out.write(",\n" if count else "\n")
+                json.dump(row, out, ensure_ascii=False, default=str)
+                count += 1
+        out.write("\n]\n" if count else "]\n")
+        return count
+    writer = csv.DictWriter(out, fieldnames=fields, lineterminator="\n")
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def read_rows(path: str, fmt: str) -> List[Dict[str, Any]]:
+    """Lê uma lista de dicionários de um arquivo JSON ou CSV"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if fmt == "json":
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def _rounded(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Arredonda valores monetários para a saída"""
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in values.items()}
+
+
+def _format_from_path(path: str, default: str = "csv") -> str:
+    if path and path.lower().endswith(".json"):
+        return "json"
+    return default
+
+
+def cmd_totals(args, out):
+    with SummaryDAO() as dao:
+        totals = dao.get_totals_by_type(args.year)
+    totals["balance"] = totals["income"] - totals["expense"]
+    totals = _rounded(totals)
+    write_rows([totals] if args.format == "csv" else totals, args.format, out)
+
+
+def cmd_by_month(args, out):
+    with SummaryDAO() as dao:
+        totals = dao.get_totals_by_month(args.year)
+    rows = [_rounded({"month": month, **values}) for month, values in totals.items()]
+    write_rows(rows, args.format, out, ["month", "income", "expense"])
+
+
+def cmd_by_category(args, out):
+    with SummaryDAO() as dao:
+        rows = [
+            _rounded(row)
+            for row in dao.get_totals_by_category(args.year, rollup=args.rollup)
+        ]
+    write_rows(rows, args.format, out, ["category_id", "category", "income", "expense"])
+
+
+def export_batches() -> Iterable[List[Dict[str, Any]]]:
+    """Transações no formato de exportação, em lotes"""
+    with TransactionDAO() as dao:
+        yield from transaction_encoder.iter_encoded(dao.iter_transaction_row_batches())
+
+
+def cmd_export(args, out):
+    fmt = args.format or _format_from_path(args.output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            exported = write_batches(export_batches(), fmt, f, TRANSACTION_FIELDS)
+        json.dump({"exported": exported}, out)
+        out.write("\n")
+    else:
+        write_batches(export_batches(), fmt, out, TRANSACTION_FIELDS)
+
+
+def load_transactions(path: str, fmt: str) -> List[Dict[str, Any]]:
+    """
+    Lê e valida as transações de um arquivo, criando as categorias que
+    faltarem (pelo nome).
+
+    Raises:
+        ValueError: Registro com campo ausente ou valor inválido.
+    """
+    rows = [
+        row
+        for batch in transaction_decoder.iter_decoded(read_rows(path, fmt))
+        for row in batch
+    ]
+    with CategoryDAO() as dao:
+        ids = {c.name: c.id for c in dao.get_all_categories()}
+        for row in rows:
+            name = row.get("category")
+            if not row.get("category_id") and name and name not in ids:
+                category = dao.create_category(name)
+                if category is not None:
+                    ids[name] = category.id
+    transactions = [
+        {
+            "description": row.get("description"),
+            "transaction_date": row["transaction_date"],
+            "transaction_value": row["transaction_value"],
+            "type": row["type"],
+            "category_id": row["category_id"] or ids.get(row.get("category")),
+        }
+        for row in rows
+    ]
+    if any(t["category_id"] is None for t in transactions):
+        # Sem categoria no arquivo: usa as regras de categorização
+        with RuleDAO() as dao:
+            dao.get_categorizer().apply(transactions)
+        missing = [i for i, t in enumerate(transactions) if t["category_id"] is None]
+        if missing:
+            raise ValueError(
+                f"{len(missing)} registro(s) sem categoria e sem regra que se "
+                f"aplique (o primeiro é o registro {missing[0]})"
+            )
+    return transactions
+
+
+def cmd_import(args, out):
+    fmt = args.format or _format_from_path(args.file)
+    try:
+        transactions = load_transactions(args.file, fmt)
+    except ValueError as e:
+        print(f"Erro ao importar transações: {e}", file=sys.stderr)
+        return 1
+    report = {}
+    if args.reconcile:
+        # Duplicatas exatas nunca entram; conflitos conforme --conflicts
+        with ReconciliationDAO() as dao:
+            result = dao.reconcile(transactions, date_tolerance=args.date_tolerance)
+        if result is None:
+            return 1
+        transactions = result.new
+        if args.conflicts == "import":
+            transactions += [conflict.record for conflict in result.conflicts]
+        report = {
+            "duplicates": len(result.duplicates),
+            "conflicts": len(result.conflicts),
+        }
+    imported = 0
+    if transactions:
+        with TransactionDAO() as dao:
+            imported = dao.create_transactions(transactions)
+    json.dump({"imported": imported, **report}, out)
+    out.write("\n")
+    return 0 if imported == len(transactions) else 1
+
+
+RULE_FIELDS = [
+    "id",
+    "category_id",
+    "kind",
+    "pattern",
+    "min_value",
+    "max_value",
+    "priority",
+]
+
+
+def cmd_rules_list(args, out):
+    with RuleDAO() as dao:
+        rules = [rule.to_dict() for rule in dao.get_all_rules()]
+    write_rows(rules, args.format, out, RULE_FIELDS)
+
+
+def cmd_rules_add(args, out):
+    with CategoryDAO() as dao:
+        category = dao.get_category_by_name(args.category)
+        if category is None:
+            print(f"Categoria não encontrada: {args.category}", file=sys.stderr)
+            return 1
+        category_id = category.id
+    kind, pattern = AMOUNT, None
+    if args.keyword:
+        kind, pattern = KEYWORD, args.keyword
+    elif args.regex:
+        kind, pattern = REGEX, args.regex
+    with RuleDAO() as dao:
+        rule = dao.create_rule(
+            category_id,
+            kind,
+            pattern,
+            min_value=args.min_value,
+            max_value=args.max_value,
+            priority=args.priority,
+        )
+        if rule is None:
+            return 1
+        json.dump(rule.to_dict(), out)
+    out.write("\n")
+
+
+def cmd_rules_delete(args, out):
+    with RuleDAO() as dao:
+        deleted = dao.delete_rule(args.rule_id)
+    json.dump({"deleted": deleted}, out)
+    out.write("\n")
+    return 0 if deleted else 1
+
+
+def cmd_archive(args, out):
+    cutoff = args.before or months_ago(args.keep_months)
+    with ArchiveDAO() as dao:
+        archived = dao.archive(cutoff)
+        end = dao.archive_end()
+    json.dump(
+        {
+            "archived": archived,
+            "cutoff": cutoff.isoformat(),
+            "archive_end": end.isoformat() if end else None,
+        },
+        out,
+    )
+    out.write("\n")
+
+
+def cmd_rebuild_summaries(args, out):
+    with SummaryDAO() as dao:
+        ok = dao.rebuild()
+    json.dump({"rebuilt": ok}, out)
+    out.write("\n")
+    return 0 if ok else 1
+
+
+def cmd_pivot(args, out):
+    type = PIVOT_TYPES[args.type.capitalize()]
+    with SummaryDAO() as dao:
+        period = dao.get_month_range(type)
+        pivot = CategoryPivot(month_range(*period) if period else [])
+        for category_id, name, totals in dao.iter_category_month_totals(type):
+            pivot.add(category_id, name, totals)
+    pivot.write_csv(out, deltas=args.deltas)
+
+
+def cmd_backup(args, out):
+    since = args.since
+    if args.base:
+        try:
+            since = read_header(args.base)["version"]
+        except (OSError, BackupError) as e:
+            print(f"Erro ao ler o backup anterior: {e}", file=sys.stderr)
+            return 1
+    # Grava ao lado e renomeia: um backup interrompido não deixa arquivo
+    partial = f"{args.file}.partial"
+    replaced = False
+    try:
+        with open(partial, "wb") as f, BackupDAO() as dao:
+            header = dao.backup(f, since=since)
+        if header is None:
+            return 1
+        os.replace(partial, args.file)
+        replaced = True
+    finally:
+        # Qualquer falha (inclusive exceção ou Ctrl+C) descarta o parcial
+        if not replaced and os.path.exists(partial):
+            os.remove(partial)
+    json.dump(
+        {
+            "file": args.file,
+            "version": header["version"],
+            "since": header["since"],
+            "rows": header["rows"],
+            "bytes": os.path.getsize(args.file),
+        },
+        out,
+    )
+    out.write("\n")
+
+
+def cmd_restore(args, out):
+    try:
+        sources = [open(path, "rb") for path in args.files]
+    except OSError as e:
+        print(f"Erro ao abrir o backup: {e}", file=sys.stderr)
+        return 1
+    try:
+        with BackupDAO() as dao:
+            result = dao.restore(sources, force=args.force, dry_run=args.dry_run)
+    finally:
+        for source in sources:
+            source.close()
+    if result is None:
+        return 1
+    json.dump({"verified" if args.dry_run else "restored": result}, out)
+    out.write("\n")
+
+
+def cmd_aggregate_daemon(args, out):
+    """Atende os agregados aos apps até ser interrompido (Ctrl+C)"""
+    import asyncio
+
+    from db.aggregate_service import AggregateServer
+
+    if not args.socket:
+        out.write("Set --socket or FINANCE_AGGREGATE_SOCKET\n")
+        return 1
+    server = AggregateServer(args.socket, poll_interval=args.poll_interval)
+
+    async def serve():
+        if not await server.start():
+            return False
+        out.write(f"Aggregate daemon listening on {server.path}\n")
+        out.flush()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+        return True
+
+    try:
+        if not asyncio.run(serve()):
+            out.write(f"Aggregate daemon already running on {args.socket}\n")
+            return 1
+    except KeyboardInterrupt:
+        pass
+    out.write(f"Aggregate daemon stopped: {server.summary()}\n")
+    return 0
+
+
+def run_tui(args):
+    """Abre a interface TUI (únicos imports pesados ficam aqui)"""
+    from finance.logconfig import setup_logging
+
+    listener = setup_logging()
+    try:
+        if args.profile:
+            from finance.profiling import profile_tui
+
+            profile_tui(args.profile_dir)
+        else:
+            from finance.tui import FinanceApp
+
+            app = FinanceApp()
+            app.run()
+    finally:
+        if listener is not None:
+            listener.stop()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m finance", description="Personal Finance Manager"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Abre a TUI medindo imports, interações e quadros",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default="profile",
+        help="Diretório dos perfis (padrão: profile)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_aggregate(name, func, help):
+        sub = subparsers.add_parser(name, help=help)
+        sub.add_argument("--year", type=int, default=None)
+        sub.add_argument("--format", choices=["json", "csv"], default="json")
+        sub.set_defaults(func=func)
+        return sub
+
+    add_aggregate("totals", cmd_totals, "Totais de receitas, despesas e saldo")
+    add_aggregate("by-month", cmd_by_month, "Totais por mês")
+    sub = add_aggregate("by-category", cmd_by_category, "Totais por categoria")
+    sub.add_argument(
+        "--rollup",
+        action="store_true",
+        help="Soma em cada categoria os totais das subcategorias",
+    )
+
+    sub = subparsers.add_parser("export", help="Exporta as transações")
+    sub.add_argument("--output", "-o", default=None)
+    sub.add_argument("--format", choices=["json", "csv"], default=None)
+    sub.set_defaults(func=cmd_export)
+
+    sub = subparsers.add_parser("import", help="Importa transações")
+    sub.add_argument("file")
+    sub.add_argument("--format", choices=["json", "csv"], default=None)
+    sub.add_argument(
+        "--no-reconcile",
+        dest="reconcile",
+        action="store_false",
+        help="Importa tudo, sem procurar duplicatas",
+    )
+    sub.add_argument(
+        "--conflicts",
+        choices=["skip", "import"],
+        default="skip",
+        help="O que fazer com as quase duplicatas (padrão: skip)",
+    )
+    sub.add_argument("--date-tolerance", type=int, default=3)
+    sub.set_defaults(func=cmd_import)
+
+    rules = subparsers.add_parser("rules", help="Regras de categorização")
+    rules_commands = rules.add_subparsers(dest="rules_command", required=True)
+    sub = rules_commands.add_parser("list", help="Lista as regras")
+    sub.add_argument("--format", choices=["json", "csv"], default="json")
+    sub.set_defaults(func=cmd_rules_list)
+    sub = rules_commands.add_parser("add", help="Cria uma regra")
+    sub.add_argument("category", help="Nome da categoria")
+    pattern = sub.add_mutually_exclusive_group()
+    pattern.add_argument("--keyword", help="Palavras da descrição")
+    pattern.add_argument("--regex", help="Expressão regular")
+    sub.add_argument("--min-value", type=float, default=None)
+    sub.add_argument("--max-value", type=float, default=None)
+    sub.add_argument("--priority", type=int, default=0)
+    sub.set_defaults(func=cmd_rules_add)
+    sub = rules_commands.add_parser("delete", help="Remove uma regra")
+    sub.add_argument("rule_id", type=int)
+    sub.set_defaults(func=cmd_rules_delete)
+
+    sub = subparsers.add_parser(
+        "archive", help="Move as transações antigas para o arquivo"
+    )
+    cutoff = sub.add_mutually_exclusive_group(required=True)
+    cutoff.add_argument(
+        "--before",
+        type=datetime.datetime.fromisoformat,
+        help="Arquiva as transações anteriores a esta data (YYYY-MM-DD)",
+    )
+    cutoff.add_argument(
+        "--keep-months",
+        type=int,
+        help="Mantém na tabela quente só os últimos N meses (mais o atual)",
+    )
+    sub.set_defaults(func=cmd_archive)
+
+    sub = subparsers.add_parser(
+        "rebuild-summaries", help="Recalcula os totais mensais pré-agregados"
+    )
+    sub.set_defaults(func=cmd_rebuild_summaries)
+
+    sub = subparsers.add_parser(
+        "pivot", help="Tabela dinâmica categorias x meses em CSV"
+    )
+    sub.add_argument(
+        "--type",
+        choices=[label.lower() for label in PIVOT_TYPES],
+        default="expenses",
+    )
+    sub.add_argument(
+        "--deltas",
+        action="store_true",
+        help="Variação de cada mês para o anterior em vez dos totais",
+    )
+    sub.set_defaults(func=cmd_pivot)
+
+    sub = subparsers.add_parser("backup", help="Grava um backup do banco")
+    sub.add_argument("file")
+    since = sub.add_mutually_exclusive_group()
+    since.add_argument(
+        "--since",
+        type=int,
+        default=None,
+        help="Incremental: só o que mudou depois desta versão de dados",
+    )
+    since.add_argument(
+        "--base",
+        default=None,
+        help="Incremental: só o que mudou depois deste backup",
+    )
+    sub.set_defaults(func=cmd_backup)
+
+    sub = subparsers.add_parser(
+        "restore", help="Restaura um backup completo e seus incrementais"
+    )
+    sub.add_argument("files", nargs="+", help="O completo primeiro, na ordem")
+    sub.add_argument(
+        "--force",
+        action="store_true",
+        help="Substitui o conteúdo de um banco que não está vazio",
+    )
+    sub.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Só confere os arquivos, sem alterar o banco",
+    )
+    sub.set_defaults(func=cmd_restore)
+
+    sub = subparsers.add_parser(
+        "aggregate-daemon",
+        help="Serviço de agregados compartilhado entre os apps (socket Unix)",
+    )
+    sub.add_argument(
+        "--socket",
+        default=config.AGGREGATE_SOCKET,
+        help="Caminho do socket (padrão: FINANCE_AGGREGATE_SOCKET)",
+    )
+    sub.add_argument(
+        "--poll-interval",
+        type=float,
+        default=2.0,
+        help="Segundos entre as consultas da versão de dados",
+    )
+    sub.set_defaults(func=cmd_aggregate_daemon)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        return run_tui(args)
+    return args.func(args, out or sys.stdout) or 0
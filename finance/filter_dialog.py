@@ -0,0 +1,181 @@
+from textual.screen import Screen
+from textual.widgets import Button, Label, Input, Select
+from textual.containers import Grid
+from dao.category_dao import CategoryDAO
+from dao.tag_dao import TagDAO, normalize_tag
+from dao.transaction_dao import TransactionFilters
+import datetime
+
+
+def parse_day(text):
+    """Converte DD-MM-YYYY em datetime (vazio -> None)"""
+    text = text.strip()
+    if not text:
+        return None
+    day, month, year = map(int, text.split("-"))
+    return datetime.datetime(year, month, day)
+
+
+def parse_value(text):
+    """Converte o texto em float, aceitando vírgula (vazio -> None)"""
+    text = text.strip().replace(",", ".")
+    return float(text) if text else None
+
+
+def parse_tags(text, tag_ids):
+    """
+    Converte "a, b, -c" em (etiquetas exigidas, etiquetas excluídas)
+
+    Args:
+        tag_ids: Nome normalizado -> ID das etiquetas existentes.
+
+    Raises:
+        ValueError: Etiqueta desconhecida.
+    """
+    tags, exclude_tags = [], []
+    for item in text.split(","):
+        item = item.strip()
+        excluded = item.startswith("-")
+        name = normalize_tag(item[1:] if excluded else item)
+        if not name:
+            continue
+        if name not in tag_ids:
+            raise ValueError(f"Unknown tag: {name}")
+        (exclude_tags if excluded else tags).append(tag_ids[name])
+    return tuple(tags), tuple(exclude_tags)
+
+
+class FilterDialog(Screen):
+    """Diálogo para filtrar a tabela de transações por coluna"""
+
+    CSS_PATH = "filter_dialog.tcss"
+
+    def __init__(self, filters=None, *args, **kwargs):
+        """
+        Args:
+            filters: TransactionFilters atuais (preenchem o formulário).
+        """
+        super().__init__(*args, **kwargs)
+        self.filters = filters or TransactionFilters()
+        with TagDAO() as dao:
+            self.tag_names = {tag.id: tag.name for tag in dao.get_all_tags()}
+
+    def compose(self):
+        filters = self.filters
+        # "Até" é inclusivo na tela; no filtro o fim é exclusivo
+        end = filters.end - datetime.timedelta(days=1) if filters.end else None
+
+        yield Grid(
+            Label("Filter Transactions", id="title"),
+            Label("Description:", classes="label"),
+            Input(
+                placeholder="Contains...",
+                value=filters.description or "",
+                classes="input",
+                id="description",
+            ),
+            Label("Type:", classes="label"),
+            Select(
+                options=[("Receita", "Receita"), ("Despesa", "Despesa")],
+                value=filters.type or Select.BLANK,
+                classes="input",
+                id="type",
+            ),
+            Label("Category:", classes="label"),
+            Select(
+                options=self.get_category_options(),
+                value=(
+                    filters.category_id
+                    if filters.category_id is not None
+                    else Select.BLANK
+                ),
+                classes="input",
+                id="category-id",
+            ),
+            Label("From:", classes="label"),
+            Input(
+                placeholder="DD-MM-YYYY",
+                value=filters.start.strftime("%d-%m-%Y") if filters.start else "",
+                classes="input",
+                id="start",
+            ),
+            Label("To:", classes="label"),
+            Input(
+                placeholder="DD-MM-YYYY",
+                value=end.strftime("%d-%m-%Y") if end else "",
+                classes="input",
+                id="end",
+            ),
+            Label("Min. value:", classes="label"),
+            Input(
+                value="" if filters.min_value is None else str(filters.min_value),
+                classes="input",
+                id="min-value",
+            ),
+            Label("Max. value:", classes="label"),
+            Input(
+                value="" if filters.max_value is None else str(filters.max_value),
+                classes="input",
+                id="max-value",
+            ),
+            Label("Tags:", classes="label"),
+            Input(
+                placeholder="viagem-2026, -reembolsável (- exclui)",
+                value=", ".join(
+                    [self.tag_names.get(t, "") for t in filters.tags]
+                    + [f"-{self.tag_names.get(t, '')}" for t in filters.exclude_tags]
+                ),
+                classes="input",
+                id="tags",
+            ),
+            Button("Clear", variant="error", id="clear"),
+            Button("Cancel", variant="warning", id="cancel"),
+            Button("Apply", variant="success", id="ok"),
+            id="filter-dialog",
+        )
+
+    def get_category_options(self):
+        """Retorna lista de categorias do banco de dados"""
+        with CategoryDAO() as dao:
+            categories = dao.get_all_categories()
+            categories.sort(key=lambda c: c.name)
+        return [(c.name, c.id) for c in categories]
+
+    def read_filters(self):
+        """Monta os filtros a partir do formulário"""
+        type = self.query_one("#type", Select).value
+        category_id = self.query_one("#category-id", Select).value
+        end = parse_day(self.query_one("#end", Input).value)
+        tags, exclude_tags = parse_tags(
+            self.query_one("#tags", Input).value,
+            {name: id for id, name in self.tag_names.items()},
+        )
+        return TransactionFilters(
+            description=self.query_one("#description", Input).value.strip() or None,
+            type=None if type == Select.BLANK else type,
+            category_id=None if category_id == Select.BLANK else category_id,
+            start=parse_day(self.query_one("#start", Input).value),
+            end=end + datetime.timedelta(days=1) if end else None,
+            min_value=parse_value(self.query_one("#min-value", Input).value),
+            max_value=parse_value(self.query_one("#max-value", Input).value),
+            tags=tags,
+            exclude_tags=exclude_tags,
+        )
+
+    def on_button_pressed(self, event):
+        """Manipula cliques nos botões"""
+        if event.button.id == "ok":
+            try:
+                filters = self.read_filters()
+            except ValueError as e:
+                message = str(e)
+                if not message.startswith("Unknown tag"):
+                    message = "Invalid date (DD-MM-YYYY) or value"
+                self.notify(message, severity="error")
+                return
+            self.dismiss(filters)
+        elif event.button.id == "clear":
+            self.dismiss(TransactionFilters())
+        else:
+            # Cancelar - retorna None
+            self.dismiss(None)
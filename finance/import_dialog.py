@@ -0,0 +1,39 @@
+from textual.screen import Screen
+from textual.widgets import Button, Label, Input
+from textual.containers import Grid
+
+
+class ImportDialog(Screen):
+    """Diálogo que pede o arquivo (CSV ou JSON) a importar"""
+
+    CSS_PATH = "import_dialog.tcss"
+
+    def compose(self):
+        path_input = Input(placeholder="extrato.csv", id="path")
+        path_input.focus()
+
+        yield Grid(
+            Label("Import Transactions (CSV or JSON)", id="title"),
+            path_input,
+            Button("Cancel", variant="warning", id="cancel"),
+            Button("Import", variant="success", id="ok"),
+            id="import-dialog",
+        )
+
+    def on_input_submitted(self, event):
+        self.submit()
+
+    def submit(self):
+        path = self.query_one("#path", Input).value.strip()
+        if not path:
+            self.notify("Enter the file to import", severity="error")
+            return
+        self.dismiss(path)
+
+    def on_button_pressed(self, event):
+        """Manipula cliques nos botões"""
+        if event.button.id == "ok":
+            self.submit()
+        else:
+            # Cancelar - retorna None
+            self.dismiss(None)
@@ -0,0 +1,39 @@
+# logconfig.py
+"""
+Configuração de logging da aplicação TUI.
+
+O logger raiz só enfileira os registros (``QueueHandler``); uma thread do
+``QueueListener`` grava no arquivo e no console. Assim um log no meio de um
+handler da interface não espera pelo disco nem pelo terminal.
+"""
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+def setup_logging(level=logging.INFO, filename="app.log"):
+    """
+    Configura os handlers de log (chamado apenas ao iniciar a TUI)
+
+    Returns:
+        O ``QueueListener`` já iniciado (``stop()`` ao sair grava o que
+        ainda estiver na fila), ou None se o log já estava configurado.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return None
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [
+        logging.FileHandler(filename),  # Salva no arquivo
+        logging.StreamHandler(),  # Mostra no console
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    root.setLevel(level)
+    root.addHandler(QueueHandler(records))
+    listener.start()
+    return listener
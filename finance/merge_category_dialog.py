@@ -0,0 +1,44 @@
+from textual.screen import Screen
+from textual.widgets import Button, Label, Select
+from textual.containers import Grid
+
+
+class MergeCategoryDialog(Screen):
+    """Diálogo para fundir uma categoria em outra"""
+
+    CSS_PATH = "merge_category_dialog.tcss"
+
+    def __init__(self, source, categories, *args, **kwargs):
+        """
+        Args:
+            source: Categoria a fundir (some depois da fusão).
+            categories: Categorias que podem receber as transações.
+        """
+        super().__init__(*args, **kwargs)
+        self.source = source
+        self.categories = sorted(
+            (c for c in categories if c.id != source.id), key=lambda c: c.name
+        )
+
+    def compose(self):
+        yield Grid(
+            Label(f"Merge '{self.source.name}' into:", id="title"),
+            Select(
+                options=[(c.name, c.id) for c in self.categories],
+                classes="input",
+                id="target",
+            ),
+            Button("Cancel", variant="warning", id="cancel"),
+            Button("Merge", variant="error", id="ok"),
+            id="merge-category-dialog",
+        )
+
+    def on_button_pressed(self, event):
+        if event.button.id == "ok":
+            target = self.query_one("#target", Select).value
+            if target == Select.BLANK:
+                self.notify("Choose the target category", severity="error")
+                return
+            self.dismiss(target)
+        else:
+            self.dismiss(None)
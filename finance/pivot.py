@@ -0,0 +1,126 @@
+# pivot.py
+"""
+Tabela dinâmica categorias x meses.
+
+As células vêm de ``SummaryDAO.iter_category_month_totals`` (uma consulta
+agrupada sobre o resumo mensal). Cada linha traz os totais dos meses, o
+total do período e a variação do último mês em relação ao anterior; no modo
+de variações, cada célula mostra a diferença para o mês anterior.
+"""
+import csv
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# Tipos de total da tabela: rótulo -> ``type`` do SummaryDAO
+PIVOT_TYPES = {"Expenses": "Despesa", "Incomes": "Receita", "Net": None}
+
+
+def month_range(first: str, last: str) -> List[str]:
+    """Meses "YYYY-MM" de ``first`` a ``last``, inclusive"""
+    year, month = map(int, first.split("-"))
+    end = tuple(map(int, last.split("-")))
+    months = []
+    while (year, month) <= end:
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _deltas(values: List[float]) -> List[Optional[float]]:
+    """Diferença de cada mês para o anterior (None no primeiro)"""
+    return [None] + [b - a for a, b in zip(values, values[1:])]
+
+
+def _last_change(values: List[float]) -> float:
+    return values[-1] - values[-2] if len(values) > 1 else 0.0
+
+
+def _csv_values(values: Iterable[Optional[float]]) -> List:
+    return ["" if value is None else round(value, 2) for value in values]
+
+
+class CategoryPivot:
+    """Totais de cada categoria (linhas) por mês (colunas)"""
+
+    def __init__(self, months: Sequence[str]):
+        self.months = list(months)
+        # Categoria -> nome e categoria -> {mês: total}, em ordem de inserção
+        self.names: Dict[int, str] = {}
+        self.cells: Dict[int, Dict[str, float]] = {}
+
+    def add(self, category_id: int, name: str, totals: Dict[str, float]):
+        """Acrescenta (ou substitui) a linha de uma categoria"""
+        self.names[category_id] = name
+        self.cells[category_id] = totals
+
+    def values(self, category_id: int, deltas: bool = False) -> List[Optional[float]]:
+        """
+        Valores da linha na ordem dos meses; com ``deltas``, a diferença
+        para o mês anterior (None no primeiro mês)
+        """
+        totals = self.cells.get(category_id, {})
+        values = [totals.get(month, 0.0) for month in self.months]
+        return _deltas(values) if deltas else values
+
+    @property
+    def years(self) -> List[str]:
+        """Anos ("YYYY") do período"""
+        return sorted({month[:4] for month in self.months})
+
+    def total(self, category_id: int, year: Optional[str] = None) -> float:
+        """Total da categoria no período ou só em um ano"""
+        totals = self.cells.get(category_id, {})
+        if year is None:
+            return sum(totals.values())
+        return sum(total for month, total in totals.items() if month[:4] == year)
+
+    def last_change(self, category_id: int) -> float:
+        """Variação do último mês em relação ao anterior"""
+        return _last_change(self.values(category_id))
+
+    def column_totals(self, deltas: bool = False) -> List[Optional[float]]:
+        """Soma de todas as categorias em cada mês (ou a sua variação)"""
+        sums = [
+            sum(totals.get(month, 0.0) for totals in self.cells.values())
+            for month in self.months
+        ]
+        return _deltas(sums) if deltas else sums
+
+    def changes(self, other: "CategoryPivot") -> Tuple[Set[int], Set[int], Set[int]]:
+        """
+        Diferenças para uma versão mais nova da tabela
+
+        Returns:
+            Categorias (novas, removidas, alteradas).
+        """
+        added = set(other.cells) - set(self.cells)
+        removed = set(self.cells) - set(other.cells)
+        changed = {
+            category_id
+            for category_id in set(self.cells) & set(other.cells)
+            if self.cells[category_id] != other.cells[category_id]
+            or self.names[category_id] != other.names[category_id]
+        }
+        return added, removed, changed
+
+    def write_csv(self, out, deltas: bool = False):
+        """Grava a tabela em CSV: categoria, um campo por mês, total e variação"""
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["category", *self.months, "total", "change"])
+        for category_id in self.cells:
+            writer.writerow(
+                [
+                    self.names[category_id],
+                    *_csv_values(self.values(category_id, deltas)),
+                    round(self.total(category_id), 2),
+                    round(self.last_change(category_id), 2),
+                ]
+            )
+        sums = self.column_totals()
+        writer.writerow(
+            [
+                "Total",
+                *_csv_values(self.column_totals(deltas)),
+                round(sum(sums), 2),
+                round(_last_change(sums), 2),
+            ]
+        )
@@ -0,0 +1,255 @@
+import time
+
+from textual.containers import Horizontal, Vertical
+from textual.screen import Screen
+from textual.widgets import Button, DataTable, Footer, Input, Label
+from textual.widgets.data_table import RowKey
+
+from dao.summary_dao import SummaryDAO
+from finance.pivot import PIVOT_TYPES, CategoryPivot, month_range
+
+# Chave da linha de totais (as demais são os IDs das categorias)
+TOTAL_ROW = "total"
+
+
+class PivotScreen(Screen):
+    """
+    Tabela dinâmica: categorias nas linhas, os meses de um ano nas colunas,
+    mais o total do ano, o do período e a variação do último mês.
+
+    A DataTable desenha todas as colunas de cada linha visível, então a tela
+    mostra um ano por vez ([ e ] trocam o ano); a exportação leva o período
+    inteiro. A tela fica instalada no app (FinanceApp.SCREENS): ao voltar a
+    ela, os totais são buscados de novo e só as células que mudaram são
+    reescritas.
+    """
+
+    CSS_PATH = "pivot_screen.tcss"
+    BINDINGS = [
+        ("escape", "close", "Back"),
+        ("left_square_bracket", "previous_year", "Previous year"),
+        ("right_square_bracket", "next_year", "Next year"),
+        ("d", "toggle_deltas", "Totals/Deltas"),
+        ("t", "next_type", "Expenses/Incomes/Net"),
+        ("x", "export", "Export CSV"),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Tabela exibida (None antes da primeira busca) e o ano nas colunas
+        self.pivot = None
+        self.year = None
+        self.type_label = next(iter(PIVOT_TYPES))
+        # Células com a variação para o mês anterior em vez dos totais
+        self.deltas = False
+        self.elapsed = 0.0
+
+    def compose(self):
+        table = DataTable(id="pivot")
+        table.cursor_type = "row"
+        table.zebra_stripes = True
+        yield Vertical(
+            Label("Loading...", id="pivot-title"),
+            table,
+            Horizontal(
+                Input(value="pivot.csv", placeholder="CSV file", id="export-path"),
+                Button("Export CSV", variant="primary", id="export"),
+                Button("Close", variant="warning", id="close"),
+                id="pivot-actions",
+            ),
+            id="pivot-dialog",
+        )
+        yield Footer()
+
+    def on_screen_resume(self):
+        self.refresh_pivot()
+
+    def refresh_pivot(self, reset=False):
+        """Busca os totais em segundo plano (``reset`` redesenha a tabela)"""
+        self.run_worker(
+            lambda: self.load_pivot(reset),
+            thread=True,
+            exclusive=True,
+            group="pivot",
+        )
+
+    def load_pivot(self, reset=False):
+        """
+        Lê os totais (thread de worker). As linhas da consulta vão direto
+        para a tabela dinâmica, que segue para a tela em uma só chamada: cada
+        chamada da thread espera a tela ser redesenhada.
+        """
+        started = time.perf_counter()
+        type = PIVOT_TYPES[self.type_label]
+        with SummaryDAO() as dao:
+            period = dao.get_month_range(type)
+            pivot = CategoryPivot(month_range(*period) if period else [])
+            for category_id, name, totals in dao.iter_category_month_totals(type):
+                pivot.add(category_id, name, totals)
+        self.app.call_from_thread(
+            self.show_pivot, pivot, reset, time.perf_counter() - started
+        )
+
+    @staticmethod
+    def cell(value):
+        return "" if value is None else f"{value:,.2f}"
+
+    def year_months(self, pivot):
+        """Posições dos meses do ano exibido"""
+        positions = [
+            i for i, month in enumerate(pivot.months) if month[:4] == self.year
+        ]
+        return slice(positions[0], positions[-1] + 1) if positions else slice(0, 0)
+
+    def row_cells(self, pivot, category_id):
+        """Nome, meses do ano, totais e variação do último mês de uma categoria"""
+        values = pivot.values(category_id, self.deltas)[self.year_months(pivot)]
+        return [
+            pivot.names[category_id],
+            *map(self.cell, values),
+            self.cell(pivot.total(category_id, self.year)),
+            self.cell(pivot.total(category_id)),
+            self.cell(pivot.last_change(category_id)),
+        ]
+
+    def total_cells(self, pivot):
+        months = self.year_months(pivot)
+        sums = pivot.column_totals()
+        return [
+            "Total",
+            *map(self.cell, pivot.column_totals(self.deltas)[months]),
+            self.cell(sum(sums[months])),
+            self.cell(sum(sums)),
+            self.cell(sums[-1] - sums[-2] if len(sums) > 1 else 0.0),
+        ]
+
+    def column_keys(self, pivot):
+        return [
+            "category",
+            *pivot.months[self.year_months(pivot)],
+            "year",
+            "total",
+            "change",
+        ]
+
+    def reset_table(self, pivot):
+        """Recria as colunas da tabela (meses do ano exibido)"""
+        table = self.query_one("#pivot", DataTable)
+        table.clear(columns=True)
+        table.add_column("Category", key="category")
+        for month in pivot.months[self.year_months(pivot)]:
+            table.add_column(month, key=month)
+        table.add_column(self.year or "Year", key="year")
+        table.add_column("Total", key="total")
+        table.add_column("Δ last", key="change")
+
+    def append_rows(self, pivot, category_ids):
+        table = self.query_one("#pivot", DataTable)
+        for category_id in category_ids:
+            table.add_row(*self.row_cells(pivot, category_id), key=category_id)
+
+    def show_pivot(self, pivot, reset, elapsed):
+        """Desenha a tabela nova ou aplica só as diferenças na exibida"""
+        previous, self.pivot = self.pivot, pivot
+        self.elapsed = elapsed
+        if reset or previous is None or pivot.months != previous.months:
+            years = pivot.years
+            if self.year not in years:
+                self.year = years[-1] if years else None
+            self.redraw()
+            return
+        added, removed, changed = previous.changes(pivot)
+        if added or removed:
+            # Categorias novas ou removidas mudam a ordem: redesenha
+            self.redraw()
+            return
+        keys = self.column_keys(pivot)
+        for category_id in changed:
+            self.update_row(
+                category_id,
+                keys,
+                self.row_cells(previous, category_id),
+                self.row_cells(pivot, category_id),
+            )
+        self.update_row(
+            TOTAL_ROW, keys, self.total_cells(previous), self.total_cells(pivot)
+        )
+        self.update_title()
+
+    def update_title(self):
+        pivot = self.pivot
+        period = f"{pivot.months[0]} to {pivot.months[-1]}" if pivot.months else "-"
+        self.query_one("#pivot-title", Label).update(
+            f"{self.type_label} by category and month, {self.year or '-'} "
+            f"({len(pivot.cells)} categories, {period}, "
+            f"loaded in {self.elapsed * 1000:.0f}ms)"
+        )
+
+    def update_row(self, row_key, keys, old, new):
+        """Reescreve só as células que mudaram"""
+        table = self.query_one("#pivot", DataTable)
+        for key, old_cell, new_cell in zip(keys, old, new):
+            if old_cell != new_cell:
+                table.update_cell(RowKey(row_key), key, new_cell)
+
+    def redraw(self):
+        """Redesenha a tabela a partir dos totais já buscados"""
+        self.reset_table(self.pivot)
+        self.append_rows(self.pivot, list(self.pivot.cells))
+        self.query_one("#pivot", DataTable).add_row(
+            *self.total_cells(self.pivot), key=TOTAL_ROW
+        )
+        self.update_title()
+
+    def show_year(self, step):
+        """Passa para o ano anterior (-1) ou seguinte (1)"""
+        years = self.pivot.years if self.pivot is not None else []
+        if self.year not in years:
+            return
+        position = years.index(self.year) + step
+        if 0 <= position < len(years):
+            self.year = years[position]
+            self.redraw()
+
+    def action_previous_year(self):
+        self.show_year(-1)
+
+    def action_next_year(self):
+        self.show_year(1)
+
+    def action_toggle_deltas(self):
+        self.deltas = not self.deltas
+        if self.pivot is not None:
+            self.redraw()
+
+    def action_next_type(self):
+        labels = list(PIVOT_TYPES)
+        self.type_label = labels[(labels.index(self.type_label) + 1) % len(labels)]
+        self.query_one("#pivot-title", Label).update("Loading...")
+        self.refresh_pivot(reset=True)
+
+    def action_export(self):
+        if self.pivot is None:
+            self.notify("Pivot not loaded yet", severity="warning")
+            return
+        path = self.query_one("#export-path", Input).value.strip()
+        if not path:
+            self.notify("Enter the CSV file name", severity="error")
+            return
+        try:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                self.pivot.write_csv(f, deltas=self.deltas)
+        except OSError as e:
+            self.notify(f"Export failed: {e}", severity="error")
+            return
+        self.notify(f"Pivot exported to {path}")
+
+    def action_close(self):
+        self.dismiss(None)
+
+    def on_button_pressed(self, event):
+        """Manipula cliques nos botões"""
+        if event.button.id == "export":
+            self.action_export()
+        else:
+            self.action_close()
@@ -0,0 +1,467 @@
+# profiling.py
+"""
+Modo de perfil da TUI (``python -m finance --profile``).
+
+Enquanto o app roda, são medidos:
+
+- os imports da partida, no formato de ``python -X importtime``;
+- a partida (cProfile do início do app até o primeiro quadro montado);
+- cada interação (tecla ou clique) com um cProfile próprio, do evento até o
+  quadro seguinte, com o nome da ação da tecla quando houver;
+- a sessão inteira por amostragem das pilhas de todas as threads;
+- o tempo de cada quadro (pintura) e de cada recálculo de layout.
+
+Tudo vai para um diretório local em formatos padrão: ``.pstats`` (abrir com
+``python -m pstats`` ou snakeviz), ``.speedscope.json`` (speedscope.app) e
+CSV/texto. Só a biblioteca padrão é importada aqui: Textual só entra em
+``Profiler.start``, depois de os imports do app já terem sido medidos.
+"""
+import cProfile
+import csv
+import importlib.abc
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+IMPORTTIME_HEADER = "import time: self [us] | cumulative | imported package"
+
+
+def percentile(values, fraction):
+    """Percentil por posição (valores já ordenados)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Mede o tempo de execução de cada módulo importado.
+
+    Fica na frente de ``sys.meta_path``: repassa a busca aos outros finders
+    e embrulha o ``exec_module`` do loader encontrado. Só os imports da
+    thread que instalou o medidor são contados.
+    """
+
+    def __init__(self):
+        # (próprio [us], acumulado [us], nível, módulo), em ordem de término
+        self.records: List[Tuple[int, int, int, str]] = []
+        self._stack: List[List[int]] = []
+        self._thread = None
+
+    def install(self):
+        if self not in sys.meta_path:
+            self._thread = threading.get_ident()
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def __enter__(self):
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Loaders de módulos nativos e congelados são a própria classe,
+        # compartilhada por todos os módulos: esses ficam de fora
+        if loader is None or isinstance(loader, type):
+            return spec
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is not None and not hasattr(exec_module, "__timed__"):
+
+            def timed(module):
+                self._exec(exec_module, module)
+
+            timed.__timed__ = True
+            loader.exec_module = timed
+        return spec
+
+    def _exec(self, exec_module, module):
+        if threading.get_ident() != self._thread:
+            exec_module(module)
+            return
+        # [início, tempo dos imports aninhados]
+        frame = [time.perf_counter_ns(), 0]
+        self._stack.append(frame)
+        try:
+            exec_module(module)
+        finally:
+            self._stack.pop()
+            cumulative = time.perf_counter_ns() - frame[0]
+            if self._stack:
+                self._stack[-1][1] += cumulative
+            self.records.append(
+                (
+                    (cumulative - frame[1]) // 1000,
+                    cumulative // 1000,
+                    len(self._stack),
+                    module.__name__,
+                )
+            )
+
+    def write(self, f):
+        """Grava no formato de ``python -X importtime``"""
+        f.write(IMPORTTIME_HEADER + "\n")
+        for self_us, cumulative_us, depth, name in self.records:
+            f.write(
+                f"import time: {self_us:>9} | {cumulative_us:>10} | "
+                f"{'  ' * depth}{name}\n"
+            )
+
+    def slowest(self, count=15):
+        return sorted(self.records, reverse=True)[:count]
+
+
+# Medidor da partida: ``finance.__main__`` o instala antes dos outros imports
+IMPORT_TIMER = ImportTimer()
+
+
+class Sampler:
+    """
+    Amostra as pilhas das threads em intervalos fixos (perfil da sessão)
+
+    Sem ``thread_id``, todas as threads são amostradas (a principal e as dos
+    workers), cada uma em um perfil próprio.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        # Quadros distintos (nome, arquivo, linha) e o índice de cada um
+        self.frames: List[Tuple[str, str, int]] = []
+        self._index: Dict[Tuple[str, str, int], int] = {}
+        # Por thread: pilhas amostradas (da raiz para a folha) e o tempo de
+        # cada uma; amostras seguidas com a mesma pilha são somadas
+        self.threads: Dict[int, Tuple[List[Tuple[int, ...]], List[float]]] = {}
+        self.names: Dict[int, str] = {}
+        self.count = 0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        started = last = time.perf_counter()
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            if self.thread_id is not None:
+                frames = {self.thread_id: frames.get(self.thread_id)}
+            for ident, frame in frames.items():
+                if ident != own and frame is not None:
+                    self._add(ident, self._stack(frame), now - last)
+            self.count += 1
+            last = now
+        self.elapsed = last - started
+
+    def _stack(self, frame) -> Tuple[int, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+            index = self._index.get(key)
+            if index is None:
+                index = self._index[key] = len(self.frames)
+                self.frames.append(key)
+            stack.append(index)
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _add(self, ident, stack, weight):
+        if ident not in self.threads:
+            self.threads[ident] = ([], [])
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self.names[ident] = names.get(ident, str(ident))
+        samples, weights = self.threads[ident]
+        if samples and samples[-1] == stack:
+            weights[-1] += weight
+        else:
+            samples.append(stack)
+            weights.append(weight)
+
+    def speedscope(self, name) -> dict:
+        """Perfis no formato de arquivo do speedscope (tipo "sampled")"""
+        main = threading.main_thread().ident
+        profiles = []
+        # A thread principal primeiro: é o perfil aberto pelo speedscope
+        for ident in sorted(self.threads, key=lambda ident: ident != main):
+            samples, weights = self.threads[ident]
+            weights = [weight * 1000 for weight in weights]
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": self.names[ident],
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": [list(stack) for stack in samples],
+                    "weights": weights,
+                }
+            )
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "finance",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": function, "file": file, "line": line}
+                    for function, file, line in self.frames
+                ]
+            },
+            "profiles": profiles,
+        }
+
+
+class Profiler:
+    """
+    Perfil de uma sessão da TUI
+
+    Uso::
+
+        profiler = Profiler("profile")
+        profiler.start()
+        profiler.attach(app)
+        app.run()
+        profiler.stop()
+        profiler.write(IMPORT_TIMER)
+
+    Os perfis ficam em memória até ``write``: nada é gravado em disco
+    enquanto o app roda.
+    """
+
+    def __init__(self, directory, interval=0.005):
+        self.directory = directory
+        self.sampler = Sampler(interval)
+        self.started = 0.0
+        # Partida: cProfile até o primeiro quadro depois de o app ser montado
+        self.startup: Optional[cProfile.Profile] = None
+        self.startup_time = None
+        self._mounted = False
+        # Interações: (nome, início [s], duração [s], cProfile)
+        self.interactions: List[Tuple[str, float, float, cProfile.Profile]] = []
+        self._interaction = None
+        # Quadros: (tipo, início [s], duração [s])
+        self.frames: List[Tuple[str, float, float]] = []
+        self._patched = []
+
+    def start(self):
+        from textual.screen import Screen
+
+        self.started = time.perf_counter()
+        self._patch(Screen, "_compositor_refresh", "paint")
+        self._patch(Screen, "_refresh_layout", "layout")
+        self.sampler.start()
+        self.startup = cProfile.Profile()
+        self.startup.enable()
+
+    def stop(self):
+        if self.startup is not None and self.startup_time is None:
+            self.startup.disable()
+            self.startup_time = time.perf_counter() - self.started
+        self._end_interaction()
+        self.sampler.stop()
+        for owner, name, original in self._patched:
+            setattr(owner, name, original)
+        self._patched.clear()
+
+    def _patch(self, owner, name, kind):
+        """Troca um método de ``Screen`` por uma versão cronometrada"""
+        original = getattr(owner, name)
+        profiler = self
+
+        def timed(screen, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(screen, *args, **kwargs)
+            finally:
+                if kind == "layout" or screen is screen.app.screen:
+                    profiler._frame(kind, started)
+
+        self._patched.append((owner, name, original))
+        setattr(owner, name, timed)
+
+    def _frame(self, kind, started):
+        now = time.perf_counter()
+        self.frames.append((kind, started - self.started, now - started))
+        if kind != "paint":
+            return
+        if self.startup_time is None and self._mounted:
+            self.startup.disable()
+            self.startup_time = now - self.started
+        self._end_interaction()
+
+    def attach(self, app):
+        """Acompanha os eventos de entrada do app (teclas e cliques)"""
+        from textual import events
+
+        on_event = app.on_event
+
+        async def profiled(event):
+            interaction = (
+                self.startup_time is not None
+                and isinstance(event, (events.Key, events.MouseDown))
+                and not event.is_forwarded
+            )
+            if interaction:
+                self._begin_interaction(self._label(app, event))
+            await on_event(event)
+            if isinstance(event, events.Mount):
+                self._mounted = True
+
+        app.on_event = profiled
+
+    @staticmethod
+    def _label(app, event):
+        """Nome da interação: a ação ligada à tecla, se houver"""
+        if not hasattr(event, "key"):
+            return "click"
+        binding = app.active_bindings.get(event.key)
+        if binding is not None:
+            return binding.binding.action
+        return f"key-{event.key}"
+
+    def _begin_interaction(self, label):
+        # Uma nova entrada encerra a anterior (nem todo evento repinta)
+        self._end_interaction()
+        profile = cProfile.Profile()
+        self._interaction = (label, time.perf_counter(), profile)
+        profile.enable()
+
+    def _end_interaction(self):
+        if self._interaction is None:
+            return
+        label, started, profile = self._interaction
+        profile.disable()
+        self._interaction = None
+        self.interactions.append(
+            (label, started - self.started, time.perf_counter() - started, profile)
+        )
+
+    # ==================== SAÍDA ====================
+
+    def write(self, imports: Optional[ImportTimer] = None):
+        """Grava os perfis em ``directory`` e devolve o caminho do resumo"""
+        os.makedirs(os.path.join(self.directory, "interactions"), exist_ok=True)
+
+        def path(name):
+            return os.path.join(self.directory, name)
+
+        if imports is not None:
+            with open(path("imports.txt"), "w", encoding="utf-8") as f:
+                imports.write(f)
+        if self.startup is not None:
+            self.startup.dump_stats(path("startup.pstats"))
+        combined = None
+        for number, (label, _, _, profile) in enumerate(self.interactions, 1):
+            profile.dump_stats(path(f"interactions/{number:03d}-{label}.pstats"))
+            if combined is None:
+                combined = pstats.Stats(profile)
+            else:
+                combined.add(profile)
+        if combined is not None:
+            combined.dump_stats(path("interactions.pstats"))
+        with open(path("session.speedscope.json"), "w", encoding="utf-8") as f:
+            json.dump(self.sampler.speedscope("finance session"), f)
+        with open(path("frames.csv"), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "start_ms", "duration_ms"])
+            for kind, started, duration in self.frames:
+                writer.writerow(
+                    [kind, f"{started * 1000:.3f}", f"{duration * 1000:.3f}"]
+                )
+        with open(path("summary.txt"), "w", encoding="utf-8") as f:
+            f.write(self.summary(imports))
+        return path("summary.txt")
+
+    def summary(self, imports: Optional[ImportTimer] = None) -> str:
+        lines = []
+        if self.startup_time is not None:
+            lines.append(
+                f"Startup: first frame after {self.startup_time * 1000:.1f}ms "
+                "(startup.pstats)"
+            )
+        if imports is not None and imports.records:
+            total = sum(record[0] for record in imports.records)
+            lines += [
+                "",
+                f"Imports: {len(imports.records)} modules, {total / 1000:.1f}ms "
+                "(imports.txt); slowest by self time:",
+            ]
+            lines += [
+                f"  {self_us / 1000:8.1f}ms  {name}"
+                for self_us, _, _, name in imports.slowest()
+            ]
+        lines += [
+            "",
+            f"Interactions: {len(self.interactions)} "
+            "(interactions/*.pstats, interactions.pstats); slowest:",
+        ]
+        slowest = sorted(self.interactions, key=lambda item: item[2], reverse=True)
+        lines += [
+            f"  {duration * 1000:8.1f}ms  {label} (at {started:.2f}s)"
+            for label, started, duration, _ in slowest[:10]
+        ]
+        lines += ["", "Frames (frames.csv):"]
+        for kind in ("paint", "layout"):
+            durations = sorted(d for k, _, d in self.frames if k == kind)
+            lines.append(
+                f"  {kind}: {len(durations)}, "
+                f"p50 {percentile(durations, 0.5) * 1000:.2f}ms, "
+                f"p95 {percentile(durations, 0.95) * 1000:.2f}ms, "
+                f"max {(durations[-1] if durations else 0) * 1000:.2f}ms"
+            )
+        lines += [
+            "",
+            f"Sampling: {self.sampler.count} samples every "
+            f"{self.sampler.interval * 1000:.0f}ms over {self.sampler.elapsed:.1f}s "
+            "(session.speedscope.json)",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def profile_tui(directory, imports: ImportTimer = IMPORT_TIMER):
+    """Abre a TUI com o perfil ligado e grava os resultados ao sair"""
+    with imports:
+        from finance.tui import FinanceApp
+
+    profiler = Profiler(directory)
+    profiler.start()
+    try:
+        app = FinanceApp()
+        profiler.attach(app)
+        app.run()
+    finally:
+        profiler.stop()
+        summary = profiler.write(imports)
+    print(f"Profile written to {directory} (see {summary})")
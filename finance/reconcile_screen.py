@@ -0,0 +1,89 @@
+from textual.screen import Screen
+from textual.widgets import Button, DataTable, Label
+from textual.containers import Grid
+from textual.widgets.data_table import RowKey
+
+
+class ReconcileScreen(Screen):
+    """
+    Revisão de uma importação reconciliada.
+
+    Duplicatas exatas já ficam de fora; cada conflito (quase duplicata) é
+    mostrado ao lado da transação existente mais parecida e só é importado
+    se o usuário marcar. Ao confirmar, devolve os registros a importar.
+    """
+
+    CSS_PATH = "reconcile_screen.tcss"
+    BINDINGS = [("space", "toggle", "Import/Skip")]
+
+    def __init__(self, result, *args, **kwargs):
+        """
+        Args:
+            result: Reconciliation devolvida pelo ReconciliationDAO.
+        """
+        super().__init__(*args, **kwargs)
+        self.result = result
+        # Índices dos conflitos marcados para importar
+        self.accepted = set()
+
+    def compose(self):
+        result = self.result
+        conflicts = DataTable(id="conflicts")
+        conflicts.cursor_type = "row"
+        conflicts.zebra_stripes = True
+        conflicts.add_column("Import", key="import")
+        conflicts.add_columns("Date", "Description", "Value", "Existing", "Similarity")
+        for index, conflict in enumerate(result.conflicts):
+            record, best = conflict.record, conflict.candidates[0]
+            conflicts.add_row(
+                "No",
+                record["transaction_date"].strftime("%d-%m-%Y"),
+                record.get("description") or "",
+                f"{record['transaction_value']:>10.2f}",
+                f"{best.transaction_date:%d-%m-%Y} {best.description or ''}",
+                f"{best.similarity:.0%}",
+                key=index,
+            )
+
+        yield Grid(
+            Label(
+                f"{len(result.new)} new, {len(result.duplicates)} duplicates "
+                f"(skipped), {len(result.conflicts)} possible duplicates to review",
+                id="summary",
+            ),
+            conflicts,
+            Button("Cancel", variant="warning", id="cancel"),
+            Button("Import", variant="success", id="ok"),
+            id="reconcile-dialog",
+        )
+
+    def action_toggle(self):
+        conflicts = self.query_one("#conflicts", DataTable)
+        if conflicts.row_count == 0:
+            return
+        row_key, _ = conflicts.coordinate_to_cell_key(conflicts.cursor_coordinate)
+        self.toggle(row_key)
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected):
+        self.toggle(event.row_key)
+
+    def toggle(self, row_key: RowKey):
+        index = row_key.value
+        self.accepted ^= {index}
+        label = "Yes" if index in self.accepted else "No"
+        self.query_one("#conflicts", DataTable).update_cell(row_key, "import", label)
+
+    def records_to_import(self):
+        return self.result.new + [
+            conflict.record
+            for index, conflict in enumerate(self.result.conflicts)
+            if index in self.accepted
+        ]
+
+    def on_button_pressed(self, event):
+        """Manipula cliques nos botões"""
+        if event.button.id == "ok":
+            self.dismiss(self.records_to_import())
+        else:
+            # Cancelar - retorna None
+            self.dismiss(None)
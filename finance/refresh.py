@@ -0,0 +1,175 @@
+# refresh.py
+"""
+Agendador das atualizações da tela principal.
+
+Em vez de cada escrita refazer a tela na hora, os componentes (tabela, KPIs,
+gráficos, árvore de categorias) são marcados como desatualizados e refeitos
+juntos no próximo quadro ou ao fim de uma janela de espera: uma rajada de
+edições, uma importação ou vários avisos de outros apps viram uma única
+atualização.
+
+As leituras dos componentes rodam em uma carga em segundo plano. Uma carga
+que ainda não terminou quando outra começa é cancelada: os seus componentes
+entram na nova e o resultado dela é descartado. Os contadores de
+``RefreshStats`` medem quanto trabalho a junção poupou.
+"""
+from collections import Counter
+from typing import Callable, Iterable, List, Optional, Set, Tuple
+
+TABLE = "table"
+CATEGORIES = "categories"
+CATEGORY_TOTALS = "category-totals"
+KPIS = "kpis"
+MONTHLY_CHART = "monthly-chart"
+CATEGORY_CHART = "category-chart"
+PIVOT = "pivot"
+
+# Ordem de atualização: a tabela primeiro, pois o delta descobre o que mais
+# mudou e marca os outros componentes na mesma rodada
+ORDER = (
+    TABLE,
+    CATEGORIES,
+    CATEGORY_TOTALS,
+    KPIS,
+    MONTHLY_CHART,
+    CATEGORY_CHART,
+    PIVOT,
+)
+# Componentes refeitos junto com outro (a árvore é montada com os totais)
+COVERS = {CATEGORIES: {CATEGORY_TOTALS}}
+
+
+class RefreshStats:
+    """Contadores do agendador"""
+
+    def __init__(self):
+        # Pedidos e atualizações feitas, por componente
+        self.marks = Counter()
+        self.runs = Counter()
+        self.flushes = 0
+        # Rodadas adiadas (componentes com a tela coberta por um diálogo)
+        self.deferred = 0
+        # Cargas canceladas por uma mais nova e resultados descartados
+        self.cancelled = 0
+        self.stale = 0
+
+    @property
+    def coalesced(self) -> int:
+        """Pedidos que não viraram uma atualização própria"""
+        return sum(self.marks.values()) - sum(self.runs.values())
+
+    def summary(self) -> str:
+        runs = ", ".join(f"{name}={count}" for name, count in sorted(self.runs.items()))
+        return (
+            f"{sum(self.marks.values())} requests, {self.flushes} flushes, "
+            f"{self.coalesced} coalesced, {self.deferred} deferred, "
+            f"{self.cancelled} loads cancelled, {self.stale} stale results "
+            f"(runs: {runs or 'none'})"
+        )
+
+
+class RefreshScheduler:
+    """Junta os pedidos de atualização em uma rodada por quadro"""
+
+    def __init__(
+        self,
+        run: Callable[[List[str]], None],
+        schedule: Callable[[float, Callable[[], None]], None],
+        ready: Optional[Callable[[str], bool]] = None,
+        retry_delay: float = 0.25,
+    ):
+        """
+        Args:
+            run: Refaz os componentes recebidos (em ``ORDER``).
+            schedule: ``schedule(delay, callback)`` chama ``callback`` no
+                próximo quadro (``delay`` 0) ou depois de ``delay`` segundos.
+            ready: Indica se um componente pode ser refeito agora (ex: a
+                tela dele está visível); os demais esperam ``retry_delay``.
+        """
+        self._run = run
+        self._schedule = schedule
+        self._ready = ready or (lambda component: True)
+        self.retry_delay = retry_delay
+        self._dirty: Set[str] = set()
+        self._pending = False
+        self._flushing = False
+        # Carga em segundo plano mais recente e os componentes ainda não
+        # aplicados
+        self._generation = 0
+        self._loading: Set[str] = set()
+        self.stats = RefreshStats()
+
+    @property
+    def dirty(self) -> Set[str]:
+        return set(self._dirty)
+
+    def mark(self, *components: str, delay: float = 0.0):
+        """
+        Marca componentes como desatualizados
+
+        Args:
+            delay: Espera antes da rodada, para juntar uma rajada de pedidos
+                (ignorada se já houver uma rodada agendada).
+        """
+        self.stats.marks.update(components)
+        self._dirty.update(components)
+        if not self._flushing:
+            self._request(delay)
+
+    def _request(self, delay: float):
+        if not self._pending:
+            self._pending = True
+            self._schedule(delay, self.flush)
+
+    def take(self) -> List[str]:
+        """Retira os componentes marcados que podem ser refeitos agora"""
+        ready = {component for component in self._dirty if self._ready(component)}
+        covered = set().union(*(COVERS.get(component, ()) for component in ready))
+        self._dirty -= ready | covered
+        ready -= covered
+        self.stats.runs.update(ready)
+        return sorted(ready, key=ORDER.index)
+
+    def flush(self):
+        """Rodada: refaz de uma vez tudo o que foi marcado"""
+        self._pending = False
+        components = self.take()
+        if components:
+            self.stats.flushes += 1
+            self._flushing = True
+            try:
+                self._run(components)
+            finally:
+                self._flushing = False
+        if self._dirty:
+            # Sobrou o que espera a tela ficar visível (ou foi marcado
+            # depois de a rodada já ter retirado os componentes)
+            if any(self._ready(component) for component in self._dirty):
+                self._request(0.0)
+            else:
+                self.stats.deferred += 1
+                self._request(self.retry_delay)
+
+    def start_load(self, components: Iterable[str]) -> Tuple[int, List[str]]:
+        """
+        Registra uma carga em segundo plano
+
+        Returns:
+            Geração da carga e os componentes a carregar: os pedidos mais os
+            da carga anterior, se ela ainda não foi aplicada.
+        """
+        if self._loading:
+            self.stats.cancelled += 1
+        self._generation += 1
+        self._loading.update(components)
+        covered = set().union(*(COVERS.get(c, ()) for c in self._loading))
+        self._loading -= covered
+        return self._generation, sorted(self._loading, key=ORDER.index)
+
+    def finish_load(self, generation: int) -> bool:
+        """Indica se o resultado da carga ainda vale (não há uma mais nova)"""
+        if generation != self._generation:
+            self.stats.stale += 1
+            return False
+        self._loading.clear()
+        return True
@@ -0,0 +1,344 @@
+# reports.py
+"""
+Relatórios anuais gerados em paralelo.
+
+O trabalho é dividido em partições (ano x faixa de categorias). Cada
+partição é calculada em um processo separado, com a sua própria engine, por
+consultas agregadas do TransactionDAO; os parciais são depois combinados em
+um único relatório, gravado em CSV e/ou HTML.
+
+Uso:
+    python -m finance.reports 2023 2024 --workers 4 --format csv html
+"""
+import argparse
+import csv
+import datetime
+import heapq
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import sessionmaker
+
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from db.config import DATABASE_URL, make_engine
+
+# Chave dos totais: (ano, mês, category_id)
+TotalsKey = Tuple[int, int, int]
+# Despesa: (valor, id, data, descrição, category_id)
+Expense = Tuple[float, int, datetime.datetime, Optional[str], int]
+
+
+@dataclass(frozen=True)
+class ReportPartition:
+    """Fatia do trabalho: um ano e um grupo de categorias"""
+
+    year: int
+    category_ids: Tuple[int, ...]
+
+
+@dataclass
+class PartialReport:
+    """Agregados parciais (de uma partição ou já combinados)"""
+
+    # (ano, mês, categoria) -> {"income": ..., "expense": ..., "count": ...}
+    totals: Dict[TotalsKey, Dict[str, float]] = field(default_factory=dict)
+    # ano -> maiores despesas
+    largest: Dict[int, List[Expense]] = field(default_factory=dict)
+
+    def merge(self, other: "PartialReport", top_n: int):
+        """Soma os agregados de outro parcial a este"""
+        for key, values in other.totals.items():
+            current = self.totals.setdefault(
+                key, {"income": 0.0, "expense": 0.0, "count": 0}
+            )
+            for name, value in values.items():
+                current[name] += value
+        for year, expenses in other.largest.items():
+            self.largest[year] = heapq.nlargest(
+                top_n, self.largest.get(year, []) + expenses
+            )
+
+
+@dataclass
+class YearlyReport(PartialReport):
+    """Relatório final, com os nomes das categorias"""
+
+    categories: Dict[int, str] = field(default_factory=dict)
+
+    def category_summary(self) -> List[Dict]:
+        """Totais e médias por ano e categoria"""
+        summary: Dict[Tuple[int, int], Dict] = {}
+        for (year, _month, category_id), values in self.totals.items():
+            row = summary.setdefault(
+                (year, category_id),
+                {"income": 0.0, "expense": 0.0, "count": 0},
+            )
+            for name, value in values.items():
+                row[name] += value
+        rows = []
+        for (year, category_id), row in sorted(summary.items()):
+            rows.append(
+                {
+                    "year": year,
+                    "category": self.categories.get(category_id, str(category_id)),
+                    "income": row["income"],
+                    "expense": row["expense"],
+                    "count": row["count"],
+                    "monthly_average_expense": row["expense"] / 12,
+                    "average_transaction": (
+                        (row["income"] + row["expense"]) / row["count"]
+                        if row["count"]
+                        else 0.0
+                    ),
+                }
+            )
+        return rows
+
+
+def plan_partitions(
+    years: Sequence[int], category_ids: Sequence[int], workers: int
+) -> List[ReportPartition]:
+    """
+    Divide anos x categorias em partições suficientes para ocupar os workers.
+
+    Cada ano é dividido em ``ceil(workers / len(years))`` faixas de categorias.
+    """
+    category_ids = sorted(category_ids)
+    chunks_per_year = max(1, -(-workers // max(len(years), 1)))
+    chunks_per_year = min(chunks_per_year, max(len(category_ids), 1))
+    chunk_size = max(1, -(-len(category_ids) // chunks_per_year))
+    partitions = []
+    for year in sorted(set(years)):
+        for start in range(0, max(len(category_ids), 1), chunk_size):
+            partitions.append(
+                ReportPartition(year, tuple(category_ids[start : start + chunk_size]))
+            )
+    return partitions
+
+
+# Fábrica de sessões de cada processo worker
+_session_factory = None
+
+
+def _init_worker(url: str):
+    """Inicializa o processo worker com a sua própria engine"""
+    global _session_factory
+    _session_factory = sessionmaker(bind=make_engine(url))
+
+
+def compute_partition(partition: ReportPartition, top_n: int = 10) -> PartialReport:
+    """Calcula os agregados de uma partição (executado no worker)"""
+    session = _session_factory() if _session_factory else None
+    start = datetime.datetime(partition.year, 1, 1)
+    end = datetime.datetime(partition.year + 1, 1, 1)
+    partial = PartialReport()
+    with TransactionDAO(session=session) as dao:
+        rows = dao.get_category_month_totals(start, end, partition.category_ids)
+        for category_id, year, month, type_, total, count in rows:
+            values = partial.totals.setdefault(
+                (int(year), int(month), category_id),
+                {"income": 0.0, "expense": 0.0, "count": 0},
+            )
+            values["income" if type_ == "Receita" else "expense"] += float(total)
+            values["count"] += count
+        partial.largest[partition.year] = [
+            (float(value), id_, date, description, category_id)
+            for id_, date, description, value, category_id in dao.get_largest_expenses(
+                start, end, partition.category_ids, limit=top_n
+            )
+        ]
+    return partial
+
+
+def generate_report(
+    years: Sequence[int],
+    workers: Optional[int] = None,
+    url: str = DATABASE_URL,
+    top_n: int = 10,
+) -> YearlyReport:
+    """
+    Gera o relatório dos anos informados.
+
+    Args:
+        workers: Quantidade de processos (padrão: núcleos disponíveis).
+            Com 1 worker tudo é calculado no processo atual.
+        url: Banco usado pelos workers.
+        top_n: Quantidade de maiores despesas por ano.
+    """
+    workers = workers or os.cpu_count() or 1
+    _init_worker(url)
+    report = YearlyReport()
+    with CategoryDAO(session=_session_factory()) as dao:
+        report.categories = {c.id: c.name for c in dao.get_all_categories()}
+    partitions = plan_partitions(years, list(report.categories), workers)
+
+    if workers == 1:
+        partials = [compute_partition(p, top_n) for p in partitions]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(url,)
+        ) as executor:
+            partials = list(
+                executor.map(compute_partition, partitions, [top_n] * len(partitions))
+            )
+    for partial in partials:
+        report.merge(partial, top_n)
+    return report
+
+
+def write_csv(report: YearlyReport, directory: str) -> List[str]:
+    """Grava o relatório em arquivos CSV no diretório informado"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    path = os.path.join(directory, "monthly.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["year", "month", "category", "income", "expense", "count"])
+        for (year, month, category_id), values in sorted(report.totals.items()):
+            writer.writerow(
+                [
+                    year,
+                    month,
+                    report.categories.get(category_id, category_id),
+                    f"{values['income']:.2f}",
+                    f"{values['expense']:.2f}",
+                    values["count"],
+                ]
+            )
+    paths.append(path)
+
+    path = os.path.join(directory, "categories.csv")
+    summary = report.category_summary()
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f,
+            fieldnames=summary[0].keys() if summary else ["year", "category"],
+        )
+        writer.writeheader()
+        writer.writerows(summary)
+    paths.append(path)
+
+    path = os.path.join(directory, "largest.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["year", "date", "description", "category", "value"])
+        for year, expenses in sorted(report.largest.items()):
+            for value, _id, date, description, category_id in expenses:
+                writer.writerow(
+                    [
+                        year,
+                        date.strftime("%Y-%m-%d"),
+                        description,
+                        report.categories.get(category_id, category_id),
+                        f"{value:.2f}",
+                    ]
+                )
+    paths.append(path)
+    return paths
+
+
+def _html_table(headers: Sequence[str], rows: Sequence[Sequence]) -> str:
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def write_html(report: YearlyReport, path: str) -> str:
+    """Grava o relatório em um arquivo HTML"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    sections = ["<h1>Finance Report</h1>"]
+
+    sections.append("<h2>Categories</h2>")
+    sections.append(
+        _html_table(
+            ["Year", "Category", "Income", "Expense", "Count", "Monthly avg."],
+            [
+                (
+                    row["year"],
+                    row["category"],
+                    f"{row['income']:,.2f}",
+                    f"{row['expense']:,.2f}",
+                    row["count"],
+                    f"{row['monthly_average_expense']:,.2f}",
+                )
+                for row in report.category_summary()
+            ],
+        )
+    )
+
+    sections.append("<h2>Expenses by Month</h2>")
+    sections.append(
+        _html_table(
+            ["Year", "Month", "Category", "Income", "Expense"],
+            [
+                (
+                    year,
+                    f"{month:02d}",
+                    report.categories.get(category_id, category_id),
+                    f"{values['income']:,.2f}",
+                    f"{values['expense']:,.2f}",
+                )
+                for (year, month, category_id), values in sorted(report.totals.items())
+            ],
+        )
+    )
+
+    sections.append("<h2>Largest Expenses</h2>")
+    sections.append(
+        _html_table(
+            ["Year", "Date", "Description", "Category", "Value"],
+            [
+                (
+                    year,
+                    date.strftime("%Y-%m-%d"),
+                    description or "",
+                    report.categories.get(category_id, category_id),
+                    f"{value:,.2f}",
+                )
+                for year, expenses in sorted(report.largest.items())
+                for value, _id, date, description, category_id in expenses
+            ],
+        )
+    )
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+            "<title>Finance Report</title></head><body>"
+            + "".join(sections)
+            + "</body></html>"
+        )
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatórios anuais de finanças")
+    parser.add_argument("years", nargs="+", type=int, help="Anos do relatório")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=10, help="Maiores despesas")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument(
+        "--format", nargs="+", choices=["csv", "html"], default=["csv", "html"]
+    )
+    args = parser.parse_args(argv)
+
+    report = generate_report(args.years, workers=args.workers, top_n=args.top)
+    if "csv" in args.format:
+        for path in write_csv(report, args.output_dir):
+            print(f"✓ {path}")
+    if "html" in args.format:
+        print(f"✓ {write_html(report, os.path.join(args.output_dir, 'report.html'))}")
+
+
+if __name__ == "__main__":
+    main()
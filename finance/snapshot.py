@@ -0,0 +1,106 @@
+# snapshot.py
+"""
+Retrato consolidado da tela inicial.
+
+Reúne, em consultas simultâneas (uma sessão por consulta), tudo o que a
+primeira tela precisa: a primeira página de transações, os totais dos KPIs,
+a série mensal e a árvore de categorias com os totais das subárvores. Os
+totais saem do resumo mensal, de forma que nenhuma consulta percorre a
+tabela de transações inteira. Com o serviço de agregados
+(db/aggregate_service.py), os totais vêm dele e não do banco.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from dao.async_dao import AsyncCategoryDAO, AsyncSummaryDAO, AsyncTransactionDAO
+from db import aggregate_service
+from models.models import Category
+from models.rows import TransactionRow
+
+# Linhas da primeira página da tabela
+FIRST_PAGE_SIZE = 200
+
+
+@dataclass
+class DashboardSnapshot:
+    """Dados da tela inicial, todos da mesma leitura"""
+
+    # Versão de dados lida antes das demais consultas (base para os deltas)
+    version: int
+    rows: List[TransactionRow] = field(default_factory=list)
+    # Há mais transações além da primeira página
+    has_more: bool = False
+    # Saldo corrente das linhas da primeira página, por ID
+    balances: Dict[int, float] = field(default_factory=dict)
+    totals: Dict[str, float] = field(default_factory=dict)
+    totals_by_month: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    categories: List[Category] = field(default_factory=list)
+    # Receitas e despesas de cada categoria somadas às das subcategorias
+    category_totals: Dict[int, Dict[str, float]] = field(default_factory=dict)
+
+
+async def load_snapshot(page_size: int = FIRST_PAGE_SIZE) -> DashboardSnapshot:
+    """Carrega o retrato da tela inicial"""
+    # A versão vem primeiro: o que mudar durante as consultas chega no delta
+    async with AsyncTransactionDAO() as dao:
+        version = await dao.current_version()
+
+    async def first_page():
+        async with AsyncTransactionDAO() as dao:
+            # Uma linha a mais indica se existe próxima página
+            rows = await dao.get_transaction_rows_sorted(limit=page_size + 1)
+            return rows, await dao.get_running_balances(rows[:page_size])
+
+    async def shared(name):
+        """Agregado do serviço compartilhado (None sem o serviço)"""
+        client = aggregate_service.get_client()
+        if client is None:
+            return None
+        return await asyncio.to_thread(getattr(client, name), min_version=version)
+
+    async def totals():
+        shared_totals = await shared("totals")
+        if shared_totals is not None:
+            return shared_totals
+        async with AsyncSummaryDAO() as dao:
+            return await dao.get_totals_by_type()
+
+    async def totals_by_month():
+        shared_totals = await shared("totals_by_month")
+        if shared_totals is not None:
+            return shared_totals
+        async with AsyncSummaryDAO() as dao:
+            return await dao.get_totals_by_month()
+
+    async def categories():
+        async with AsyncCategoryDAO() as dao:
+            return await dao.get_all_categories()
+
+    async def category_totals():
+        shared_totals = await shared("category_totals")
+        if shared_totals is not None:
+            return shared_totals
+        async with AsyncSummaryDAO() as dao:
+            rows = await dao.get_totals_by_category(rollup=True)
+            return {row["category_id"]: row for row in rows}
+
+    (
+        (rows, balances),
+        totals,
+        totals_by_month,
+        categories,
+        category_totals,
+    ) = await asyncio.gather(
+        first_page(), totals(), totals_by_month(), categories(), category_totals()
+    )
+    return DashboardSnapshot(
+        version=version,
+        rows=rows[:page_size],
+        has_more=len(rows) > page_size,
+        balances=balances,
+        totals=totals,
+        totals_by_month=totals_by_month,
+        categories=categories,
+        category_totals=category_totals,
+    )
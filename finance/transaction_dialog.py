@@ -2,6 +2,8 @@ from textual.screen import Screen
 from textual.widgets import Button, Label, Input, Select, Static
 from textual.containers import Grid, Horizontal
 from dao.category_dao import CategoryDAO
+from dao.rule_dao import RuleDAO
+from dao.tag_dao import TagDAO
 from finance.category_dialog import CategoryDialog
 import datetime
 
@@ -20,6 +22,11 @@ class TransactionDialog(Screen):
         super().__init__(*args, **kwargs)
         self.transaction = transaction
         self.is_edit_mode = transaction is not None
+        # Regras de categorização (compiladas ao abrir o diálogo)
+        self.categorizer = None
+        # Categoria escolhida pela sugestão (o usuário ainda não mexeu)
+        self.suggested_category = None
+        self.category_names = {}
 
     def compose(self):
         # Define valores padrão para modo criação
@@ -28,6 +35,7 @@ class TransactionDialog(Screen):
         transaction_value = ""
         type_value = Select.BLANK
         category_value = Select.BLANK
+        tags = ""
 
         # Se estiver em modo edição, preenche com dados existentes
         if self.is_edit_mode:
@@ -39,6 +47,8 @@ class TransactionDialog(Screen):
             transaction_value = str(self.transaction.transaction_value)
             type_value = self.transaction.type
             category_value = self.transaction.category_id
+            with TagDAO() as dao:
+                tags = ", ".join(dao.get_tag_names(self.transaction.id))
 
         # Ajusta textos conforme o modo
         title = "Edit Transaction" if self.is_edit_mode else "Add Transaction"
@@ -84,19 +94,65 @@ class TransactionDialog(Screen):
                 Button("+", variant="primary", id="add-category"),
                 id="category-select-container",
             ),
-            Static(),
+            Label("Tags:", classes="label"),
+            Input(
+                placeholder="Ex: viagem-2026, reembolsável",
+                value=tags,
+                classes="input",
+                id="tags",
+            ),
+            Static(id="suggestion"),
             Button("Cancel", variant="warning", id="cancel"),
             Button(button_label, variant="success", id="ok"),
             id="input-dialog",
         )
 
+    def on_mount(self):
+        with RuleDAO() as dao:
+            self.categorizer = dao.get_categorizer()
+
     def get_category_options(self):
         """Retorna lista de categorias do banco de dados"""
         with CategoryDAO() as dao:
             categories = dao.get_all_categories()
             categories.sort(key=lambda c: c.name)
+        self.category_names = {c.id: c.name for c in categories}
         return [(c.name, c.id) for c in categories]
 
+    def on_input_changed(self, event):
+        if event.input.id in ("description", "transaction-value"):
+            self.suggest_category()
+
+    def suggest_category(self):
+        """Mostra as categorias sugeridas pelas regras e pré-seleciona a melhor"""
+        if not self.categorizer:
+            return
+        description = self.query_one("#description", Input).value
+        value = self.query_one("#transaction-value", Input).value.replace(",", ".")
+        try:
+            value = float(value)
+        except ValueError:
+            value = None
+        suggestions = [
+            category_id
+            for category_id in self.categorizer.suggest(description, value)
+            if category_id in self.category_names
+        ]
+        hint = self.query_one("#suggestion", Static)
+        if not suggestions:
+            hint.update("")
+            return
+        names = ", ".join(self.category_names[c] for c in suggestions)
+        hint.update(f"Suggested: {names}")
+        category_select = self.query_one("#category-id", Select)
+        # Não sobrescreve uma categoria escolhida pelo usuário
+        if not self.is_edit_mode and category_select.value in (
+            Select.BLANK,
+            self.suggested_category,
+        ):
+            self.suggested_category = suggestions[0]
+            category_select.value = suggestions[0]
+
     def refresh_categories(self):
         """Atualiza a lista de categorias no Select mantendo a seleção atual"""
         category_select = self.query_one("#category-id", Select)
@@ -108,11 +164,16 @@ class TransactionDialog(Screen):
         except ValueError:
             pass
 
-    def handle_new_category(self, category_name):
+    def handle_new_category(self, category):
         """Callback executado após criar nova categoria"""
-        if category_name:
+        if category:
             with CategoryDAO() as dao:
-                new_category = dao.create_category(category_name)
+                new_category = dao.create_category(
+                    category["name"], parent_id=category["parent_id"]
+                )
+            if new_category is None:
+                self.notify("Category not created", severity="error")
+                return
             self.refresh_categories()
             # Seleciona automaticamente a categoria recém-criada
             category_select = self.query_one("#category-id", Select)
@@ -122,7 +183,9 @@ class TransactionDialog(Screen):
         """Manipula cliques nos botões"""
         if event.button.id == "add-category":
             # Abre diálogo para criar nova categoria
-            self.app.push_screen(CategoryDialog(), self.handle_new_category)
+            with CategoryDAO() as dao:
+                categories = dao.get_all_categories()
+            self.app.push_screen(CategoryDialog(categories), self.handle_new_category)
 
         elif event.button.id == "ok":
             # Coleta os dados do formulário
@@ -133,6 +196,7 @@ class TransactionDialog(Screen):
             transaction_value = transaction_value.replace(",", ".")
             type = self.query_one("#type", Select).value
             category_id = self.query_one("#category-id", Select).value
+            tags = self.query_one("#tags", Input).value
 
             # Converte data de DD-MM-YYYY para YYYY-MM-DD
             day, month, year = map(int, transaction_date.split("-"))
@@ -145,11 +209,15 @@ class TransactionDialog(Screen):
                 "transaction_value": float(transaction_value),
                 "type": type,
                 "category_id": category_id,
+                # Etiquetas separadas por vírgula (gravadas pelo TagDAO)
+                "tags": [tag for tag in tags.split(",") if tag.strip()],
             }
 
             # Adiciona o ID se estiver em modo edição
             if self.is_edit_mode:
                 result["id"] = self.transaction.id
+                # Versão lida ao abrir o diálogo (concorrência otimista)
+                result["version"] = self.transaction.version
 
             self.dismiss(result)
         else:
@@ -1,5 +1,7 @@
+from rich.text import Text
 from textual import on
 from textual.app import App
+from textual.worker import get_current_worker
 from textual.containers import Horizontal, Vertical, Container
 from textual_plot import PlotWidget
 from textual.widgets import (
@@ -9,39 +11,140 @@ from textual.widgets import (
     Header,
     Static,
     Digits,
+    Tree,
 )
+from textual.widgets.data_table import RowKey
 from dao.category_dao import CategoryDAO
-from dao.transaction_dao import TransactionDAO
+from dao.reconciliation import ReconciliationDAO
+from dao.summary_dao import SummaryDAO
+from dao.tag_dao import TagDAO
+from dao.transaction_dao import (
+    SORT_KEYS,
+    TransactionDAO,
+    TransactionFilters,
+    row_sort_key,
+)
+from db import aggregate_service, change_bus, column_cache, replica
+from db.tag_index import TagIndex
+from finance.cli import load_transactions
+from finance.filter_dialog import FilterDialog
+from finance.import_dialog import ImportDialog
+from finance.merge_category_dialog import MergeCategoryDialog
+from finance.pivot_screen import PivotScreen
 from finance.question_dialog import QuestionDialog
+from finance.refresh import (
+    CATEGORIES,
+    CATEGORY_CHART,
+    CATEGORY_TOTALS,
+    KPIS,
+    MONTHLY_CHART,
+    PIVOT,
+    TABLE,
+    RefreshScheduler,
+)
+from finance.reconcile_screen import ReconcileScreen
+from finance.snapshot import FIRST_PAGE_SIZE, DashboardSnapshot, load_snapshot
 from finance.transaction_dialog import TransactionDialog
+from models.anomalies import AnomalyDetector, detect_anomalies
 import logging
+import time
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),  # Salva no arquivo
-        logging.StreamHandler(),  # Mostra no console
-    ],
-)
-
-# Uso do logger
+# Uso do logger (os handlers são configurados em finance.logconfig)
 logger = logging.getLogger(__name__)
 
+# Linhas buscadas por página da tabela de transações
+PAGE_SIZE = FIRST_PAGE_SIZE
+# A próxima página é buscada quando o cursor chega a esta distância do fim
+PAGE_PREFETCH = 20
+
+# Espera antes de aplicar as alterações avisadas por outros apps: uma rajada
+# de escritas vira uma única busca do delta
+PUBLISHED_CHANGES_DELAY = 0.25
+# Intervalo entre as tentativas de atualizar a tela principal enquanto um
+# diálogo a cobre
+REFRESH_RETRY_DELAY = 0.25
+
+# Cores das barras do gráfico de despesas por mês
+BAR_COLORS = ["red", "blue", "green", "yellow", "magenta", "cyan"]
+
+# Rótulos dos tipos de anomalia (models/anomalies.py) no painel
+ANOMALY_LABELS = {
+    "spike": "Category spike",
+    "outlier": "Unusual expense",
+    "duplicate": "Possible duplicate",
+}
+# Destaque do valor das transações apontadas como anomalias
+FLAGGED_STYLE = "bold red"
+
 
 class FinanceApp(App):
     CSS_PATH = "finance.tcss"
+    # Telas instaladas: continuam montadas depois de fechadas
+    SCREENS = {"pivot": PivotScreen}
+    # Chaves das colunas da tabela de transações
+    TRANSACTION_COLUMNS = (
+        "description",
+        "date",
+        "value",
+        "type",
+        "category",
+        "balance",
+    )
     BINDINGS = [
         ("m", "toggle_dark", "Toggle dark mode"),
         ("a", "add", "Add"),
         ("e", "edit", "Edit"),
         ("d", "delete", "Delete"),
         ("c", "clear_all", "Clear All"),
+        ("f", "filter", "Filter"),
+        ("i", "import", "Import"),
+        ("g", "merge_category", "Merge Category"),
+        ("p", "pivot", "Pivot"),
+        ("r", "resync", "Resync"),
         ("q", "request_quit", "Quit"),
     ]
 
     def __init__(self):
         super().__init__()
+        # Transações exibidas (TransactionRow, por ID) e a versão de dados que
+        # elas refletem; instâncias ORM só são carregadas para edição
+        self._last_transactions = {}
+        # Categorias por ID, nós da árvore de categorias e os totais de cada
+        # subárvore (receitas e despesas somadas às das subcategorias)
+        self._categories = {}
+        self._category_nodes = {}
+        self._category_totals = {}
+        # Categoria exibida no gráfico por categoria (com as subcategorias)
+        self._selected_category = None
+        self._data_version = 0
+        # Ordenação e filtros aplicados no banco; a tabela tem só as páginas
+        # já carregadas, até a linha _page_end
+        self._sort = "date"
+        self._descending = True
+        self._transaction_filters = TransactionFilters()
+        self._page_end = None
+        self._has_more = False
+        # Cache colunar local (None se desabilitado): só mapeia os arquivos
+        self._column_cache = column_cache.open_cache()
+        # Bitmaps das etiquetas sobre o cache (montados no primeiro filtro)
+        self._tag_index = (
+            TagIndex(self._column_cache) if self._column_cache is not None else None
+        )
+        # Anomalias de gastos sobre o cache colunar, as listadas no painel e
+        # as transações destacadas na tabela
+        self._anomalies = AnomalyDetector()
+        self._anomaly_rows = []
+        self._flagged_ids = set()
+        # Alterações de outros apps (server.py) chegam pelo barramento local
+        self._change_listener = None
+        # Componentes da tela marcados para atualizar, refeitos em uma rodada
+        # por quadro (finance/refresh.py)
+        self._refresh = RefreshScheduler(
+            self.run_refresh,
+            self.schedule_refresh,
+            ready=self.refresh_ready,
+            retry_delay=REFRESH_RETRY_DELAY,
+        )
 
     def compose(self):
         yield Header()
@@ -78,19 +181,17 @@ class FinanceApp(App):
         transactions_list = DataTable(classes="transactions-list")
         transactions_list.cursor_type = "row"
         transactions_list.zebra_stripes = True
-        transactions_list.add_columns(
-            "Description", "Date", "Value", "Type", "Category"
-        )
-        # DataTable de categorias
-        category_list_table = DataTable(id="category-list-table")
-        category_list_table.cursor_type = "row"
-        category_list_table.zebra_stripes = True
-        category_list_table.add_columns(
-            "Name",
-        )
-        # Container para a lista de categorias (ainda sem conteúdo)
+        for label, key in zip(
+            ("Description", "Date", "Value", "Type", "Category", "Balance"),
+            self.TRANSACTION_COLUMNS,
+        ):
+            transactions_list.add_column(label, key=key)
+        # Árvore de categorias (subcategorias expansíveis)
+        category_tree = Tree("Categories", id="category-tree")
+        category_tree.show_root = False
+        # Container para a árvore de categorias (ainda sem conteúdo)
         category_list = Container(
-            category_list_table,
+            category_tree,
             id="category-list-container",
         )
         category_list.border_title = "Categories"  # Define o título aqui!
@@ -119,9 +220,19 @@ class FinanceApp(App):
         )
         category_container.border_title = "Expenses by Category"
 
+        anomaly_list = DataTable(id="anomaly-list")
+        anomaly_list.cursor_type = "row"
+        anomaly_list.add_columns("Month", "Anomaly", "Category", "Value", "Expected")
+        anomalies_container = Container(
+            anomaly_list,
+            classes="anomalies-container",
+        )
+        anomalies_container.border_title = "Anomalies"
+
         graphics = Horizontal(
             expense_container,
             category_container,
+            anomalies_container,
             classes="graphics-container",
         )
         dashboard_container = Vertical(
@@ -137,13 +248,420 @@ class FinanceApp(App):
         )
         yield Footer()
 
-    def on_mount(self):
+    async def on_mount(self):
         self.title = "Personal Finance Manager"
         self.sub_title = "A Finance Manager App With Textual & Python"
-        self.load_transactions()
-        self.load_categories()
-        self.update_kpis()
-        self.create_graphic()
+        cache = self._column_cache
+        if cache is not None and cache.version is not None:
+            # KPIs e gráfico saem do cache antes de qualquer consulta ao banco
+            self.show_kpis(**cache.totals())
+            self.create_graphic(cache.totals_by_month())
+        self.apply_snapshot(await load_snapshot())
+        if cache is not None:
+            self.run_worker(
+                self.sync_column_cache,
+                thread=True,
+                exclusive=True,
+                group="column-cache",
+            )
+        if change_bus.bus_enabled():
+            listener = change_bus.ChangeListener(self.handle_published_changes)
+            if listener.start():
+                self._change_listener = listener
+        if replica.replica_enabled():
+            # A tela inicial vem da réplica; o primário é consultado em segundo plano
+            self.update_replica_status()
+            self.set_interval(30, self.update_replica_status)
+            self.run_worker(
+                self.sync_replica, thread=True, exclusive=True, group="replica"
+            )
+
+    def on_unmount(self):
+        if self._change_listener is not None:
+            self._change_listener.stop()
+        logger.info(f"Refresh stats: {self._refresh.stats.summary()}")
+
+    def handle_published_changes(self, events):
+        """Agenda a aplicação das alterações feitas por outros apps"""
+        if max(event.get("version", 0) for event in events) <= self._data_version:
+            return
+        self.request_refresh(delay=PUBLISHED_CHANGES_DELAY)
+
+    def request_refresh(self, delay=0.0):
+        """
+        Agenda a aplicação do delta na tela principal e, se estiver aberta,
+        na tabela dinâmica
+        """
+        if isinstance(self.screen, PivotScreen):
+            self._refresh.mark(TABLE, PIVOT, delay=delay)
+        else:
+            self._refresh.mark(TABLE, delay=delay)
+
+    def schedule_refresh(self, delay, callback):
+        """Chama ``callback`` no próximo quadro ou depois de ``delay``"""
+        if delay:
+            self.set_timer(delay, callback)
+        else:
+            self.call_after_refresh(callback)
+
+    def refresh_ready(self, component):
+        """
+        Os componentes da tela principal só são refeitos com ela visível
+        (com a tabela dinâmica ou um diálogo aberto, esperam)
+        """
+        return component == PIVOT or len(self.screen_stack) == 1
+
+    def run_refresh(self, components):
+        """Rodada do agendador: delta da tabela, depois as cargas"""
+        started = time.perf_counter()
+        if TABLE in components:
+            self.refresh_transactions()
+            # O delta marca o que mais mudou (KPIs, gráficos, árvore)
+            components = components + self._refresh.take()
+        if PIVOT in components and isinstance(self.screen, PivotScreen):
+            self.screen.refresh_pivot()
+        loads = [c for c in components if c not in (TABLE, PIVOT)]
+        if loads:
+            generation, loads = self._refresh.start_load(loads)
+            self.run_worker(
+                lambda: self.load_components(loads, generation),
+                thread=True,
+                exclusive=True,
+                group="refresh",
+            )
+        logger.debug(
+            f"Refresh of {', '.join(components)}: "
+            f"{(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+
+    def load_components(self, components, generation):
+        """Lê os dados dos componentes (executado em uma thread de worker)"""
+        worker = get_current_worker()
+        loaded = {}
+        for component in components:
+            if worker.is_cancelled:
+                # Uma carga mais nova assumiu estes componentes
+                return
+            loaded[component] = self.load_component(component)
+        self.call_from_thread(self.apply_components, loaded, generation)
+
+    def load_component(self, component):
+        if component == CATEGORIES:
+            with CategoryDAO() as dao:
+                categories = dao.get_all_categories()
+            return categories, self.fetch_category_totals()
+        if component == CATEGORY_TOTALS:
+            return self.fetch_category_totals()
+        if component == KPIS:
+            return self.fetch_totals()
+        if component == MONTHLY_CHART:
+            return self.fetch_totals_by_month()
+        category_id = self._selected_category
+        if category_id is None:
+            return None, None
+        return category_id, self.fetch_category_month_totals(category_id)
+
+    def apply_components(self, loaded, generation):
+        """Leva à tela o resultado da carga, se ela ainda for a mais nova"""
+        if not self._refresh.finish_load(generation):
+            return
+        if len(self.screen_stack) > 1:
+            # Um diálogo foi aberto durante a carga: refaz quando ele fechar
+            self._refresh.mark(*loaded)
+            return
+        if CATEGORIES in loaded:
+            self.load_categories(*loaded[CATEGORIES])
+            if self._anomaly_rows:
+                # Nomes das categorias no painel de anomalias
+                self.show_anomalies()
+        if CATEGORY_TOTALS in loaded:
+            self.show_category_totals(loaded[CATEGORY_TOTALS])
+        if KPIS in loaded:
+            totals = loaded[KPIS]
+            self.show_kpis(totals["income"], totals["expense"])
+        if MONTHLY_CHART in loaded:
+            self.create_graphic(loaded[MONTHLY_CHART])
+        if CATEGORY_CHART in loaded:
+            category_id, totals_by_month = loaded[CATEGORY_CHART]
+            if category_id is not None and category_id == self._selected_category:
+                self.update_category_graphic(totals_by_month)
+
+    def sync_replica(self, force=False):
+        """Sincroniza a réplica local (executado em uma thread de worker)"""
+        sync = replica.ReplicaSync()
+        applied = sync.resync() if force else sync.sync()
+        logger.info(f"Replica synced: {applied} rows applied")
+        self.call_from_thread(self.handle_replica_synced, applied)
+
+    def handle_replica_synced(self, applied):
+        """Aplica na tela as novidades trazidas pela sincronização"""
+        self.update_replica_status()
+        if applied:
+            self.request_refresh()
+
+    def sync_column_cache(self):
+        """Atualiza o cache colunar (executado em uma thread de worker)"""
+        with TransactionDAO() as dao:
+            applied = self._column_cache.sync(dao)
+        logger.info(f"Column cache synced: {applied} rows applied")
+        self.detect_anomalies()
+
+    def detect_anomalies(self):
+        """Detecção completa de anomalias no cache (thread de worker)"""
+        cache = self._column_cache
+        version = cache.version
+        if version is None:
+            return
+        started = time.perf_counter()
+        anomalies = detect_anomalies(cache.read(), **self._anomalies.options)
+        logger.info(
+            f"Anomalies detected: {len(anomalies)} "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+        self.call_from_thread(self.install_anomalies, anomalies, version)
+
+    def install_anomalies(self, anomalies, version):
+        """Exibe o resultado da detecção completa"""
+        self._anomalies.replace(anomalies)
+        self.show_anomalies()
+        if self._column_cache.version != version:
+            # O cache avançou durante a detecção: refaz com as colunas novas
+            self.run_worker(
+                self.detect_anomalies, thread=True, exclusive=True, group="anomalies"
+            )
+
+    def update_anomalies(self, category_ids):
+        """Refaz as anomalias só das categorias alteradas"""
+        # No cache, transações sem categoria ficam na categoria 0
+        category_ids = {category_id or 0 for category_id in category_ids}
+        self._anomalies.detect(self._column_cache.read(category_ids), category_ids)
+        self.show_anomalies()
+
+    def show_anomalies(self):
+        """Lista as anomalias e destaca na tabela as transações apontadas"""
+        anomalies = self._anomalies.anomalies
+        anomaly_list = self.query_one("#anomaly-list", DataTable)
+        anomaly_list.clear()
+        for anomaly in anomalies:
+            category = self._categories.get(anomaly.category_id)
+            anomaly_list.add_row(
+                anomaly.month,
+                ANOMALY_LABELS[anomaly.kind],
+                category.name if category is not None else "None",
+                f"{anomaly.value:>10.2f}",
+                f"{anomaly.expected:>10.2f}",
+            )
+        self._anomaly_rows = anomalies
+        container = self.query_one(".anomalies-container", Container)
+        container.border_title = f"Anomalies ({len(anomalies)})"
+        flagged = self._anomalies.flagged_ids
+        transactions_list = self.query_one(".transactions-list", DataTable)
+        for transaction_id in flagged ^ self._flagged_ids:
+            row = self._last_transactions.get(transaction_id)
+            if row is not None:
+                transactions_list.update_cell(
+                    RowKey(row.id), "value", self.value_cell(row, row.id in flagged)
+                )
+        self._flagged_ids = flagged
+
+    @on(DataTable.RowSelected, "#anomaly-list")
+    def handle_anomaly_selected(self, event: DataTable.RowSelected):
+        """Leva à transação apontada (ou ao gráfico da categoria, nos picos)"""
+        anomaly = self._anomaly_rows[event.cursor_row]
+        if anomaly.transaction_id is None:
+            self._selected_category = anomaly.category_id
+            self._refresh.mark(CATEGORY_CHART)
+            return
+        if anomaly.transaction_id not in self._last_transactions:
+            self.notify("Transaction not loaded in the table", severity="warning")
+            return
+        transactions_list = self.query_one(".transactions-list", DataTable)
+        transactions_list.move_cursor(
+            row=transactions_list.get_row_index(RowKey(anomaly.transaction_id))
+        )
+        transactions_list.focus()
+
+    def column_cache_current(self) -> bool:
+        """Indica se o cache colunar reflete ao menos o que a tela mostra"""
+        cache = self._column_cache
+        return (
+            cache is not None
+            and cache.version is not None
+            and cache.version >= self._data_version
+        )
+
+    def update_replica_status(self):
+        """Mostra no subtítulo há quanto tempo a réplica foi sincronizada"""
+        staleness = replica.ReplicaSync().staleness()
+        if staleness is None:
+            self.sub_title = "Replica: never synced"
+        elif staleness < 60:
+            self.sub_title = "Replica: up to date"
+        else:
+            self.sub_title = f"Replica: stale ({int(staleness // 60)} min)"
+
+    def action_resync(self):
+        """Força a ressincronização completa da réplica"""
+        if not replica.replica_enabled():
+            self.notify("Local replica is disabled", severity="warning")
+            return
+        self.sub_title = "Replica: resyncing..."
+        self.run_worker(
+            lambda: self.sync_replica(force=True),
+            thread=True,
+            exclusive=True,
+            group="replica",
+        )
+
+    def apply_snapshot(self, snapshot: DashboardSnapshot):
+        """Alimenta todos os widgets da tela inicial a partir do retrato"""
+        self._data_version = snapshot.version
+        self._last_transactions = {}
+        self.query_one(".transactions-list", DataTable).clear()
+        self.append_page(snapshot.rows, snapshot.has_more, snapshot.balances)
+        self.show_kpis(snapshot.totals["income"], snapshot.totals["expense"])
+        self.create_graphic(snapshot.totals_by_month)
+        self.load_categories(snapshot.categories, snapshot.category_totals)
+
+    def fetch_page(self, after=None):
+        """Busca no banco a página seguinte a ``after`` na ordenação atual"""
+        with TransactionDAO() as dao:
+            # Uma linha a mais indica se existe próxima página
+            rows = dao.get_transaction_rows_sorted(
+                self._sort,
+                self._descending,
+                self._transaction_filters,
+                after=after,
+                limit=PAGE_SIZE + 1,
+            )
+            balances = dao.get_running_balances(rows[:PAGE_SIZE])
+        return rows[:PAGE_SIZE], len(rows) > PAGE_SIZE, balances
+
+    def reload_transactions(self):
+        """Recarrega a tabela a partir da primeira página"""
+        self.query_one(".transactions-list", DataTable).clear()
+        self._last_transactions = {}
+        self.append_page(*self.fetch_page())
+        self.update_table_title()
+
+    def load_next_page(self):
+        if self._has_more:
+            self.append_page(*self.fetch_page(after=self._page_end))
+
+    def append_page(self, rows, has_more, balances):
+        """Acrescenta uma página à tabela (ignora as linhas já exibidas)"""
+        transactions_list = self.query_one(".transactions-list", DataTable)
+        for row in rows:
+            if row.id in self._last_transactions:
+                continue
+            transactions_list.add_row(
+                *self.transaction_cells(row, row.id in self._flagged_ids),
+                self.balance_cell(balances.get(row.id)),
+                key=row.id,
+            )
+            self._last_transactions[row.id] = row
+        if rows:
+            self._page_end = rows[-1]
+        self._has_more = has_more
+
+    def in_loaded_range(self, row):
+        """Indica se a linha cai dentro das páginas já carregadas"""
+        if not self._has_more or self._page_end is None:
+            return True
+        key, end = row_sort_key(row, self._sort), row_sort_key(
+            self._page_end, self._sort
+        )
+        return key >= end if self._descending else key <= end
+
+    def sort_table(self):
+        """Reordena apenas as linhas carregadas (após aplicar um delta)"""
+        # Valores destacados (anomalias) são Text: a chave usa o texto
+        key = (lambda cell: float(str(cell))) if self._sort == "value" else None
+        self.query_one(".transactions-list", DataTable).sort(
+            self._sort, key=key, reverse=self._descending
+        )
+
+    def update_table_title(self):
+        arrow = "↓" if self._descending else "↑"
+        details = f"{self._sort} {arrow}"
+        if self._transaction_filters != TransactionFilters():
+            details += ", filtered"
+        container = self.query_one(".transactions-container", Container)
+        container.border_title = f"Transactions ({details})"
+
+    @on(DataTable.HeaderSelected, ".transactions-list")
+    def handle_header_selected(self, event: DataTable.HeaderSelected):
+        """Clique no cabeçalho: ordena no banco por aquela coluna"""
+        sort = event.column_key.value
+        if sort not in SORT_KEYS:
+            self.notify(f"Sorting by {event.label} is not available")
+            return
+        if sort == self._sort:
+            self._descending = not self._descending
+        else:
+            self._sort = sort
+            # Datas e valores começam pelos maiores; textos em ordem alfabética
+            self._descending = sort in ("date", "value")
+        self.reload_transactions()
+
+    @on(DataTable.RowHighlighted, ".transactions-list")
+    def handle_row_highlighted(self, event: DataTable.RowHighlighted):
+        """Busca a próxima página quando o cursor se aproxima do fim"""
+        if event.cursor_row >= event.data_table.row_count - PAGE_PREFETCH:
+            self.load_next_page()
+
+    def action_filter(self):
+        def apply_filters(filters):
+            if filters is not None:
+                by_tags = filters.has_tags or self._transaction_filters.has_tags
+                self._transaction_filters = filters
+                self.reload_transactions()
+                if by_tags:
+                    # KPIs e gráficos seguem o filtro de etiquetas
+                    self._refresh.mark(KPIS, MONTHLY_CHART, CATEGORY_CHART)
+
+        self.push_screen(FilterDialog(self._transaction_filters), apply_filters)
+
+    def action_import(self):
+        def reconcile(path):
+            if path:
+                self.run_worker(
+                    lambda: self.reconcile_import(path), thread=True, group="import"
+                )
+
+        self.push_screen(ImportDialog(), reconcile)
+
+    def reconcile_import(self, path):
+        """Lê e reconcilia o arquivo (em uma thread) e abre a revisão"""
+        fmt = "json" if path.lower().endswith(".json") else "csv"
+        try:
+            records = load_transactions(path, fmt)
+        except (OSError, ValueError) as e:
+            logger.warning("Import of %s failed: %s", path, e)
+            self.call_from_thread(self.notify, f"Import failed: {e}", severity="error")
+            return
+        with ReconciliationDAO() as dao:
+            result = dao.reconcile(records)
+        if result is None:
+            self.call_from_thread(
+                self.notify, "Import failed: reconciliation error", severity="error"
+            )
+            return
+        self.call_from_thread(
+            self.push_screen, ReconcileScreen(result), self.handle_import_result
+        )
+
+    def handle_import_result(self, records):
+        """Importa os registros confirmados na revisão"""
+        if not records:
+            return
+        with TransactionDAO() as dao:
+            imported = dao.create_transactions(records)
+        if imported:
+            self.notify(f"{imported} transactions imported")
+        else:
+            self.notify("Transactions not imported", severity="error")
+        self.request_refresh()
 
     def action_request_quit(self):
         def check_answer(accepted):
@@ -152,56 +670,305 @@ class FinanceApp(App):
 
         self.push_screen(QuestionDialog("Do you want to quit?"), check_answer)
 
-    def load_transactions(self):
-        transactions_list = self.query_one(".transactions-list", DataTable)
-        transactions_list.clear()
+    @classmethod
+    def transaction_cells(cls, row, flagged=False):
+        """Valores exibidos na tabela para uma TransactionRow"""
+        return (
+            row.description,
+            row.transaction_date,
+            cls.value_cell(row, flagged),
+            row.type,
+            row.category_name or "None",
+        )
+
+    @staticmethod
+    def value_cell(row, flagged=False):
+        """Valor da transação, destacado se ela foi apontada como anomalia"""
+        value = f"{row.transaction_value:>10.2f}"
+        return Text(value, style=FLAGGED_STYLE) if flagged else value
+
+    @staticmethod
+    def balance_cell(balance):
+        return "" if balance is None else f"{balance:>10.2f}"
+
+    def refresh_balances(self, since):
+        """Recalcula o saldo apenas das linhas exibidas a partir de ``since``"""
+        rows = [
+            row
+            for row in self._last_transactions.values()
+            if row.transaction_date >= since
+        ]
         with TransactionDAO() as dao:
-            transactions = list(dao.get_all_transactions(order=True))
-            for transaction in transactions:
-                transactions_list.add_row(
-                    transaction.description,
-                    transaction.transaction_date,
-                    f"{transaction.transaction_value:>10.2f}",
-                    transaction.type,
-                    transaction.category.name if transaction.category else "None",
-                    # Armazena o ID da transação como chave da linha
-                    key=transaction.id,
-                )
-        self._last_transactions = transactions  # guarda para cálculo
-        self.update_kpis()
+            balances = dao.get_running_balances(rows)
+        transactions_list = self.query_one(".transactions-list", DataTable)
+        for row in rows:
+            transactions_list.update_cell(
+                RowKey(row.id), "balance", self.balance_cell(balances.get(row.id))
+            )
 
-    def load_categories(self):
-        category_list_table = self.query_one("#category-list-table", DataTable)
-        category_list_table.clear()
+    def refresh_transactions(self):
+        """Aplica na tela apenas o que mudou desde a última versão carregada"""
+        transactions_list = self.query_one(".transactions-list", DataTable)
+        since = self._data_version
+        filters = self._transaction_filters
         with CategoryDAO() as dao:
-            categories = sorted(list(dao.get_all_categories()), key=lambda c: c.name)
-            for category in categories:
-                category_list_table.add_row(
-                    category.name,
-                    key=category.id,
+            # A versão vem antes dos deltas e é o novo marcador: linhas mais
+            # novas aplicadas agora voltam no próximo delta (dao/versioning.py)
+            self._data_version = max(self._data_version, dao.current_version())
+            changed_categories = dao.changes_since(since)
+        with TransactionDAO() as dao:
+            changes = dao.row_changes_since(since)
+        # Etiquetas das transações alteradas: para o filtro e para os bitmaps
+        tag_index_current = self._tag_index is not None and self._tag_index.current
+        tags = {}
+        if changes and (filters.has_tags or tag_index_current):
+            with TagDAO() as dao:
+                tags = dao.get_transaction_tags([t.id for t in changes])
+        # Uma alteração só muda o saldo das linhas a partir da sua data
+        # (a antiga ou a nova, se a data mudou)
+        balances_from = None
+        # KPIs e gráficos só são refeitos se a alteração os afeta (mover
+        # transações de categoria não muda os totais por mês)
+        # Com filtro de etiquetas, mudar as etiquetas muda os totais
+        totals_changed = bool(changes) and filters.has_tags
+        touched_categories = set()
+        for transaction in changes:
+            old = self._last_transactions.get(transaction.id)
+            shown = old is not None
+            dates = [transaction.transaction_date]
+            touched_categories.add(transaction.category_id)
+            if shown:
+                dates.append(old.transaction_date)
+                touched_categories.add(old.category_id)
+            totals_changed = totals_changed or (
+                not shown or self.totals_key(old) != self.totals_key(transaction)
+            )
+            balances_from = min(filter(None, [balances_from, *dates]))
+            visible = (
+                not transaction.deleted
+                and filters.matches(transaction, tags.get(transaction.id, ()))
+                and self.in_loaded_range(transaction)
+            )
+            if not visible:
+                if shown:
+                    transactions_list.remove_row(RowKey(transaction.id))
+                    del self._last_transactions[transaction.id]
+                continue
+            cells = self.transaction_cells(
+                transaction, transaction.id in self._flagged_ids
+            )
+            if shown:
+                for column, value in zip(self.TRANSACTION_COLUMNS, cells):
+                    transactions_list.update_cell(RowKey(transaction.id), column, value)
+            else:
+                transactions_list.add_row(*cells, "", key=transaction.id)
+            self._last_transactions[transaction.id] = transaction
+        if balances_from is not None:
+            self.refresh_balances(balances_from)
+        if changed_categories:
+            names = {c.id: c.name for c in changed_categories}
+            for row in list(self._last_transactions.values()):
+                if row.category_id in names:
+                    row = row._replace(category_name=names[row.category_id])
+                    self._last_transactions[row.id] = row
+                    transactions_list.update_cell(
+                        RowKey(row.id), "category", row.category_name
+                    )
+            self._refresh.mark(CATEGORIES)
+        removed = {c.id for c in changed_categories if c.deleted}
+        if any(row.category_id in removed for row in self._last_transactions.values()):
+            # Transações arquivadas movidas por uma fusão não vêm no delta
+            self.reload_transactions()
+        elif changes or (changed_categories and self._sort == "category"):
+            self.sort_table()
+        if self._column_cache is not None:
+            generation = self._column_cache.generation
+            self._column_cache.apply(changes, self._data_version, since=since)
+            if tag_index_current and generation == self._column_cache.generation:
+                self._tag_index.update([t.id for t in changes], tags)
+            if (
+                (changes or changed_categories)
+                and self._anomalies.ready
+                and self.column_cache_current()
+            ):
+                # Só as categorias alteradas têm as anomalias refeitas
+                self.update_anomalies(touched_categories | removed)
+            if removed and not self._column_cache.drop_categories(list(removed)):
+                # Uma fusão moveu transações arquivadas: reconstrói o cache
+                self.run_worker(
+                    self.sync_column_cache,
+                    thread=True,
+                    exclusive=True,
+                    group="column-cache",
                 )
+        if totals_changed:
+            self._refresh.mark(KPIS, MONTHLY_CHART)
+        if changes:
+            # Se a árvore for recarregada, os totais vêm junto
+            self._refresh.mark(CATEGORY_TOTALS)
+        if self._selected_category in removed:
+            self._selected_category = None
+            self.query_one("#category-plot", PlotWidget).clear()
+        elif self._selected_category is not None and (
+            changed_categories
+            or touched_categories.intersection(
+                self.subtree_ids(self._selected_category)
+            )
+        ):
+            self._refresh.mark(CATEGORY_CHART)
+
+    @staticmethod
+    def totals_key(row):
+        """Campos de uma transação que entram nos KPIs e no gráfico mensal"""
+        return (row.transaction_date, row.transaction_value, row.type, row.deleted)
+
+    def load_categories(self, categories=None, totals=None):
+        """Monta a árvore de categorias, mantendo os nós que estavam abertos"""
+        if categories is None:
+            with CategoryDAO() as dao:
+                categories = dao.get_all_categories()
+        if totals is None:
+            totals = self.fetch_category_totals()
+        expanded = {
+            category_id
+            for category_id, node in self._category_nodes.items()
+            if node.is_expanded
+        }
+        self._categories = {c.id: c for c in categories}
+        self._category_totals = totals
+        self._category_nodes = {}
+        children = {}
+        for category in sorted(categories, key=lambda c: c.name):
+            parent_id = (
+                category.parent_id if category.parent_id in self._categories else None
+            )
+            children.setdefault(parent_id, []).append(category)
+        tree = self.query_one("#category-tree", Tree)
+        tree.clear()
+        pending = [(tree.root, None)]
+        while pending:
+            parent, parent_id = pending.pop()
+            for category in children.get(parent_id, []):
+                label = self.category_label(category)
+                if category.id in children:
+                    node = parent.add(
+                        label, data=category.id, expand=category.id in expanded
+                    )
+                    pending.append((node, category.id))
+                else:
+                    node = parent.add_leaf(label, data=category.id)
+                self._category_nodes[category.id] = node
+
+    def fetch_category_totals(self):
+        """Totais de cada subárvore de categorias (uma consulta)"""
+        totals = self.shared_aggregate("category_totals")
+        if totals is not None:
+            return totals
+        with SummaryDAO() as dao:
+            rows = dao.get_totals_by_category(rollup=True)
+        return {row["category_id"]: row for row in rows}
+
+    def category_label(self, category):
+        """Nome da categoria seguido das despesas da subárvore"""
+        totals = self._category_totals.get(category.id)
+        label = Text(category.name)
+        if totals and totals["expense"]:
+            label.append(f"  {totals['expense']:,.2f}", style="red")
+        if totals and totals["income"]:
+            label.append(f"  +{totals['income']:,.2f}", style="green")
+        return label
+
+    def show_category_totals(self, totals):
+        """Refaz apenas os rótulos da árvore com os totais atuais"""
+        self._category_totals = totals
+        for category_id, node in self._category_nodes.items():
+            node.set_label(self.category_label(self._categories[category_id]))
+
+    def subtree_ids(self, category_id):
+        """A categoria e todas as suas subcategorias (árvore em memória)"""
+        ids = [category_id]
+        for parent_id in ids:
+            ids.extend(
+                c.id for c in self._categories.values() if c.parent_id == parent_id
+            )
+        return ids
 
     def handle_transaction_result(self, result):
         """Processa o resultado do diálogo (create ou edit)"""
         if result:  # Se não foi cancelado
+            tags = result.pop("tags", None)
             with TransactionDAO() as dao:
                 if "id" in result:
                     # Modo edição - atualiza transação existente
-                    dao.update_transaction(result)
+                    saved = dao.update_transaction(result)
                 else:
                     # Modo criação - cria nova transação
-                    dao.create_transaction(result)
+                    saved = dao.create_transaction(result)
+            if saved is None:
+                self.notify(
+                    "Transaction not saved: it may have been changed by someone else",
+                    severity="error",
+                )
+            elif tags is not None and (tags or "id" in result):
+                with TagDAO() as dao:
+                    if dao.set_transaction_tags(saved.id, tags) is None:
+                        self.notify("Tags not saved", severity="error")
 
-            # Atualiza a lista de transações na tela
-            self.load_transactions()
+            # Atualiza a lista de transações na tela (apenas o delta)
+            self.request_refresh()
 
-    def update_kpis(self):
-        income = sum(
-            t.transaction_value for t in self._last_transactions if t.type == "Receita"
-        )
-        expense = sum(
-            t.transaction_value for t in self._last_transactions if t.type == "Despesa"
+    def tag_mask(self, with_category=True):
+        """
+        Linhas do cache colunar que passam pelo filtro de etiquetas (bitmaps),
+        ou None sem filtro de etiquetas ou sem cache atualizado
+        """
+        filters = self._transaction_filters
+        if not filters.has_tags or not self.column_cache_current():
+            return None
+        if not self._tag_index.current:
+            with TagDAO() as dao:
+                pairs = self._tag_index.rebuild(dao.iter_tag_members())
+            logger.info(f"Tag index rebuilt: {pairs} tag assignments")
+        return self._tag_index.mask(
+            filters.tags,
+            filters.exclude_tags,
+            filters.category_id if with_category else None,
         )
+
+    def fetch_totals(self):
+        """Totais dos KPIs (executado em uma thread de worker)"""
+        # A tabela pode ter só parte das transações: os totais vêm do cache
+        # colunar ou do resumo
+        filters = self._transaction_filters
+        if filters.has_tags:
+            # Com filtro de etiquetas, os totais são os das etiquetas e da
+            # categoria do filtro
+            mask = self.tag_mask()
+            if mask is not None:
+                totals = self._column_cache.totals(mask)
+            else:
+                with TransactionDAO() as dao:
+                    totals = dao.get_totals_by_type(filters.tag_view())
+        elif self.column_cache_current():
+            totals = self._column_cache.totals()
+        else:
+            totals = self.shared_aggregate("totals")
+            if totals is None:
+                with SummaryDAO() as dao:
+                    totals = dao.get_totals_by_type()
+        return totals
+
+    def shared_aggregate(self, name, *args):
+        """
+        Agregado do serviço compartilhado entre apps, ou None sem o serviço
+        (quem chama lê do SummaryDAO)
+        """
+        client = aggregate_service.get_client()
+        if client is None:
+            return None
+        return getattr(client, name)(*args, min_version=self._data_version)
+
+    def show_kpis(self, income, expense):
         balance = income - expense
 
         kpi_income = self.query_one("#kpi-income-value", Digits)
@@ -212,9 +979,24 @@ class FinanceApp(App):
         kpi_expense.update(f"R$ {expense:,.2f}")
         kpi_balance.update(f"R$ {balance:,.2f}")
 
-    def create_graphic(self):
-        with TransactionDAO() as dao:
-            totals_by_month = dao.get_totals_by_month()
+    def fetch_totals_by_month(self):
+        """Totais do gráfico mensal (executado em uma thread de worker)"""
+        filters = self._transaction_filters
+        if filters.has_tags:
+            mask = self.tag_mask()
+            if mask is not None:
+                return self._column_cache.totals_by_month(mask)
+            with TransactionDAO() as dao:
+                return dao.get_totals_by_month(filters.tag_view())
+        if self.column_cache_current():
+            return self._column_cache.totals_by_month()
+        totals_by_month = self.shared_aggregate("totals_by_month")
+        if totals_by_month is not None:
+            return totals_by_month
+        with SummaryDAO() as dao:
+            return dao.get_totals_by_month()
+
+    def create_graphic(self, totals_by_month):
         months = sorted(totals_by_month.keys())
         # income_values = [totals_by_month[month]["income"] for month in months]
         expense_values = [totals_by_month[month]["expense"] for month in months]
@@ -223,29 +1005,23 @@ class FinanceApp(App):
         plot.bar(
             months,
             expense_values,
-            bar_style=["red", "blue", "green", "yellow", "magenta", "cyan"],
+            # Uma cor por barra (as cores se repetem)
+            bar_style=[BAR_COLORS[i % len(BAR_COLORS)] for i in range(len(months))],
             label="Expense Data",
         )
 
-    def update_category_graphic(self):
-        if not hasattr(self, "_totals_category") or not self._totals_category:
+    def update_category_graphic(self, totals_by_month):
+        plot = self.query_one("#category-plot", PlotWidget)
+        plot.clear()
+        if not totals_by_month:
             return
 
-        totals_by_month: dict[str, float] = {}
-        for transaction in self._totals_category:
-            month_key = transaction.transaction_date.strftime("%Y-%m")
-            totals_by_month.setdefault(month_key, 0.0)
-            totals_by_month[month_key] += transaction.transaction_value
-
         months = sorted(totals_by_month.keys())
         values = [totals_by_month[month] for month in months]
 
         # Eixo X numérico: 0, 1, 2, ...
         x = list(range(len(months)))
 
-        plot = self.query_one("#category-plot", PlotWidget)
-        plot.clear()
-
         # Gráfico de linha
         plot.plot(
             x,
@@ -272,6 +1048,10 @@ class FinanceApp(App):
         )
         with TransactionDAO() as dao:
             transaction = dao.get_transaction_by_id(row_key.value)
+        if transaction is None:
+            # Transações arquivadas não estão na tabela quente
+            self.notify("Archived transactions are read-only", severity="warning")
+            return
         # Abre o diálogo
         self.app.push_screen(
             TransactionDialog(transaction=transaction), self.handle_transaction_result
@@ -284,23 +1064,86 @@ class FinanceApp(App):
             transactions_list.cursor_coordinate
         )
         logger.info(f"Delete button pressed for transaction ID: {row_key.value}")
-        with TransactionDAO() as dao:
-            transaction = dao.get_transaction_by_id(row_key.value)
+        transaction = self._last_transactions[row_key.value]
 
         def check_answer(accepted):
             if accepted:
                 with TransactionDAO() as dao:
-                    dao.delete_transaction(transaction.id)
-                self.load_transactions()
+                    deleted = dao.delete_transaction(transaction.id)
+                if not deleted:
+                    self.notify("Transaction not deleted", severity="warning")
+                self.request_refresh()
 
         self.push_screen(
             QuestionDialog(f"Do you want to delete '{transaction.description}'?"),
             check_answer,
         )
 
-    @on(DataTable.RowSelected, "#category-list-table")
-    def handle_category_selected(self, event: DataTable.RowSelected):
-        category_id = int(event.row_key.value)
-        with TransactionDAO() as dao:
-            self._totals_category = dao.get_transactions_by_category(category_id)
-        self.update_category_graphic()
+    @on(Tree.NodeSelected, "#category-tree")
+    def handle_category_selected(self, event: Tree.NodeSelected):
+        self._selected_category = event.node.data
+        self._refresh.mark(CATEGORY_CHART)
+
+    def fetch_category_month_totals(self, category_id):
+        """
+        Série mensal da categoria, com as subcategorias (executado em uma
+        thread de worker)
+        """
+        filters = self._transaction_filters
+        if filters.has_tags:
+            mask = self.tag_mask(with_category=False)
+            if mask is not None:
+                return self._column_cache.category_month_totals(
+                    self.subtree_ids(category_id), mask
+                )
+            with TransactionDAO() as dao:
+                totals_by_month = dao.get_totals_by_month(
+                    filters.tag_view(with_category=False),
+                    category_ids=self.subtree_ids(category_id),
+                )
+            return {
+                month: totals["income"] + totals["expense"]
+                for month, totals in totals_by_month.items()
+            }
+        if self.column_cache_current():
+            # Soma por mês direto das colunas, sem buscar as transações
+            return self._column_cache.category_month_totals(
+                self.subtree_ids(category_id)
+            )
+        totals_by_month = self.shared_aggregate("subtree_month_totals", category_id)
+        if totals_by_month is not None:
+            return totals_by_month
+        with SummaryDAO() as dao:
+            return dao.get_subtree_month_totals(category_id)
+
+    def action_pivot(self):
+        """Abre a tabela dinâmica categorias x meses"""
+        self.push_screen("pivot", lambda _: self.request_refresh())
+
+    def action_merge_category(self):
+        """Funde a categoria destacada na árvore em outra"""
+        node = self.query_one("#category-tree", Tree).cursor_node
+        if node is None or node.data is None:
+            self.notify("No categories", severity="warning")
+            return
+        with CategoryDAO() as dao:
+            categories = dao.get_all_categories()
+        source = next((c for c in categories if c.id == node.data), None)
+        if source is None:
+            return
+
+        def merge(target_id):
+            if target_id is None:
+                return
+            with CategoryDAO() as dao:
+                moved = dao.merge_categories(source.id, target_id)
+            if moved is None:
+                self.notify("Categories not merged", severity="error")
+                return
+            self.notify(f"{moved} transactions moved")
+            self.request_refresh()
+
+        # Uma categoria não pode ser fundida em uma das suas subcategorias
+        descendants = set(self.subtree_ids(source.id)[1:])
+        targets = [c for c in categories if c.id not in descendants]
+        self.push_screen(MergeCategoryDialog(source, targets), merge)
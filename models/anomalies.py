@@ -0,0 +1,301 @@
+# anomalies.py
+"""
+Detecção de gastos fora do comum, vetorizada sobre as colunas das transações.
+
+Recebe as colunas no formato do cache colunar (db/column_cache.py: id, date,
+month, value, type e category) e considera só as despesas vivas. Três tipos
+de anomalia, todos calculados por categoria:
+
+- ``spike``: o total de um mês da categoria muito acima dos meses anteriores.
+  Mediana e MAD (desvio absoluto mediano) dos ``window`` meses anteriores,
+  com a pontuação robusta ``(total - mediana) / (1.4826 * MAD)``.
+- ``outlier``: uma despesa muito acima das despesas da mesma categoria nos
+  ``window`` meses anteriores (z-score sobre média e desvio padrão).
+- ``duplicate``: mesma categoria e mesmo valor de outra despesa a até
+  ``duplicate_days`` dias (cobrança repetida).
+
+Os totais por (categoria, mês) saem de ``np.bincount`` e as janelas de meses
+anteriores de somas acumuladas ou de ``sliding_window_view``: não há laço
+Python por transação nem por categoria. Como tudo é por categoria, refazer a
+detecção só das categorias alteradas dá o mesmo resultado que refazer tudo
+(``AnomalyDetector.detect`` com ``category_ids``).
+"""
+import warnings
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set
+
+import numpy as np
+
+SPIKE = "spike"
+OUTLIER = "outlier"
+DUPLICATE = "duplicate"
+
+# Código de "Despesa" na coluna "type" do cache colunar
+EXPENSE_CODE = 2
+
+# Meses anteriores comparados e pontuação a partir da qual o gasto é anômalo
+WINDOW_MONTHS = 6
+THRESHOLD = 3.5
+# Histórico mínimo: meses com a categoria ativa (picos) e despesas (outliers)
+MIN_MONTHS = 3
+MIN_ROWS = 5
+# A escala nunca fica abaixo desta fração da referência (séries constantes)
+MIN_SCALE_RATIO = 0.1
+# Distância máxima, em dias, entre duas cobranças iguais
+DUPLICATE_DAYS = 3
+
+
+class Anomaly(NamedTuple):
+    """Gasto fora do comum"""
+
+    kind: str
+    # Transação (None nos picos, que são de um mês inteiro da categoria)
+    transaction_id: Optional[int]
+    category_id: int
+    month: str
+    value: float
+    # Referência: mediana, média ou o valor da outra cobrança
+    expected: float
+    # Pontuação (picos e outliers) ou distância em dias (duplicadas)
+    score: float
+    # Cobrança anterior igual (duplicadas)
+    related_id: Optional[int] = None
+
+
+def _month_key(month: int) -> str:
+    """Mês do cache (meses desde 1970-01) como "YYYY-MM" """
+    return str(np.datetime64(int(month), "M"))
+
+
+def _expenses(columns: Mapping[str, np.ndarray]):
+    """Colunas só das despesas vivas"""
+    selected = np.asarray(columns["type"]) == EXPENSE_CODE
+    return {name: np.asarray(column)[selected] for name, column in columns.items()}
+
+
+def _scale(spread: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Escala da pontuação, com piso relativo à referência"""
+    return np.maximum(spread, MIN_SCALE_RATIO * np.abs(reference))
+
+
+def _spikes(
+    categories, totals, active, first_month, window, threshold
+) -> List[Anomaly]:
+    """Meses de cada categoria muito acima da mediana dos anteriores"""
+    count, months = totals.shape
+    # Meses antes da primeira despesa da categoria não entram na referência
+    history = np.where(active, totals, np.nan)
+    padded = np.concatenate([np.full((count, window), np.nan), history], axis=1)
+    # Janela dos ``window`` meses anteriores a cada mês
+    previous = np.lib.stride_tricks.sliding_window_view(padded, window, axis=1)
+    previous = previous[:, :months]
+    enough = (~np.isnan(previous)).sum(axis=2) >= MIN_MONTHS
+    with warnings.catch_warnings():
+        # Janelas vazias (sem histórico) viram NaN e são descartadas
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(previous, axis=2)
+        mad = np.nanmedian(np.abs(previous - median[..., None]), axis=2)
+    scale = _scale(1.4826 * mad, median)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (totals - median) / scale
+    flagged = enough & active & (scores > threshold)
+    return [
+        Anomaly(
+            SPIKE,
+            None,
+            int(categories[c]),
+            _month_key(first_month + m),
+            float(totals[c, m]),
+            float(median[c, m]),
+            float(scores[c, m]),
+        )
+        for c, m in zip(*np.nonzero(flagged))
+    ]
+
+
+def _outliers(
+    rows, category_index, month_index, categories, first_month, shape, window, threshold
+) -> List[Anomaly]:
+    """Despesas muito acima das da categoria nos meses anteriores"""
+    values = rows["value"]
+    bins = category_index * shape[1] + month_index
+    windows = []
+    for weights in (None, values, values * values):
+        per_month = np.bincount(bins, weights=weights, minlength=shape[0] * shape[1])
+        # Somas acumuladas com uma coluna de zeros à esquerda; a janela do
+        # mês m é [m - window, m) e exclui o mês da própria despesa
+        cumulative = np.zeros((shape[0], shape[1] + 1))
+        cumulative[:, 1:] = np.cumsum(per_month.reshape(shape), axis=1)
+        start = np.maximum(np.arange(shape[1]) - window, 0)
+        windows.append(cumulative[:, :-1] - cumulative[:, start])
+    count, total, squares = windows
+    # Média e escala por (categoria, mês); cada despesa só as consulta
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+    scale = _scale(std, mean)
+    mean, scale = mean.ravel()[bins], scale.ravel()[bins]
+    enough = (count >= MIN_ROWS).ravel()[bins]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (values - mean) / scale
+    flagged = np.flatnonzero(enough & (scores > threshold))
+    return [
+        Anomaly(
+            OUTLIER,
+            int(rows["id"][i]),
+            int(categories[category_index[i]]),
+            _month_key(first_month + month_index[i]),
+            float(values[i]),
+            float(mean[i]),
+            float(scores[i]),
+        )
+        for i in flagged
+    ]
+
+
+def _duplicates(rows, category_index, duplicate_days) -> List[Anomaly]:
+    """Despesas com a mesma categoria e valor de outra, poucos dias depois"""
+    dates = rows["date"].astype("datetime64[s]").astype(np.int64)
+    # Categoria e valor (em centavos) em uma única chave inteira
+    cents = np.rint(rows["value"] * 100).astype(np.int64)
+    cents -= cents.min()
+    key = category_index * (int(cents.max()) + 1) + cents
+    # Por data e, estável, por chave: duas ordenações de uma chave só saem
+    # bem mais baratas que np.lexsort com três
+    by_date = np.argsort(dates)
+    order = by_date[np.argsort(key[by_date], kind="stable")]
+    key, date = key[order], dates[order]
+    category, value = rows["category"][order], rows["value"][order]
+    gap = np.diff(date) / 86400
+    flagged = np.flatnonzero((key[1:] == key[:-1]) & (gap <= duplicate_days))
+    return [
+        Anomaly(
+            DUPLICATE,
+            int(rows["id"][order[i + 1]]),
+            int(category[i + 1]),
+            _month_key(rows["month"][order[i + 1]]),
+            float(value[i + 1]),
+            float(value[i]),
+            float(gap[i]),
+            related_id=int(rows["id"][order[i]]),
+        )
+        for i in flagged
+    ]
+
+
+def detect_anomalies(
+    columns: Mapping[str, np.ndarray],
+    window: int = WINDOW_MONTHS,
+    threshold: float = THRESHOLD,
+    duplicate_days: float = DUPLICATE_DAYS,
+) -> List[Anomaly]:
+    """
+    Picos, outliers e cobranças duplicadas das despesas
+
+    Args:
+        columns: Colunas id, date, month, value, type e category (ex:
+            ``ColumnCache.read()``).
+
+    Returns:
+        Anomalias, dos meses mais recentes para os mais antigos.
+    """
+    rows = _expenses(columns)
+    if not len(rows["id"]):
+        return []
+    categories, category_index = np.unique(rows["category"], return_inverse=True)
+    first_month = int(rows["month"].min())
+    month_index = (rows["month"] - first_month).astype(np.int64)
+    shape = (len(categories), int(month_index.max()) + 1)
+    bins = category_index * shape[1] + month_index
+    totals = np.bincount(bins, weights=rows["value"], minlength=shape[0] * shape[1])
+    totals = totals.reshape(shape)
+    # Categoria ativa a partir do mês da sua primeira despesa
+    first = np.full(shape[0], shape[1])
+    np.minimum.at(first, category_index, month_index)
+    active = np.arange(shape[1]) >= first[:, None]
+
+    anomalies = (
+        _spikes(categories, totals, active, first_month, window, threshold)
+        + _outliers(
+            rows,
+            category_index,
+            month_index,
+            categories,
+            first_month,
+            shape,
+            window,
+            threshold,
+        )
+        + _duplicates(rows, category_index, duplicate_days)
+    )
+    anomalies.sort(key=lambda a: (a.month, a.score), reverse=True)
+    return anomalies
+
+
+class AnomalyDetector:
+    """Anomalias atuais, refeitas por categoria a cada alteração"""
+
+    def __init__(self, **options):
+        """
+        Args:
+            options: Parâmetros de ``detect_anomalies`` (window, threshold,
+                duplicate_days).
+        """
+        self.options = options
+        self.by_category: Dict[int, List[Anomaly]] = {}
+        # Indica se já houve uma detecção completa
+        self.ready = False
+
+    def detect(
+        self,
+        columns: Mapping[str, np.ndarray],
+        category_ids: Optional[Iterable[int]] = None,
+    ) -> List[Anomaly]:
+        """
+        Refaz a detecção de todas as categorias ou só das informadas
+
+        Args:
+            columns: Colunas das transações; com ``category_ids``, basta
+                que tragam as linhas dessas categorias.
+            category_ids: Categorias alteradas (None: todas).
+
+        Returns:
+            Todas as anomalias atuais.
+        """
+        return self.replace(detect_anomalies(columns, **self.options), category_ids)
+
+    def replace(
+        self, anomalies: Iterable[Anomaly], category_ids: Optional[Iterable[int]] = None
+    ) -> List[Anomaly]:
+        """
+        Troca as anomalias de todas as categorias (ou só das informadas) por
+        outras já detectadas, ex: em uma thread de worker
+        """
+        by_category = {}
+        for anomaly in anomalies:
+            by_category.setdefault(anomaly.category_id, []).append(anomaly)
+        if category_ids is None:
+            self.by_category = by_category
+            self.ready = True
+        else:
+            for category_id in set(category_ids):
+                self.by_category.pop(category_id, None)
+                if category_id in by_category:
+                    self.by_category[category_id] = by_category[category_id]
+        return self.anomalies
+
+    @property
+    def anomalies(self) -> List[Anomaly]:
+        """Anomalias, dos meses mais recentes para os mais antigos"""
+        anomalies = [a for found in self.by_category.values() for a in found]
+        anomalies.sort(key=lambda a: (a.month, a.score), reverse=True)
+        return anomalies
+
+    @property
+    def flagged_ids(self) -> Set[int]:
+        """Transações apontadas por alguma anomalia"""
+        return {
+            a.transaction_id
+            for found in self.by_category.values()
+            for a in found
+            if a.transaction_id is not None
+        }
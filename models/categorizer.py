@@ -0,0 +1,209 @@
+# categorizer.py
+"""
+Categorização automática de transações por regras.
+
+Cada regra (CategoryRule) aponta para uma categoria e é de um de três tipos:
+
+- ``keyword``: palavras que aparecem, nessa ordem e juntas, na descrição
+  normalizada (sem acentos, caixa nem pontuação). "posto shell" casa com
+  "PAG*POSTO SHELL 123", mas "shell" não casa com "shellbox".
+- ``regex``: expressão regular buscada na descrição original (sem
+  diferenciar maiúsculas).
+- ``amount``: só a faixa de valor.
+
+Qualquer regra pode restringir a faixa de valor (min_value/max_value).
+
+As palavras-chave de todas as regras são compiladas em um único autômato de
+Aho-Corasick sobre palavras: cada descrição é percorrida uma vez, com uma
+consulta a dicionário por palavra, qualquer que seja o número de regras. As
+expressões regulares são testadas uma a uma, então devem ser poucas.
+"""
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from models.fingerprint import normalize_description
+
+KEYWORD = "keyword"
+REGEX = "regex"
+AMOUNT = "amount"
+RULE_KINDS = (KEYWORD, REGEX, AMOUNT)
+
+
+def compile_rule_pattern(kind: str, pattern):
+    """
+    Valida e compila o padrão de uma regra.
+
+    Raises:
+        ValueError: Tipo desconhecido ou padrão vazio/inválido.
+    """
+    if kind == KEYWORD:
+        words = tuple(normalize_description(pattern).split())
+        if not words:
+            raise ValueError("Palavra-chave vazia")
+        return words
+    if kind == REGEX:
+        if not pattern:
+            raise ValueError("Expressão regular vazia")
+        try:
+            return re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Expressão regular inválida: {e}") from e
+    if kind == AMOUNT:
+        return None
+    raise ValueError(f"Tipo de regra desconhecido: {kind}")
+
+
+class KeywordAutomaton:
+    """Autômato de Aho-Corasick cujo alfabeto são palavras"""
+
+    def __init__(self):
+        # Nó i: filhos (palavra -> nó), falha e saídas (valores que terminam
+        # no nó ou em algum sufixo dele)
+        self._children: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[tuple] = [()]
+        self._built = False
+
+    def add(self, words: Sequence[str], value):
+        node = 0
+        for word in words:
+            child = self._children[node].get(word)
+            if child is None:
+                child = len(self._children)
+                self._children[node][word] = child
+                self._children.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            node = child
+        self._outputs[node] += (value,)
+        self._built = False
+
+    def build(self):
+        """Calcula as ligações de falha (busca em largura)"""
+        queue = deque(self._children[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for word, child in self._children[node].items():
+                fail = self._fail[node]
+                while fail and word not in self._children[fail]:
+                    fail = self._fail[fail]
+                target = self._children[fail].get(word, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] += self._outputs[self._fail[child]]
+                queue.append(child)
+        self._built = True
+
+    def find(self, words: Iterable[str]) -> List:
+        """Valores de todas as sequências de palavras presentes"""
+        if not self._built:
+            self.build()
+        children, fail, outputs = self._children, self._fail, self._outputs
+        found = []
+        node = 0
+        for word in words:
+            while node and word not in children[node]:
+                node = fail[node]
+            node = children[node].get(word, 0)
+            if outputs[node]:
+                found.extend(outputs[node])
+        return found
+
+
+class Categorizer:
+    """Aplica um conjunto de regras de categorização"""
+
+    def __init__(self, rules: Iterable):
+        """
+        Args:
+            rules: CategoryRule (ou objetos com os mesmos atributos). Regras
+                com padrão inválido são ignoradas.
+        """
+        self._keywords = KeywordAutomaton()
+        self._regexes = []
+        self._amounts = []
+        # Regra -> (categoria, valor mínimo, valor máximo, prioridade)
+        self._rules = []
+        for rule in rules:
+            try:
+                compiled = compile_rule_pattern(rule.kind, rule.pattern)
+            except ValueError:
+                continue
+            index = len(self._rules)
+            self._rules.append(
+                (rule.category_id, rule.min_value, rule.max_value, rule.priority or 0)
+            )
+            if rule.kind == KEYWORD:
+                # O valor guardado no autômato já traz o tamanho do trecho
+                self._keywords.add(compiled, (index, len(" ".join(compiled))))
+            elif rule.kind == REGEX:
+                self._regexes.append((compiled, index))
+            else:
+                self._amounts.append(index)
+        self._keywords.build()
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _matching_rules(self, description, value) -> List[tuple]:
+        """
+        Regras que casam, como chaves de preferência: maior prioridade,
+        depois o trecho casado mais longo, depois a regra mais antiga.
+        """
+        candidates = self._keywords.find(normalize_description(description).split())
+        for regex, index in self._regexes if description else ():
+            match = regex.search(description)
+            if match:
+                candidates.append((index, match.end() - match.start()))
+        candidates.extend((index, 0) for index in self._amounts)
+        matching = []
+        for index, length in candidates:
+            _, min_value, max_value, priority = self._rules[index]
+            if value is None and (min_value is not None or max_value is not None):
+                continue
+            if min_value is not None and value < min_value:
+                continue
+            if max_value is not None and value > max_value:
+                continue
+            matching.append((priority, length, -index))
+        return matching
+
+    def suggest(self, description, value=None, limit: int = 3) -> List[int]:
+        """IDs das categorias sugeridas, da mais para a menos provável"""
+        matching = sorted(self._matching_rules(description, value), reverse=True)
+        suggestions = []
+        for _, _, index in matching:
+            category_id = self._rules[-index][0]
+            if category_id not in suggestions:
+                suggestions.append(category_id)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+    def categorize(self, description, value=None) -> Optional[int]:
+        """ID da categoria da melhor regra que casa (None se nenhuma)"""
+        matching = self._matching_rules(description, value)
+        if not matching:
+            return None
+        return self._rules[-max(matching)[2]][0]
+
+    def apply(self, records: Iterable[Dict]) -> int:
+        """
+        Preenche ``category_id`` dos registros que não têm categoria.
+
+        Returns:
+            Quantidade de registros categorizados.
+        """
+        categorized = 0
+        for record in records:
+            if record.get("category_id"):
+                continue
+            category_id = self.categorize(
+                record.get("description"), record.get("transaction_value")
+            )
+            if category_id is not None:
+                record["category_id"] = category_id
+                categorized += 1
+        return categorized
@@ -0,0 +1,55 @@
+# fingerprint.py
+"""
+Impressão digital de transações para detectar duplicatas.
+
+Duas transações com o mesmo dia, tipo, valor (em centavos) e descrição
+normalizada têm a mesma impressão digital, mesmo que a descrição venha com
+acentos, caixa, pontuação ou espaços diferentes de um extrato para outro.
+"""
+import datetime
+import hashlib
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_description(description) -> str:
+    """Minúsculas, sem acentos, pontuação nem espaços repetidos"""
+    if not description:
+        return ""
+    text = unicodedata.normalize("NFKD", description)
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def to_cents(value: float) -> int:
+    return round(value * 100)
+
+
+def transaction_fingerprint(
+    transaction_date: datetime.datetime,
+    transaction_value: float,
+    type: str,
+    description,
+) -> str:
+    """Hash de (dia, tipo, valor em centavos, descrição normalizada)"""
+    key = "|".join(
+        (
+            transaction_date.strftime("%Y-%m-%d"),
+            type or "",
+            str(to_cents(transaction_value)),
+            normalize_description(description),
+        )
+    )
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def fingerprint_of(transaction) -> str:
+    """Impressão digital de uma Transaction, TransactionRow ou similar"""
+    return transaction_fingerprint(
+        transaction.transaction_date,
+        transaction.transaction_value,
+        transaction.type,
+        transaction.description,
+    )
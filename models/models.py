@@ -1,6 +1,7 @@
 # models.py
 from typing import List, Optional
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, Sequence, String
+from sqlalchemy.sql import expression
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column, relationship
 from db.config import Base
@@ -13,8 +14,22 @@ class Category(Base):
     __tablename__ = "CATEGORIES"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    name: Mapped[str]
+    name: Mapped[str] = mapped_column(index=True)
+    # Categoria mãe (None: categoria raiz); ver CategoryClosure
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("CATEGORIES.id"), index=True
+    )
+    # Versão da última alteração (contador global de DATA_VERSION)
+    version: Mapped[int] = mapped_column(default=0, server_default="0", index=True)
+    # Lápide: categorias removidas continuam visíveis para changes_since
+    deleted: Mapped[bool] = mapped_column(
+        default=False, server_default=expression.false()
+    )
     transactions: Mapped[List["Transaction"]] = relationship()
+    rules: Mapped[List["CategoryRule"]] = relationship(back_populates="category")
+
+    # Concorrência otimista: UPDATE ... WHERE version = <versão carregada>
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
     def __repr__(self):
         return f"<Category(id={self.id}, name='{self.name}')>"
@@ -23,7 +38,7 @@ class Category(Base):
         return {
             "id": self.id,
             "name": self.name,
-            "transactions": self.transactions,
+            "parent_id": self.parent_id,
         }
 
     @classmethod
@@ -31,7 +46,33 @@ class Category(Base):
         return cls(
             id=data.get("id"),
             name=data.get("name"),
-            transactions=data.get("transactions"),
+            parent_id=data.get("parent_id"),
+        )
+
+
+class CategoryClosure(Base):
+    """
+    Fechamento transitivo da árvore de categorias, mantido pelo CategoryDAO.
+
+    Há uma linha para cada par (ancestral, descendente), inclusive a da
+    própria categoria (profundidade 0). Totais de uma subárvore saem de um
+    único JOIN com ``descendant_id`` e GROUP BY ``ancestor_id``.
+    """
+
+    __tablename__ = "CATEGORY_CLOSURE"
+
+    ancestor_id: Mapped[int] = mapped_column(
+        ForeignKey("CATEGORIES.id"), primary_key=True
+    )
+    descendant_id: Mapped[int] = mapped_column(
+        ForeignKey("CATEGORIES.id"), primary_key=True, index=True
+    )
+    depth: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self):
+        return (
+            f"<CategoryClosure({self.ancestor_id} -> {self.descendant_id}, "
+            f"depth={self.depth})>"
         )
 
 
@@ -40,12 +81,29 @@ class Transaction(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     description: Mapped[Optional[str]]
-    transaction_date: Mapped[datetime.datetime]
+    transaction_date: Mapped[datetime.datetime] = mapped_column(index=True)
     transaction_value: Mapped[float]
     type: Mapped[str]
     category_id: Mapped[int] = mapped_column(ForeignKey("CATEGORIES.id"))
+    # Impressão digital de (dia, tipo, valor, descrição) para achar duplicatas
+    # na importação (ver models/fingerprint.py)
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(32), index=True)
+    version: Mapped[int] = mapped_column(default=0, server_default="0", index=True)
+    deleted: Mapped[bool] = mapped_column(
+        default=False, server_default=expression.false()
+    )
     category: Mapped["Category"] = relationship(back_populates="transactions")
 
+    # Índices (coluna, id) das ordenações da tabela, para paginação por chave
+    __table_args__ = (
+        Index("ix_transactions_date_id", "transaction_date", "id"),
+        Index("ix_transactions_value_id", "transaction_value", "id"),
+        Index("ix_transactions_type_id", "type", "id"),
+        Index("ix_transactions_category_id", "category_id", "id"),
+    )
+
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
+
     def __repr__(self):
         return (
             f"<Transaction(id={self.id}, date={self.transaction_date}, "
@@ -60,7 +118,7 @@ class Transaction(Base):
             "transaction_date": self.transaction_date,
             "transaction_value": self.transaction_value,
             "type": self.type,
-            "category": self.category.to_dict() if self.category else None,
+            "category_id": self.category_id,
         }
 
     @classmethod
@@ -73,3 +131,152 @@ class Transaction(Base):
             type=data.get("type"),
             category_id=data.get("category_id"),
         )
+
+
+class ArchivedTransaction(Base):
+    """
+    Transação movida para o arquivo (ver dao/archive_dao.py).
+
+    Tem as mesmas colunas de Transaction, com o mesmo ID, para que as
+    leituras possam juntar as duas tabelas.
+    """
+
+    __tablename__ = "TRANSACTIONS_ARCHIVE"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    description: Mapped[Optional[str]]
+    transaction_date: Mapped[datetime.datetime] = mapped_column(index=True)
+    transaction_value: Mapped[float]
+    type: Mapped[str]
+    category_id: Mapped[int] = mapped_column(ForeignKey("CATEGORIES.id"))
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(32), index=True)
+    version: Mapped[int] = mapped_column(default=0, server_default="0")
+    # Sempre falso: só transações vivas são arquivadas
+    deleted: Mapped[bool] = mapped_column(
+        default=False, server_default=expression.false()
+    )
+    # Versão da operação de arquivamento (a réplica remove essas linhas)
+    archived_version: Mapped[int] = mapped_column(
+        default=0, server_default="0", index=True
+    )
+
+    __table_args__ = (
+        Index("ix_transactions_archive_date_id", "transaction_date", "id"),
+        Index("ix_transactions_archive_value_id", "transaction_value", "id"),
+        Index("ix_transactions_archive_type_id", "type", "id"),
+        Index("ix_transactions_archive_category_id", "category_id", "id"),
+    )
+
+    def __repr__(self):
+        return (
+            f"<ArchivedTransaction(id={self.id}, date={self.transaction_date}, "
+            f"value={self.transaction_value}, type={self.type})>"
+        )
+
+    to_dict = Transaction.to_dict
+
+
+class Tag(Base):
+    """Etiqueta livre de transações (ex: "viagem-2026", "reembolsável")"""
+
+    __tablename__ = "TAGS"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(60), unique=True)
+
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name='{self.name}')>"
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name}
+
+
+class TransactionTag(Base):
+    """
+    Associação muitos-para-muitos entre transações e etiquetas.
+
+    ``transaction_id`` não tem chave estrangeira: o ID é o mesmo em
+    TRANSACTIONS e em TRANSACTIONS_ARCHIVE, e as etiquetas acompanham a
+    transação arquivada.
+    """
+
+    __tablename__ = "TRANSACTION_TAGS"
+
+    transaction_id: Mapped[int] = mapped_column(primary_key=True)
+    tag_id: Mapped[int] = mapped_column(
+        ForeignKey("TAGS.id"), primary_key=True, index=True
+    )
+
+    def __repr__(self):
+        return f"<TransactionTag({self.transaction_id} -> {self.tag_id})>"
+
+
+class CategoryRule(Base):
+    """Regra de categorização automática (ver models/categorizer.py)"""
+
+    __tablename__ = "CATEGORY_RULES"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("CATEGORIES.id"), index=True)
+    # "keyword" (palavras da descrição), "regex" ou "amount" (só valor)
+    kind: Mapped[str] = mapped_column(String(10))
+    pattern: Mapped[Optional[str]] = mapped_column(String(200))
+    # Faixa de valor opcional, combinada com o padrão
+    min_value: Mapped[Optional[float]]
+    max_value: Mapped[Optional[float]]
+    # Entre regras que casam, vence a de maior prioridade
+    priority: Mapped[int] = mapped_column(default=0, server_default="0")
+    category: Mapped["Category"] = relationship(back_populates="rules")
+
+    def __repr__(self):
+        return (
+            f"<CategoryRule(id={self.id}, kind={self.kind}, "
+            f"pattern={self.pattern!r}, category={self.category_id})>"
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "category_id": self.category_id,
+            "kind": self.kind,
+            "pattern": self.pattern,
+            "min_value": self.min_value,
+            "max_value": self.max_value,
+            "priority": self.priority,
+        }
+
+
+class DataVersion(Base):
+    """Contador global e monotônico das versões de dados"""
+
+    __tablename__ = "DATA_VERSION"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    value: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self):
+        return f"<DataVersion(value={self.value})>"
+
+
+# No Firebird as versões vêm deste generator, fora das transações (ver
+# dao/versioning.py); create_all só o cria nos bancos com sequências
+VERSION_SEQUENCE = Sequence("DATA_VERSION_SEQ", metadata=Base.metadata)
+
+
+class MonthlySummary(Base):
+    """Totais por mês, categoria e tipo, mantidos pelo TransactionDAO"""
+
+    __tablename__ = "MONTHLY_SUMMARY"
+
+    year: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[int] = mapped_column(primary_key=True)
+    category_id: Mapped[int] = mapped_column(primary_key=True)
+    type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    total: Mapped[float] = mapped_column(default=0.0)
+    count: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self):
+        return (
+            f"<MonthlySummary({self.year}-{self.month:02d}, "
+            f"category={self.category_id}, type={self.type}, total={self.total})>"
+        )
@@ -0,0 +1,24 @@
+# rows.py
+"""
+Modelo de leitura compacto.
+
+Linhas imutáveis montadas a partir de consultas por projeção de colunas, sem
+estado de instrumentação do ORM nem entradas no identity map. São usadas
+pela tela (tabela, KPIs e gráficos); instâncias ORM ficam para a edição.
+"""
+import datetime
+from typing import NamedTuple, Optional
+
+
+class TransactionRow(NamedTuple):
+    """Transação pronta para exibição (com o nome da categoria)"""
+
+    id: int
+    description: Optional[str]
+    transaction_date: datetime.datetime
+    transaction_value: float
+    type: str
+    category_id: int
+    category_name: Optional[str]
+    version: int
+    deleted: bool
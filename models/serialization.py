@@ -0,0 +1,173 @@
+# serialization.py
+"""
+Serialização rasa e orientada a lotes.
+
+Cada schema é uma lista de campos planos (nada de objetos aninhados nem
+relacionamentos carregados sob demanda). ``RowEncoder`` transforma linhas
+projetadas (ex: TransactionRow) em dicionários prontos para JSON/CSV;
+``BatchDecoder`` faz o caminho inverso na ingestão em massa, verificando os
+tipos de cada coluna uma vez por lote e convertendo apenas quando preciso.
+"""
+import datetime
+from itertools import islice
+from operator import attrgetter
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+
+class Field(NamedTuple):
+    """Campo de um schema de serialização"""
+
+    name: str
+    type: type
+    required: bool = True
+    # Atributo lido da linha, quando difere do nome serializado
+    attribute: Optional[str] = None
+
+
+# Campos de transação usados na exportação, importação e API
+TRANSACTION_SCHEMA = (
+    Field("id", int, required=False),
+    Field("description", str, required=False),
+    Field("transaction_date", datetime.datetime),
+    Field("transaction_value", float),
+    Field("type", str),
+    Field("category_id", int, required=False),
+    Field("category", str, required=False, attribute="category_name"),
+)
+
+CATEGORY_SCHEMA = (
+    Field("id", int, required=False),
+    Field("name", str),
+    Field("parent_id", int, required=False),
+    Field("version", int, required=False),
+)
+
+# Tamanho padrão dos lotes
+BATCH_SIZE = 5000
+
+
+def _parse_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime.combine(value, datetime.time())
+    return datetime.datetime.fromisoformat(value)
+
+
+# Conversões por tipo: valor Python -> valor serializado e vice-versa
+ENCODERS = {datetime.datetime: datetime.datetime.isoformat}
+DECODERS = {
+    datetime.datetime: _parse_datetime,
+    float: float,
+    int: int,
+    str: str,
+}
+
+
+def batched(items: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[List[Any]]:
+    """Agrupa um iterável em listas de até ``size`` itens"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class RowEncoder:
+    """Converte linhas (tuplas nomeadas ou objetos) em dicionários planos"""
+
+    def __init__(self, schema: Sequence[Field]):
+        self.schema = tuple(schema)
+        self.names = tuple(field.name for field in self.schema)
+        self._getter = attrgetter(
+            *(field.attribute or field.name for field in self.schema)
+        )
+        self._encoders = [
+            (index, ENCODERS[field.type])
+            for index, field in enumerate(self.schema)
+            if field.type in ENCODERS
+        ]
+
+    def encode(self, row) -> Dict[str, Any]:
+        values = self._getter(row)
+        if len(self.schema) == 1:
+            values = (values,)
+        if self._encoders:
+            values = list(values)
+            for index, encoder in self._encoders:
+                if values[index] is not None:
+                    values[index] = encoder(values[index])
+        return dict(zip(self.names, values))
+
+    def encode_batch(self, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        return [self.encode(row) for row in rows]
+
+    def iter_encoded(self, batches: Iterable[Iterable[Any]]):
+        """Codifica lote a lote, sem materializar tudo em memória"""
+        for batch in batches:
+            yield self.encode_batch(batch)
+
+
+class BatchDecoder:
+    """Valida e converte registros (dicionários) vindos de JSON ou CSV"""
+
+    def __init__(self, schema: Sequence[Field]):
+        self.schema = tuple(schema)
+        self.names = tuple(field.name for field in self.schema)
+
+    def _decode_column(self, field: Field, values: List[Any]) -> List[Any]:
+        if field.type is not str:
+            # Em CSV, campo vazio significa ausente
+            values = [None if value == "" else value for value in values]
+        if field.required and None in values:
+            index = values.index(None)
+            raise ValueError(
+                f"Registro {index} do lote: campo '{field.name}' obrigatório"
+            )
+        types = {type(value) for value in values} - {type(None)}
+        if types <= {field.type}:
+            # Lote inteiro já tem o tipo certo: nada a converter
+            return values
+        decoder = DECODERS[field.type]
+        decoded = []
+        for index, value in enumerate(values):
+            try:
+                decoded.append(None if value is None else decoder(value))
+            except (TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Registro {index} do lote: valor inválido para '{field.name}': "
+                    f"{value!r} ({e})"
+                ) from e
+        return decoded
+
+    def decode_batch(self, records: Sequence[Mapping[str, Any]]) -> List[Dict]:
+        """
+        Decodifica um lote de registros.
+
+        Raises:
+            ValueError: Campo obrigatório ausente ou valor não conversível.
+        """
+        columns = [
+            self._decode_column(field, [record.get(field.name) for record in records])
+            for field in self.schema
+        ]
+        return [dict(zip(self.names, values)) for values in zip(*columns)]
+
+    def iter_decoded(self, records: Iterable[Mapping[str, Any]], size=BATCH_SIZE):
+        """Decodifica um iterável de registros em lotes"""
+        for batch in batched(records, size):
+            yield self.decode_batch(batch)
+
+
+transaction_encoder = RowEncoder(TRANSACTION_SCHEMA)
+transaction_decoder = BatchDecoder(TRANSACTION_SCHEMA)
+category_encoder = RowEncoder(CATEGORY_SCHEMA)
+category_decoder = BatchDecoder(CATEGORY_SCHEMA)
@@ -1,4 +1,32 @@
+import os
+import subprocess
+import sys
+import tempfile
+
 from textual_serve.server import Server
 
-server = Server("python -m finance")
-server.serve()
+# Cada navegador roda o seu app: o barramento local propaga as alterações
+# entre eles (ver db/change_bus.py) e o serviço de agregados calcula os
+# totais uma vez para todos (ver db/aggregate_service.py). Com
+# FINANCE_AGGREGATE_SOCKET vazio, cada app volta a ler os totais do banco
+if hasattr(os, "getuid"):
+    os.environ.setdefault(
+        "FINANCE_NOTIFY_DIR",
+        os.path.join(tempfile.gettempdir(), f"finance-bus-{os.getuid()}"),
+    )
+    os.environ.setdefault(
+        "FINANCE_AGGREGATE_SOCKET",
+        os.path.join(tempfile.gettempdir(), f"finance-aggregates-{os.getuid()}.sock"),
+    )
+
+daemon = None
+if os.environ.get("FINANCE_AGGREGATE_SOCKET"):
+    daemon = subprocess.Popen([sys.executable, "-m", "finance", "aggregate-daemon"])
+
+try:
+    server = Server("python -m finance")
+    server.serve()
+finally:
+    if daemon is not None:
+        daemon.terminate()
+        daemon.wait()
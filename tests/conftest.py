@@ -5,6 +5,26 @@ configurações que serão usadas em todos os testes.
 """
 
 import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models.models  # noqa: F401 - registra os modelos no metadata
+from dao import (
+    archive_dao,
+    async_dao,
+    backup_dao,
+    category_dao,
+    reconciliation,
+    rule_dao,
+    summary_dao,
+    tag_dao,
+    transaction_dao,
+)
+from db import config
+from db.config import Base
 
 # from unittest.mock import MagicMock
 
@@ -20,3 +40,57 @@ def pytest_configure(config):
 def db_config():
     """Configurações de banco de dados para testes"""
     return {"database": "test_db", "echo": False, "pool_size": 5}
+
+
+@pytest.fixture
+def sqlite_engine():
+    """Engine SQLite em memória com o schema dos modelos"""
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_session_factory(sqlite_engine):
+    """Fábrica de sessões ligada ao banco SQLite em memória"""
+    return sessionmaker(bind=sqlite_engine)
+
+
+@pytest.fixture
+def use_sqlite(sqlite_session_factory, monkeypatch):
+    """Faz os DAOs usarem o banco SQLite em memória"""
+    for module in (
+        archive_dao,
+        backup_dao,
+        category_dao,
+        reconciliation,
+        rule_dao,
+        summary_dao,
+        tag_dao,
+        transaction_dao,
+    ):
+        monkeypatch.setattr(module, "SessionLocal", sqlite_session_factory)
+
+
+@pytest_asyncio.fixture
+async def async_db(tmp_path, monkeypatch):
+    """Banco SQLite em arquivo acessado pelo driver aiosqlite"""
+    path = tmp_path / "finance.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    url = f"sqlite+aiosqlite:///{path}"
+    async_engine = create_async_engine(url)
+    monkeypatch.setattr(config, "ASYNC_DATABASE_URL", url)
+    monkeypatch.setattr(
+        async_dao,
+        "_session_factory",
+        async_sessionmaker(bind=async_engine, expire_on_commit=False),
+    )
+    yield
+    await async_engine.dispose()
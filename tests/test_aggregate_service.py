@@ -0,0 +1,219 @@
+import asyncio
+import datetime
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db import aggregate_service, config
+from db.aggregate_service import (
+    OP_CATEGORY_TOTALS,
+    OP_SUBTREE_MONTH_TOTALS,
+    OP_TOTALS,
+    OP_TOTALS_BY_MONTH,
+    AggregateClient,
+    AggregateServer,
+    decode_category_totals,
+    decode_subtree_month_totals,
+    decode_totals,
+    decode_totals_by_month,
+    load_aggregates,
+)
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def ledger(use_sqlite):
+    """
+    Árvore "Casa" > "Contas", mais "Lazer" na raiz, com despesas em 2024-01
+    e 2024-02 e uma receita em "Lazer"
+    """
+    with CategoryDAO() as dao:
+        house = dao.create_category("Casa").id
+        bills = dao.create_category("Contas", parent_id=house).id
+        leisure = dao.create_category("Lazer").id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": description,
+                    "transaction_date": datetime.datetime(2024, month, 10),
+                    "transaction_value": value,
+                    "type": type,
+                    "category_id": category_id,
+                }
+                for description, month, value, type, category_id in (
+                    ("Reforma", 1, 500.0, "Despesa", house),
+                    ("Luz", 1, 100.0, "Despesa", bills),
+                    ("Luz", 2, 120.0, "Despesa", bills),
+                    ("Cinema", 2, 40.0, "Despesa", leisure),
+                    ("Ingresso vendido", 2, 15.0, "Receita", leisure),
+                )
+            ]
+        )
+    return {"house": house, "bills": bills, "leisure": leisure}
+
+
+@pytest_asyncio.fixture
+async def service(ledger, tmp_path):
+    """Serviço atendendo em um socket temporário"""
+    server = AggregateServer(str(tmp_path / "aggregates.sock"), poll_interval=60)
+    assert await server.start()
+    yield server
+    await server.stop()
+
+
+def request_all(client, category_id):
+    """Os quatro agregados da tela principal (executado em uma thread)"""
+    return (
+        client.totals(),
+        client.totals_by_month(),
+        client.category_totals(),
+        client.subtree_month_totals(category_id),
+    )
+
+
+# ==================== TESTES: agregados ====================
+
+
+def test_aggregates_match_summary_dao(ledger):
+    """Testa que os agregados em memória são os mesmos do SummaryDAO"""
+    # Act
+    aggregates = load_aggregates()
+    with SummaryDAO() as dao:
+        totals = dao.get_totals_by_type()
+        totals_by_month = dao.get_totals_by_month()
+        rows = dao.get_totals_by_category(rollup=True)
+        subtree = dao.get_subtree_month_totals(ledger["house"])
+
+    # Assert
+    assert decode_totals(aggregates.payload(OP_TOTALS)) == totals
+    assert decode_totals_by_month(aggregates.payload(OP_TOTALS_BY_MONTH)) == (
+        totals_by_month
+    )
+    assert decode_category_totals(aggregates.payload(OP_CATEGORY_TOTALS)) == {
+        row["category_id"]: row for row in rows
+    }
+    assert (
+        decode_subtree_month_totals(
+            aggregates.payload(OP_SUBTREE_MONTH_TOTALS, ledger["house"])
+        )
+        == subtree
+        == {"2024-01": 600.0, "2024-02": 120.0}
+    )
+    # Categoria inexistente: série vazia
+    assert aggregates.payload(OP_SUBTREE_MONTH_TOTALS, 999) == b""
+
+
+# ==================== TESTES: serviço ====================
+
+
+@pytest.mark.asyncio
+async def test_viewers_do_not_query_the_database(service, ledger, sqlite_engine):
+    """Testa que vários apps são atendidos sem nenhuma consulta ao banco"""
+    # Arrange
+    statements = []
+    event.listen(
+        sqlite_engine, "before_cursor_execute", lambda *args: statements.append(1)
+    )
+    clients = [AggregateClient(service.path) for _ in range(5)]
+
+    # Act
+    results = await asyncio.gather(
+        *(asyncio.to_thread(request_all, client, ledger["bills"]) for client in clients)
+    )
+    for client in clients:
+        client.close()
+
+    # Assert
+    assert statements == []
+    assert service.requests == 20
+    assert service.reloads == 1
+    totals, totals_by_month, category_totals, subtree = results[0]
+    assert all(result == results[0] for result in results)
+    assert totals == {"income": 15.0, "expense": 760.0}
+    assert totals_by_month["2024-02"] == {"income": 15.0, "expense": 160.0}
+    assert category_totals[ledger["house"]]["expense"] == 720.0
+    assert subtree == {"2024-01": 100.0, "2024-02": 120.0}
+
+
+@pytest.mark.asyncio
+async def test_newer_version_reloads_before_answering(service, ledger):
+    """Testa que um app que já viu uma escrita recebe os totais dela"""
+    # Arrange
+    client = AggregateClient(service.path)
+    with TransactionDAO() as dao:
+        dao.create_transaction(
+            {
+                "description": "Gás",
+                "transaction_date": datetime.datetime(2024, 3, 5),
+                "transaction_value": 80.0,
+                "type": "Despesa",
+                "category_id": ledger["bills"],
+            }
+        )
+        version = dao.current_version()
+
+    # Act
+    stale = await asyncio.to_thread(client.totals)
+    fresh = await asyncio.to_thread(client.totals, min_version=version)
+    client.close()
+
+    # Assert
+    assert stale["expense"] == 760.0
+    assert fresh["expense"] == 840.0
+    assert service.reloads == 2
+    assert service.aggregates.version == version
+
+
+@pytest.mark.asyncio
+async def test_published_writes_reload_once(ledger, tmp_path, monkeypatch):
+    """Testa que uma rajada de escritas avisada pelo barramento vira uma recarga"""
+    # Arrange
+    monkeypatch.setattr(config, "NOTIFY_DIR", str(tmp_path / "bus"))
+    server = AggregateServer(str(tmp_path / "aggregates.sock"), poll_interval=60)
+    assert await server.start()
+
+    # Act
+    with TransactionDAO() as dao:
+        for day in range(1, 6):
+            dao.create_transaction(
+                {
+                    "description": "Café",
+                    "transaction_date": datetime.datetime(2024, 3, day),
+                    "transaction_value": 5.0,
+                    "type": "Despesa",
+                    "category_id": ledger["leisure"],
+                }
+            )
+        version = dao.current_version()
+    for _ in range(100):
+        if server.aggregates.version == version:
+            break
+        await asyncio.sleep(0.01)
+    await server.stop()
+
+    # Assert
+    assert server.aggregates.version == version
+    assert server.reloads == 2
+
+
+def test_client_falls_back_without_service(tmp_path, monkeypatch):
+    """Testa que sem serviço o cliente devolve None e espera para tentar de novo"""
+    # Arrange
+    client = AggregateClient(str(tmp_path / "missing.sock"), retry_after=60)
+
+    # Act
+    first = client.totals()
+    down_until = client._down_until
+    second = client.totals()
+    monkeypatch.setattr(config, "AGGREGATE_SOCKET", "")
+
+    # Assert
+    assert first is None and second is None
+    assert client._down_until == down_until
+    assert aggregate_service.get_client() is None
@@ -0,0 +1,188 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from db.column_cache import COLUMNS, ColumnCache
+from models.anomalies import (
+    DUPLICATE,
+    OUTLIER,
+    SPIKE,
+    AnomalyDetector,
+    detect_anomalies,
+)
+
+EXPENSE, INCOME, REMOVED = 2, 1, 0
+
+# ==================== FIXTURES ====================
+
+
+def make_columns(rows):
+    """Colunas no formato do cache a partir de (id, data, valor, tipo, categoria)"""
+    ids, dates, values, types, categories = zip(*rows)
+    dates = np.array(dates, dtype=COLUMNS["date"])
+    return {
+        "id": np.array(ids, dtype=COLUMNS["id"]),
+        "date": dates,
+        "month": dates.astype("datetime64[M]").astype(COLUMNS["month"]),
+        "value": np.array(values, dtype=COLUMNS["value"]),
+        "type": np.array(types, dtype=COLUMNS["type"]),
+        "category": np.array(categories, dtype=COLUMNS["category"]),
+    }
+
+
+@pytest.fixture
+def history():
+    """
+    Categorias 1 e 2 com quatro despesas parecidas (~25) por mês em 2024
+    """
+    rows = []
+    for month in range(1, 13):
+        for day, value in ((3, 24.0), (10, 26.0), (17, 25.0), (24, 25.5)):
+            for category in (1, 2):
+                rows.append(
+                    (
+                        len(rows) + 1,
+                        datetime.datetime(2024, month, day, category),
+                        value + category / 10,
+                        EXPENSE,
+                        category,
+                    )
+                )
+    return rows
+
+
+def kinds(anomalies):
+    return sorted((a.kind, a.category_id, a.month) for a in anomalies)
+
+
+# ==================== TESTES: detecção ====================
+
+
+def test_steady_spending_has_no_anomalies(history):
+    """Testa que gastos regulares não geram anomalias"""
+    # Act
+    anomalies = detect_anomalies(make_columns(history))
+
+    # Assert
+    assert anomalies == []
+
+
+def test_category_spike(history):
+    """Testa o pico mensal de uma categoria (mediana/MAD dos meses anteriores)"""
+    # Arrange: quatro despesas extras em 2024-08 da categoria 1
+    extra = [
+        (1000 + i, datetime.datetime(2024, 8, 5 + i), 24.0 + i, EXPENSE, 1)
+        for i in range(4)
+    ]
+
+    # Act
+    anomalies = detect_anomalies(make_columns(history + extra))
+
+    # Assert
+    assert kinds(anomalies) == [(SPIKE, 1, "2024-08")]
+    spike = anomalies[0]
+    assert spike.transaction_id is None
+    assert spike.value > 2 * spike.expected
+
+
+def test_unusual_expense_ignores_income_and_removed(history):
+    """Testa a despesa fora da faixa da categoria (z-score)"""
+    # Arrange
+    extra = [
+        (1000, datetime.datetime(2024, 9, 12), 90.0, EXPENSE, 2),
+        # Receitas e transações removidas não entram
+        (1001, datetime.datetime(2024, 9, 12), 5000.0, INCOME, 1),
+        (1002, datetime.datetime(2024, 9, 12), 5000.0, REMOVED, 1),
+    ]
+
+    # Act
+    anomalies = detect_anomalies(make_columns(history + extra))
+
+    # Assert
+    outliers = [a for a in anomalies if a.kind == OUTLIER]
+    assert [(a.transaction_id, a.category_id) for a in outliers] == [(1000, 2)]
+    assert outliers[0].expected == pytest.approx(25.2, abs=0.5)
+    assert all(a.category_id == 2 for a in anomalies)
+
+
+def test_duplicate_charges():
+    """Testa a cobrança repetida: mesma categoria e valor, poucos dias depois"""
+    # Arrange
+    rows = [
+        (1, datetime.datetime(2024, 5, 1), 79.9, EXPENSE, 1),
+        (2, datetime.datetime(2024, 5, 2), 79.9, EXPENSE, 1),
+        # Longe demais, outra categoria ou outro valor
+        (3, datetime.datetime(2024, 6, 1), 79.9, EXPENSE, 1),
+        (4, datetime.datetime(2024, 5, 2), 79.9, EXPENSE, 2),
+        (5, datetime.datetime(2024, 5, 1), 79.0, EXPENSE, 1),
+    ]
+
+    # Act
+    anomalies = detect_anomalies(make_columns(rows))
+
+    # Assert
+    assert [(a.kind, a.transaction_id, a.related_id) for a in anomalies] == [
+        (DUPLICATE, 2, 1)
+    ]
+    assert anomalies[0].score == pytest.approx(1.0)
+
+
+def test_incremental_detection_matches_full(history):
+    """Testa que refazer só a categoria alterada dá o resultado completo"""
+    # Arrange
+    detector = AnomalyDetector()
+    detector.detect(make_columns(history))
+    changed = history + [
+        (1000, datetime.datetime(2024, 11, 20), 300.0, EXPENSE, 1),
+        (1001, datetime.datetime(2024, 11, 21), 300.0, EXPENSE, 1),
+    ]
+    columns = make_columns(changed)
+    only_category = {
+        name: column[columns["category"] == 1] for name, column in columns.items()
+    }
+
+    # Act
+    anomalies = detector.detect(only_category, category_ids=[1])
+
+    # Assert
+    assert anomalies == AnomalyDetector().detect(columns)
+    assert {OUTLIER, DUPLICATE} <= {a.kind for a in anomalies}
+    assert detector.flagged_ids == {1000, 1001}
+
+
+# ==================== TESTES: cache colunar ====================
+
+
+def test_detection_over_column_cache(use_sqlite, tmp_path):
+    """Testa a detecção sobre as colunas lidas do cache"""
+    # Arrange
+    with CategoryDAO() as dao:
+        category_id = dao.create_category("Assinaturas").id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": "Assinatura",
+                    "transaction_date": datetime.datetime(2024, 3, day),
+                    "transaction_value": 39.9,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                }
+                for day in (4, 5)
+            ]
+        )
+    cache = ColumnCache(str(tmp_path / "columns"), stamp="test")
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+
+    # Act
+    anomalies = detect_anomalies(cache.read())
+    by_category = cache.read(category_ids=[category_id])
+
+    # Assert
+    assert [a.kind for a in anomalies] == [DUPLICATE]
+    assert len(by_category["id"]) == 2
+    assert len(cache.read(category_ids=[category_id + 1])["id"]) == 0
@@ -0,0 +1,214 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from db import config, replica
+from finance.api import create_app
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def category_id(sqlite_session_factory):
+    """Categoria com três transações"""
+    with CategoryDAO(session=sqlite_session_factory()) as dao:
+        category_id = dao.create_category("Mercado").id
+    with TransactionDAO(session=sqlite_session_factory()) as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": f"Compra {day}",
+                    "transaction_date": datetime.datetime(2024, 1, day),
+                    "transaction_value": 10.0 * day,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                }
+                for day in (1, 2, 3)
+            ]
+        )
+    return category_id
+
+
+@pytest_asyncio.fixture
+async def client(sqlite_session_factory):
+    # Um único worker: o SQLite em memória compartilha uma só conexão
+    app = create_app(sqlite_session_factory, workers=1)
+    async with TestClient(TestServer(app)) as client:
+        yield client
+
+
+# ==================== TESTES: leituras ====================
+
+
+@pytest.mark.asyncio
+async def test_transactions_are_paginated(category_id, client):
+    """Testa a paginação de /api/transactions"""
+    # Act
+    first = await (await client.get("/api/transactions?limit=2")).json()
+    last = await (await client.get("/api/transactions?limit=2&offset=2")).json()
+
+    # Assert
+    assert [t["description"] for t in first["items"]] == ["Compra 3", "Compra 2"]
+    assert first["next_offset"] == 2
+    assert [t["description"] for t in last["items"]] == ["Compra 1"]
+    assert last["next_offset"] is None
+    assert last["items"][0]["category"] == "Mercado"
+
+
+@pytest.mark.asyncio
+async def test_totals_use_etag(category_id, client):
+    """Testa o 304 quando nada mudou e o novo ETag depois de uma escrita"""
+    # Arrange
+    response = await client.get("/api/totals")
+    etag = response.headers["ETag"]
+
+    # Act
+    unchanged = await client.get("/api/totals", headers={"If-None-Match": etag})
+    await client.post("/api/categories", json={"name": "Lazer"})
+    changed = await client.get("/api/totals", headers={"If-None-Match": etag})
+
+    # Assert
+    assert await response.json() == {"income": 0.0, "expense": 60.0, "balance": -60.0}
+    assert unchanged.status == 304
+    assert changed.status == 200
+    assert changed.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_etag_with_replica(category_id, client, tmp_path, monkeypatch):
+    """Testa que, com réplica habilitada, o ETag segue a versão do primário"""
+    # Arrange
+    monkeypatch.setattr(config, "REPLICA_PATH", str(tmp_path / "replica.db"))
+    monkeypatch.setattr(replica, "_engine", None)
+    monkeypatch.setattr(replica, "_session_factory", None)
+    first = await client.get("/api/totals")
+
+    # Act
+    await client.post("/api/categories", json={"name": "Lazer"})
+    second = await client.get(
+        "/api/totals", headers={"If-None-Match": first.headers["ETag"]}
+    )
+
+    # Assert
+    assert first.headers["ETag"] != '"0"'
+    assert second.status == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    replica.get_replica_engine().dispose()
+
+
+@pytest.mark.asyncio
+async def test_series(category_id, client):
+    """Testa as séries por mês e por categoria"""
+    by_month = await (await client.get("/api/totals/by-month?year=2024")).json()
+    by_category = await (await client.get("/api/totals/by-category")).json()
+
+    assert by_month == [{"month": "2024-01", "income": 0.0, "expense": 60.0}]
+    assert by_category[0]["category"] == "Mercado"
+
+
+@pytest.mark.asyncio
+async def test_invalid_parameter(client):
+    """Testa a validação dos parâmetros"""
+    response = await client.get("/api/totals?year=abc")
+
+    assert response.status == 400
+    assert "year" in (await response.json())["error"]
+
+
+# ==================== TESTES: categorias ====================
+
+
+@pytest.mark.asyncio
+async def test_category_crud(client):
+    """Testa criar, renomear e remover uma categoria"""
+    # Create
+    response = await client.post("/api/categories", json={"name": "Lazer"})
+    created = await response.json()
+    assert response.status == 201
+
+    # Update
+    response = await client.put(
+        f"/api/categories/{created['id']}",
+        json={"name": "Cinema", "version": created["version"]},
+    )
+    updated = await response.json()
+    assert updated["name"] == "Cinema"
+
+    # Conflito: versão antiga
+    response = await client.put(
+        f"/api/categories/{created['id']}",
+        json={"name": "Teatro", "version": created["version"]},
+    )
+    assert response.status == 409
+
+    # Delete
+    response = await client.delete(f"/api/categories/{created['id']}")
+    assert response.status == 204
+    response = await client.get(f"/api/categories/{created['id']}")
+    assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_category_in_use_is_merged(category_id, client):
+    """Testa que uma categoria com transações só sai por fusão"""
+    # Arrange
+    response = await client.post("/api/categories", json={"name": "Feira"})
+    target = await response.json()
+
+    # Act
+    refused = await client.delete(f"/api/categories/{category_id}")
+    merged = await client.post(
+        f"/api/categories/{category_id}/merge", json={"target": target["id"]}
+    )
+
+    # Assert
+    assert refused.status == 409
+    assert merged.status == 200
+    assert await merged.json() == {"moved": 3}
+    response = await client.get("/api/totals/by-category")
+    totals = await response.json()
+    assert [(t["category_id"], t["expense"]) for t in totals] == [(target["id"], 60.0)]
+    response = await client.get(f"/api/categories/{category_id}")
+    assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_subcategories_roll_up(category_id, client):
+    """Testa a criação de subcategoria, a movimentação e o rollup"""
+    # Arrange
+    response = await client.post(
+        "/api/categories", json={"name": "Feira", "parent_id": category_id}
+    )
+    child = await response.json()
+    response = await client.post("/api/categories", json={"name": "Casa"})
+    parent = await response.json()
+
+    # Act
+    moved = await client.post(
+        f"/api/categories/{category_id}/move", json={"parent_id": parent["id"]}
+    )
+    cycle = await client.post(
+        f"/api/categories/{parent['id']}/move", json={"parent_id": child["id"]}
+    )
+    response = await client.get("/api/totals/by-category?rollup=1")
+
+    # Assert
+    assert child["parent_id"] == category_id
+    assert moved.status == 200
+    assert (await moved.json())["parent_id"] == parent["id"]
+    assert cycle.status == 409
+    totals = {t["category_id"]: t["expense"] for t in await response.json()}
+    assert totals == {parent["id"]: 60.0, category_id: 60.0}
+
+
+@pytest.mark.asyncio
+async def test_create_category_requires_name(client):
+    """Testa a validação do corpo da requisição"""
+    response = await client.post("/api/categories", json={})
+
+    assert response.status == 400
@@ -0,0 +1,251 @@
+import datetime
+import random
+
+import pytest
+from sqlalchemy import delete, event, func, insert, select
+
+from dao import transaction_dao as transaction_dao_module
+from dao.archive_dao import ArchiveDAO, months_ago
+from dao.category_dao import CategoryDAO
+from dao.reconciliation import ReconciliationDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import SORT_KEYS, TransactionDAO, TransactionFilters
+from models.models import ArchivedTransaction, Transaction
+
+CUTOFF = datetime.datetime(2024, 1, 1)
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def ledger(use_sqlite):
+    """Transações de 2023 e 2024 em duas categorias; retorna os IDs delas"""
+    rng = random.Random(3)
+    with CategoryDAO() as dao:
+        categories = [dao.create_category(name).id for name in ("Mercado", "Casa")]
+    records = []
+    for day in range(0, 540, 9):
+        income = day % 5 == 0
+        records.append(
+            {
+                "description": f"Transação {day}",
+                "transaction_date": datetime.datetime(2023, 1, 1)
+                + datetime.timedelta(days=day, hours=rng.randrange(24)),
+                "transaction_value": 1000.0 if income else float(rng.randint(1, 50)),
+                "type": "Receita" if income else "Despesa",
+                "category_id": rng.choice(categories),
+            }
+        )
+    with TransactionDAO() as dao:
+        dao.create_transactions(records)
+    return categories
+
+
+def unarchive(engine):
+    """Devolve o arquivo para a tabela quente (referência sem arquivo)"""
+    columns = [column.name for column in Transaction.__table__.columns]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Transaction).from_select(
+                columns,
+                select(*(ArchivedTransaction.__table__.c[name] for name in columns)),
+            )
+        )
+        connection.execute(delete(ArchivedTransaction))
+
+
+def read_everything(categories):
+    """Resultado de todas as leituras do TransactionDAO"""
+    reads = {}
+    with TransactionDAO() as dao:
+        for sort in SORT_KEYS:
+            for descending in (True, False):
+                # Percorre todas as páginas, como a tabela da TUI
+                pages, after = [], None
+                while page := dao.get_transaction_rows_sorted(
+                    sort, descending, after=after, limit=7
+                ):
+                    pages.append(page)
+                    after = page[-1]
+                reads[(sort, descending)] = pages
+        reads["filtered"] = dao.get_transaction_rows_sorted(
+            filters=TransactionFilters(
+                start=datetime.datetime(2023, 11, 1), type="Despesa"
+            ),
+            limit=15,
+        )
+        reads["pages"] = [
+            dao.get_transaction_rows_page(10, offset) for offset in (0, 40, 50)
+        ]
+        # A exportação lista as arquivadas por último: compara só o conteúdo
+        reads["batches"] = sorted(
+            row.id for batch in dao.iter_transaction_row_batches(8) for row in batch
+        )
+        reads["all"] = sorted(dao.get_transaction_rows())
+        reads["by_category"] = dao.get_transaction_rows_by_category(categories[0])
+        reads["by_type"] = dao.get_totals_by_type()
+        reads["by_month"] = dao.get_totals_by_month()
+        reads["category_month"] = sorted(
+            (c, int(y), int(m), t, round(total, 2), n)
+            for c, y, m, t, total, n in dao.get_category_month_totals(
+                datetime.datetime(2023, 6, 1), datetime.datetime(2024, 3, 1)
+            )
+        )
+        reads["largest"] = [
+            tuple(row)
+            for row in dao.get_largest_expenses(
+                datetime.datetime(2023, 10, 1), datetime.datetime(2024, 2, 1), limit=5
+            )
+        ]
+        rows = dao.get_transaction_rows()
+        reads["balances"] = {
+            id: round(balance, 2)
+            for id, balance in dao.get_running_balances(rows).items()
+        }
+    return reads
+
+
+# ==================== TESTES: arquivamento ====================
+
+
+def test_archive_moves_old_rows_and_keeps_summaries(ledger, sqlite_engine):
+    """Testa a movimentação e que o resumo mensal continua cobrindo tudo"""
+    # Arrange
+    with SummaryDAO() as dao:
+        summary = dao.get_totals_by_month()
+
+    # Act
+    with ArchiveDAO() as dao:
+        archived = dao.archive(CUTOFF, batch_size=7)
+        end = dao.archive_end()
+        count = dao.count()
+
+    # Assert
+    with sqlite_engine.connect() as connection:
+        oldest = connection.execute(
+            select(func.min(Transaction.transaction_date))
+        ).scalar()
+    assert archived == count > 0
+    assert oldest >= CUTOFF > end
+    with SummaryDAO() as dao:
+        assert dao.get_totals_by_month() == summary
+        assert dao.rebuild() is True
+        assert dao.get_totals_by_month() == summary
+
+
+def test_archiving_never_lowers_the_data_version(ledger):
+    """
+    Testa que arquivar a transação de maior versão não faz a versão de dados
+    voltar atrás (ETags, serviço de agregados e deltas dependem disso)
+    """
+    # Arrange
+    with TransactionDAO() as dao:
+        old = min(dao.get_all_transactions(), key=lambda t: t.transaction_date)
+        dao.update_transaction({"id": old.id, "description": "Editada"})
+        edited = dao.current_version()
+
+    # Act
+    with ArchiveDAO() as dao:
+        dao.archive(CUTOFF)
+    with TransactionDAO() as dao:
+        archived = dao.current_version()
+        newest = max(
+            t.version
+            for t in dao.get_all_transactions()
+            if not isinstance(t, ArchivedTransaction)
+        )
+
+    # Assert
+    assert newest < edited
+    assert archived > edited
+
+
+@pytest.mark.parametrize("window_functions", [True, False])
+def test_reads_union_the_archive(ledger, sqlite_engine, window_functions, monkeypatch):
+    """Testa que as leituras não mudam com o arquivamento"""
+    # Arrange
+    monkeypatch.setattr(
+        transaction_dao_module,
+        "window_functions_supported",
+        lambda session: window_functions,
+    )
+    with ArchiveDAO() as dao:
+        dao.archive(CUTOFF)
+    with TransactionDAO() as dao:
+        # Lançamento retroativo: fica na tabela quente, antes do corte
+        dao.create_transaction(
+            {
+                "description": "Retroativo",
+                "transaction_date": datetime.datetime(2023, 12, 20),
+                "transaction_value": 33.0,
+                "type": "Despesa",
+                "category_id": ledger[0],
+            }
+        )
+
+    # Act
+    archived = read_everything(ledger)
+    unarchive(sqlite_engine)
+    expected = read_everything(ledger)
+
+    # Assert
+    for key, value in expected.items():
+        assert archived[key] == value, key
+
+
+def test_recent_ranges_do_not_read_the_archive(ledger, sqlite_engine):
+    """Testa que períodos posteriores ao arquivo só consultam a tabela quente"""
+    # Arrange
+    with ArchiveDAO() as dao:
+        dao.archive(CUTOFF)
+    statements = []
+    event.listen(
+        sqlite_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    recent = TransactionFilters(start=CUTOFF)
+
+    # Act
+    with TransactionDAO() as dao:
+        page = dao.get_transaction_rows_sorted("value", filters=recent, limit=5)
+        first_page = dao.get_transaction_rows_sorted(limit=5)
+        dao.get_category_month_totals(CUTOFF, datetime.datetime(2025, 1, 1))
+        dao.get_running_balances(first_page)
+
+    # Assert
+    assert len(page) == len(first_page) == 5
+    archive_reads = [
+        s for s in statements if "TRANSACTIONS_ARCHIVE" in s and "max(" not in s
+    ]
+    assert archive_reads == []
+
+
+def test_reconcile_finds_duplicates_in_archive(ledger):
+    """Testa que a importação de um extrato antigo reconhece as arquivadas"""
+    # Arrange
+    with TransactionDAO() as dao:
+        old = dao.get_transaction_rows_sorted(descending=False, limit=1)[0]
+    with ArchiveDAO() as dao:
+        dao.archive(CUTOFF)
+    record = {
+        "description": old.description.upper(),
+        "transaction_date": old.transaction_date,
+        "transaction_value": old.transaction_value,
+        "type": old.type,
+        "category_id": old.category_id,
+    }
+
+    # Act
+    with ReconciliationDAO() as dao:
+        result = dao.reconcile([record])
+
+    # Assert
+    assert result.duplicates == [(record, old.id)]
+
+
+def test_months_ago():
+    """Testa o corte por quantidade de meses"""
+    assert months_ago(0, datetime.date(2024, 3, 15)) == datetime.datetime(2024, 3, 1)
+    assert months_ago(14, datetime.date(2024, 3, 15)) == datetime.datetime(2023, 1, 1)
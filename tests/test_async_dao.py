@@ -0,0 +1,151 @@
+import asyncio
+import datetime
+
+import pytest
+
+from dao.async_dao import AsyncCategoryDAO, AsyncSummaryDAO, AsyncTransactionDAO
+from db import config
+
+
+# ==================== FIXTURES ====================
+
+
+async def create_ledger():
+    """Cria uma categoria com duas transações e retorna o ID da categoria"""
+    async with AsyncCategoryDAO() as dao:
+        category_id = (await dao.create_category("Mercado")).id
+    async with AsyncTransactionDAO() as dao:
+        await dao.create_transactions(
+            [
+                {
+                    "description": "Compra",
+                    "transaction_date": datetime.datetime(2024, 1, 10),
+                    "transaction_value": 100.0,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                },
+                {
+                    "description": "Salário",
+                    "transaction_date": datetime.datetime(2024, 2, 5),
+                    "transaction_value": 1000.0,
+                    "type": "Receita",
+                    "category_id": category_id,
+                },
+            ]
+        )
+    return category_id
+
+
+# ==================== TESTES: AsyncSession ====================
+
+
+@pytest.mark.asyncio
+async def test_async_crud(async_db):
+    """Testa escrita e leitura pelos DAOs assíncronos"""
+    # Arrange
+    category_id = await create_ledger()
+
+    # Act
+    async with AsyncCategoryDAO() as dao:
+        renamed = await dao.update_category(category_id, "Feira")
+    async with AsyncTransactionDAO() as dao:
+        rows = await dao.get_transaction_rows(order=True)
+
+    # Assert
+    assert renamed.name == "Feira"
+    assert [row.description for row in rows] == ["Salário", "Compra"]
+    assert rows[0].category_name == "Feira"
+
+
+@pytest.mark.asyncio
+async def test_async_hierarchy_and_merge(async_db):
+    """Testa mover, reassociar e fundir categorias pelos DAOs assíncronos"""
+    # Arrange
+    market = await create_ledger()
+    async with AsyncCategoryDAO() as dao:
+        food = (await dao.create_category("Alimentação")).id
+        fair = (await dao.create_category("Feira")).id
+
+    # Act
+    async with AsyncCategoryDAO() as dao:
+        moved = await dao.set_parent(fair, food)
+        rebuilt = await dao.rebuild_closure()
+        reassigned = await dao.reassign_transactions(market, fair)
+        merged = await dao.merge_categories(fair, market)
+        names = [c.name for c in await dao.get_all_categories()]
+    async with AsyncTransactionDAO() as dao:
+        rows = await dao.get_transaction_rows_by_category(market)
+
+    # Assert
+    assert moved.parent_id == food
+    assert rebuilt is True
+    assert reassigned == 2 and merged == 2
+    assert sorted(names) == ["Alimentação", "Mercado"]
+    assert len(rows) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fan_out(async_db):
+    """Testa consultas independentes em paralelo, uma sessão por tarefa"""
+    # Arrange
+    await create_ledger()
+
+    async def totals():
+        async with AsyncSummaryDAO() as dao:
+            return await dao.get_totals_by_type()
+
+    async def by_month():
+        async with AsyncTransactionDAO() as dao:
+            return await dao.get_totals_by_month()
+
+    async def categories():
+        async with AsyncCategoryDAO() as dao:
+            return [c.name for c in await dao.get_all_categories()]
+
+    # Act
+    results = await asyncio.gather(totals(), by_month(), categories())
+
+    # Assert
+    assert results == [
+        {"income": 1000.0, "expense": 100.0},
+        {
+            "2024-01": {"income": 0.0, "expense": 100.0},
+            "2024-02": {"income": 1000.0, "expense": 0.0},
+        },
+        ["Mercado"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_row_batches(async_db):
+    """Testa a leitura em lotes por streaming"""
+    await create_ledger()
+
+    async with AsyncTransactionDAO() as dao:
+        batches = [batch async for batch in dao.iter_transaction_row_batches(1)]
+
+    assert [[row.description for row in batch] for batch in batches] == [
+        ["Salário"],
+        ["Compra"],
+    ]
+
+
+# ==================== TESTES: sem driver assíncrono ====================
+
+
+@pytest.mark.asyncio
+async def test_thread_fallback(use_sqlite, monkeypatch):
+    """Testa que, sem driver assíncrono, os DAOs síncronos rodam em threads"""
+    # Arrange
+    monkeypatch.setattr(config, "ASYNC_DATABASE_URL", "")
+
+    # Act
+    category_id = await create_ledger()
+    async with AsyncTransactionDAO() as dao:
+        rows = await dao.get_transaction_rows_by_category(category_id)
+        batches = [batch async for batch in dao.iter_transaction_row_batches()]
+
+    # Assert
+    assert dao.session is None
+    assert len(rows) == 2
+    assert sum(len(batch) for batch in batches) == 2
@@ -0,0 +1,285 @@
+import datetime
+import io
+import json
+
+import pytest
+from sqlalchemy import func, inspect, select
+
+from dao.archive_dao import ArchiveDAO
+from dao.backup_dao import FRAME, PREFIX, BackupDAO, BackupReader
+from dao.category_dao import CategoryDAO
+from dao.rule_dao import RuleDAO
+from dao.summary_dao import SummaryDAO
+from dao.tag_dao import TagDAO
+from dao.transaction_dao import TransactionDAO
+from finance import cli
+from models.categorizer import KEYWORD
+from models.models import (
+    ArchivedTransaction,
+    Category,
+    CategoryClosure,
+    CategoryRule,
+    DataVersion,
+    MonthlySummary,
+    Tag,
+    Transaction,
+    TransactionTag,
+)
+
+TABLES = [
+    DataVersion,
+    Category,
+    CategoryClosure,
+    CategoryRule,
+    Transaction,
+    ArchivedTransaction,
+    Tag,
+    TransactionTag,
+    MonthlySummary,
+]
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def ledger(use_sqlite):
+    """
+    "Casa" > "Contas" e "Lazer", transações de 2023 (arquivadas) e 2024,
+    uma etiqueta e uma regra
+    """
+    with CategoryDAO() as dao:
+        house = dao.create_category("Casa").id
+        bills = dao.create_category("Contas", parent_id=house).id
+        leisure = dao.create_category("Lazer").id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": description,
+                    "transaction_date": datetime.datetime(year, month, 10, 8, 30),
+                    "transaction_value": value,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                }
+                for description, year, month, value, category_id in (
+                    ("Luz", 2023, 5, 90.0, bills),
+                    ("Reforma", 2023, 6, 500.0, house),
+                    ("Luz", 2024, 1, 100.5, bills),
+                    ("Cinema", 2024, 2, 40.0, leisure),
+                )
+            ]
+        )
+        ids = sorted(t.id for t in dao.get_all_transactions())
+    with TagDAO() as dao:
+        dao.set_transaction_tags(ids[-1], ["fim de semana"])
+    with RuleDAO() as dao:
+        dao.create_rule(bills, KEYWORD, "luz")
+    with ArchiveDAO() as dao:
+        dao.archive(datetime.datetime(2024, 1, 1))
+    return {"house": house, "bills": bills, "leisure": leisure, "ids": ids}
+
+
+def snapshot(session_factory):
+    """Conteúdo de todas as tabelas do backup, ordenado"""
+    with session_factory() as session:
+        return {
+            model.__tablename__: sorted(
+                tuple(row) for row in session.execute(select(*model.__table__.c))
+            )
+            for model in TABLES
+        }
+
+
+def backup(**kwargs) -> bytes:
+    out = io.BytesIO()
+    with BackupDAO() as dao:
+        assert dao.backup(out, **kwargs) is not None
+    return out.getvalue()
+
+
+def restore(*files: bytes, **kwargs):
+    with BackupDAO() as dao:
+        return dao.restore([io.BytesIO(data) for data in files], **kwargs)
+
+
+# ==================== TESTES: backup completo ====================
+
+
+def test_full_backup_roundtrip(ledger, sqlite_session_factory):
+    """Testa que restaurar um backup completo devolve o banco idêntico"""
+    # Arrange
+    before = snapshot(sqlite_session_factory)
+    data = backup(chunk_size=1)
+
+    # Act
+    with TransactionDAO() as dao:
+        dao.delete_transaction(ledger["ids"][-1])
+    refused = restore(data)
+    result = restore(data, force=True)
+
+    # Assert
+    assert refused is None
+    assert snapshot(sqlite_session_factory) == before
+    assert result["rows"]["TRANSACTIONS"] == 2
+    assert result["rows"]["TRANSACTIONS_ARCHIVE"] == 2
+    with TransactionDAO() as dao:
+        restored = dao.get_transaction_by_id(ledger["ids"][2])
+    assert restored.transaction_date == datetime.datetime(2024, 1, 10, 8, 30)
+    assert restored.transaction_value == 100.5
+
+
+def test_corrupted_backup_changes_nothing(
+    ledger, sqlite_engine, sqlite_session_factory
+):
+    """
+    Testa que um arquivo corrompido ou truncado é recusado sem alterar nada
+    (nem os índices retirados durante a carga)
+    """
+    # Arrange
+    data = bytearray(backup())
+    before = snapshot(sqlite_session_factory)
+    indexes = inspect(sqlite_engine).get_indexes("TRANSACTIONS")
+    header_size = PREFIX.size + PREFIX.unpack_from(data)[2]
+    truncated = bytes(data[:-10])
+    data[header_size + FRAME.size + 3] ^= 0xFF
+
+    # Act
+    corrupted = restore(bytes(data), force=True)
+    cut = restore(truncated, force=True)
+
+    # Assert
+    assert corrupted is None and cut is None
+    assert snapshot(sqlite_session_factory) == before
+    assert inspect(sqlite_engine).get_indexes("TRANSACTIONS") == indexes
+
+
+def test_dry_run_only_verifies(ledger, sqlite_session_factory):
+    """Testa que --dry-run confere o arquivo sem tocar no banco"""
+    # Arrange
+    data = backup()
+    with TransactionDAO() as dao:
+        dao.delete_transaction(ledger["ids"][-1])
+    before = snapshot(sqlite_session_factory)
+
+    # Act
+    result = restore(data, dry_run=True)
+
+    # Assert
+    assert result["rows"]["CATEGORIES"] == 3
+    assert snapshot(sqlite_session_factory) == before
+
+
+# ==================== TESTES: backup incremental ====================
+
+
+def test_incremental_backups_replay_changes(ledger, sqlite_session_factory):
+    """
+    Testa que completo + incrementais reproduz o banco, com edições, lápides,
+    arquivamento, etiquetas e regras alteradas depois do completo
+    """
+    # Arrange
+    full = backup()
+    since = BackupReader(io.BytesIO(full)).header["version"]
+    with TransactionDAO() as dao:
+        dao.update_transaction({"id": ledger["ids"][2], "transaction_value": 111.0})
+        dao.delete_transaction(ledger["ids"][3])
+    with CategoryDAO() as dao:
+        dao.update_category(ledger["leisure"], "Diversão")
+        dao.create_category("Mercado", parent_id=ledger["house"])
+    with TagDAO() as dao:
+        dao.delete_tag(dao.get_all_tags()[0].id)
+        dao.set_transaction_tags(ledger["ids"][2], ["fixa"])
+    with RuleDAO() as dao:
+        dao.delete_rule(dao.get_all_rules()[0].id)
+    first = backup(since=since)
+    with ArchiveDAO() as dao:
+        dao.archive(datetime.datetime(2024, 2, 1))
+    second = backup(since=BackupReader(io.BytesIO(first)).header["version"])
+    expected = snapshot(sqlite_session_factory)
+    # Volta ao estado do backup completo
+    assert restore(full, force=True) is not None
+
+    # Act
+    skipped = restore(second)
+    result = restore(first, second)
+
+    # Assert
+    assert skipped is None
+    assert result["rows"]["TRANSACTIONS"] == 2
+    assert result["rows"]["TRANSACTIONS_ARCHIVE"] == 1
+    assert snapshot(sqlite_session_factory) == expected
+    with RuleDAO() as dao:
+        assert dao.get_all_rules() == []
+    with SummaryDAO() as dao:
+        assert dao.get_totals_by_type()["expense"] == 701.0
+
+
+def test_incremental_backup_is_small(ledger):
+    """Testa que o incremental só leva as linhas alteradas"""
+    # Arrange
+    full = backup()
+    since = BackupReader(io.BytesIO(full)).header["version"]
+    with TransactionDAO() as dao:
+        dao.update_transaction({"id": ledger["ids"][2], "description": "Energia"})
+
+    # Act
+    out = io.BytesIO()
+    with BackupDAO() as dao:
+        header = dao.backup(out, since=since)
+
+    # Assert
+    assert header["rows"]["TRANSACTIONS"] == 1
+    assert header["rows"]["CATEGORIES"] == 0
+    assert header["rows"]["TRANSACTIONS_ARCHIVE"] == 0
+
+
+# ==================== TESTES: CLI ====================
+
+
+def test_cli_backup_and_restore(ledger, tmp_path, sqlite_session_factory):
+    """Testa os subcomandos backup (completo e --base) e restore"""
+    # Arrange
+    full, incremental = str(tmp_path / "full.bak"), str(tmp_path / "inc.bak")
+    before = snapshot(sqlite_session_factory)
+    out = io.StringIO()
+
+    # Act
+    cli.main(["backup", full], out=out)
+    with TransactionDAO() as dao:
+        dao.delete_transaction(ledger["ids"][2])
+    cli.main(["backup", incremental, "--base", full], out=out)
+    after = snapshot(sqlite_session_factory)
+    code = cli.main(["restore", full, "--force"], out=out)
+    restored_full = snapshot(sqlite_session_factory)
+    cli.main(["restore", full, incremental, "--force"], out=out)
+
+    # Assert
+    reports = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert code == 0
+    assert reports[0]["since"] is None
+    assert reports[1]["since"] == reports[0]["version"]
+    assert reports[1]["rows"]["TRANSACTIONS"] == 1
+    assert restored_full == before
+    assert snapshot(sqlite_session_factory) == after
+    assert not (tmp_path / "full.bak.partial").exists()
+    with sqlite_session_factory() as session:
+        assert session.execute(select(func.count(Transaction.id))).scalar() == 2
+
+
+def test_cli_backup_failure_leaves_no_partial(ledger, tmp_path, monkeypatch):
+    """Testa que um backup interrompido por exceção não deixa o .partial"""
+    # Arrange
+    path = tmp_path / "full.bak"
+
+    def failing_backup(self, out, **kwargs):
+        out.write(b"meio backup")
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(BackupDAO, "backup", failing_backup)
+
+    # Act
+    with pytest.raises(OSError):
+        cli.main(["backup", str(path)], out=io.StringIO())
+
+    # Assert
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,136 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from dao.category_dao import CategoryDAO
+from dao.rule_dao import RuleDAO
+from models.categorizer import AMOUNT, KEYWORD, REGEX, Categorizer, KeywordAutomaton
+
+
+# ==================== FIXTURES ====================
+
+
+def rule(category_id, kind=KEYWORD, pattern=None, priority=0, **values):
+    return SimpleNamespace(
+        category_id=category_id,
+        kind=kind,
+        pattern=pattern,
+        min_value=values.get("min_value"),
+        max_value=values.get("max_value"),
+        priority=priority,
+    )
+
+
+@pytest.fixture
+def categories(use_sqlite):
+    with CategoryDAO() as dao:
+        return [dao.create_category("Transporte").id, dao.create_category("Casa").id]
+
+
+# ==================== TESTES: autômato ====================
+
+
+def test_automaton_finds_same_sequences_as_brute_force():
+    """Testa o Aho-Corasick contra a busca ingênua em textos aleatórios"""
+    # Arrange
+    rng = random.Random(1)
+    vocabulary = ["a", "b", "c", "d"]
+    patterns = {
+        tuple(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+        for _ in range(30)
+    }
+    automaton = KeywordAutomaton()
+    for pattern in patterns:
+        automaton.add(pattern, pattern)
+
+    for _ in range(200):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(0, 8))]
+        expected = sorted(
+            pattern
+            for pattern in patterns
+            for start in range(len(words))
+            if tuple(words[start : start + len(pattern)]) == pattern
+        )
+
+        # Act / Assert
+        assert sorted(automaton.find(words)) == expected
+
+
+# ==================== TESTES: regras ====================
+
+
+def test_keywords_match_whole_words_ignoring_accents():
+    """Testa palavras-chave sobre a descrição normalizada"""
+    # Arrange
+    categorizer = Categorizer([rule(1, pattern="posto shell"), rule(2, pattern="pão")])
+
+    # Act / Assert
+    assert categorizer.categorize("PAG*POSTO  SHELL 123") == 1
+    assert categorizer.categorize("Padaria - PAO quente") == 2
+    assert categorizer.categorize("shellbox posto") is None
+
+
+def test_priority_specificity_and_amount_range():
+    """Testa a escolha entre regras e a faixa de valor"""
+    # Arrange
+    categorizer = Categorizer(
+        [
+            rule(1, pattern="uber"),
+            rule(2, pattern="uber eats"),
+            rule(3, REGEX, r"uber\s*\*\s*trip"),
+            rule(4, pattern="uber", priority=5, min_value=100),
+            rule(5, AMOUNT, min_value=5000, priority=-1),
+        ]
+    )
+
+    # Act / Assert
+    assert categorizer.categorize("UBER EATS", 30.0) == 2
+    assert categorizer.categorize("UBER *TRIP", 30.0) == 3
+    assert categorizer.categorize("UBER *TRIP", 150.0) == 4
+    assert categorizer.categorize("Salário", 6000.0) == 5
+    assert categorizer.categorize("Salário") is None
+    assert categorizer.suggest("UBER EATS", 30.0) == [2, 1]
+
+
+def test_apply_only_fills_missing_categories():
+    """Testa que apply não troca uma categoria já informada"""
+    # Arrange
+    categorizer = Categorizer([rule(1, pattern="posto")])
+    records = [
+        {"description": "Posto", "category_id": None},
+        {"description": "Posto", "category_id": 9},
+        {"description": "Mercado", "category_id": None},
+    ]
+
+    # Act
+    categorized = categorizer.apply(records)
+
+    # Assert
+    assert categorized == 1
+    assert [r["category_id"] for r in records] == [1, 9, None]
+
+
+# ==================== TESTES: RuleDAO ====================
+
+
+def test_rule_dao_validates_and_skips_deleted_categories(categories, capsys):
+    """Testa a criação de regras e a exclusão das de categorias removidas"""
+    # Arrange
+    transport, home = categories
+    with RuleDAO() as dao:
+        assert dao.create_rule(transport, REGEX, "posto(") is None
+        dao.create_rule(transport, KEYWORD, "posto")
+        dao.create_rule(home, KEYWORD, "aluguel")
+    with CategoryDAO() as dao:
+        dao.delete_category(home)
+
+    # Act
+    with RuleDAO() as dao:
+        categorizer = dao.get_categorizer()
+
+    # Assert
+    assert "Regra inválida" in capsys.readouterr().out
+    assert len(categorizer) == 1
+    assert categorizer.categorize("Aluguel") is None
+    assert categorizer.categorize("Posto") == transport
@@ -253,19 +253,22 @@ def test_update_category_database_error(
 
 
 def test_delete_category_success(category_dao, mock_session, sample_category):
-    """Testa remoção bem-sucedida de categoria"""
+    """Testa remoção bem-sucedida de categoria (lápide, sem DELETE físico)"""
     # Arrange
     mock_session.get.return_value = sample_category
     mock_session.delete.return_value = None
     mock_session.commit.return_value = None
+    # Nenhuma transação usa a categoria
+    mock_session.execute.return_value.scalar.return_value = 0
 
     # Act
     result = category_dao.delete_category(1)
 
     # Assert
     assert result is True
+    assert sample_category.deleted is True
     mock_session.get.assert_called_once_with(Category, 1)
-    mock_session.delete.assert_called_once_with(sample_category)
+    mock_session.delete.assert_not_called()
     mock_session.commit.assert_called_once()
 
 
@@ -290,6 +293,7 @@ def test_delete_category_database_error(
     """Testa remoção com erro no banco de dados"""
     # Arrange
     mock_session.get.return_value = sample_category
+    mock_session.execute.return_value.scalar.return_value = 0
     mock_session.commit.side_effect = SQLAlchemyError("Database error")
 
     # Act
@@ -302,6 +306,23 @@ def test_delete_category_database_error(
     assert "Erro ao remover categoria" in captured.out
 
 
+def test_delete_category_in_use(category_dao, mock_session, sample_category, capsys):
+    """Testa que uma categoria usada por transações não é removida"""
+    # Arrange
+    mock_session.get.return_value = sample_category
+    mock_session.execute.return_value.scalar.return_value = 3
+
+    # Act
+    result = category_dao.delete_category(1)
+
+    # Assert
+    assert result is False
+    assert sample_category.deleted is not True
+    mock_session.commit.assert_not_called()
+    captured = capsys.readouterr()
+    assert "Categoria possui transações" in captured.out
+
+
 # ==================== TESTES: close ====================
 
 
@@ -346,6 +367,7 @@ def test_full_crud_workflow(category_dao, mock_session):
     assert updated.name == "Updated Category"
 
     # Delete
+    mock_session.execute.return_value.scalar.return_value = 0
     deleted = category_dao.delete_category(1)
     assert deleted is True
 
@@ -0,0 +1,148 @@
+import datetime
+
+import pytest
+from sqlalchemy import select
+
+from dao.archive_dao import ArchiveDAO
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db.column_cache import ColumnCache
+from models.models import ArchivedTransaction, MonthlySummary
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def categories(use_sqlite):
+    """Categorias "Mercado", "Supermercado" e "Casa" com transações em 2023-2024"""
+    with CategoryDAO() as dao:
+        ids = [
+            dao.create_category(name).id for name in ("Mercado", "Supermercado", "Casa")
+        ]
+    records = [
+        {
+            "description": f"Compra {i}",
+            "transaction_date": datetime.datetime(2023 + i % 2, 1 + i % 12, 1 + i % 28),
+            "transaction_value": float(10 + i),
+            "type": "Receita" if i % 7 == 0 else "Despesa",
+            "category_id": ids[i % 3],
+        }
+        for i in range(90)
+    ]
+    with TransactionDAO() as dao:
+        dao.create_transactions(records)
+    return ids
+
+
+def summary_rows(sqlite_engine):
+    """Linhas do resumo mensal, ordenadas"""
+    with sqlite_engine.connect() as connection:
+        return sorted(
+            (r.year, r.month, r.category_id, r.type, round(r.total, 2), r.count)
+            for r in connection.execute(select(MonthlySummary))
+        )
+
+
+# ==================== TESTES: fusão ====================
+
+
+@pytest.mark.parametrize("chunk_size", [7, 50_000])
+def test_merge_moves_transactions_and_summary(categories, sqlite_engine, chunk_size):
+    """Testa a fusão (inclusive de arquivadas) e a consistência do resumo"""
+    # Arrange
+    source, target, other = categories
+    with ArchiveDAO() as dao:
+        dao.archive(datetime.datetime(2024, 1, 1))
+    with CategoryDAO() as dao:
+        version = dao.current_version()
+    with SummaryDAO() as dao:
+        by_month = dao.get_totals_by_month()
+
+    # Act
+    with CategoryDAO() as dao:
+        moved = dao.merge_categories(source, target, chunk_size=chunk_size)
+
+    # Assert
+    assert moved == 30
+    summary = summary_rows(sqlite_engine)
+    assert all(category_id != source for _, _, category_id, *_ in summary)
+    with SummaryDAO() as dao:
+        assert dao.get_totals_by_month() == by_month
+        dao.rebuild()
+    assert summary_rows(sqlite_engine) == summary
+    with TransactionDAO() as dao:
+        changes = dao.row_changes_since(version)
+        assert {row.category_id for row in dao.get_transaction_rows()} == {
+            target,
+            other,
+        }
+    # Transações quentes movidas chegam no delta; a origem vira lápide
+    assert len({row.version for row in changes}) == 1
+    assert {row.category_id for row in changes} == {target}
+    with sqlite_engine.connect() as connection:
+        archived = connection.execute(select(ArchivedTransaction.category_id)).all()
+    assert source not in {category_id for (category_id,) in archived}
+    with CategoryDAO() as dao:
+        assert dao.get_category_by_id(source) is None
+        assert [c.id for c in dao.changes_since(version)] == [source]
+
+
+def test_reassign_keeps_source_category(categories):
+    """Testa a reassociação sem remover a categoria de origem"""
+    # Arrange
+    source, target, _ = categories
+
+    # Act
+    with CategoryDAO() as dao:
+        moved = dao.reassign_transactions(source, target)
+        same = dao.reassign_transactions(target, target)
+
+    # Assert
+    assert moved == 30
+    assert same is None
+    with CategoryDAO() as dao:
+        assert dao.get_category_by_id(source) is not None
+        assert dao.delete_category(source) is True
+
+
+def test_delete_category_requires_reassignment(categories):
+    """Testa que a remoção de uma categoria em uso exige o destino"""
+    # Arrange
+    source, target, _ = categories
+
+    # Act
+    with CategoryDAO() as dao:
+        refused = dao.delete_category(source)
+        deleted = dao.delete_category(source, reassign_to=target)
+
+    # Assert
+    assert refused is False
+    assert deleted is True
+    with TransactionDAO() as dao:
+        assert len(dao.get_transaction_rows_by_category(target)) == 60
+
+
+def test_merge_rebuilds_column_cache(categories, tmp_path):
+    """Testa que o cache colunar reflete a fusão de transações arquivadas"""
+    # Arrange
+    source, target, _ = categories
+    with ArchiveDAO() as dao:
+        dao.archive(datetime.datetime(2024, 1, 1))
+    cache = ColumnCache(str(tmp_path / "columns"), stamp="test")
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+    expected = cache.category_month_totals(source)
+
+    # Act
+    with CategoryDAO() as dao:
+        dao.merge_categories(source, target)
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+
+    # Assert
+    assert cache.version is not None
+    assert cache.category_month_totals(source) == {}
+    merged = cache.category_month_totals(target)
+    for month, total in expected.items():
+        assert merged[month] >= total
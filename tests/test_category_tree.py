@@ -0,0 +1,175 @@
+import datetime
+
+import pytest
+from sqlalchemy import event, select
+
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from models.models import CategoryClosure
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def tree(use_sqlite):
+    """
+    Árvore "Casa" > "Contas" > "Energia", mais "Lazer" na raiz, com uma
+    despesa por categoria e mês em 2024
+    """
+    with CategoryDAO() as dao:
+        house = dao.create_category("Casa").id
+        bills = dao.create_category("Contas", parent_id=house).id
+        power = dao.create_category("Energia", parent_id=bills).id
+        leisure = dao.create_category("Lazer").id
+    ids = {"house": house, "bills": bills, "power": power, "leisure": leisure}
+    values = {house: 1.0, bills: 10.0, power: 100.0, leisure: 1000.0}
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": f"Conta {month}",
+                    "transaction_date": datetime.datetime(2024, month, 10),
+                    "transaction_value": value,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                }
+                for category_id, value in values.items()
+                for month in (1, 2)
+            ]
+        )
+    return ids
+
+
+def closure_rows(sqlite_engine):
+    """Caminhos da tabela de fechamento (ancestral, descendente, profundidade)"""
+    with sqlite_engine.connect() as connection:
+        return sorted(
+            (r.ancestor_id, r.descendant_id, r.depth)
+            for r in connection.execute(select(CategoryClosure))
+        )
+
+
+def expenses(rows):
+    return {row["category_id"]: row["expense"] for row in rows}
+
+
+# ==================== TESTES: tabela de fechamento ====================
+
+
+def test_create_builds_closure(tree, sqlite_engine):
+    """Testa os caminhos criados ao inserir subcategorias"""
+    # Arrange
+    house, bills, power, leisure = tree.values()
+
+    # Act
+    rows = closure_rows(sqlite_engine)
+
+    # Assert
+    assert rows == sorted(
+        [
+            (house, house, 0),
+            (bills, bills, 0),
+            (power, power, 0),
+            (leisure, leisure, 0),
+            (house, bills, 1),
+            (bills, power, 1),
+            (house, power, 2),
+        ]
+    )
+
+
+def test_set_parent_moves_subtree(tree, sqlite_engine):
+    """Testa que mover uma categoria leva junto as subcategorias"""
+    # Arrange
+    house, bills, power, leisure = tree.values()
+
+    # Act
+    with CategoryDAO() as dao:
+        moved = dao.set_parent(bills, leisure)
+
+    # Assert
+    assert moved.parent_id == leisure
+    rows = closure_rows(sqlite_engine)
+    assert (leisure, power, 2) in rows
+    assert (house, power, 2) not in rows
+    # O mesmo resultado que recalcular tudo a partir de parent_id
+    with CategoryDAO() as dao:
+        assert dao.rebuild_closure() is True
+    assert closure_rows(sqlite_engine) == rows
+
+
+def test_cycles_are_refused(tree, sqlite_engine):
+    """Testa que uma categoria não fica abaixo de si mesma"""
+    # Arrange
+    house, bills, power, _ = tree.values()
+    rows = closure_rows(sqlite_engine)
+
+    # Act
+    with CategoryDAO() as dao:
+        below_itself = dao.set_parent(house, power)
+        own_parent = dao.set_parent(bills, bills)
+        into_child = dao.merge_categories(house, bills)
+
+    # Assert
+    assert below_itself is None
+    assert own_parent is None
+    assert into_child is None
+    assert closure_rows(sqlite_engine) == rows
+
+
+def test_delete_and_merge_keep_tree(tree, sqlite_engine):
+    """Testa remoção e fusão de categorias que têm subcategorias"""
+    # Arrange
+    house, bills, power, leisure = tree.values()
+    with CategoryDAO() as dao:
+        empty = dao.create_category("Vazia").id
+        dao.create_category("Sub", parent_id=empty)
+
+    # Act
+    with CategoryDAO() as dao:
+        refused = dao.delete_category(empty)
+        moved = dao.merge_categories(bills, leisure)
+
+    # Assert: a filha da categoria fundida passa para o destino
+    assert refused is False
+    assert moved == 2
+    with CategoryDAO() as dao:
+        assert dao.get_category_by_id(power).parent_id == leisure
+    rows = closure_rows(sqlite_engine)
+    assert all(bills not in (ancestor, descendant) for ancestor, descendant, _ in rows)
+    assert (leisure, power, 1) in rows
+
+
+# ==================== TESTES: totais da subárvore ====================
+
+
+def test_rollup_sums_subtree_in_one_query(tree, sqlite_engine):
+    """Testa o rollup de cada categoria com uma única consulta"""
+    # Arrange
+    house, bills, power, leisure = tree.values()
+    statements = []
+    event.listen(
+        sqlite_engine, "before_cursor_execute", lambda *args: statements.append(1)
+    )
+
+    # Act
+    with SummaryDAO() as dao:
+        rolled_up = expenses(dao.get_totals_by_category(rollup=True))
+        queries = len(statements)
+        flat = expenses(dao.get_totals_by_category())
+
+    # Assert
+    assert queries == 1
+    assert flat == {house: 2.0, bills: 20.0, power: 200.0, leisure: 2000.0}
+    assert rolled_up == {house: 222.0, bills: 220.0, power: 200.0, leisure: 2000.0}
+
+
+def test_subtree_month_totals(tree):
+    """Testa a série mensal de uma categoria com as subcategorias"""
+    # Act
+    with SummaryDAO() as dao:
+        totals = dao.get_subtree_month_totals(tree["bills"])
+
+    # Assert
+    assert totals == {"2024-01": 110.0, "2024-02": 110.0}
@@ -0,0 +1,145 @@
+import asyncio
+import datetime
+import os
+import socket
+
+import pytest
+import pytest_asyncio
+
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from db import change_bus, config
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def bus_dir(tmp_path, monkeypatch):
+    """Barramento em um diretório temporário (caminho curto: limite do AF_UNIX)"""
+    directory = tmp_path / "bus"
+    monkeypatch.setattr(config, "NOTIFY_DIR", str(directory))
+    return str(directory)
+
+
+@pytest_asyncio.fixture
+async def received(bus_dir):
+    """Listener ativo; retorna a lista de chamadas do callback"""
+    calls = []
+    listener = change_bus.ChangeListener(calls.append, ignore_own=False)
+    assert listener.start()
+    yield calls
+    listener.stop()
+
+
+async def wait_for(calls, count=1):
+    for _ in range(100):
+        if len(calls) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+# ==================== TESTES: barramento ====================
+
+
+@pytest.mark.asyncio
+async def test_burst_is_delivered_at_once(received):
+    """Testa que uma rajada de eventos chega em uma única chamada"""
+    # Act
+    for version in range(1, 51):
+        change_bus.publish("transactions", version)
+    await wait_for(received)
+
+    # Assert: a fila do socket é curta; o que não coube é descartado, mas
+    # qualquer evento recebido já leva o app a buscar todo o delta
+    assert len(received) == 1
+    versions = [event["version"] for event in received[0]]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+@pytest.mark.asyncio
+async def test_own_events_are_ignored(bus_dir):
+    """Testa que o app não recebe os próprios eventos"""
+    # Arrange
+    calls = []
+    listener = change_bus.ChangeListener(calls.append)
+    listener.start()
+
+    # Act
+    change_bus.publish("transactions", 1)
+    await asyncio.sleep(0.05)
+    listener.stop()
+
+    # Assert
+    assert calls == []
+    assert os.listdir(bus_dir) == []
+
+
+def test_stale_sockets_are_removed(bus_dir):
+    """Testa que o socket de um app encerrado é removido no envio"""
+    # Arrange
+    os.makedirs(bus_dir)
+    path = os.path.join(bus_dir, f"1-dead{change_bus.SOCKET_SUFFIX}")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as dead:
+        dead.bind(path)
+
+    # Act
+    change_bus.publish("transactions", 1)
+
+    # Assert
+    assert not os.path.exists(path)
+
+
+def test_disabled_bus_publishes_nothing(monkeypatch):
+    """Testa que sem diretório configurado nada é enviado"""
+    # Arrange
+    monkeypatch.setattr(config, "NOTIFY_DIR", "")
+
+    # Act / Assert
+    assert change_bus.bus_enabled() is False
+    change_bus.publish("transactions", 1)
+
+
+# ==================== TESTES: escritas dos DAOs ====================
+
+
+@pytest.mark.asyncio
+async def test_dao_writes_publish_events(use_sqlite, received):
+    """Testa que as escritas publicam a versão gravada"""
+    # Act
+    with CategoryDAO() as dao:
+        category = dao.create_category("Mercado")
+    with TransactionDAO() as dao:
+        transaction = dao.create_transaction(
+            {
+                "description": "Compra",
+                "transaction_date": datetime.datetime(2024, 1, 5),
+                "transaction_value": 10.0,
+                "type": "Despesa",
+                "category_id": category.id,
+            }
+        )
+        created = dao.create_transactions(
+            [
+                {
+                    "description": f"Lote {i}",
+                    "transaction_date": datetime.datetime(2024, 1, 6),
+                    "transaction_value": 1.0,
+                    "type": "Despesa",
+                    "category_id": category.id,
+                }
+                for i in range(3)
+            ]
+        )
+        dao.delete_transaction(transaction.id)
+        version = dao.current_version()
+    await wait_for(received)
+
+    # Assert
+    events = [event for call in received for event in call]
+    assert [(e["table"], e["count"]) for e in events] == [
+        ("categories", 1),
+        ("transactions", 1),
+        ("transactions", created),
+        ("transactions", 1),
+    ]
+    assert events[-1]["version"] == version
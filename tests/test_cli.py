@@ -0,0 +1,224 @@
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from finance import cli
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def ledger(use_sqlite):
+    """Banco com duas transações em uma categoria"""
+    with CategoryDAO() as dao:
+        category = dao.create_category("Mercado")
+        category_id = category.id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": "Compra",
+                    "transaction_date": "2024-01-10",
+                    "transaction_value": 100.0,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                },
+                {
+                    "description": "Salário",
+                    "transaction_date": "2024-02-05",
+                    "transaction_value": 1000.0,
+                    "type": "Receita",
+                    "category_id": category_id,
+                },
+            ]
+        )
+
+
+def run(*argv):
+    out = io.StringIO()
+    code = cli.main(list(argv), out=out)
+    return code, out.getvalue()
+
+
+# ==================== TESTES: agregados ====================
+
+
+def test_totals_json(ledger):
+    """Testa o subcomando totals em JSON"""
+    # Act
+    code, output = run("totals")
+
+    # Assert
+    assert code == 0
+    assert json.loads(output) == {"income": 1000.0, "expense": 100.0, "balance": 900.0}
+
+
+def test_by_month_csv(ledger):
+    """Testa o subcomando by-month em CSV"""
+    # Act
+    code, output = run("by-month", "--format", "csv")
+
+    # Assert
+    assert output.splitlines() == [
+        "month,income,expense",
+        "2024-01,0.0,100.0",
+        "2024-02,1000.0,0.0",
+    ]
+
+
+# ==================== TESTES: exportação e importação ====================
+
+
+def test_export_import_round_trip(ledger, tmp_path):
+    """Testa que uma exportação pode ser reimportada"""
+    # Arrange
+    path = tmp_path / "export.json"
+    run("export", "--output", str(path))
+    exported = json.loads(path.read_text(encoding="utf-8"))
+
+    # Act
+    code, output = run("import", str(path), "--no-reconcile")
+
+    # Assert
+    assert code == 0
+    assert json.loads(output) == {"imported": 2}
+    assert [row["category"] for row in exported] == ["Mercado", "Mercado"]
+    assert json.loads(run("totals")[1])["expense"] == 200.0
+
+
+def test_import_reconciles_with_existing(ledger, tmp_path):
+    """Testa que duplicatas são ignoradas e quase duplicatas viram conflitos"""
+    # Arrange
+    path = tmp_path / "extrato.csv"
+    path.write_text(
+        "description,transaction_date,transaction_value,type,category\n"
+        "COMPRA,2024-01-10,100.0,Despesa,Mercado\n"
+        "Salario.,2024-02-07,1000.0,Receita,Mercado\n"
+        "Padaria,2024-01-10,100.0,Despesa,Mercado\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    code, output = run("import", str(path))
+
+    # Assert
+    assert code == 0
+    assert json.loads(output) == {"imported": 1, "duplicates": 1, "conflicts": 1}
+    assert json.loads(run("totals")[1]) == {
+        "income": 1000.0,
+        "expense": 200.0,
+        "balance": 800.0,
+    }
+
+
+def test_import_creates_missing_categories(use_sqlite, tmp_path):
+    """Testa a criação de categorias pelo nome durante a importação"""
+    # Arrange
+    path = tmp_path / "import.csv"
+    path.write_text(
+        "description,transaction_date,transaction_value,type,category\n"
+        "Ônibus,2024-05-01,4.5,Despesa,Transporte\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    code, _ = run("import", str(path))
+
+    # Assert
+    assert code == 0
+    with CategoryDAO() as dao:
+        assert dao.get_category_by_name("Transporte") is not None
+
+
+def test_import_rejects_invalid_values(use_sqlite, tmp_path, capsys):
+    """Testa que um lote com valor inválido não importa nada"""
+    # Arrange
+    path = tmp_path / "import.csv"
+    path.write_text(
+        "description,transaction_date,transaction_value,type,category\n"
+        "Ônibus,2024-05-01,quatro,Despesa,Transporte\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    code, output = run("import", str(path))
+
+    # Assert
+    assert code == 1
+    assert output == ""
+    assert "transaction_value" in capsys.readouterr().err
+
+
+def test_export_csv_to_stdout(ledger):
+    """Testa a exportação em CSV na saída padrão"""
+    # Act
+    code, output = run("export", "--format", "csv")
+
+    # Assert
+    lines = output.splitlines()
+    assert code == 0
+    assert lines[0] == ",".join(cli.TRANSACTION_FIELDS)
+    assert lines[1].endswith("2024-02-05T00:00:00,1000.0,Receita,1,Mercado")
+
+
+# ==================== TESTES: partida leve ====================
+
+
+def test_cli_does_not_import_textual():
+    """Testa que a CLI não carrega Textual nem os gráficos"""
+    code = (
+        "import sys, finance.cli; "
+        "assert not any(m.startswith(('textual', 'plotext')) for m in sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True)
+    assert result.returncode == 0, result.stderr.decode()
+
+
+def test_import_categorizes_with_rules(use_sqlite, tmp_path, capsys):
+    """Testa que registros sem categoria usam as regras de categorização"""
+    # Arrange
+    with CategoryDAO() as dao:
+        dao.create_category("Transporte")
+    run("rules", "add", "Transporte", "--keyword", "posto")
+    path = tmp_path / "import.csv"
+    path.write_text(
+        "description,transaction_date,transaction_value,type\n"
+        "POSTO SHELL,2024-05-01,150,Despesa\n",
+        encoding="utf-8",
+    )
+    other = tmp_path / "other.csv"
+    other.write_text(
+        "description,transaction_date,transaction_value,type\n"
+        "Cinema,2024-05-02,30,Despesa\n",
+        encoding="utf-8",
+    )
+
+    # Act
+    code, output = run("import", str(path))
+    other_code, _ = run("import", str(other))
+
+    # Assert
+    assert code == 0
+    assert json.loads(output)["imported"] == 1
+    assert json.loads(run("by-category")[1])[0]["category"] == "Transporte"
+    assert other_code == 1
+    assert "sem categoria" in capsys.readouterr().err
+
+
+def test_archive_keeps_totals(ledger):
+    """Testa o subcomando archive"""
+    # Act
+    code, output = run("archive", "--before", "2024-02-01")
+
+    # Assert
+    assert code == 0
+    assert json.loads(output)["archived"] == 1
+    assert json.loads(run("totals")[1])["balance"] == 900.0
+    exported = json.loads(run("export", "--format", "json")[1])
+    assert [t["description"] for t in exported] == ["Salário", "Compra"]
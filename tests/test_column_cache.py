@@ -0,0 +1,191 @@
+import datetime
+
+import pytest
+
+from dao.archive_dao import ArchiveDAO
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from db.column_cache import ColumnCache
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def category_id(use_sqlite):
+    """Categoria das transações dos testes"""
+    with CategoryDAO() as dao:
+        return dao.create_category("Mercado").id
+
+
+@pytest.fixture
+def ledger(category_id):
+    """Transações em três meses"""
+    records = [
+        {
+            "description": f"Transação {i}",
+            "transaction_date": datetime.datetime(2024, 1 + i % 3, 1 + i),
+            "transaction_value": 1000.0 if i % 4 == 0 else float(10 + i),
+            "type": "Receita" if i % 4 == 0 else "Despesa",
+            "category_id": category_id,
+        }
+        for i in range(12)
+    ]
+    with TransactionDAO() as dao:
+        dao.create_transactions(records)
+    return records
+
+
+@pytest.fixture
+def cache(ledger, tmp_path):
+    """Cache construído a partir do banco"""
+    cache = ColumnCache(str(tmp_path / "columns"), stamp="test")
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+    return cache
+
+
+def assert_matches_database(cache, category_id):
+    """Os agregados do cache batem com os do banco"""
+    with SummaryDAO() as dao:
+        assert cache.totals() == pytest.approx(dao.get_totals_by_type())
+        expected = dao.get_totals_by_month()
+    by_month = cache.totals_by_month()
+    assert list(by_month) == list(expected)
+    for month, totals in expected.items():
+        assert by_month[month] == pytest.approx(totals)
+    with TransactionDAO() as dao:
+        rows = dao.get_transaction_rows_by_category(category_id)
+    expected = {}
+    for row in rows:
+        key = row.transaction_date.strftime("%Y-%m")
+        expected[key] = expected.get(key, 0.0) + row.transaction_value
+    assert cache.category_month_totals(category_id) == pytest.approx(expected)
+
+
+# ==================== TESTES: construção ====================
+
+
+def test_build_matches_database(cache, category_id):
+    """Testa que o cache recém-construído reflete o banco"""
+    # Assert
+    with TransactionDAO() as dao:
+        assert cache.version == dao.current_version()
+    assert cache.count == 12
+    assert_matches_database(cache, category_id)
+
+
+def test_last_month_with_income_only(cache, category_id):
+    """Testa os totais por mês quando o último mês só tem receitas"""
+    # Arrange
+    with TransactionDAO() as dao:
+        dao.create_transaction(
+            {
+                "description": "Salário",
+                "transaction_date": datetime.datetime(2024, 6, 5),
+                "transaction_value": 2000.0,
+                "type": "Receita",
+                "category_id": category_id,
+            }
+        )
+
+    # Act
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+
+    # Assert
+    assert cache.totals_by_month()["2024-06"] == {"income": 2000.0, "expense": 0.0}
+    assert_matches_database(cache, category_id)
+
+
+def test_reopen_maps_existing_files(cache, category_id):
+    """Testa que um cache salvo é usado sem consultar o banco"""
+    # Act
+    reopened = ColumnCache(cache.directory, stamp="test")
+
+    # Assert
+    assert reopened.version == cache.version
+    assert reopened.totals() == cache.totals()
+    assert reopened.totals_by_month() == cache.totals_by_month()
+
+
+def test_other_database_invalidates_cache(cache):
+    """Testa que o cache de outro banco é descartado"""
+    # Act
+    other = ColumnCache(cache.directory, stamp="other")
+
+    # Assert
+    assert other.version is None
+    assert other.totals() == {"income": 0.0, "expense": 0.0}
+
+
+# ==================== TESTES: alterações ====================
+
+
+def test_sync_applies_only_the_delta(cache, category_id):
+    """Testa atualizações, remoções e inclusões aplicadas ao cache"""
+    # Arrange
+    with TransactionDAO() as dao:
+        rows = dao.get_transaction_rows()
+        changed = dao.get_transaction_by_id(rows[0].id).to_dict()
+        changed["transaction_value"] = 999.0
+        changed["transaction_date"] = datetime.datetime(2024, 5, 10)
+        dao.update_transaction(changed)
+        dao.delete_transaction(rows[1].id)
+        dao.create_transaction(
+            {
+                "description": "Nova",
+                "transaction_date": datetime.datetime(2024, 6, 1),
+                "transaction_value": 45.0,
+                "type": "Despesa",
+                "category_id": category_id,
+            }
+        )
+
+    # Act
+    with TransactionDAO() as dao:
+        applied = cache.sync(dao)
+        version = dao.current_version()
+
+    # Assert
+    assert applied == 3
+    assert cache.version == version
+    assert cache.count == 13
+    assert_matches_database(cache, category_id)
+    reopened = ColumnCache(cache.directory, stamp="test")
+    assert reopened.count == 13
+    assert_matches_database(reopened, category_id)
+
+
+def test_apply_skips_deltas_with_a_gap(cache):
+    """Testa que alterações lidas depois de uma lacuna não são aplicadas"""
+    # Arrange
+    with TransactionDAO() as dao:
+        dao.delete_transaction(dao.get_transaction_rows()[0].id)
+        since = dao.current_version()
+        dao.delete_transaction(dao.get_transaction_rows()[0].id)
+        changes = dao.row_changes_since(since)
+    totals = cache.totals()
+
+    # Act
+    applied = cache.apply(changes, changes[-1].version, since=since)
+
+    # Assert
+    assert applied is False
+    assert cache.totals() == totals
+
+
+def test_archived_transactions_stay_in_cache(cache, category_id):
+    """Testa que arquivar não muda os agregados do cache"""
+    # Arrange
+    totals = cache.totals_by_month()
+
+    # Act
+    with ArchiveDAO() as dao:
+        dao.archive(datetime.datetime(2024, 3, 1))
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+
+    # Assert
+    assert cache.totals_by_month() == totals
+    assert_matches_database(cache, category_id)
@@ -0,0 +1,184 @@
+import csv
+import io
+
+import pytest
+from sqlalchemy import event
+
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from finance import cli
+from finance.pivot import CategoryPivot, month_range
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def ledger(use_sqlite):
+    """
+    "Mercado" com despesas em 2023-12 e 2024-02 e "Aluguel" com uma
+    despesa em 2024-01 e uma receita em 2024-02
+    """
+    with CategoryDAO() as dao:
+        market = dao.create_category("Mercado").id
+        rent = dao.create_category("Aluguel").id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": description,
+                    "transaction_date": date,
+                    "transaction_value": value,
+                    "type": type,
+                    "category_id": category_id,
+                }
+                for description, date, value, type, category_id in (
+                    ("Feira", "2023-12-10", 100.0, "Despesa", market),
+                    ("Feira", "2023-12-20", 50.0, "Despesa", market),
+                    ("Feira", "2024-02-03", 80.0, "Despesa", market),
+                    ("Aluguel", "2024-01-05", 1000.0, "Despesa", rent),
+                    ("Reembolso", "2024-02-05", 300.0, "Receita", rent),
+                )
+            ]
+        )
+    return {"market": market, "rent": rent}
+
+
+def load(type="Despesa"):
+    with SummaryDAO() as dao:
+        pivot = CategoryPivot(month_range(*dao.get_month_range(type)))
+        for category_id, name, totals in dao.iter_category_month_totals(type):
+            pivot.add(category_id, name, totals)
+    return pivot
+
+
+# ==================== TESTES: consulta ====================
+
+
+def test_month_range_crosses_years():
+    """Testa os meses do período, inclusive na virada do ano"""
+    # Act / Assert
+    assert month_range("2023-11", "2024-02") == [
+        "2023-11",
+        "2023-12",
+        "2024-01",
+        "2024-02",
+    ]
+    assert month_range("2024-03", "2024-03") == ["2024-03"]
+
+
+def test_category_month_totals_in_one_query(ledger, sqlite_engine):
+    """Testa os totais por categoria e mês com uma única consulta"""
+    # Arrange
+    statements = []
+    event.listen(
+        sqlite_engine, "before_cursor_execute", lambda *args: statements.append(1)
+    )
+
+    # Act
+    with SummaryDAO() as dao:
+        rows = list(dao.iter_category_month_totals(batch_size=1))
+        queries = len(statements)
+        period = dao.get_month_range()
+
+    # Assert
+    assert queries == 1
+    assert period == ("2023-12", "2024-02")
+    # Em ordem de nome
+    assert rows == [
+        (ledger["rent"], "Aluguel", {"2024-01": 1000.0}),
+        (ledger["market"], "Mercado", {"2023-12": 150.0, "2024-02": 80.0}),
+    ]
+
+
+def test_net_totals(ledger):
+    """Testa o saldo (receitas - despesas) por categoria e mês"""
+    # Act
+    pivot = load(type=None)
+
+    # Assert
+    assert pivot.months == ["2023-12", "2024-01", "2024-02"]
+    assert pivot.values(ledger["rent"]) == [0.0, -1000.0, 300.0]
+    assert pivot.total(ledger["rent"]) == -700.0
+
+
+# ==================== TESTES: tabela ====================
+
+
+def test_totals_and_deltas(ledger):
+    """Testa totais, variações e a linha de totais"""
+    # Act
+    pivot = load()
+
+    # Assert
+    market = ledger["market"]
+    assert pivot.values(market) == [150.0, 0.0, 80.0]
+    assert pivot.values(market, deltas=True) == [None, -150.0, 80.0]
+    assert pivot.total(market) == 230.0
+    assert pivot.last_change(market) == 80.0
+    assert pivot.column_totals() == [150.0, 1000.0, 80.0]
+    assert pivot.column_totals(deltas=True) == [None, 850.0, -920.0]
+
+
+def test_changes_after_write(ledger):
+    """Testa as diferenças entre a tabela exibida e a buscada após escritas"""
+    # Arrange
+    before = load()
+    with CategoryDAO() as dao:
+        travel = dao.create_category("Viagem").id
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": "Feira",
+                    "transaction_date": "2024-01-15",
+                    "transaction_value": 20.0,
+                    "type": "Despesa",
+                    "category_id": ledger["market"],
+                },
+                {
+                    "description": "Passagem",
+                    "transaction_date": "2024-02-20",
+                    "transaction_value": 400.0,
+                    "type": "Despesa",
+                    "category_id": travel,
+                },
+            ]
+        )
+
+    # Act
+    added, removed, changed = before.changes(load())
+
+    # Assert
+    assert added == {travel}
+    assert removed == set()
+    assert changed == {ledger["market"]}
+
+
+def test_write_csv(ledger):
+    """Testa a exportação em CSV, com a linha de totais"""
+    # Arrange
+    out = io.StringIO()
+
+    # Act
+    load().write_csv(out)
+
+    # Assert
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert rows[0] == ["category", "2023-12", "2024-01", "2024-02", "total", "change"]
+    assert rows[1] == ["Aluguel", "0.0", "1000.0", "0.0", "1000.0", "-1000.0"]
+    assert rows[-1] == ["Total", "150.0", "1000.0", "80.0", "1230.0", "-920.0"]
+
+
+def test_cli_pivot_deltas(ledger):
+    """Testa o subcomando pivot com as variações"""
+    # Arrange
+    out = io.StringIO()
+
+    # Act
+    code = cli.main(["pivot", "--deltas"], out=out)
+
+    # Assert
+    rows = list(csv.reader(io.StringIO(out.getvalue())))
+    assert code == 0
+    assert rows[2] == ["Mercado", "", "-150.0", "80.0", "230.0", "80.0"]
@@ -0,0 +1,164 @@
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+import pytest
+from textual.app import App
+
+from finance.logconfig import setup_logging
+from finance.profiling import IMPORTTIME_HEADER, ImportTimer, Profiler, Sampler
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """Pacote ``perfpkg`` que importa o submódulo ``perfpkg.child``"""
+    root = tmp_path / "perfpkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("from perfpkg import child\n")
+    (root / "child.py").write_text("VALUE = sum(range(1000))\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "perfpkg"
+    for name in ("perfpkg", "perfpkg.child"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+
+
+class CounterApp(App):
+    BINDINGS = [("a", "bump", "Bump")]
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def action_bump(self):
+        self.count += 1
+
+
+def busy(seconds):
+    """Mantém a thread ocupada por ``seconds``"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+# ==================== TESTES: imports ====================
+
+
+def test_import_timer_nests_submodules(package):
+    """Testa a medição dos imports no formato de ``python -X importtime``"""
+    # Arrange
+    timer = ImportTimer()
+
+    # Act
+    with timer:
+        __import__(package)
+    out = io.StringIO()
+    timer.write(out)
+
+    # Assert
+    names = [(depth, name) for _, _, depth, name in timer.records]
+    assert names == [(1, "perfpkg.child"), (0, "perfpkg")]
+    child, parent = timer.records
+    # O tempo acumulado do pacote inclui o do submódulo
+    assert parent[1] >= child[1] + parent[0]
+    lines = out.getvalue().splitlines()
+    assert lines[0] == IMPORTTIME_HEADER
+    assert lines[1].startswith("import time:")
+    assert lines[1].endswith("|   perfpkg.child")
+    assert timer not in sys.meta_path
+
+
+# ==================== TESTES: amostragem ====================
+
+
+def test_sampler_writes_speedscope_profile():
+    """Testa o perfil por amostragem no formato do speedscope"""
+    # Arrange
+    sampler = Sampler(interval=0.001, thread_id=threading.get_ident())
+
+    # Act
+    sampler.start()
+    busy(0.05)
+    sampler.stop()
+    document = json.loads(json.dumps(sampler.speedscope("test")))
+
+    # Assert
+    profile = document["profiles"][0]
+    frames = document["shared"]["frames"]
+    assert profile["type"] == "sampled"
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+    assert all(0 <= i < len(frames) for stack in profile["samples"] for i in stack)
+    assert any(frame["name"] == "busy" for frame in frames)
+    assert [p["name"] for p in document["profiles"]] == ["MainThread"]
+
+
+# ==================== TESTES: sessão ====================
+
+
+@pytest.mark.asyncio
+async def test_profiler_records_startup_interactions_and_frames(tmp_path):
+    """Testa o perfil de uma sessão: partida, uma tecla e os quadros"""
+    # Arrange
+    profiler = Profiler(str(tmp_path))
+    app = CounterApp()
+
+    # Act
+    profiler.start()
+    try:
+        profiler.attach(app)
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            await pilot.press("a")
+            await pilot.pause()
+    finally:
+        profiler.stop()
+    summary = profiler.write(ImportTimer())
+
+    # Assert
+    assert app.count == 1
+    assert profiler.startup_time is not None
+    assert [label for label, *_ in profiler.interactions] == ["bump"]
+    assert any(kind == "paint" for kind, _, _ in profiler.frames)
+    assert os.path.exists(tmp_path / "interactions" / "001-bump.pstats")
+    pstats.Stats(str(tmp_path / "startup.pstats"))
+    pstats.Stats(str(tmp_path / "interactions.pstats"))
+    with open(tmp_path / "session.speedscope.json", encoding="utf-8") as f:
+        assert json.load(f)["profiles"][0]["type"] == "sampled"
+    with open(summary, encoding="utf-8") as f:
+        assert "bump" in f.read()
+
+
+# ==================== TESTES: log ====================
+
+
+def test_logging_goes_through_queue(tmp_path, monkeypatch):
+    """Testa que o logger raiz só enfileira e a thread grava no arquivo"""
+    # Arrange
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+    filename = tmp_path / "app.log"
+
+    # Act
+    listener = setup_logging(filename=str(filename))
+    try:
+        handlers = list(root.handlers)
+        logging.getLogger("finance.test").info("Queued message")
+    finally:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+    # Assert
+    assert [type(h).__name__ for h in handlers] == ["QueueHandler"]
+    line = filename.read_text().strip()
+    assert line.endswith(" - finance.test - INFO - Queued message")
+    # Formatada uma única vez, pelos handlers do listener
+    assert line.count(" - INFO - ") == 1
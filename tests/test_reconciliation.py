@@ -0,0 +1,128 @@
+import datetime
+
+import pytest
+from sqlalchemy import update
+
+from dao.category_dao import CategoryDAO
+from dao.reconciliation import ReconciliationDAO
+from dao.transaction_dao import TransactionDAO
+from models.fingerprint import normalize_description, transaction_fingerprint
+from models.models import Transaction
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def category_id(use_sqlite):
+    with CategoryDAO() as dao:
+        return dao.create_category("Mercado").id
+
+
+def record(category_id, description, day, value=50.0, type="Despesa"):
+    return {
+        "description": description,
+        "transaction_date": datetime.datetime(2024, 3, day),
+        "transaction_value": value,
+        "type": type,
+        "category_id": category_id,
+    }
+
+
+# ==================== TESTES: impressão digital ====================
+
+
+def test_fingerprint_ignores_formatting():
+    """Testa que acentos, caixa, pontuação e hora não mudam a impressão"""
+    # Act
+    first = transaction_fingerprint(
+        datetime.datetime(2024, 3, 1, 10), 12.3, "Despesa", "Pão  de Açúcar!"
+    )
+    second = transaction_fingerprint(
+        datetime.datetime(2024, 3, 1), 12.30, "Despesa", "PAO DE ACUCAR"
+    )
+    other = transaction_fingerprint(
+        datetime.datetime(2024, 3, 1), 12.31, "Despesa", "PAO DE ACUCAR"
+    )
+
+    # Assert
+    assert normalize_description("Pão  de Açúcar!") == "pao de acucar"
+    assert first == second != other
+
+
+def test_writes_store_fingerprint(category_id):
+    """Testa que create/update gravam a impressão digital"""
+    with TransactionDAO() as dao:
+        # Act
+        created = dao.create_transaction(record(category_id, "Feira", 1))
+        updated = dao.update_transaction({"id": created.id, "description": "Açougue"})
+
+        # Assert
+        assert updated.fingerprint == transaction_fingerprint(
+            datetime.datetime(2024, 3, 1), 50.0, "Despesa", "acougue"
+        )
+
+
+# ==================== TESTES: reconciliação ====================
+
+
+def test_exact_duplicates_respect_multiplicity(category_id):
+    """Testa que cada transação existente absorve um único registro"""
+    # Arrange
+    with TransactionDAO() as dao:
+        dao.create_transactions([record(category_id, "Café", 1)] * 2)
+    incoming = [record(category_id, "CAFE", 1)] * 3
+
+    # Act
+    with ReconciliationDAO() as dao:
+        result = dao.reconcile(incoming)
+
+    # Assert
+    assert len(result.duplicates) == 2
+    assert len({existing_id for _, existing_id in result.duplicates}) == 2
+    assert len(result.new) == 1
+    assert result.conflicts == []
+
+
+def test_near_duplicates_become_conflicts(category_id):
+    """Testa o casamento aproximado dentro da tolerância de datas"""
+    # Arrange
+    with TransactionDAO() as dao:
+        existing = dao.create_transaction(record(category_id, "Supermercado X", 10))
+        existing_id = existing.id
+    incoming = [
+        record(category_id, "Supermercado X 123", 12),
+        record(category_id, "Supermercado X 123", 20),
+        record(category_id, "Farmácia", 11),
+        record(category_id, "Supermercado X", 11, value=51.0),
+    ]
+
+    # Act
+    with ReconciliationDAO() as dao:
+        result = dao.reconcile(incoming, date_tolerance=3)
+
+    # Assert
+    assert [c.record["transaction_date"].day for c in result.conflicts] == [12]
+    assert [c.id for c in result.conflicts[0].candidates] == [existing_id]
+    assert [r["description"] for r in result.new] == [
+        "Supermercado X 123",
+        "Farmácia",
+        "Supermercado X",
+    ]
+
+
+def test_reconcile_backfills_missing_fingerprints(category_id, sqlite_engine):
+    """Testa que transações antigas, sem impressão digital, também casam"""
+    # Arrange
+    with TransactionDAO() as dao:
+        dao.create_transaction(record(category_id, "Aluguel", 5, value=900.0))
+    with sqlite_engine.begin() as connection:
+        connection.execute(update(Transaction).values(fingerprint=None))
+
+    # Act
+    with ReconciliationDAO() as dao:
+        result = dao.reconcile([record(category_id, "aluguel", 5, value=900.0)])
+
+    # Assert
+    assert len(result.duplicates) == 1
+    assert result.new == []
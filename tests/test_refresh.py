@@ -0,0 +1,148 @@
+import pytest
+
+from finance.refresh import (
+    CATEGORIES,
+    CATEGORY_CHART,
+    CATEGORY_TOTALS,
+    KPIS,
+    MONTHLY_CHART,
+    TABLE,
+    RefreshScheduler,
+)
+
+# ==================== FIXTURES ====================
+
+
+class FakeLoop:
+    """Laço de eventos de mentira: guarda os callbacks agendados"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, delay, callback):
+        self.scheduled.append((delay, callback))
+
+    def run(self):
+        """Executa os callbacks agendados até então"""
+        scheduled, self.scheduled = self.scheduled, []
+        for _, callback in scheduled:
+            callback()
+
+
+@pytest.fixture
+def loop():
+    return FakeLoop()
+
+
+@pytest.fixture
+def runs():
+    return []
+
+
+@pytest.fixture
+def scheduler(loop, runs):
+    return RefreshScheduler(runs.append, loop.schedule)
+
+
+# ==================== TESTES: junção ====================
+
+
+def test_burst_becomes_one_flush(scheduler, loop, runs):
+    """Testa que uma rajada de pedidos vira uma única rodada, em ordem"""
+    # Act
+    for _ in range(10):
+        scheduler.mark(TABLE)
+    scheduler.mark(MONTHLY_CHART, KPIS)
+    loop.run()
+
+    # Assert
+    assert runs == [[TABLE, KPIS, MONTHLY_CHART]]
+    assert scheduler.stats.flushes == 1
+    assert scheduler.stats.coalesced == 9
+    assert loop.scheduled == []
+
+
+def test_first_delay_wins(scheduler, loop):
+    """Testa que os pedidos seguintes entram na rodada já agendada"""
+    # Act
+    scheduler.mark(TABLE, delay=0.25)
+    scheduler.mark(KPIS)
+
+    # Assert
+    assert [delay for delay, _ in loop.scheduled] == [0.25]
+
+
+def test_marks_during_run_join_the_flush(loop):
+    """Testa que o que a tabela marca é retirado na mesma rodada"""
+    # Arrange
+    runs = []
+
+    def run(components):
+        if TABLE in components:
+            scheduler.mark(KPIS, CATEGORY_TOTALS)
+            components = components + scheduler.take()
+        runs.append(components)
+
+    scheduler = RefreshScheduler(run, loop.schedule)
+
+    # Act
+    scheduler.mark(TABLE)
+    loop.run()
+
+    # Assert
+    assert runs == [[TABLE, CATEGORY_TOTALS, KPIS]]
+    assert loop.scheduled == []
+
+
+def test_category_tree_covers_totals(scheduler, loop, runs):
+    """Testa que recarregar a árvore dispensa refazer só os totais"""
+    # Act
+    scheduler.mark(CATEGORY_TOTALS)
+    scheduler.mark(CATEGORIES)
+    loop.run()
+
+    # Assert
+    assert runs == [[CATEGORIES]]
+    assert scheduler.dirty == set()
+
+
+def test_waits_while_screen_is_covered(loop, runs):
+    """Testa que componentes de uma tela coberta esperam e são refeitos depois"""
+    # Arrange
+    covered = {"value": True}
+    scheduler = RefreshScheduler(
+        runs.append,
+        loop.schedule,
+        ready=lambda component: component == CATEGORY_CHART or not covered["value"],
+        retry_delay=0.5,
+    )
+    scheduler.mark(TABLE, CATEGORY_CHART)
+
+    # Act
+    loop.run()
+    retry = [delay for delay, _ in loop.scheduled]
+    covered["value"] = False
+    loop.run()
+
+    # Assert
+    assert runs == [[CATEGORY_CHART], [TABLE]]
+    assert retry == [0.5]
+    assert scheduler.stats.deferred == 1
+
+
+# ==================== TESTES: cargas em segundo plano ====================
+
+
+def test_newer_load_takes_over_pending_one(scheduler):
+    """Testa que a carga nova inclui a anterior e descarta o seu resultado"""
+    # Act
+    first, _ = scheduler.start_load([KPIS])
+    second, components = scheduler.start_load([CATEGORY_CHART])
+
+    # Assert
+    assert components == [KPIS, CATEGORY_CHART]
+    assert scheduler.finish_load(first) is False
+    assert scheduler.finish_load(second) is True
+    assert (scheduler.stats.cancelled, scheduler.stats.stale) == (1, 1)
+    # Depois de aplicada, a carga seguinte começa do zero
+    assert scheduler.start_load([KPIS])[1] == [KPIS]
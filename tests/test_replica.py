@@ -0,0 +1,246 @@
+import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import select
+
+from dao import transaction_dao as transaction_dao_module
+from dao import versioning
+from dao.archive_dao import ArchiveDAO
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO
+from db import config, replica
+from models.models import Category, Transaction
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def replica_engine(tmp_path, monkeypatch):
+    """Habilita uma réplica SQLite temporária"""
+    monkeypatch.setattr(config, "REPLICA_PATH", str(tmp_path / "replica.db"))
+    monkeypatch.setattr(replica, "_engine", None)
+    monkeypatch.setattr(replica, "_session_factory", None)
+    engine = replica.get_replica_engine()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def primary(sqlite_session_factory):
+    """Popula o banco primário com uma categoria e duas transações"""
+    session = sqlite_session_factory()
+    session.add(Category(id=1, name="Mercado"))
+    session.add_all(
+        [
+            Transaction(
+                id=1,
+                description="Compra",
+                transaction_date=datetime.datetime(2024, 1, 10),
+                transaction_value=100.0,
+                type="Despesa",
+                category_id=1,
+            ),
+            Transaction(
+                id=2,
+                description="Salário",
+                transaction_date=datetime.datetime(2024, 1, 5),
+                transaction_value=1000.0,
+                type="Receita",
+                category_id=1,
+            ),
+        ]
+    )
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def replica_sync(sqlite_session_factory, replica_engine):
+    return replica.ReplicaSync(sqlite_session_factory, replica_engine)
+
+
+def replica_ids(engine):
+    with engine.connect() as connection:
+        return sorted(connection.execute(select(Transaction.__table__.c.id)).scalars())
+
+
+# ==================== TESTES: sync ====================
+
+
+def test_sync_copies_everything(primary, replica_sync, replica_engine):
+    """Testa a primeira sincronização completa"""
+    # Act
+    applied = replica_sync.sync()
+
+    # Assert
+    assert applied == 3
+    assert replica_ids(replica_engine) == [1, 2]
+
+
+def test_sync_is_incremental(primary, replica_sync, replica_engine):
+    """Testa que apenas as novidades são aplicadas na segunda sincronização"""
+    # Arrange
+    replica_sync.sync()
+    primary.add(
+        Transaction(
+            id=3,
+            description="Nova",
+            transaction_date=datetime.datetime(2024, 2, 1),
+            transaction_value=50.0,
+            type="Despesa",
+            category_id=1,
+        )
+    )
+    primary.commit()
+
+    # Act
+    applied = replica_sync.sync()
+
+    # Assert
+    assert applied == 1
+    assert replica_ids(replica_engine) == [1, 2, 3]
+    assert replica_sync.sync() == 0
+
+
+def test_sync_waits_for_late_commits(
+    primary, replica_sync, replica_engine, monkeypatch
+):
+    """
+    Testa que a sincronização não passa de uma versão reservada e ainda não
+    confirmada (generator do Firebird), mesmo com muitas escritas depois
+    """
+    # Arrange: versão 1 reservada e pendente; 2 a 151 já confirmadas
+    pending = [0]
+    monkeypatch.setattr(
+        versioning, "settled_version", lambda session: min(pending, default=None)
+    )
+    primary.add_all(
+        Transaction(
+            id=100 + version,
+            description="Nova",
+            transaction_date=datetime.datetime(2024, 2, 1),
+            transaction_value=1.0,
+            type="Despesa",
+            category_id=1,
+            version=version,
+        )
+        for version in range(2, 152)
+    )
+    primary.commit()
+    replica_sync.sync()
+
+    # Act: a versão 1 é confirmada
+    primary.get(Transaction, 1).description = "Importada"
+    primary.get(Transaction, 1).version = 1
+    primary.commit()
+    pending.clear()
+    replica_sync.sync()
+
+    # Assert
+    with replica_engine.connect() as connection:
+        description = connection.execute(
+            select(Transaction.__table__.c.description).where(
+                Transaction.__table__.c.id == 1
+            )
+        ).scalar()
+    assert description == "Importada"
+    assert len(replica_ids(replica_engine)) == 152
+
+
+def test_resync_rebuilds_replica(primary, replica_sync, replica_engine):
+    """Testa que a ressincronização descarta e recopia os dados"""
+    # Arrange
+    replica_sync.sync()
+    replica.fold_delete(Transaction, [1])
+    assert replica_ids(replica_engine) == [2]
+
+    # Act
+    replica_sync.resync()
+
+    # Assert
+    assert replica_ids(replica_engine) == [1, 2]
+
+
+def test_sync_removes_archived_transactions(
+    primary, replica_sync, replica_engine, sqlite_session_factory
+):
+    """Testa que transações arquivadas por outro cliente saem da réplica"""
+    # Arrange
+    replica_sync.sync()
+    with ArchiveDAO(session=sqlite_session_factory()) as dao:
+        # Sem réplica habilitada neste "cliente": só o primário muda
+        with patch.object(replica, "replica_enabled", return_value=False):
+            dao.archive(datetime.datetime(2024, 1, 8))
+
+    # Act
+    replica_sync.sync()
+
+    # Assert
+    assert replica_ids(replica_engine) == [1]
+    assert replica_sync.sync() == 0
+
+
+def test_current_version_reads_primary(primary, replica_sync, sqlite_session_factory):
+    """
+    Testa que, com réplica habilitada, a versão de dados vem do primário
+    (com as versões de arquivamento, que a réplica não tem)
+    """
+    # Arrange
+    replica_sync.sync()
+    with ArchiveDAO(session=sqlite_session_factory()) as dao:
+        dao.archive(datetime.datetime(2024, 1, 8))
+    with sqlite_session_factory() as session:
+        expected = versioning.current_version(session)
+
+    # Act
+    with TransactionDAO(session=sqlite_session_factory()) as dao:
+        transactions = dao.current_version()
+        assert dao.read_session is not dao.session
+    with CategoryDAO(session=sqlite_session_factory()) as dao:
+        categories = dao.current_version()
+
+    # Assert
+    assert expected > 0
+    assert transactions == categories == expected
+
+
+def test_staleness(primary, replica_sync):
+    """Testa o indicador de defasagem da réplica"""
+    assert replica_sync.staleness() is None
+
+    replica_sync.sync()
+
+    assert 0 <= replica_sync.staleness() < 60
+
+
+# ==================== TESTES: leituras pelos DAOs ====================
+
+
+def test_dao_reads_from_replica(
+    primary, replica_sync, sqlite_session_factory, monkeypatch
+):
+    """Testa que o DAO lê da réplica e dobra as escritas nela"""
+    # Arrange
+    replica_sync.sync()
+    monkeypatch.setattr(transaction_dao_module, "SessionLocal", sqlite_session_factory)
+
+    # Act
+    with TransactionDAO() as dao:
+        created = dao.create_transaction(
+            {
+                "description": "Padaria",
+                "transaction_date": datetime.datetime(2024, 3, 1),
+                "transaction_value": 12.5,
+                "type": "Despesa",
+                "category_id": 1,
+            }
+        )
+        replica_session = dao.read_session
+        transactions = dao.get_all_transactions(order=True)
+
+    # Assert
+    assert replica_session is not dao.session
+    assert [t.id for t in transactions] == [created.id, 1, 2]
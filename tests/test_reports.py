@@ -0,0 +1,122 @@
+import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from db.config import Base, make_engine
+from finance import reports
+from models.models import Category, Transaction
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """Banco SQLite em arquivo (compartilhável entre processos)"""
+    url = f"sqlite:///{tmp_path / 'reports.db'}"
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+
+    def row(id_, date, value, type_, category_id):
+        return {
+            "id": id_,
+            "description": f"Transação {id_}",
+            "transaction_date": date,
+            "transaction_value": value,
+            "type": type_,
+            "category_id": category_id,
+        }
+
+    with engine.begin() as connection:
+        connection.execute(
+            insert(Category),
+            [{"id": 1, "name": "Mercado"}, {"id": 2, "name": "Salário"}],
+        )
+        connection.execute(
+            insert(Transaction),
+            [
+                row(1, datetime.datetime(2023, 1, 5), 100.0, "Despesa", 1),
+                row(2, datetime.datetime(2023, 1, 20), 50.0, "Despesa", 1),
+                row(3, datetime.datetime(2023, 2, 1), 3000.0, "Receita", 2),
+                row(4, datetime.datetime(2024, 3, 1), 700.0, "Despesa", 1),
+                row(5, datetime.datetime(2025, 1, 1), 999.0, "Despesa", 1),
+            ],
+        )
+    engine.dispose()
+    return url
+
+
+# ==================== TESTES: particionamento ====================
+
+
+def test_plan_partitions_fills_workers():
+    """Testa que anos x categorias geram partições para todos os workers"""
+    # Act
+    partitions = reports.plan_partitions([2023, 2024], [3, 1, 2, 4], workers=4)
+
+    # Assert
+    assert len(partitions) == 4
+    assert {p.year for p in partitions} == {2023, 2024}
+    assert sorted(c for p in partitions if p.year == 2023 for c in p.category_ids) == [
+        1,
+        2,
+        3,
+        4,
+    ]
+
+
+def test_merge_sums_partials():
+    """Testa a combinação de agregados parciais"""
+    # Arrange
+    a = reports.PartialReport(
+        totals={(2023, 1, 1): {"income": 0.0, "expense": 10.0, "count": 1}},
+        largest={2023: [(10.0, 1, datetime.datetime(2023, 1, 1), "a", 1)]},
+    )
+    b = reports.PartialReport(
+        totals={(2023, 1, 1): {"income": 5.0, "expense": 2.0, "count": 2}},
+        largest={2023: [(20.0, 2, datetime.datetime(2023, 1, 2), "b", 1)]},
+    )
+
+    # Act
+    a.merge(b, top_n=1)
+
+    # Assert
+    assert a.totals[(2023, 1, 1)] == {"income": 5.0, "expense": 12.0, "count": 3}
+    assert [e[1] for e in a.largest[2023]] == [2]
+
+
+# ==================== TESTES: geração ====================
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_generate_report(database_url, workers):
+    """Testa o relatório calculado no processo atual e em um pool"""
+    # Act
+    report = reports.generate_report([2023, 2024], workers=workers, url=database_url)
+
+    # Assert
+    assert report.totals[(2023, 1, 1)] == {"income": 0.0, "expense": 150.0, "count": 2}
+    assert report.totals[(2023, 2, 2)]["income"] == 3000.0
+    assert report.totals[(2024, 3, 1)]["expense"] == 700.0
+    assert not any(year == 2025 for year, _, _ in report.totals)
+    assert [e[0] for e in report.largest[2023]] == [100.0, 50.0]
+
+
+def test_write_csv_and_html(database_url, tmp_path):
+    """Testa a gravação do relatório em CSV e HTML"""
+    # Arrange
+    report = reports.generate_report([2023], workers=1, url=database_url)
+
+    # Act
+    paths = reports.write_csv(report, str(tmp_path / "out"))
+    html_path = reports.write_html(report, str(tmp_path / "out" / "report.html"))
+
+    # Assert
+    with open(paths[0], encoding="utf-8") as f:
+        monthly = f.read().splitlines()
+    with open(html_path, encoding="utf-8") as f:
+        page = f.read()
+    assert monthly[0] == "year,month,category,income,expense,count"
+    assert "2023,1,Mercado,0.00,150.00,2" in monthly
+    assert "Mercado" in page
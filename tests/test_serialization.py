@@ -0,0 +1,116 @@
+import datetime
+
+import pytest
+
+from models.rows import TransactionRow
+from models.serialization import (
+    BatchDecoder,
+    Field,
+    batched,
+    transaction_decoder,
+    transaction_encoder,
+)
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def row():
+    return TransactionRow(
+        id=1,
+        description="Compra",
+        transaction_date=datetime.datetime(2024, 1, 10),
+        transaction_value=100.0,
+        type="Despesa",
+        category_id=2,
+        category_name="Mercado",
+        version=3,
+        deleted=False,
+    )
+
+
+# ==================== TESTES: codificação ====================
+
+
+def test_encoder_is_shallow(row):
+    """Testa que a linha vira um dicionário plano, só com campos do schema"""
+    # Act
+    encoded = transaction_encoder.encode(row)
+
+    # Assert
+    assert encoded == {
+        "id": 1,
+        "description": "Compra",
+        "transaction_date": "2024-01-10T00:00:00",
+        "transaction_value": 100.0,
+        "type": "Despesa",
+        "category_id": 2,
+        "category": "Mercado",
+    }
+
+
+def test_encode_round_trip(row):
+    """Testa que a saída do encoder é aceita pelo decoder"""
+    # Act
+    decoded = transaction_decoder.decode_batch(transaction_encoder.encode_batch([row]))
+
+    # Assert
+    assert decoded[0]["transaction_date"] == row.transaction_date
+    assert decoded[0]["category"] == row.category_name
+
+
+# ==================== TESTES: decodificação ====================
+
+
+def test_decoder_converts_csv_text():
+    """Testa a conversão de colunas de texto (CSV)"""
+    # Act
+    decoded = transaction_decoder.decode_batch(
+        [
+            {
+                "description": "Ônibus",
+                "transaction_date": "2024-05-01",
+                "transaction_value": "4.5",
+                "type": "Despesa",
+                "category_id": "",
+                "category": "Transporte",
+            }
+        ]
+    )
+
+    # Assert
+    assert decoded[0]["transaction_date"] == datetime.datetime(2024, 5, 1)
+    assert decoded[0]["transaction_value"] == 4.5
+    assert decoded[0]["category_id"] is None
+    assert decoded[0]["id"] is None
+
+
+def test_decoder_keeps_values_already_typed():
+    """Testa que colunas já tipadas são devolvidas sem conversão"""
+    # Arrange
+    decoder = BatchDecoder([Field("value", float)])
+    values = [{"value": 1.5}, {"value": 2.0}]
+
+    # Act / Assert
+    assert decoder.decode_batch(values) == values
+
+
+@pytest.mark.parametrize(
+    "record, message",
+    [
+        ({"value": None}, "obrigatório"),
+        ({"value": "abc"}, "valor inválido"),
+    ],
+)
+def test_decoder_rejects_invalid_batch(record, message):
+    """Testa os erros de validação do lote"""
+    decoder = BatchDecoder([Field("value", float)])
+
+    with pytest.raises(ValueError, match=message):
+        decoder.decode_batch([{"value": 1.0}, record])
+
+
+def test_batched():
+    """Testa o agrupamento em lotes"""
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+import pytest_asyncio
+
+from dao.async_dao import AsyncCategoryDAO, AsyncTransactionDAO
+from finance.snapshot import load_snapshot
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest_asyncio.fixture
+async def ledger(async_db):
+    """Categoria com cinco transações, uma por dia"""
+    async with AsyncCategoryDAO() as dao:
+        category_id = (await dao.create_category("Mercado")).id
+    async with AsyncTransactionDAO() as dao:
+        await dao.create_transactions(
+            [
+                {
+                    "description": f"Compra {day}",
+                    "transaction_date": datetime.datetime(2024, 1, day),
+                    "transaction_value": 10.0,
+                    "type": "Despesa",
+                    "category_id": category_id,
+                }
+                for day in range(1, 6)
+            ]
+        )
+
+
+# ==================== TESTES: retrato da tela inicial ====================
+
+
+@pytest.mark.asyncio
+async def test_snapshot_has_everything_for_first_screen(ledger):
+    """Testa que o retrato traz página, totais, série e categorias"""
+    # Act
+    snapshot = await load_snapshot(page_size=2)
+
+    # Assert
+    assert [row.description for row in snapshot.rows] == ["Compra 5", "Compra 4"]
+    assert snapshot.has_more
+    assert sorted(snapshot.balances.values()) == [-50.0, -40.0]
+    assert snapshot.totals == {"income": 0.0, "expense": 50.0}
+    assert snapshot.totals_by_month == {"2024-01": {"income": 0.0, "expense": 50.0}}
+    assert [c.name for c in snapshot.categories] == ["Mercado"]
+    assert snapshot.version == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_single_page(ledger):
+    """Testa has_more quando tudo cabe na primeira página"""
+    snapshot = await load_snapshot(page_size=10)
+
+    assert len(snapshot.rows) == 5
+    assert not snapshot.has_more
@@ -0,0 +1,199 @@
+import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from dao import transaction_dao as transaction_dao_module
+from dao.category_dao import CategoryDAO
+from dao.summary_dao import SummaryDAO
+from dao.transaction_dao import TransactionDAO
+from models.models import MonthlySummary
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def categories(use_sqlite):
+    with CategoryDAO() as dao:
+        return [dao.create_category("Mercado").id, dao.create_category("Salário").id]
+
+
+def transaction_data(category_id, date, value, type="Despesa"):
+    return {
+        "description": "Transação",
+        "transaction_date": date,
+        "transaction_value": value,
+        "type": type,
+        "category_id": category_id,
+    }
+
+
+# ==================== TESTES: manutenção pelo TransactionDAO ====================
+
+
+def test_writes_keep_summary_consistent(categories):
+    """Testa que create/update/delete mantêm o resumo igual a um rebuild"""
+    # Arrange
+    market, salary = categories
+    with TransactionDAO() as dao:
+        first = dao.create_transaction(
+            transaction_data(market, datetime.datetime(2024, 1, 10), 100.0)
+        )
+        dao.create_transaction(
+            transaction_data(salary, "2024-01-05", 3000.0, type="Receita")
+        )
+        second = dao.create_transaction(
+            transaction_data(market, datetime.datetime(2024, 2, 1), 40.0)
+        )
+        dao.update_transaction(
+            {
+                "id": first.id,
+                "transaction_value": 80.0,
+                "transaction_date": "2024-03-01",
+            }
+        )
+        dao.delete_transaction(second.id)
+        dao.create_transactions(
+            [
+                transaction_data(market, datetime.datetime(2024, 3, 2), 5.0),
+                transaction_data(market, datetime.datetime(2024, 3, 3), 5.0),
+            ]
+        )
+
+    # Act
+    with SummaryDAO() as dao:
+        maintained = dao.get_totals_by_month()
+        assert dao.rebuild() is True
+        rebuilt = dao.get_totals_by_month()
+
+    # Assert
+    assert maintained == rebuilt
+    assert maintained["2024-01"] == {"income": 3000.0, "expense": 0.0}
+    assert "2024-02" not in maintained
+    assert maintained["2024-03"] == {"income": 0.0, "expense": 90.0}
+
+
+def test_concurrent_first_write_keeps_both(categories, monkeypatch):
+    """
+    Testa que, se outro escritor cria a linha do mês entre o UPDATE e o
+    INSERT, a escrita do usuário é mantida e soma na linha existente
+    """
+    # Arrange
+    market, _ = categories
+    with TransactionDAO() as dao:
+        begin_nested = dao.session.begin_nested
+
+        def racing_begin_nested():
+            # O outro escritor confirma a linha entre o UPDATE e o INSERT
+            dao.session.execute(
+                insert(MonthlySummary).values(
+                    year=2024,
+                    month=1,
+                    category_id=market,
+                    type="Despesa",
+                    total=50.0,
+                    count=1,
+                )
+            )
+            return begin_nested()
+
+        monkeypatch.setattr(dao.session, "begin_nested", racing_begin_nested)
+
+        # Act
+        created = dao.create_transaction(
+            transaction_data(market, datetime.datetime(2024, 1, 10), 100.0)
+        )
+
+    # Assert
+    assert created is not None
+    with TransactionDAO() as dao:
+        assert dao.get_transaction_by_id(created.id) is not None
+    with SummaryDAO() as dao:
+        assert dao.get_totals_by_type() == {"income": 0.0, "expense": 150.0}
+
+
+def test_totals_by_type_and_category(categories):
+    """Testa os totais por tipo e por categoria"""
+    # Arrange
+    market, salary = categories
+    with TransactionDAO() as dao:
+        dao.create_transaction(transaction_data(market, "2023-12-31", 10.0))
+        dao.create_transaction(transaction_data(market, "2024-01-01", 20.0))
+        dao.create_transaction(
+            transaction_data(salary, "2024-01-01", 100.0, type="Receita")
+        )
+
+    # Act
+    with SummaryDAO() as dao:
+        all_time = dao.get_totals_by_type()
+        year = dao.get_totals_by_type(2024)
+        by_category = dao.get_totals_by_category(2024)
+
+    # Assert
+    assert all_time == {"income": 100.0, "expense": 30.0}
+    assert year == {"income": 100.0, "expense": 20.0}
+    assert [(c["category"], c["income"], c["expense"]) for c in by_category] == [
+        ("Mercado", 0.0, 20.0),
+        ("Salário", 100.0, 0.0),
+    ]
+
+
+# ==================== TESTES: saldo corrente ====================
+
+
+@pytest.fixture
+def ledger(categories):
+    """Transações em três meses, com várias no mesmo dia"""
+    market, salary = categories
+    with TransactionDAO() as dao:
+        for date, value, type in [
+            ("2024-01-05", 1000.0, "Receita"),
+            ("2024-01-05", 200.0, "Despesa"),
+            ("2024-01-20", 50.0, "Despesa"),
+            ("2024-03-01", 10.0, "Despesa"),
+            ("2024-02-10", 300.0, "Receita"),
+            ("2024-03-01", 40.0, "Despesa"),
+        ]:
+            category = salary if type == "Receita" else market
+            dao.create_transaction(transaction_data(category, date, value, type))
+        return dao.get_transaction_rows()
+
+
+def expected_balances(rows):
+    balance, balances = 0.0, {}
+    for row in sorted(rows, key=lambda r: (r.transaction_date, r.id)):
+        sign = 1 if row.type == "Receita" else -1
+        balance += sign * row.transaction_value
+        balances[row.id] = balance
+    return balances
+
+
+def test_opening_balances_per_month(ledger):
+    """Testa o saldo de abertura de cada mês do resumo"""
+    # Act
+    with SummaryDAO() as dao:
+        opening = dao.get_opening_balances()
+
+    # Assert
+    assert opening == {(2024, 1): 0.0, (2024, 2): 750.0, (2024, 3): 1050.0}
+
+
+@pytest.mark.parametrize("window_functions", [True, False])
+def test_running_balances(ledger, monkeypatch, window_functions):
+    """Testa o saldo corrente com e sem funções de janela"""
+    # Arrange
+    monkeypatch.setattr(
+        transaction_dao_module,
+        "window_functions_supported",
+        lambda session: window_functions,
+    )
+    page = [row for row in ledger if row.transaction_date.month != 2]
+
+    # Act
+    with TransactionDAO() as dao:
+        balances = dao.get_running_balances(page)
+
+    # Assert
+    expected = expected_balances(ledger)
+    assert balances == {row.id: expected[row.id] for row in page}
@@ -0,0 +1,217 @@
+import datetime
+
+import pytest
+
+from dao.category_dao import CategoryDAO
+from dao.tag_dao import TagDAO
+from dao.transaction_dao import TransactionDAO, TransactionFilters
+from db.column_cache import ColumnCache
+from db.tag_index import TagIndex
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def tagged(use_sqlite):
+    """
+    60 transações em duas categorias: "viagem" em uma a cada 2, "reembolsável"
+    em uma a cada 3
+    """
+    with CategoryDAO() as dao:
+        categories = [dao.create_category(name).id for name in ("Lazer", "Casa")]
+    with TransactionDAO() as dao:
+        dao.create_transactions(
+            [
+                {
+                    "description": f"Compra {i}",
+                    "transaction_date": datetime.datetime(2024, 1 + i % 6, 1 + i % 28),
+                    "transaction_value": float(10 + i),
+                    "type": "Receita" if i % 5 == 0 else "Despesa",
+                    "category_id": categories[i % 2],
+                }
+                for i in range(60)
+            ]
+        )
+        ids = sorted(row.id for row in dao.get_transaction_rows())
+    with TagDAO() as dao:
+        dao.tag_transactions("Viagem", ids[::2])
+        dao.tag_transactions("Reembolsável", ids[::3])
+        tags = {tag.name: tag.id for tag in dao.get_all_tags()}
+    return {"ids": ids, "categories": categories, "tags": tags}
+
+
+@pytest.fixture
+def cache(tagged, tmp_path):
+    """Cache colunar sincronizado com o banco"""
+    cache = ColumnCache(str(tmp_path / "columns"), stamp="test")
+    with TransactionDAO() as dao:
+        cache.sync(dao)
+    return cache
+
+
+def a_and_not_b(tagged):
+    """Filtro "viagem e não reembolsável na categoria Lazer" """
+    return TransactionFilters(
+        category_id=tagged["categories"][0],
+        tags=(tagged["tags"]["viagem"],),
+        exclude_tags=(tagged["tags"]["reembolsável"],),
+    )
+
+
+def build_index(cache):
+    index = TagIndex(cache)
+    with TagDAO() as dao:
+        index.rebuild(dao.iter_tag_members())
+    return index
+
+
+# ==================== TESTES: TagDAO ====================
+
+
+def test_set_transaction_tags_normalizes_and_versions(tagged):
+    """Testa a troca das etiquetas de uma transação e a nova versão"""
+    # Arrange
+    transaction_id = tagged["ids"][1]
+    with TransactionDAO() as dao:
+        version = dao.current_version()
+
+    # Act
+    with TagDAO() as dao:
+        tags = dao.set_transaction_tags(transaction_id, [" Viagem ", "VIAGEM", "Sol"])
+        names = dao.get_tag_names(transaction_id)
+        missing = dao.set_transaction_tags(10_000, ["sol"])
+
+    # Assert
+    assert [tag.name for tag in tags] == ["sol", "viagem"]
+    assert names == ["sol", "viagem"]
+    assert missing is None
+    with TransactionDAO() as dao:
+        assert [row.id for row in dao.row_changes_since(version)] == [transaction_id]
+
+
+def test_tag_transactions_adds_and_removes(tagged):
+    """Testa a etiquetagem em lote: só as transações alteradas contam"""
+    # Arrange
+    ids = tagged["ids"]
+
+    # Act
+    with TagDAO() as dao:
+        added = dao.tag_transactions("viagem", ids[:10])
+        removed = dao.tag_transactions("viagem", ids, remove=True)
+        unknown = dao.tag_transactions("inexistente", ids, remove=True)
+        tags = dao.get_transaction_tags(ids)
+
+    # Assert: 5 das 10 primeiras ainda não tinham a etiqueta
+    assert added == 5
+    assert removed == 35
+    assert unknown == 0
+    assert all(tagged["tags"]["viagem"] not in tag_ids for tag_ids in tags.values())
+    with TagDAO() as dao:
+        assert "inexistente" not in {tag.name for tag in dao.get_all_tags()}
+
+
+def test_delete_tag(tagged):
+    """Testa a remoção de uma etiqueta em uso"""
+    # Arrange
+    tag_id = tagged["tags"]["reembolsável"]
+    with TransactionDAO() as dao:
+        version = dao.current_version()
+
+    # Act
+    with TagDAO() as dao:
+        deleted = dao.delete_tag(tag_id)
+        again = dao.delete_tag(tag_id)
+
+    # Assert
+    assert deleted is True
+    assert again is False
+    with TransactionDAO() as dao:
+        assert len(dao.row_changes_since(version)) == 20
+
+
+# ==================== TESTES: filtros ====================
+
+
+def test_filters_by_tags_in_sql_and_memory(tagged):
+    """Testa que o SQL e ``matches`` concordam no filtro por etiquetas"""
+    # Arrange
+    filters = a_and_not_b(tagged)
+    with TagDAO() as dao:
+        tags = dao.get_transaction_tags(tagged["ids"])
+
+    # Act
+    with TransactionDAO() as dao:
+        rows = dao.get_transaction_rows_sorted(filters=filters, limit=100)
+        every = dao.get_transaction_rows()
+
+    # Assert: pares fora dos múltiplos de 3, na categoria Lazer (i par)
+    expected = [i for i in range(60) if i % 2 == 0 and i % 3 != 0]
+    assert sorted(row.id for row in rows) == [tagged["ids"][i] for i in expected]
+    assert {row.id for row in every if filters.matches(row, tags.get(row.id, ()))} == {
+        row.id for row in rows
+    }
+
+
+# ==================== TESTES: índice de bitmaps ====================
+
+
+def test_index_mask_matches_sql_totals(tagged, cache):
+    """Testa os totais da máscara de bitmaps contra as somas em SQL"""
+    # Arrange
+    filters = a_and_not_b(tagged)
+    index = build_index(cache)
+
+    # Act
+    mask = index.mask(filters.tags, filters.exclude_tags, filters.category_id)
+
+    # Assert
+    assert index.current
+    with TransactionDAO() as dao:
+        assert cache.totals(mask) == pytest.approx(dao.get_totals_by_type(filters))
+        by_month = dao.get_totals_by_month(filters)
+    assert cache.totals_by_month(mask).keys() == by_month.keys()
+    for month, values in cache.totals_by_month(mask).items():
+        assert values == pytest.approx(by_month[month])
+    # Etiqueta sem nenhuma transação: nada selecionado
+    assert not index.mask((10_000,)).any()
+
+
+def test_index_follows_delta(tagged, cache):
+    """Testa a atualização do índice com as etiquetas de um delta"""
+    # Arrange
+    index = build_index(cache)
+    filters = TransactionFilters(tags=(tagged["tags"]["viagem"],))
+    with TransactionDAO() as dao:
+        since = dao.current_version()
+    with TagDAO() as dao:
+        dao.tag_transactions("viagem", tagged["ids"][1:5])
+        dao.set_transaction_tags(tagged["ids"][0], ["sol"])
+
+    # Act
+    with TransactionDAO() as dao:
+        changed = [row.id for row in dao.row_changes_since(since)]
+        cache.sync(dao)
+        stale = index.current
+        with TagDAO() as tag_dao:
+            index.update(changed, tag_dao.get_transaction_tags(changed))
+
+    # Assert
+    assert stale is False
+    assert index.current
+    mask = index.mask(filters.tags)
+    with TransactionDAO() as dao:
+        assert cache.totals(mask) == pytest.approx(dao.get_totals_by_type(filters))
+    assert build_index(cache).bitmaps.keys() == index.bitmaps.keys()
+
+
+def test_cache_rebuild_invalidates_index(cache):
+    """Testa que uma reconstrução do cache (novas posições) invalida o índice"""
+    # Arrange
+    index = build_index(cache)
+
+    # Act
+    with TransactionDAO() as dao:
+        cache.rebuild(dao)
+
+    # Assert
+    assert index.current is False
@@ -0,0 +1,290 @@
+import datetime
+
+import pytest
+
+from dao import transaction_dao as transaction_dao_module
+from dao import versioning
+from dao.category_dao import CategoryDAO
+from dao.transaction_dao import TransactionDAO, TransactionFilters
+from models.models import Transaction
+from models.rows import TransactionRow
+
+
+# ==================== FIXTURES ====================
+
+
+@pytest.fixture
+def category(use_sqlite):
+    with CategoryDAO() as dao:
+        return dao.create_category("Mercado")
+
+
+def transaction_data(category_id, **overrides):
+    data = {
+        "description": "Compra",
+        "transaction_date": datetime.datetime(2024, 1, 10),
+        "transaction_value": 100.0,
+        "type": "Despesa",
+        "category_id": category_id,
+    }
+    data.update(overrides)
+    return data
+
+
+# ==================== TESTES: versões ====================
+
+
+def test_writes_get_increasing_versions(category):
+    """Testa que cada escrita recebe uma versão maior que a anterior"""
+    # Act
+    with TransactionDAO() as dao:
+        first = dao.create_transaction(transaction_data(category.id))
+        first_version = first.version
+        second = dao.create_transaction(transaction_data(category.id))
+        second_version = second.version
+        updated = dao.update_transaction({"id": first.id, "description": "Nova"})
+
+        # Assert
+        assert category.version < first_version < second_version < updated.version
+
+
+def test_changes_since_returns_only_deltas(category):
+    """Testa que changes_since traz apenas o que mudou após a versão"""
+    # Arrange
+    with TransactionDAO() as dao:
+        dao.create_transaction(transaction_data(category.id))
+        version = dao.current_version()
+        second = dao.create_transaction(transaction_data(category.id))
+
+        # Act
+        changes = dao.changes_since(version)
+
+        # Assert
+        assert [t.id for t in changes] == [second.id]
+
+
+def test_delete_leaves_tombstone(category):
+    """Testa que a remoção gera uma lápide visível em changes_since"""
+    # Arrange
+    with TransactionDAO() as dao:
+        transaction = dao.create_transaction(transaction_data(category.id))
+        version = dao.current_version()
+
+        # Act
+        deleted = dao.delete_transaction(transaction.id)
+
+        # Assert
+        assert deleted is True
+        assert dao.get_transaction_by_id(transaction.id) is None
+        assert dao.get_all_transactions() == []
+        changes = dao.changes_since(version)
+        assert [(t.id, t.deleted) for t in changes] == [(transaction.id, True)]
+
+
+# ==================== TESTES: concorrência otimista ====================
+
+
+def test_update_with_stale_version_is_rejected(category, capsys):
+    """Testa que uma edição baseada em versão antiga é recusada"""
+    # Arrange
+    with TransactionDAO() as dao:
+        transaction = dao.create_transaction(transaction_data(category.id))
+        read_version = transaction.version
+        dao.update_transaction({"id": transaction.id, "description": "Outro usuário"})
+
+    # Act
+    with TransactionDAO() as dao:
+        result = dao.update_transaction(
+            {"id": transaction.id, "description": "Eu", "version": read_version}
+        )
+        current = dao.get_transaction_by_id(transaction.id)
+
+    # Assert
+    assert result is None
+    assert current.description == "Outro usuário"
+    assert "Conflito de concorrência" in capsys.readouterr().out
+
+
+def test_concurrent_update_raises_conflict(category, capsys):
+    """Testa o conflito detectado pelo UPDATE ... WHERE version = ?"""
+    # Arrange: duas sessões carregam a mesma versão
+    with TransactionDAO() as dao:
+        transaction = dao.create_transaction(transaction_data(category.id))
+    first, second = TransactionDAO(), TransactionDAO()
+    loaded = [
+        dao.session.get(transaction_dao_module.Transaction, transaction.id)
+        for dao in (first, second)
+    ]
+
+    # Act
+    ok = first.update_transaction({"id": transaction.id, "description": "A"})
+    conflict = second.update_transaction({"id": transaction.id, "description": "B"})
+    first.close()
+    second.close()
+
+    # Assert
+    assert loaded[0] is not loaded[1]
+    assert ok is not None
+    assert conflict is None
+    assert "Conflito de concorrência" in capsys.readouterr().out
+
+
+# ==================== TESTES: linhas compactas ====================
+
+
+def test_transaction_rows_are_projected(category):
+    """Testa o modelo de leitura compacto (sem instâncias ORM)"""
+    # Arrange
+    with TransactionDAO() as dao:
+        old = dao.create_transaction(transaction_data(category.id))
+        new = dao.create_transaction(
+            transaction_data(
+                category.id, transaction_date=datetime.datetime(2024, 2, 1)
+            )
+        )
+        dao.delete_transaction(old.id)
+
+        # Act
+        rows = dao.get_transaction_rows(order=True)
+
+        # Assert
+        assert [row.id for row in rows] == [new.id]
+        assert rows[0].category_name == "Mercado"
+        assert isinstance(rows[0], TransactionRow)
+
+
+def test_row_changes_since_includes_tombstones(category):
+    """Testa que o delta em linhas compactas traz as exclusões"""
+    # Arrange
+    with TransactionDAO() as dao:
+        transaction_id = dao.create_transaction(transaction_data(category.id)).id
+        version = dao.current_version()
+        dao.delete_transaction(transaction_id)
+
+        # Act
+        changes = dao.row_changes_since(version)
+
+    # Assert
+    assert [(row.id, row.deleted) for row in changes] == [(transaction_id, True)]
+
+
+def test_late_commit_of_an_old_version_is_not_lost(
+    category, sqlite_session_factory, monkeypatch
+):
+    """
+    Testa que uma escrita que reservou a versão cedo e só confirma depois de
+    muitas escritas mais novas (generator do Firebird) ainda chega ao delta
+    """
+    # Arrange: um escritor reserva a versão e fica pendente
+    with sqlite_session_factory() as session:
+        late_version = versioning.next_version(session)
+        session.commit()
+    pending = [late_version - 1]
+    monkeypatch.setattr(
+        versioning, "settled_version", lambda session: min(pending, default=None)
+    )
+    with TransactionDAO() as dao:
+        for _ in range(150):
+            dao.create_transaction(transaction_data(category.id))
+        seen = dao.current_version()
+        newer = dao.row_changes_since(0)
+
+    # Act: o escritor confirma
+    with sqlite_session_factory() as session:
+        late = Transaction(
+            **transaction_data(category.id, description="Importada"),
+            version=late_version,
+        )
+        session.add(late)
+        session.commit()
+        late_id = late.id
+    pending.clear()
+    with TransactionDAO() as dao:
+        changes = dao.row_changes_since(seen)
+        current = dao.current_version()
+
+    # Assert
+    assert len(newer) == 150
+    assert seen == late_version - 1
+    assert late_id in [row.id for row in changes]
+    assert current == max(row.version for row in newer)
+
+
+# ==================== TESTES: ordenação e filtros ====================
+
+
+@pytest.fixture
+def ledger(category):
+    """Dez transações com datas e valores distintos"""
+    with CategoryDAO() as dao:
+        salary = dao.create_category("Salário")
+    with TransactionDAO() as dao:
+        for day in range(1, 11):
+            dao.create_transaction(
+                transaction_data(
+                    salary.id if day % 2 else category.id,
+                    description=f"Item {day}",
+                    transaction_date=datetime.datetime(2024, 1, day),
+                    transaction_value=float((day * 7) % 11),
+                    type="Receita" if day % 2 else "Despesa",
+                )
+            )
+
+
+def read_all_pages(dao, **kwargs):
+    rows, after = [], None
+    while page := dao.get_transaction_rows_sorted(after=after, limit=3, **kwargs):
+        rows.extend(page)
+        after = page[-1]
+    return rows
+
+
+def test_sorted_pages_follow_the_sort_key(ledger):
+    """Testa que as páginas por chave seguem a ordenação, sem repetir linhas"""
+    with TransactionDAO() as dao:
+        # Act
+        by_date = read_all_pages(dao)
+        by_value = read_all_pages(dao, sort="value", descending=False)
+        by_category = read_all_pages(dao, sort="category", descending=False)
+
+    # Assert
+    assert [row.transaction_date.day for row in by_date] == list(range(10, 0, -1))
+    values = [(row.transaction_value, row.id) for row in by_value]
+    assert values == sorted(values)
+    assert len({row.id for row in by_value}) == 10
+    names = [row.category_name for row in by_category]
+    assert names == ["Mercado"] * 5 + ["Salário"] * 5
+
+
+def test_sorted_pages_apply_filters(ledger):
+    """Testa que os filtros vão para o WHERE e batem com matches()"""
+    # Arrange
+    filters = TransactionFilters(
+        type="Receita",
+        start=datetime.datetime(2024, 1, 3),
+        end=datetime.datetime(2024, 1, 9),
+        min_value=1.0,
+    )
+
+    with TransactionDAO() as dao:
+        # Act
+        rows = read_all_pages(dao, filters=filters)
+        all_rows = dao.get_transaction_rows()
+
+    # Assert
+    assert [row.transaction_date.day for row in rows] == [7, 5, 3]
+    assert [row.id for row in all_rows if filters.matches(row)] == sorted(
+        row.id for row in rows
+    )
+
+
+def test_description_filter_ignores_case(ledger):
+    """Testa o filtro por trecho da descrição"""
+    with TransactionDAO() as dao:
+        # Act
+        rows = dao.get_transaction_rows_sorted(
+            filters=TransactionFilters(description="item 1")
+        )
+
+    # Assert
+    assert sorted(row.description for row in rows) == ["Item 1", "Item 10"]